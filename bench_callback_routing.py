@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк маршрутизации колбэков
+
+Сравнивает стоимость поиска хэндлера для callback_data по всему дереву роутеров:
+- линейный перебор фильтров F.data (как было до CallbackRouter);
+- поиск кандидатов через префиксное дерево CallbackRouter.
+
+Для каждого зарегистрированного маршрута генерируется подходящая callback_data,
+плюс несколько промахов. Сами хэндлеры не вызываются - измеряется только выбор.
+
+Запуск: python bench_callback_routing.py [количество_повторов]
+"""
+import asyncio
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Конфиг требует обязательные переменные; для бенчмарка БД и бот не нужны
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("ADMIN_TELEGRAM_ID", "0")
+
+from aiogram import F
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.types import CallbackQuery, User
+
+from bot.handlers import admin, user
+from bot.utils.callback_router import CallbackRoute, CallbackTrieObserver
+
+# Порядок как в bot/main.py
+ROOT_ROUTERS = [admin.router, user.router]
+
+MISSES = ["noop", "unknown_action_1", "lesson", "teacher_x"]
+
+
+def to_magic_filter(route: CallbackRoute):
+    """Эквивалентный фильтр F.data, каким он был до перехода на CallbackRoute"""
+    if route.is_exact:
+        return F.data == route.key
+    if route.pattern is not None:
+        magic = F.data.regexp(route.pattern.pattern)
+        for excluded in route.exclude_patterns:
+            magic = magic & ~F.data.regexp(excluded.pattern)
+        return magic
+    magic = F.data.startswith(route.key)
+    for excluded in route.exclude:
+        magic = magic & ~F.data.startswith(excluded)
+    return magic
+
+
+def sample_data(route: CallbackRoute) -> str:
+    """Пример callback_data, подходящий под маршрут"""
+    if route.is_exact:
+        return route.key
+    if route.pattern is None:
+        return f"{route.key}7"
+    return re.sub(r"\\d\+", "12", route.pattern.pattern).replace(".+", "x").strip("^$")
+
+
+def collect_observers():
+    """Все наблюдатели callback_query в порядке распространения события"""
+    observers = []
+    for root in ROOT_ROUTERS:
+        for router in root.chain_tail:
+            observers.append(router.callback_query)
+    return observers
+
+
+def build_linear_tables(observers):
+    """Копии хэндлеров с фильтрами F.data вместо CallbackRoute"""
+    tables = []
+    for observer in observers:
+        table = []
+        for handler in observer.handlers:
+            filters = []
+            for filter_object in handler.filters or []:
+                if isinstance(filter_object.callback, CallbackRoute):
+                    filters.append(FilterObject(callback=to_magic_filter(filter_object.callback)))
+                else:
+                    filters.append(filter_object)
+            table.append(HandlerObject(callback=handler.callback, filters=filters, flags=handler.flags))
+        tables.append(table)
+    return tables
+
+
+async def resolve_linear(tables, event):
+    checks = 0
+    for table in tables:
+        for handler in table:
+            checks += 1
+            result, _ = await handler.check(event)
+            if result:
+                return handler.callback, checks
+    return None, checks
+
+
+async def resolve_trie(observers, event):
+    checks = 0
+    for observer in observers:
+        for position in observer.candidates(event.data):
+            handler = observer.handlers[position]
+            checks += 1
+            result, _ = await handler.check(event)
+            if result:
+                return handler.callback, checks
+    return None, checks
+
+
+async def measure(resolver, source, events, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for event in events:
+            await resolver(source, event)
+    return (time.perf_counter() - started) / (repeats * len(events))
+
+
+async def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    observers = collect_observers()
+    if not all(isinstance(observer, CallbackTrieObserver) for observer in observers):
+        print("❌ Не все роутеры используют CallbackRouter")
+        sys.exit(1)
+
+    routes = [
+        filter_object.callback
+        for observer in observers
+        for handler in observer.handlers
+        for filter_object in handler.filters or []
+        if isinstance(filter_object.callback, CallbackRoute)
+    ]
+    samples = [sample_data(route) for route in routes] + MISSES
+
+    bench_user = User(id=1, is_bot=False, first_name="bench")
+    events = [
+        CallbackQuery(id=str(index), from_user=bench_user, chat_instance="bench", data=data)
+        for index, data in enumerate(samples)
+    ]
+
+    tables = build_linear_tables(observers)
+
+    # Проверяем, что оба способа выбирают один и тот же хэндлер
+    linear_checks = 0
+    trie_checks = 0
+    for event in events:
+        linear_callback, linear_count = await resolve_linear(tables, event)
+        trie_callback, trie_count = await resolve_trie(observers, event)
+        if linear_callback is not trie_callback:
+            print(f"❌ Расхождение маршрутизации для '{event.data}'")
+            sys.exit(1)
+        linear_checks += linear_count
+        trie_checks += trie_count
+
+    linear_time = await measure(resolve_linear, tables, events, repeats)
+    trie_time = await measure(resolve_trie, observers, events, repeats)
+
+    print("=" * 60)
+    print("Маршрутизация callback_query")
+    print("=" * 60)
+    print(f"Роутеров: {len(observers)}, маршрутов: {len(routes)}, колбэков в выборке: {len(events)}")
+    print(f"Проверок фильтров на колбэк: линейно {linear_checks / len(events):.1f}, "
+          f"дерево {trie_checks / len(events):.1f}")
+    print(f"Время выбора хэндлера: линейно {linear_time * 1e6:.1f} мкс, "
+          f"дерево {trie_time * 1e6:.1f} мкс (x{linear_time / trie_time:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
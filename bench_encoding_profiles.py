@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк профилей кодирования (MP3 и Opus для речи)
+
+Кодирует одну и ту же запись каждым профилем на нескольких битрейтах и
+сравнивает время кодирования, размер и сколько часов записи помещается
+в лимит Telegram (MAX_OUTPUT_SIZE_MB) одним файлом.
+
+Все варианты используют одинаковые измерения громкости (analyze_audio).
+Без файла генерируется синтетическая "речь": тон с гармониками и шумом,
+модулированный по слогам (4 Гц), с паузами каждые 10 секунд.
+
+Запуск: python bench_encoding_profiles.py [файл | минуты]
+Пример: python bench_encoding_profiles.py 30
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Конфиг требует обязательные переменные; для бенчмарка БД и бот не нужны
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("ADMIN_TELEGRAM_ID", "0")
+
+from bot.utils.audio_converter import (
+    MAX_OUTPUT_SIZE_BYTES,
+    MP3_PROFILE,
+    OPUS_SPEECH_PROFILE,
+    convert_to_mp3
+)
+from bot.utils.loudness import analyze_audio
+
+# (профиль, битрейт в kbps)
+VARIANTS = [
+    (MP3_PROFILE, 64),
+    (MP3_PROFILE, 48),
+    (OPUS_SPEECH_PROFILE, 32),
+    (OPUS_SPEECH_PROFILE, 24),
+]
+
+
+def generate_speech(path: str, minutes: int) -> None:
+    """Синтетическая речь: основной тон 140 Гц с гармониками, шум, слоги и паузы"""
+    duration = minutes * 60
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"sine=f=140:r=44100:d={duration}",
+        "-f", "lavfi", "-i", f"sine=f=280:r=44100:d={duration}",
+        "-f", "lavfi", "-i", f"anoisesrc=d={duration}:c=pink:a=0.1:r=44100",
+        "-filter_complex", (
+            "[0][1][2]amix=inputs=3,"
+            "lowpass=f=4000,"
+            "tremolo=f=4:d=0.8,"
+            "volume='if(lt(mod(t,10),8),1,0)':eval=frame"
+        ),
+        "-ac", "1",
+        "-y", path
+    ], check=True)
+
+
+async def main():
+    workdir = tempfile.mkdtemp(prefix="bench_profiles_")
+    source = sys.argv[1] if len(sys.argv) > 1 else "30"
+
+    if os.path.exists(source):
+        input_path = source
+    else:
+        input_path = os.path.join(workdir, "speech.wav")
+        print(f"Генерация записи на {source} мин...")
+        generate_speech(input_path, int(source))
+
+    analysis = await analyze_audio(input_path)
+    if analysis is None or analysis.duration <= 0:
+        print("❌ Не удалось проанализировать файл")
+        sys.exit(1)
+
+    print("=" * 72)
+    print(f"Профили кодирования: запись {analysis.duration // 60} мин")
+    print("=" * 72)
+    print(f"{'Профиль':<10}{'kbps':>6}{'Время, с':>11}{'Размер, МБ':>13}{'МБ/час':>9}{'Часов в лимите':>17}")
+
+    baseline_size = None
+    for profile, bitrate_kbps in VARIANTS:
+        output_path = os.path.join(workdir, f"{profile.name}_{bitrate_kbps}{profile.extension}")
+        started = time.perf_counter()
+        success, error = await convert_to_mp3(
+            input_path, output_path,
+            bitrate=f"{bitrate_kbps}k",
+            analysis=analysis,
+            profile=profile
+        )
+        elapsed = time.perf_counter() - started
+        if not success:
+            print(f"❌ {profile.name} {bitrate_kbps} kbps: {error}")
+            continue
+
+        size = os.path.getsize(output_path)
+        per_hour = size / analysis.duration * 3600
+        baseline_size = baseline_size or size
+        print(
+            f"{profile.title:<10}{bitrate_kbps:>6}{elapsed:>11.1f}{size / 1024 / 1024:>13.2f}"
+            f"{per_hour / 1024 / 1024:>9.1f}{MAX_OUTPUT_SIZE_BYTES / per_hour:>17.1f}"
+            f"   ({size / baseline_size:.0%} от MP3 64)"
+        )
+
+    print(f"\nФайлы: {workdir}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
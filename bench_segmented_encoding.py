@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк параллельного кодирования длинных записей
+
+Сравнивает время конвертации одной и той же записи:
+- целиком одним процессом FFmpeg (convert_to_mp3);
+- по частям, разрезанным по паузам (convert_to_mp3_segmented).
+
+Оба варианта используют одинаковые измерения громкости (analyze_audio).
+Без файла генерируется синтетическая "лекция": шум с паузами каждые 10 секунд.
+
+Запуск: python bench_segmented_encoding.py [файл | минуты] [сегментов]
+Пример: python bench_segmented_encoding.py 120 4
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Конфиг требует обязательные переменные; для бенчмарка БД и бот не нужны
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+os.environ.setdefault("DB_PASSWORD", "bench")
+os.environ.setdefault("ADMIN_TELEGRAM_ID", "0")
+
+SEGMENTS = int(sys.argv[2]) if len(sys.argv) > 2 else min(4, os.cpu_count() or 1)
+# Слотов пула столько же, сколько сегментов
+os.environ.setdefault("FFMPEG_MAX_CONCURRENT", str(SEGMENTS))
+
+from bot.utils.audio_converter import convert_to_mp3, convert_to_mp3_segmented, plan_segments
+from bot.utils.loudness import analyze_audio
+
+
+def generate_lecture(path: str, minutes: int) -> None:
+    """Синтетическая запись: 8 секунд шума, 2 секунды тишины"""
+    subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"anoisesrc=d={minutes * 60}:c=pink:a=0.3:r=44100",
+        "-af", "volume='if(lt(mod(t,10),8),1,0)':eval=frame",
+        "-ac", "2",
+        "-y", path
+    ], check=True)
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+async def main():
+    workdir = tempfile.mkdtemp(prefix="bench_segments_")
+    source = sys.argv[1] if len(sys.argv) > 1 else "60"
+
+    if os.path.exists(source):
+        input_path = source
+    else:
+        input_path = os.path.join(workdir, "lecture.wav")
+        print(f"Генерация записи на {source} мин...")
+        generate_lecture(input_path, int(source))
+
+    analysis, analysis_time = await timed(analyze_audio(input_path))
+    if analysis is None:
+        print("❌ Не удалось проанализировать файл")
+        sys.exit(1)
+
+    segments = plan_segments(analysis.duration, analysis.silences or [], SEGMENTS)
+    if not segments:
+        print("❌ Не удалось разбить запись по паузам (слишком короткая или без пауз)")
+        sys.exit(1)
+
+    single_path = os.path.join(workdir, "single.mp3")
+    segmented_path = os.path.join(workdir, "segmented.mp3")
+
+    (ok_single, error_single), single_time = await timed(
+        convert_to_mp3(input_path, single_path, analysis=analysis)
+    )
+    (ok_segmented, error_segmented), segmented_time = await timed(
+        convert_to_mp3_segmented(input_path, segmented_path, segments, analysis=analysis)
+    )
+
+    if not ok_single or not ok_segmented:
+        print(f"❌ Ошибка конвертации: {error_single or error_segmented}")
+        sys.exit(1)
+
+    single_check = await analyze_audio(single_path)
+    segmented_check = await analyze_audio(segmented_path)
+
+    print("=" * 60)
+    print("Конвертация длинной записи")
+    print("=" * 60)
+    print(f"Длительность: {analysis.duration // 60} мин, пауз: {len(analysis.silences or [])}, "
+          f"сегментов: {len(segments)}")
+    print(f"Анализ (громкость + паузы): {analysis_time:.1f} с")
+    print(f"Целиком:  {single_time:.1f} с, {os.path.getsize(single_path) / 1024 / 1024:.2f} МБ, "
+          f"{single_check.duration} с, I={single_check.input_i} LUFS")
+    print(f"По частям: {segmented_time:.1f} с, {os.path.getsize(segmented_path) / 1024 / 1024:.2f} МБ, "
+          f"{segmented_check.duration} с, I={segmented_check.input_i} LUFS")
+    print(f"Ускорение: x{single_time / segmented_time:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,19 @@
 """
 Административные обработчики - модульная структура
 """
-from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from bot.utils.decorators import admin_required
 from bot.utils.config import config
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 # Импорт роутеров из модулей
 from . import themes, authors, teachers, teachers_series, books, lessons, users, stats, series, tests, feedbacks
 
 # Главный роутер для админ-панели
-router = Router()
+router = CallbackRouter()
 
 # Включение всех подроутеров
 router.include_router(themes.router)
@@ -56,7 +56,7 @@ async def admin_panel(message: Message):
     )
 
 
-@router.callback_query(F.data == "admin_help")
+@router.callback_query(CallbackRoute.exact("admin_help"))
 @admin_required
 async def admin_help(callback: CallbackQuery):
     """Показать справку по работе с админ-панелью"""
@@ -190,7 +190,7 @@ async def admin_help(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin_panel")
+@router.callback_query(CallbackRoute.exact("admin_panel"))
 @admin_required
 async def admin_panel_callback(callback: CallbackQuery):
     """Вернуться в админ-панель через callback"""
@@ -1,7 +1,6 @@
 """
 Управление авторами книг
 """
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -16,8 +15,9 @@ from bot.services.database_service import (
     update_book_author,
     delete_book_author,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 class BookAuthorStates(StatesGroup):
@@ -26,7 +26,7 @@ class BookAuthorStates(StatesGroup):
     biography = State()
 
 
-@router.callback_query(F.data == "admin_authors")
+@router.callback_query(CallbackRoute.exact("admin_authors"))
 @admin_required
 async def admin_authors(callback: CallbackQuery):
     """Показать список авторов для управления"""
@@ -52,7 +52,7 @@ async def admin_authors(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "add_author")
+@router.callback_query(CallbackRoute.exact("add_author"))
 @admin_required
 async def add_author_start(callback: CallbackQuery, state: FSMContext):
     """Начать добавление нового автора"""
@@ -201,7 +201,7 @@ async def save_author_name(message: Message, state: FSMContext):
         await state.set_state(BookAuthorStates.biography)
 
 
-@router.callback_query(F.data == "skip_author_biography")
+@router.callback_query(CallbackRoute.exact("skip_author_biography"))
 @admin_required
 async def add_author_skip_biography(callback: CallbackQuery, state: FSMContext):
     """Пропустить биографию автора"""
@@ -371,7 +371,7 @@ async def save_author_biography(message: Message, state: FSMContext):
                 )
 
 
-@router.callback_query(F.data.regexp(r"^edit_author_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_author_\d+$"))
 @admin_required
 async def edit_author_menu(callback: CallbackQuery):
     """Показать меню редактирования автора"""
@@ -403,7 +403,7 @@ async def edit_author_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_author_name_"))
+@router.callback_query(CallbackRoute.prefix("edit_author_name_"))
 @admin_required
 async def edit_author_name_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение имени автора"""
@@ -430,7 +430,7 @@ async def edit_author_name_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_author_bio_"))
+@router.callback_query(CallbackRoute.prefix("edit_author_bio_"))
 @admin_required
 async def edit_author_bio_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение биографии автора"""
@@ -463,7 +463,7 @@ async def edit_author_bio_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("delete_author_bio_"))
+@router.callback_query(CallbackRoute.prefix("delete_author_bio_"))
 @admin_required
 async def delete_author_bio(callback: CallbackQuery, state: FSMContext):
     """Удалить биографию автора"""
@@ -504,7 +504,7 @@ async def delete_author_bio(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@router.callback_query(F.data.startswith("toggle_author_"))
+@router.callback_query(CallbackRoute.prefix("toggle_author_"))
 @admin_required
 async def toggle_author(callback: CallbackQuery):
     """Переключить статус автора"""
@@ -525,7 +525,7 @@ async def toggle_author(callback: CallbackQuery):
     await edit_author_menu(callback)
 
 
-@router.callback_query(F.data.startswith("delete_author_"))
+@router.callback_query(CallbackRoute.prefix("delete_author_"))
 @admin_required
 async def delete_author_confirm(callback: CallbackQuery):
     """Подтверждение удаления автора"""
@@ -561,7 +561,7 @@ async def delete_author_confirm(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_author_"))
+@router.callback_query(CallbackRoute.prefix("confirm_delete_author_"))
 @admin_required
 async def delete_author_confirmed(callback: CallbackQuery):
     """Удалить автора после подтверждения"""
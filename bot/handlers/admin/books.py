@@ -3,7 +3,6 @@
 """
 import logging
 
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -20,10 +19,11 @@ from bot.services.database_service import (
     get_all_book_authors,
     regenerate_book_lessons_titles,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 class BookStates(StatesGroup):
@@ -34,7 +34,7 @@ class BookStates(StatesGroup):
     author_id = State()
 
 
-@router.callback_query(F.data == "admin_books")
+@router.callback_query(CallbackRoute.exact("admin_books"))
 @admin_required
 async def admin_books(callback: CallbackQuery):
     """Показать список книг для управления"""
@@ -60,7 +60,7 @@ async def admin_books(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "add_book")
+@router.callback_query(CallbackRoute.exact("add_book"))
 @admin_required
 async def add_book_start(callback: CallbackQuery, state: FSMContext):
     """Начать добавление новой книги"""
@@ -226,7 +226,7 @@ async def add_book_name(message: Message, state: FSMContext):
         await state.set_state(BookStates.description)
 
 
-@router.callback_query(F.data == "skip_book_description")
+@router.callback_query(CallbackRoute.exact("skip_book_description"))
 @admin_required
 async def add_book_skip_description(callback: CallbackQuery, state: FSMContext):
     """Пропустить описание книги"""
@@ -360,7 +360,7 @@ async def add_book_description(message: Message, state: FSMContext):
         await state.set_state(BookStates.theme_id)
 
 
-@router.callback_query(F.data == "skip_book_theme")
+@router.callback_query(CallbackRoute.exact("skip_book_theme"))
 @admin_required
 async def skip_book_theme(callback: CallbackQuery, state: FSMContext):
     """Пропустить выбор темы"""
@@ -385,7 +385,7 @@ async def skip_book_theme(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^select_theme_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^select_theme_\d+$"))
 @admin_required
 async def select_theme_for_book(callback: CallbackQuery, state: FSMContext):
     """Выбрать тему для книги"""
@@ -411,7 +411,7 @@ async def select_theme_for_book(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "skip_book_author")
+@router.callback_query(CallbackRoute.exact("skip_book_author"))
 @admin_required
 async def skip_book_author(callback: CallbackQuery, state: FSMContext):
     """Пропустить выбор автора"""
@@ -468,7 +468,7 @@ async def skip_book_author(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^select_author_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^select_author_\d+$"))
 @admin_required
 async def select_author_for_book(callback: CallbackQuery, state: FSMContext):
     """Выбрать автора для книги"""
@@ -526,7 +526,7 @@ async def select_author_for_book(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_book_name_"))
+@router.callback_query(CallbackRoute.prefix("edit_book_name_"))
 @admin_required
 async def edit_book_name_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование названия книги"""
@@ -547,7 +547,7 @@ async def edit_book_name_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_book_description_"))
+@router.callback_query(CallbackRoute.prefix("edit_book_description_"))
 @admin_required
 async def edit_book_description_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование описания книги"""
@@ -568,7 +568,7 @@ async def edit_book_description_start(callback: CallbackQuery, state: FSMContext
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_book_theme_"))
+@router.callback_query(CallbackRoute.prefix("edit_book_theme_"))
 @admin_required
 async def edit_book_theme_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение темы книги"""
@@ -591,7 +591,7 @@ async def edit_book_theme_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^update_book_theme_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^update_book_theme_\d+_\d+$"))
 @admin_required
 async def update_book_theme(callback: CallbackQuery):
     """Обновить тему книги и всех её уроков"""
@@ -616,7 +616,7 @@ async def update_book_theme(callback: CallbackQuery):
     await edit_book_menu(callback)
 
 
-@router.callback_query(F.data.regexp(r"^update_book_theme_\d+_none$"))
+@router.callback_query(CallbackRoute.regexp(r"^update_book_theme_\d+_none$"))
 @admin_required
 async def update_book_theme_none(callback: CallbackQuery):
     """Убрать тему у книги"""
@@ -640,7 +640,7 @@ async def update_book_theme_none(callback: CallbackQuery):
     await edit_book_menu(callback)
 
 
-@router.callback_query(F.data.startswith("edit_book_author_"))
+@router.callback_query(CallbackRoute.prefix("edit_book_author_"))
 @admin_required
 async def edit_book_author_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение автора книги"""
@@ -663,7 +663,7 @@ async def edit_book_author_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^update_book_author_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^update_book_author_\d+_\d+$"))
 @admin_required
 async def update_book_author(callback: CallbackQuery):
     """Обновить автора книги"""
@@ -682,7 +682,7 @@ async def update_book_author(callback: CallbackQuery):
     await edit_book_menu(callback)
 
 
-@router.callback_query(F.data.regexp(r"^update_book_author_\d+_none$"))
+@router.callback_query(CallbackRoute.regexp(r"^update_book_author_\d+_none$"))
 @admin_required
 async def update_book_author_none(callback: CallbackQuery):
     """Убрать автора у книги"""
@@ -700,7 +700,7 @@ async def update_book_author_none(callback: CallbackQuery):
     await edit_book_menu(callback)
 
 
-@router.callback_query(F.data.startswith("toggle_book_"))
+@router.callback_query(CallbackRoute.prefix("toggle_book_"))
 @admin_required
 async def toggle_book_status(callback: CallbackQuery):
     """Переключить статус активности книги"""
@@ -721,7 +721,7 @@ async def toggle_book_status(callback: CallbackQuery):
     await edit_book_menu(callback)
 
 
-@router.callback_query(F.data.startswith("delete_book_"))
+@router.callback_query(CallbackRoute.prefix("delete_book_"))
 @admin_required
 async def delete_book_confirm(callback: CallbackQuery):
     """Подтверждение удаления книги"""
@@ -753,7 +753,7 @@ async def delete_book_confirm(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_book_"))
+@router.callback_query(CallbackRoute.prefix("confirm_delete_book_"))
 @admin_required
 async def delete_book_confirmed(callback: CallbackQuery):
     """Удалить книгу после подтверждения"""
@@ -777,7 +777,7 @@ async def delete_book_confirmed(callback: CallbackQuery):
 
 
 # ВАЖНО: Этот обработчик должен быть ПОСЛЕДНИМ среди всех edit_book_* обработчиков
-@router.callback_query(F.data.regexp(r"^edit_book_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_book_\d+$"))
 @admin_required
 async def edit_book_menu(callback: CallbackQuery):
     """Показать меню редактирования книги"""
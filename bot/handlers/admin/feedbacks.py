@@ -1,4 +1,3 @@
-from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 
@@ -12,13 +11,14 @@ from bot.services.database_service import (
     delete_feedback
 )
 from bot.utils.decorators import admin_required
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 import logging
 
-router = Router()
+router = CallbackRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.callback_query(F.data == "admin_feedbacks")
+@router.callback_query(CallbackRoute.exact("admin_feedbacks"))
 @admin_required
 async def show_feedbacks_menu(callback: CallbackQuery, state: FSMContext):
     """Главное меню обращений для админа"""
@@ -51,7 +51,7 @@ async def show_feedbacks_menu(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedbacks_filter_"))
+@router.callback_query(CallbackRoute.prefix("feedbacks_filter_"))
 @admin_required
 async def show_feedbacks_list(callback: CallbackQuery, state: FSMContext):
     """Показать список обращений по фильтру"""
@@ -109,7 +109,7 @@ async def show_feedbacks_list(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedback_view_"))
+@router.callback_query(CallbackRoute.prefix("feedback_view_"))
 @admin_required
 async def view_feedback_details(callback: CallbackQuery, state: FSMContext):
     """Просмотр деталей обращения (для админа)"""
@@ -165,7 +165,7 @@ async def view_feedback_details(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedback_reply_"))
+@router.callback_query(CallbackRoute.prefix("feedback_reply_"))
 @admin_required
 async def start_reply(callback: CallbackQuery, state: FSMContext):
     """Начать ввод ответа на обращение"""
@@ -300,7 +300,7 @@ async def save_reply(message: Message, state: FSMContext):
         await state.clear()
 
 
-@router.callback_query(F.data.startswith("feedback_close_") & ~F.data.startswith("feedback_close_confirm_"))
+@router.callback_query(CallbackRoute.prefix("feedback_close_", exclude=("feedback_close_confirm_",)))
 @admin_required
 async def close_feedback_confirm(callback: CallbackQuery, state: FSMContext):
     """Подтверждение закрытия обращения"""
@@ -328,7 +328,7 @@ async def close_feedback_confirm(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedback_close_confirm_"))
+@router.callback_query(CallbackRoute.prefix("feedback_close_confirm_"))
 @admin_required
 async def close_feedback_execute(callback: CallbackQuery, state: FSMContext):
     """Выполнение закрытия обращения"""
@@ -350,7 +350,7 @@ async def close_feedback_execute(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedback_delete_") & ~F.data.startswith("feedback_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("feedback_delete_", exclude=("feedback_delete_confirm_",)))
 @admin_required
 async def delete_feedback_confirm(callback: CallbackQuery, state: FSMContext):
     """Подтверждение удаления обращения"""
@@ -378,7 +378,7 @@ async def delete_feedback_confirm(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("feedback_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("feedback_delete_confirm_"))
 @admin_required
 async def delete_feedback_execute(callback: CallbackQuery, state: FSMContext):
     """Выполнение удаления обращения"""
@@ -4,15 +4,24 @@
 import os
 import re
 import logging
+from typing import Optional
 
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from bot.utils.decorators import admin_required
-from bot.utils.audio_converter import convert_to_mp3_auto, get_audio_duration
+from bot.utils.audio_converter import (
+    ENCODING_PROFILES,
+    EncodingProfile,
+    get_encoding_profile,
+    max_duration_seconds,
+    profile_for_path
+)
+from bot.utils.audio_store import audio_store, convert_and_store, download_telegram_file
+from bot.utils.handoff import handoff_store, parse_handoff_code
+from bot.utils.media_probe import probe
 from bot.utils.formatters import format_duration, format_file_size
 from bot.utils.config import config
 from bot.services.database_service import (
@@ -30,16 +39,22 @@ from bot.services.database_service import (
     get_series_by_id,
     check_lesson_number_exists,
     regenerate_lesson_title,
+    get_lesson_parts,
+    replace_lesson_parts,
+    get_referenced_audio_paths,
+    update_lesson_telegram_file_id,
+    update_lesson_part_telegram_file_id,
 )
 from bot.models.lesson import Lesson
 from bot.models.book import Book
 from bot.models.database import async_session_maker
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload, joinedload
 
 logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 class LessonStates(StatesGroup):
@@ -68,7 +83,130 @@ async def _get_teacher_name(teacher_id: int) -> str:
     return teacher.name if teacher else "Преподаватель"
 
 
-@router.callback_query(F.data == "admin_lessons")
+def _upload_profile(message: Message) -> EncodingProfile:
+    """Профиль кодирования загрузки: хэштег в подписи к файлу (#opus, #mp3) или настройка по умолчанию"""
+    for tag in re.findall(r"#(\w+)", message.caption or ""):
+        profile = ENCODING_PROFILES.get(tag.lower())
+        if profile:
+            return profile
+    return get_encoding_profile()
+
+
+def _upload_processing_hint() -> str:
+    """Описание обработки загрузки по профилю по умолчанию и настройке деления длинных уроков"""
+    profile = get_encoding_profile()
+    single_minutes = max_duration_seconds(profile.preferred_kbps) // 60
+    if config.audio_split_long_lessons:
+        split_minutes = max_duration_seconds(min(profile.preferred_kbps, profile.quality_min_kbps)) // 60
+        length_line = (
+            f"💡 До {single_minutes} минут в {profile.title} {profile.preferred_kbps} kbps, "
+            f"больше {split_minutes} минут - делится на части\n"
+        )
+    else:
+        length_line = (
+            f"💡 До {single_minutes} минут в {profile.title} {profile.preferred_kbps} kbps, "
+            f"длиннее - с пониженным битрейтом\n"
+        )
+    return (
+        f"✓ Конвертация в {profile.title}\n"
+        "✓ Нормализация громкости\n"
+        f"✓ Оптимизация битрейта ({profile.min_kbps}-{profile.preferred_kbps} kbps)\n\n"
+        "📏 <b>Макс. размер: 20 МБ</b>\n"
+        f"{length_line}"
+    )
+
+
+async def _release_audio_files(paths: list) -> None:
+    """Удалить с диска файлы, на которые больше не ссылается ни один урок (файлы хранилища общие)"""
+    paths = [path for path in dict.fromkeys(paths) if path]
+    referenced = await get_referenced_audio_paths(paths)
+    for path in paths:
+        if path in referenced or not os.path.exists(path):
+            continue
+        try:
+            os.remove(path)
+            logger.info(f"Удалён аудиофайл: {path}")
+        except Exception as e:
+            logger.error(f"Ошибка при удалении файла {path}: {e}")
+
+
+async def _receive_handoff(message: Message, code: str, cancel_callback: str):
+    """
+    Готовый файл из веб-конвертера по коду: переносится в хранилище без скачивания и конвертации
+
+    Returns:
+        (processing_msg, [путь в хранилище], битрейт) или None, если код не подошёл
+        (состояние не сбрасывается - можно отправить другой код или файл)
+    """
+    processing_msg = await message.answer("⏳ Получение файла из веб-конвертера...")
+    cancel_markup = InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="🔙 Отмена", callback_data=cancel_callback)
+    ]])
+
+    handoff = handoff_store.claim(code)
+    if handoff is None:
+        await processing_msg.edit_text(
+            "❌ Код не найден, уже использован или истёк\n\n"
+            "Получите новый код в веб-конвертере или отправьте аудиофайл",
+            reply_markup=cancel_markup
+        )
+        return None
+
+    try:
+        stored_path = await audio_store.put(handoff_store.path(handoff))
+    except OSError as e:
+        logger.error(f"Не удалось забрать файл по коду {handoff.display_code}: {e}")
+        await processing_msg.edit_text(
+            f"❌ Ошибка при получении файла: {str(e)}",
+            reply_markup=cancel_markup
+        )
+        return None
+
+    logger.info(f"Файл из веб-конвертера получен по коду {handoff.display_code}: {handoff.title} -> {stored_path}")
+    return processing_msg, [stored_path], handoff.bitrate_kbps
+
+
+async def _preload_lesson_file_ids(bot, chat_id: int, lesson: Lesson, lesson_parts: list, title: str) -> None:
+    """
+    Предзагрузка file_id: аудио (или каждая часть) отправляется админу для
+    кэширования в Telegram, служебные сообщения сразу удаляются
+    """
+    from aiogram.types import FSInputFile
+
+    for part in lesson_parts or [None]:
+        try:
+            audio_path = part.audio_path if part else lesson.audio_path
+            if profile_for_path(audio_path).send_as_voice:
+                cache_msg = await bot.send_voice(chat_id=chat_id, voice=FSInputFile(audio_path))
+                media = cache_msg.voice
+            else:
+                cache_msg = await bot.send_audio(
+                    chat_id=chat_id,
+                    audio=FSInputFile(audio_path),
+                    title=part.display_title(title) if part else title
+                )
+                media = cache_msg.audio
+
+            # Сохраняем file_id (у урока - file_id первой части)
+            if media:
+                file_id = media.file_id
+                if part:
+                    await update_lesson_part_telegram_file_id(part.id, file_id)
+                if part is None or part.part_number == 1:
+                    lesson.telegram_file_id = file_id
+                    await update_lesson_telegram_file_id(lesson.id, file_id)
+                logger.info(f"File_id сохранен для урока {lesson.id}" + (f", часть {part.part_number}" if part else ""))
+
+            # Удаляем служебное сообщение
+            try:
+                await cache_msg.delete()
+            except:
+                pass
+        except Exception as e:
+            logger.warning(f"Не удалось предзагрузить file_id: {e}")
+
+
+@router.callback_query(CallbackRoute.exact("admin_lessons"))
 @admin_required
 async def admin_lessons(callback: CallbackQuery):
     """Показать список преподавателей для управления уроками"""
@@ -96,7 +234,7 @@ async def admin_lessons(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("lessons_teacher_"))
+@router.callback_query(CallbackRoute.prefix("lessons_teacher_"))
 @admin_required
 async def show_teacher_series(callback: CallbackQuery):
     """Показать все серии выбранного преподавателя"""
@@ -151,7 +289,7 @@ async def show_teacher_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^lessons_no_theme_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^lessons_no_theme_\d+$"))
 @admin_required
 async def show_lessons_without_theme(callback: CallbackQuery):
     """Показать уроки без темы (effective_theme_id == None)"""
@@ -223,7 +361,7 @@ async def show_lessons_without_theme(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("lessons_no_theme_no_book_"))
+@router.callback_query(CallbackRoute.prefix("lessons_no_theme_no_book_"))
 @admin_required
 async def show_no_theme_no_book_lessons(callback: CallbackQuery):
     """Показать уроки без темы и без книги"""
@@ -305,7 +443,7 @@ async def show_no_theme_no_book_lessons(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("lessons_no_theme_book_"))
+@router.callback_query(CallbackRoute.prefix("lessons_no_theme_book_"))
 @admin_required
 async def show_no_theme_book_series(callback: CallbackQuery):
     """Показать серии уроков для книги без темы"""
@@ -390,7 +528,7 @@ async def show_no_theme_book_series(callback: CallbackQuery):
 
 
 
-@router.callback_query(F.data.regexp(r"^lessons_theme_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^lessons_theme_\d+_\d+$"))
 @admin_required
 async def show_theme_books(callback: CallbackQuery):
     """Показать книги в выбранной теме для данного преподавателя"""
@@ -486,7 +624,7 @@ async def show_theme_books(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("lessons_theme_no_book_"))
+@router.callback_query(CallbackRoute.prefix("lessons_theme_no_book_"))
 @admin_required
 async def show_theme_lessons_without_book(callback: CallbackQuery):
     """Показать уроки без книги в рамках конкретной темы"""
@@ -589,7 +727,7 @@ async def show_theme_lessons_without_book(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^lessons_book_\d+_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^lessons_book_\d+_\d+_\d+$"))
 @admin_required
 async def show_book_series(callback: CallbackQuery):
     """Показать серии уроков для выбранной книги"""
@@ -676,7 +814,7 @@ async def show_book_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("lessons_series_id_"))
+@router.callback_query(CallbackRoute.prefix("lessons_series_id_"))
 @admin_required
 async def show_series_lessons_by_id(callback: CallbackQuery):
     """Показать уроки в выбранной серии по series_id"""
@@ -779,7 +917,7 @@ async def show_series_lessons_by_id(callback: CallbackQuery):
 
 
 
-@router.callback_query(F.data.startswith("add_lesson_series_"))
+@router.callback_query(CallbackRoute.prefix("add_lesson_series_"))
 @admin_required
 async def add_lesson_with_series(callback: CallbackQuery, state: FSMContext):
     """Начать добавление нового урока для выбранной серии"""
@@ -813,7 +951,7 @@ async def add_lesson_with_series(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "skip_lesson_description")
+@router.callback_query(CallbackRoute.exact("skip_lesson_description"))
 @admin_required
 async def add_lesson_skip_description(callback: CallbackQuery, state: FSMContext):
     """Пропустить описание урока"""
@@ -925,7 +1063,7 @@ async def add_lesson_number(message: Message, state: FSMContext):
         )
 
 
-@router.callback_query(F.data == "skip_lesson_tags")
+@router.callback_query(CallbackRoute.exact("skip_lesson_tags"))
 @admin_required
 async def add_lesson_skip_tags(callback: CallbackQuery, state: FSMContext):
     """Пропустить теги урока"""
@@ -939,12 +1077,10 @@ async def add_lesson_skip_tags(callback: CallbackQuery, state: FSMContext):
         "📁 Отправьте аудиофайл урока\n\n"
         "📋 <b>Поддерживаемые форматы:</b> MP3, WAV, FLAC, M4A, OGG, AAC, WMA\n\n"
         "ℹ️ <b>Автоматическая обработка:</b>\n"
-        "✓ Конвертация в MP3\n"
-        "✓ Нормализация громкости\n"
-        "✓ Оптимизация битрейта (16-64 kbps)\n\n"
-        "📏 <b>Макс. размер: 20 МБ</b>\n"
-        "💡 До 40 минут в MP3 64kbps\n\n"
-        f"🌐 <b>Для файлов до 2 ГБ:</b> {config.web_converter_url}",
+        f"{_upload_processing_hint()}"
+        "💬 Подпись #opus или #mp3 к файлу - выбрать формат\n\n"
+        f"🌐 <b>Для файлов до 2 ГБ:</b> {config.web_converter_url}\n"
+        "🔑 После конвертации отправьте сюда код из веб-конвертера вместо файла",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Отмена", callback_data=f"lessons_series_id_{series_id}")]])
     )
     await state.set_state(LessonStates.audio_file)
@@ -974,12 +1110,10 @@ async def add_lesson_tags(message: Message, state: FSMContext):
              "📁 Отправьте аудиофайл урока\n\n"
              "📋 <b>Поддерживаемые форматы:</b> MP3, WAV, FLAC, M4A, OGG, AAC, WMA\n\n"
              "ℹ️ <b>Автоматическая обработка:</b>\n"
-             "✓ Конвертация в MP3\n"
-             "✓ Нормализация громкости\n"
-             "✓ Оптимизация битрейта (16-64 kbps)\n\n"
-             "📏 <b>Макс. размер: 20 МБ</b>\n"
-             "💡 До 40 минут в MP3 64kbps\n\n"
-             f"🌐 <b>Для файлов до 2 ГБ:</b> {config.web_converter_url}",
+             f"{_upload_processing_hint()}"
+             "💬 Подпись #opus или #mp3 к файлу - выбрать формат\n\n"
+             f"🌐 <b>Для файлов до 2 ГБ:</b> {config.web_converter_url}\n"
+             "🔑 После конвертации отправьте сюда код из веб-конвертера вместо файла",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Отмена", callback_data=f"lessons_series_id_{series_id}")]])
     )
     await state.set_state(LessonStates.audio_file)
@@ -991,6 +1125,18 @@ async def add_lesson_audio(message: Message, state: FSMContext):
     """Сохранить аудиофайл урока с автоматической конвертацией через FFmpeg"""
     data = await state.get_data()
 
+    # Код из веб-конвертера вместо файла: готовый MP3 уже на диске
+    code = parse_handoff_code(message.text)
+    if code:
+        received = await _receive_handoff(message, code, "admin_lessons")
+        if received:
+            processing_msg, converted_paths, used_bitrate = received
+            await _finish_add_lesson(
+                message, state, data, processing_msg,
+                converted_paths, used_bitrate, get_encoding_profile("mp3"), None
+            )
+        return
+
     # Определяем тип медиа и получаем файл
     audio_file = None
     file_ext = None
@@ -1040,10 +1186,19 @@ async def add_lesson_audio(message: Message, state: FSMContext):
     # Показываем сообщение о начале обработки
     processing_msg = await message.answer("⏳ Скачивание аудио файла...")
 
-    # Скачиваем аудиофайл
+    # Создаём директории для аудио
+    original_dir = "bot/audio_files/original"
+    converted_dir = "bot/audio_files/converted"
+    os.makedirs(original_dir, exist_ok=True)
+    os.makedirs(converted_dir, exist_ok=True)
+
+    # Скачиваем оригинальный файл сразу на диск (по частям, с подсчётом хеша)
+    original_path = os.path.join(original_dir, f"{audio_file.file_unique_id}.{file_ext}")
     try:
         file_info = await message.bot.get_file(audio_file.file_id)
-        downloaded_file = await message.bot.download_file(file_info.file_path)
+        source_hash, _ = await download_telegram_file(
+            message.bot, file_info.file_path, original_path, config.max_audio_size_bytes
+        )
     except Exception as e:
         await processing_msg.edit_text(
             f"❌ Ошибка при скачивании файла: {str(e)}\n\n"
@@ -1055,17 +1210,6 @@ async def add_lesson_audio(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # Создаём директории для аудио
-    original_dir = "bot/audio_files/original"
-    converted_dir = "bot/audio_files/converted"
-    os.makedirs(original_dir, exist_ok=True)
-    os.makedirs(converted_dir, exist_ok=True)
-
-    # Сохраняем оригинальный файл
-    original_path = os.path.join(original_dir, f"{audio_file.file_unique_id}.{file_ext}")
-    with open(original_path, "wb") as f:
-        f.write(downloaded_file.getvalue())
-
     logger.info(f"Оригинальный файл сохранён: {original_path}")
 
     # Обновляем сообщение о процессе
@@ -1083,12 +1227,16 @@ async def add_lesson_audio(message: Message, state: FSMContext):
         f"Пожалуйста, подождите..."
     )
 
-    # Конвертируем в MP3 с автоматическим подбором битрейта
-    converted_path = os.path.join(converted_dir, f"{audio_file.file_unique_id}.mp3")
-    success, error, used_bitrate = await convert_to_mp3_auto(
+    # Конвертируем по профилю с автоматическим подбором битрейта
+    # (слишком длинная запись делится на части вместо снижения битрейта)
+    # Тот же исходник уже загружался - файлы из хранилища переиспользуются без конвертации
+    profile = _upload_profile(message)
+    converted_path = os.path.join(converted_dir, f"{audio_file.file_unique_id}{profile.extension}")
+    success, error, converted_paths, used_bitrate = await convert_and_store(
         original_path,
+        source_hash,
         converted_path,
-        preferred_bitrate=64  # Предпочтительный битрейт для хорошего качества
+        profile=profile
     )
 
     if not success:
@@ -1108,15 +1256,35 @@ async def add_lesson_audio(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # Получаем длительность автоматически
-    duration_seconds = await get_audio_duration(converted_path)
+    await _finish_add_lesson(
+        message, state, data, processing_msg,
+        converted_paths, used_bitrate, profile, original_path
+    )
+
+
+async def _finish_add_lesson(
+    message: Message,
+    state: FSMContext,
+    data: dict,
+    processing_msg: Message,
+    converted_paths: list,
+    used_bitrate: int,
+    profile: EncodingProfile,
+    original_path: Optional[str]
+) -> None:
+    """Создание урока из готовых файлов хранилища (загрузка в бота или код веб-конвертера)"""
+    # Получаем длительность автоматически (по каждой части)
+    part_durations = []
+    for path in converted_paths:
+        converted_info = await probe(path)
+        part_durations.append(converted_info.duration if converted_info else 0)
+    duration_seconds = sum(part_durations)
 
     if not duration_seconds:
-        logger.warning(f"Не удалось определить длительность для {converted_path}")
+        logger.warning(f"Не удалось определить длительность для {converted_paths[0]}")
         duration_seconds = 0
 
-    # Создаём красивое имя файла на основе данных урока
-    # Получаем данные для имени файла и названия урока
+    # Получаем данные для названия урока
     teacher = await get_lesson_teacher_by_id(data["teacher_id"]) if data.get("teacher_id") else None
     book = await get_book_by_id(data["book_id"]) if data.get("book_id") else None
     series = await get_series_by_id(data["series_id"]) if data.get("series_id") else None
@@ -1130,45 +1298,15 @@ async def add_lesson_audio(message: Message, state: FSMContext):
         lesson_number=data.get("lesson_number", 0)
     )
 
-    # Функция для очистки имени файла от недопустимых символов
-    def sanitize_filename(name):
-        """Удаляет недопустимые символы из имени файла"""
-        if not name:
-            return "unnamed"
-        # Заменяем недопустимые символы на подчёркивание
-        name = re.sub(r'[<>:"/\\|?*]', '_', name)
-        # Убираем множественные пробелы и подчёркивания
-        name = re.sub(r'[\s_]+', '_', name)
-        # Ограничиваем длину
-        return name[:50]
-
-    # Формируем имя файла
-    parts = []
-    if teacher:
-        parts.append(sanitize_filename(teacher.name))
-    if book:
-        parts.append(sanitize_filename(book.name))
-    if series:
-        parts.append(f"{series.year}")
-        parts.append(sanitize_filename(series.name))
-    if data.get('lesson_number'):
-        parts.append(f"урок_{data['lesson_number']}")
-
-    new_filename = "_".join(parts) + ".mp3"
-    new_converted_path = os.path.join(converted_dir, new_filename)
-
-    # Переименовываем файл
-    if os.path.exists(converted_path):
-        os.rename(converted_path, new_converted_path)
-        logger.info(f"Файл переименован: {converted_path} -> {new_converted_path}")
-        converted_path = new_converted_path
+    # Файлы лежат в хранилище под хешем содержимого, название урока - в БД
+    converted_path = converted_paths[0]
 
     # Создаём урок в базе
     try:
         lesson = await create_lesson(
             title=auto_generated_title,  # Автоматически сгенерированное название
             description=data.get("description", ""),
-            audio_file_path=converted_path,  # Путь к MP3 с нормальным именем
+            audio_file_path=converted_path,  # Путь к файлу в хранилище
             duration_seconds=duration_seconds,  # Автоматически определённая длительность
             lesson_number=data["lesson_number"],
             book_id=data.get("book_id"),
@@ -1179,6 +1317,12 @@ async def add_lesson_audio(message: Message, state: FSMContext):
             series_id=data.get("series_id")  # Используем только series_id
         )
 
+        # Длинный урок - сохраняем части
+        lesson_parts = []
+        if len(converted_paths) > 1:
+            await replace_lesson_parts(lesson.id, list(zip(converted_paths, part_durations)))
+            lesson_parts = await get_lesson_parts(lesson.id)
+
         # Удаляем сообщение о обработке
         try:
             await processing_msg.delete()
@@ -1194,32 +1338,12 @@ async def add_lesson_audio(message: Message, state: FSMContext):
         logger.info(f"Урок создан: {lesson.id} - {lesson.title}, длительность: {duration_seconds}с")
 
         # Предзагрузка file_id: отправляем аудио админу для кэширования в Telegram
-        try:
-            from aiogram.types import FSInputFile
-            audio_for_cache = FSInputFile(converted_path)
-            cache_msg = await message.bot.send_audio(
-                chat_id=message.chat.id,
-                audio=audio_for_cache,
-                title=auto_generated_title
-            )
-
-            # Сохраняем file_id
-            if cache_msg.audio:
-                lesson.telegram_file_id = cache_msg.audio.file_id
-                await update_lesson(lesson)
-                logger.info(f"File_id сохранен для урока {lesson.id}")
-
-            # Удаляем служебное сообщение
-            try:
-                await cache_msg.delete()
-            except:
-                pass
-        except Exception as e:
-            logger.warning(f"Не удалось предзагрузить file_id: {e}")
+        await _preload_lesson_file_ids(message.bot, message.chat.id, lesson, lesson_parts, auto_generated_title)
 
         # Показываем окно успеха с кнопкой OK (Single-Window Pattern)
         series_id = data.get("series_id")
-        mp3_size = os.path.getsize(converted_path)
+        audio_size = sum(os.path.getsize(path) for path in converted_paths)
+        parts_line = f"🧩 Частей: {len(converted_paths)}\n" if len(converted_paths) > 1 else ""
 
         await message.bot.edit_message_text(
             chat_id=data['create_chat_id'],
@@ -1228,8 +1352,9 @@ async def add_lesson_audio(message: Message, state: FSMContext):
                  f"📝 Название: {lesson.title}\n"
                  f"🔢 Номер: {lesson.lesson_number}\n"
                  f"⏱ Длительность: {format_duration(duration_seconds)}\n"
-                 f"🎵 Битрейт: {used_bitrate} kbps\n"
-                 f"💾 Размер: {format_file_size(mp3_size)}",
+                 f"🎵 Формат: {profile.title}, {used_bitrate} kbps\n"
+                 f"{parts_line}"
+                 f"💾 Размер: {format_file_size(audio_size)}",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
                 InlineKeyboardButton(text="✅ OK", callback_data=f"admin_lesson_created_ok_{series_id}")
             ]])
@@ -1256,16 +1381,15 @@ async def add_lesson_audio(message: Message, state: FSMContext):
                 InlineKeyboardButton(text="🔙 Назад", callback_data=f"lessons_series_id_{series_id}" if series_id else "admin_lessons")
             ]])
         )
-        # Удаляем файлы при ошибке
-        if os.path.exists(original_path):
+        # Удаляем файлы при ошибке (общие файлы хранилища остаются)
+        if original_path and os.path.exists(original_path):
             os.remove(original_path)
-        if os.path.exists(converted_path):
-            os.remove(converted_path)
+        await _release_audio_files(converted_paths)
         await state.clear()
 
 
 # Хэндлер для кнопки OK после создания урока
-@router.callback_query(F.data.startswith("admin_lesson_created_ok_"))
+@router.callback_query(CallbackRoute.prefix("admin_lesson_created_ok_"))
 @admin_required
 async def lesson_created_ok_handler(callback: CallbackQuery):
     """Вернуться к списку уроков серии после создания"""
@@ -1347,7 +1471,7 @@ def build_lesson_info_and_menu(lesson) -> tuple[str, InlineKeyboardMarkup]:
     return info, builder.as_markup()
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_\d+$"))
 @admin_required
 async def edit_lesson_menu(callback: CallbackQuery):
     """Показать меню редактирования урока"""
@@ -1372,7 +1496,7 @@ async def edit_lesson_menu(callback: CallbackQuery):
 
 # === Обработчики редактирования полей урока ===
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_number_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_number_\d+$"))
 @admin_required
 async def edit_lesson_number_handler(callback: CallbackQuery, state: FSMContext):
     """Изменить номер урока"""
@@ -1482,7 +1606,7 @@ async def save_edited_lesson_number(message: Message, state: FSMContext):
         )
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_description_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_description_\d+$"))
 @admin_required
 async def edit_lesson_description_handler(callback: CallbackQuery, state: FSMContext):
     """Изменить описание урока"""
@@ -1515,7 +1639,7 @@ async def edit_lesson_description_handler(callback: CallbackQuery, state: FSMCon
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^clear_lesson_description_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^clear_lesson_description_\d+$"))
 @admin_required
 async def clear_lesson_description_handler(callback: CallbackQuery, state: FSMContext):
     """Удалить описание урока"""
@@ -1588,7 +1712,7 @@ async def save_edited_lesson_description(message: Message, state: FSMContext):
             await message.answer(info, reply_markup=markup)
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_tags_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_tags_\d+$"))
 @admin_required
 async def edit_lesson_tags_handler(callback: CallbackQuery, state: FSMContext):
     """Изменить теги урока"""
@@ -1621,7 +1745,7 @@ async def edit_lesson_tags_handler(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^clear_lesson_tags_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^clear_lesson_tags_\d+$"))
 @admin_required
 async def clear_lesson_tags_handler(callback: CallbackQuery, state: FSMContext):
     """Удалить теги урока"""
@@ -1694,7 +1818,7 @@ async def save_edited_lesson_tags(message: Message, state: FSMContext):
             await message.answer(info, reply_markup=markup)
 
 
-@router.callback_query(F.data.regexp(r"^toggle_lesson_active_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^toggle_lesson_active_\d+$"))
 @admin_required
 async def toggle_lesson_active_handler(callback: CallbackQuery):
     """Переключить активность урока"""
@@ -1721,7 +1845,7 @@ async def toggle_lesson_active_handler(callback: CallbackQuery):
     await edit_lesson_menu(fake_callback)
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_book_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_book_\d+$"))
 @admin_required
 async def edit_lesson_book_handler(callback: CallbackQuery):
     """Изменить книгу урока"""
@@ -1755,7 +1879,7 @@ async def edit_lesson_book_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("update_lesson_book_"))
+@router.callback_query(CallbackRoute.prefix("update_lesson_book_"))
 @admin_required
 async def update_lesson_book_handler(callback: CallbackQuery):
     """Обновить книгу урока"""
@@ -1780,7 +1904,7 @@ async def update_lesson_book_handler(callback: CallbackQuery):
     await edit_lesson_menu(callback)
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_theme_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_theme_\d+$"))
 @admin_required
 async def edit_lesson_theme_handler(callback: CallbackQuery):
     """Изменить тему урока (только для уроков без книги)"""
@@ -1818,7 +1942,7 @@ async def edit_lesson_theme_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("update_lesson_theme_"))
+@router.callback_query(CallbackRoute.prefix("update_lesson_theme_"))
 @admin_required
 async def update_lesson_theme_handler(callback: CallbackQuery):
     """Обновить тему урока"""
@@ -1843,7 +1967,7 @@ async def update_lesson_theme_handler(callback: CallbackQuery):
     await edit_lesson_menu(callback)
 
 
-@router.callback_query(F.data.regexp(r"^edit_lesson_teacher_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_lesson_teacher_\d+$"))
 @admin_required
 async def edit_lesson_teacher_handler(callback: CallbackQuery):
     """Изменить преподавателя урока"""
@@ -1876,7 +2000,7 @@ async def edit_lesson_teacher_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("update_lesson_teacher_"))
+@router.callback_query(CallbackRoute.prefix("update_lesson_teacher_"))
 @admin_required
 async def update_lesson_teacher_handler(callback: CallbackQuery):
     """Обновить преподавателя урока"""
@@ -1897,7 +2021,7 @@ async def update_lesson_teacher_handler(callback: CallbackQuery):
     await edit_lesson_menu(callback)
 
 
-@router.callback_query(F.data.startswith("delete_lesson_"))
+@router.callback_query(CallbackRoute.prefix("delete_lesson_"))
 @admin_required
 async def delete_lesson_handler(callback: CallbackQuery):
     """Подтверждение удаления урока"""
@@ -1933,7 +2057,7 @@ async def delete_lesson_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_lesson_"))
+@router.callback_query(CallbackRoute.prefix("confirm_delete_lesson_"))
 @admin_required
 async def confirm_delete_lesson_handler(callback: CallbackQuery):
     """Подтвердить удаление урока"""
@@ -1948,20 +2072,15 @@ async def confirm_delete_lesson_handler(callback: CallbackQuery):
     series_id = lesson.series_id
     series = await get_series_by_id(series_id) if series_id else None
 
-    # Удаляем аудиофайл, если есть
-    if lesson.audio_path:
-        import os
-        audio_path = os.path.join(config.audio_files_path, lesson.audio_path)
-        if os.path.exists(audio_path):
-            try:
-                os.remove(audio_path)
-                logger.info(f"Удалён аудиофайл: {audio_path}")
-            except Exception as e:
-                logger.error(f"Ошибка при удалении файла {audio_path}: {e}")
+    # Файлы урока и его частей (записи частей удалит каскад вместе с уроком)
+    audio_paths = [lesson.audio_path] + [part.audio_path for part in await get_lesson_parts(lesson_id)]
 
     # Удаляем урок из БД
     await delete_lesson(lesson_id)
 
+    # Удаляем файлы, если их не использует другой урок с тем же аудио
+    await _release_audio_files(audio_paths)
+
     # Проверяем, остались ли ещё уроки в этой серии
     remaining_count = 0
     if series_id:
@@ -1990,7 +2109,7 @@ async def confirm_delete_lesson_handler(callback: CallbackQuery):
     await callback.answer("✅ Урок удалён")
 
 
-@router.callback_query(F.data.startswith("replace_lesson_audio_"))
+@router.callback_query(CallbackRoute.prefix("replace_lesson_audio_"))
 @admin_required
 async def replace_lesson_audio_handler(callback: CallbackQuery, state: FSMContext):
     """Начать процесс замены аудиофайла урока"""
@@ -2026,8 +2145,10 @@ async def replace_lesson_audio_handler(callback: CallbackQuery, state: FSMContex
 
     info += "📤 <b>Отправьте новый аудиофайл</b>\n\n"
     info += "📋 Поддерживаемые форматы: MP3, WAV, FLAC, M4A, OGG, AAC и другие\n"
-    info += f"📏 Максимальный размер: {config.max_audio_size_mb} МБ\n\n"
-    info += f"🌐 Для файлов больше {config.max_audio_size_mb} МБ используйте для конвертации:\n{config.web_converter_url}"
+    info += f"📏 Максимальный размер: {config.max_audio_size_mb} МБ\n"
+    info += "💬 Подпись #opus или #mp3 к файлу - выбрать формат\n\n"
+    info += f"🌐 Для файлов больше {config.max_audio_size_mb} МБ используйте для конвертации:\n{config.web_converter_url}\n"
+    info += "🔑 После конвертации отправьте сюда код из веб-конвертера вместо файла"
 
     await callback.message.edit_text(
         info,
@@ -2056,6 +2177,18 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
         await state.clear()
         return
 
+    # Код из веб-конвертера вместо файла: готовый MP3 уже на диске
+    code = parse_handoff_code(message.text)
+    if code:
+        received = await _receive_handoff(message, code, f"edit_lesson_{lesson.id}")
+        if received:
+            processing_msg, converted_paths, used_bitrate = received
+            await _finish_replace_lesson_audio(
+                message, state, data, lesson, processing_msg,
+                converted_paths, used_bitrate, get_encoding_profile("mp3"), None
+            )
+        return
+
     # Определяем тип медиа и получаем файл
     audio_file = None
     file_ext = None
@@ -2105,10 +2238,19 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
     # Показываем сообщение о начале обработки
     processing_msg = await message.answer("⏳ Скачивание нового аудио файла...")
 
-    # Скачиваем аудиофайл
+    # Создаём директории для аудио
+    original_dir = "bot/audio_files/original"
+    converted_dir = "bot/audio_files/converted"
+    os.makedirs(original_dir, exist_ok=True)
+    os.makedirs(converted_dir, exist_ok=True)
+
+    # Скачиваем оригинальный файл сразу на диск (по частям, с подсчётом хеша)
+    original_path = os.path.join(original_dir, f"{audio_file.file_unique_id}.{file_ext}")
     try:
         file_info = await message.bot.get_file(audio_file.file_id)
-        downloaded_file = await message.bot.download_file(file_info.file_path)
+        source_hash, _ = await download_telegram_file(
+            message.bot, file_info.file_path, original_path, config.max_audio_size_bytes
+        )
     except Exception as e:
         await processing_msg.edit_text(
             f"❌ Ошибка при скачивании файла: {str(e)}\n\n"
@@ -2120,17 +2262,6 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # Создаём директории для аудио
-    original_dir = "bot/audio_files/original"
-    converted_dir = "bot/audio_files/converted"
-    os.makedirs(original_dir, exist_ok=True)
-    os.makedirs(converted_dir, exist_ok=True)
-
-    # Сохраняем оригинальный файл
-    original_path = os.path.join(original_dir, f"{audio_file.file_unique_id}.{file_ext}")
-    with open(original_path, "wb") as f:
-        f.write(downloaded_file.getvalue())
-
     logger.info(f"Оригинальный файл сохранён: {original_path}")
 
     # Обновляем сообщение о процессе
@@ -2148,43 +2279,16 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
         f"Пожалуйста, подождите..."
     )
 
-    # Получаем данные урока для генерации имени файла
-    teacher = await get_lesson_teacher_by_id(lesson.teacher_id) if lesson.teacher_id else None
-    book = await get_book_by_id(lesson.book_id) if lesson.book_id else None
-    series = await get_series_by_id(lesson.series_id) if lesson.series_id else None
-
-    # Функция для очистки имени файла от недопустимых символов
-    def sanitize_filename(name):
-        """Удаляет недопустимые символы из имени файла"""
-        if not name:
-            return "unnamed"
-        # Заменяем недопустимые символы на подчёркивание
-        name = re.sub(r'[<>:"/\\|?*]', '_', name)
-        # Убираем множественные пробелы и подчёркивания
-        name = re.sub(r'[\s_]+', '_', name)
-        # Ограничиваем длину
-        return name[:50]
-
-    # Формируем имя файла
-    parts = []
-    if teacher:
-        parts.append(sanitize_filename(teacher.name))
-    if book:
-        parts.append(sanitize_filename(book.name))
-    if series:
-        parts.append(f"{series.year}")
-        parts.append(sanitize_filename(series.name))
-    if lesson.lesson_number:
-        parts.append(f"урок_{lesson.lesson_number}")
-
-    new_filename = "_".join(parts) + ".mp3"
-    converted_path = os.path.join(converted_dir, new_filename)
-
-    # Конвертируем в MP3 с автоматическим подбором битрейта
-    success, error, used_bitrate = await convert_to_mp3_auto(
+    # Конвертируем по профилю с автоматическим подбором битрейта
+    # (слишком длинная запись делится на части вместо снижения битрейта)
+    # Тот же исходник уже загружался - файлы из хранилища переиспользуются без конвертации
+    profile = _upload_profile(message)
+    converted_path = os.path.join(converted_dir, f"{audio_file.file_unique_id}{profile.extension}")
+    success, error, converted_paths, used_bitrate = await convert_and_store(
         original_path,
+        source_hash,
         converted_path,
-        preferred_bitrate=64  # Предпочтительный битрейт для хорошего качества
+        profile=profile
     )
 
     if not success:
@@ -2204,17 +2308,45 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # Получаем длительность автоматически
-    duration_seconds = await get_audio_duration(converted_path)
+    await _finish_replace_lesson_audio(
+        message, state, data, lesson, processing_msg,
+        converted_paths, used_bitrate, profile, original_path
+    )
+
+
+async def _finish_replace_lesson_audio(
+    message: Message,
+    state: FSMContext,
+    data: dict,
+    lesson: Lesson,
+    processing_msg: Message,
+    converted_paths: list,
+    used_bitrate: int,
+    profile: EncodingProfile,
+    original_path: Optional[str]
+) -> None:
+    """Замена аудио урока готовыми файлами хранилища (загрузка в бота или код веб-конвертера)"""
+    lesson_id = lesson.id
+
+    # Получаем длительность автоматически (по каждой части)
+    part_durations = []
+    for path in converted_paths:
+        converted_info = await probe(path)
+        part_durations.append(converted_info.duration if converted_info else 0)
+    duration_seconds = sum(part_durations)
+    converted_path = converted_paths[0]
 
     if not duration_seconds:
         logger.warning(f"Не удалось определить длительность для {converted_path}")
         duration_seconds = 0
 
+    # Получаем данные урока для названия в плеере
+    teacher = await get_lesson_teacher_by_id(lesson.teacher_id) if lesson.teacher_id else None
+    book = await get_book_by_id(lesson.book_id) if lesson.book_id else None
+    series = await get_series_by_id(lesson.series_id) if lesson.series_id else None
+
     # Сохраняем путь к старому файлу (удалим только после успешного обновления БД)
-    old_audio_path = None
-    if lesson.audio_path:
-        old_audio_path = os.path.join(config.audio_files_path, lesson.audio_path)
+    old_audio_path = lesson.audio_path
 
     # СНАЧАЛА обновляем урок в базе
     try:
@@ -2227,47 +2359,26 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
         await update_lesson(lesson)
         logger.info(f"База данных обновлена: урок {lesson.id}, новый файл: {converted_path}")
 
-        # ТОЛЬКО ПОСЛЕ успешного обновления БД удаляем старый файл
-        if old_audio_path and os.path.exists(old_audio_path):
-            try:
-                os.remove(old_audio_path)
-                logger.info(f"Удалён старый аудиофайл: {old_audio_path}")
-            except Exception as e:
-                logger.error(f"Ошибка при удалении старого файла {old_audio_path}: {e}")
-                # Это не критично - новый файл уже в БД, просто старый остался на диске
+        # Части урока: новый список (пустой - урок снова одним файлом)
+        new_parts = list(zip(converted_paths, part_durations)) if len(converted_paths) > 1 else []
+        old_part_paths = await replace_lesson_parts(lesson.id, new_parts)
+        lesson_parts = await get_lesson_parts(lesson.id) if new_parts else []
 
-        # Предзагрузка file_id: отправляем новое аудио для кэширования в Telegram
-        try:
-            from aiogram.types import FSInputFile
-            # Генерируем автоматическое название
-            auto_generated_title = generate_lesson_title(
-                teacher_name=teacher.name if teacher else "",
-                book_name=book.name if book else "",
-                series_year=series.year if series else 0,
-                series_name=series.name if series else "",
-                lesson_number=lesson.lesson_number if lesson.lesson_number else 0
-            )
-
-            audio_for_cache = FSInputFile(converted_path)
-            cache_msg = await message.bot.send_audio(
-                chat_id=message.chat.id,
-                audio=audio_for_cache,
-                title=auto_generated_title
-            )
-
-            # Сохраняем file_id
-            if cache_msg.audio:
-                lesson.telegram_file_id = cache_msg.audio.file_id
-                await update_lesson(lesson)
-                logger.info(f"File_id сохранен после замены для урока {lesson.id}")
+        # ТОЛЬКО ПОСЛЕ успешного обновления БД удаляем старые файлы.
+        # Новые файлы могут совпадать со старыми (то же аудио) или быть
+        # общими с другими уроками - такие остаются на диске
+        await _release_audio_files([old_audio_path] + old_part_paths)
 
-            # Удаляем служебное сообщение
-            try:
-                await cache_msg.delete()
-            except:
-                pass
-        except Exception as e:
-            logger.warning(f"Не удалось предзагрузить file_id: {e}")
+        # Предзагрузка file_id: отправляем новое аудио для кэширования в Telegram
+        # Генерируем автоматическое название
+        auto_generated_title = generate_lesson_title(
+            teacher_name=teacher.name if teacher else "",
+            book_name=book.name if book else "",
+            series_year=series.year if series else 0,
+            series_name=series.name if series else "",
+            lesson_number=lesson.lesson_number if lesson.lesson_number else 0
+        )
+        await _preload_lesson_file_ids(message.bot, message.chat.id, lesson, lesson_parts, auto_generated_title)
 
         # Удаляем сообщения
         await processing_msg.delete()
@@ -2301,12 +2412,14 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
                 await message.answer(info, reply_markup=markup)
 
         # Показываем временное уведомление об успехе на 3 секунды
-        mp3_size = os.path.getsize(converted_path)
+        audio_size = sum(os.path.getsize(path) for path in converted_paths)
+        parts_line = f"🧩 Частей: {len(converted_paths)}\n" if len(converted_paths) > 1 else ""
         success_notification = await message.answer(
             f"✅ <b>Аудиофайл успешно заменён!</b>\n\n"
             f"📊 Длительность: {format_duration(duration_seconds)}\n"
-            f"🎵 Битрейт: {used_bitrate} kbps\n"
-            f"💾 Размер: {format_file_size(mp3_size)}"
+            f"🎵 Формат: {profile.title}, {used_bitrate} kbps\n"
+            f"{parts_line}"
+            f"💾 Размер: {format_file_size(audio_size)}"
         )
 
         # Удаляем уведомление через 3 секунды
@@ -2328,8 +2441,7 @@ async def replace_lesson_audio_file(message: Message, state: FSMContext):
             ]])
         )
         # Удаляем новые файлы при ошибке
-        if os.path.exists(original_path):
+        if original_path and os.path.exists(original_path):
             os.remove(original_path)
-        if os.path.exists(converted_path):
-            os.remove(converted_path)
+        await _release_audio_files(converted_paths)
         await state.clear()
@@ -1,7 +1,6 @@
 """
 Обработчики управления сериями уроков для администраторов
 """
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -23,8 +22,9 @@ from bot.services.database_service import (
     update_book,
     regenerate_series_lessons_titles
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 class SeriesStates(StatesGroup):
@@ -45,7 +45,7 @@ class SeriesStates(StatesGroup):
     create_theme = State()
 
 
-@router.callback_query(F.data == "admin_series")
+@router.callback_query(CallbackRoute.exact("admin_series"))
 @admin_required
 async def series_menu(callback: CallbackQuery):
     """Главное меню управления сериями"""
@@ -75,7 +75,7 @@ async def series_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_teacher_"))
+@router.callback_query(CallbackRoute.prefix("series_teacher_"))
 @admin_required
 async def show_teacher_series(callback: CallbackQuery):
     """Показать все серии преподавателя"""
@@ -119,7 +119,7 @@ async def show_teacher_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_view_"))
+@router.callback_query(CallbackRoute.prefix("series_view_"))
 @admin_required
 async def view_series(callback: CallbackQuery):
     """Просмотр детальной информации о серии"""
@@ -159,7 +159,7 @@ async def view_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_edit_name_"))
+@router.callback_query(CallbackRoute.prefix("series_edit_name_"))
 @admin_required
 async def edit_series_name(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование названия серии"""
@@ -259,7 +259,7 @@ async def save_series_name(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("series_toggle_completed_"))
+@router.callback_query(CallbackRoute.prefix("series_toggle_completed_"))
 @admin_required
 async def toggle_series_completed(callback: CallbackQuery):
     """Переключить статус завершённости серии"""
@@ -280,7 +280,7 @@ async def toggle_series_completed(callback: CallbackQuery):
     await view_series(callback)
 
 
-@router.callback_query(F.data.startswith("series_toggle_active_"))
+@router.callback_query(CallbackRoute.prefix("series_toggle_active_"))
 @admin_required
 async def toggle_series_active(callback: CallbackQuery):
     """Переключить активность серии"""
@@ -301,7 +301,7 @@ async def toggle_series_active(callback: CallbackQuery):
     await view_series(callback)
 
 
-@router.callback_query(F.data.startswith("series_delete_") & ~F.data.startswith("series_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("series_delete_", exclude=("series_delete_confirm_",)))
 @admin_required
 async def confirm_delete_series(callback: CallbackQuery):
     """Подтверждение удаления серии"""
@@ -329,7 +329,7 @@ async def confirm_delete_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("series_delete_confirm_"))
 @admin_required
 async def delete_series_confirmed(callback: CallbackQuery):
     """Удалить серию после подтверждения"""
@@ -354,7 +354,7 @@ async def delete_series_confirmed(callback: CallbackQuery):
     await callback.answer("✅ Серия удалена")
 
 
-@router.callback_query(F.data.startswith("series_edit_year_"))
+@router.callback_query(CallbackRoute.prefix("series_edit_year_"))
 @admin_required
 async def edit_series_year(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование года серии"""
@@ -480,7 +480,7 @@ async def save_series_year(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("series_edit_desc_"))
+@router.callback_query(CallbackRoute.prefix("series_edit_desc_"))
 @admin_required
 async def edit_series_description(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование описания серии"""
@@ -579,7 +579,7 @@ async def save_series_description(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("series_edit_book_"))
+@router.callback_query(CallbackRoute.prefix("series_edit_book_"))
 @admin_required
 async def edit_series_book(callback: CallbackQuery, state: FSMContext):
     """Изменить книгу серии"""
@@ -620,7 +620,7 @@ async def edit_series_book(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_set_book_"))
+@router.callback_query(CallbackRoute.prefix("series_set_book_"))
 @admin_required
 async def set_series_book(callback: CallbackQuery, state: FSMContext):
     """Сохранить выбранную книгу"""
@@ -675,7 +675,7 @@ async def set_series_book(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(text, reply_markup=builder.as_markup())
 
 
-@router.callback_query(F.data.startswith("series_edit_theme_"))
+@router.callback_query(CallbackRoute.prefix("series_edit_theme_"))
 @admin_required
 async def edit_series_theme(callback: CallbackQuery, state: FSMContext):
     """Изменить тему серии (или тему книги, если книга с темой)"""
@@ -741,7 +741,7 @@ async def edit_series_theme(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_set_theme_"))
+@router.callback_query(CallbackRoute.prefix("series_set_theme_"))
 @admin_required
 async def set_series_theme(callback: CallbackQuery, state: FSMContext):
     """Сохранить выбранную тему (для серии или для книги)"""
@@ -817,7 +817,7 @@ async def set_series_theme(callback: CallbackQuery, state: FSMContext):
 
 # ============= СОЗДАНИЕ НОВОЙ СЕРИИ =============
 
-@router.callback_query(F.data.startswith("series_create_teacher_"))
+@router.callback_query(CallbackRoute.prefix("series_create_teacher_"))
 @admin_required
 async def create_series_start(callback: CallbackQuery, state: FSMContext):
     """Начать создание новой серии для преподавателя"""
@@ -933,7 +933,7 @@ async def create_series_year(message: Message, state: FSMContext):
     )
 
 
-@router.callback_query(F.data == "series_create_skip_desc")
+@router.callback_query(CallbackRoute.exact("series_create_skip_desc"))
 @admin_required
 async def create_series_skip_description(callback: CallbackQuery, state: FSMContext):
     """Пропустить описание и перейти к выбору книги"""
@@ -1016,7 +1016,7 @@ async def ask_series_book(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_create_book_"))
+@router.callback_query(CallbackRoute.prefix("series_create_book_"))
 @admin_required
 async def create_series_book(callback: CallbackQuery, state: FSMContext):
     """Сохранить выбор книги и решить, нужна ли тема"""
@@ -1075,7 +1075,7 @@ async def ask_series_theme(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("series_create_theme_"))
+@router.callback_query(CallbackRoute.prefix("series_create_theme_"))
 @admin_required
 async def create_series_theme(callback: CallbackQuery, state: FSMContext):
     """Сохранить выбор темы и создать серию"""
@@ -1,7 +1,7 @@
 """
 Обработчик статистики для админ-панели
 """
-from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.utils.decorators import admin_required
@@ -14,11 +14,15 @@ from bot.services.database_service import (
     get_all_lesson_series,
     get_all_tests,
 )
+from bot.services.storage_service import get_disk_usage, storage_reconciler
+from bot.utils.audio_converter import bitrate_stats
+from bot.utils.formatters import format_file_size
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
-@router.callback_query(F.data == "admin_stats")
+@router.callback_query(CallbackRoute.exact("admin_stats"))
 @admin_required
 async def admin_stats(callback: CallbackQuery):
     """Показать статистику"""
@@ -59,8 +63,78 @@ async def admin_stats(callback: CallbackQuery):
         f"🔥 Активные элементы / Всего элементов"
     )
 
+    # Подбор битрейта при конвертации (с момента запуска бота)
+    if bitrate_stats.total or bitrate_stats.copied:
+        stats_text += (
+            f"\n\n🎛 Конвертаций: {bitrate_stats.total}, "
+            f"повторных: {bitrate_stats.second_pass} ({bitrate_stats.second_pass_rate:.0%}), "
+            f"не уложились в лимит: {bitrate_stats.failed}, "
+            f"без перекодирования: {bitrate_stats.copied}"
+        )
+
     await callback.message.edit_text(
         stats_text,
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Назад", callback_data="admin_panel")]])
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="💾 Место на диске", callback_data="admin_stats_storage")],
+            [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_panel")]
+        ])
     )
     await callback.answer()
+
+
+async def _storage_text() -> str:
+    """Отчёт о хранилище: последняя сверка и объём по преподавателям и сериям"""
+    report = storage_reconciler.last_report
+    usage = await get_disk_usage()
+
+    text = "💾 <b>Место на диске</b>\n\n"
+    if report is None:
+        text += "Сверка файлов ещё не выполнялась\n"
+    else:
+        text += (
+            f"🎧 Аудио уроков: {report.files} файлов, {format_file_size(report.total_size)}\n"
+            f"📥 Исходники: {format_file_size(report.originals_size)}\n"
+            f"🕒 Сверка: {report.finished_at.strftime('%d.%m %H:%M')}\n"
+            f"🗑 Без ссылок: {report.orphans}, удалено: {report.deleted} "
+            f"({format_file_size(report.deleted_size)})\n"
+        )
+        if report.missing:
+            shown = ", ".join(report.missing[:10])
+            more = f" и ещё {len(report.missing) - 10}" if len(report.missing) > 10 else ""
+            text += f"⚠️ Нет на диске: {shown}{more}\n"
+
+    if usage.by_teacher:
+        text += "\n👤 <b>По преподавателям:</b>\n"
+        text += "".join(f"• {name} - {format_file_size(size)}\n" for name, size in usage.by_teacher)
+    if usage.by_series:
+        text += "\n📁 <b>По сериям:</b>\n"
+        text += "".join(f"• {name} - {format_file_size(size)}\n" for name, size in usage.by_series)
+    return text
+
+
+def _storage_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔄 Сверить сейчас", callback_data="admin_stats_storage_reconcile")],
+        [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_stats")]
+    ])
+
+
+@router.callback_query(CallbackRoute.exact("admin_stats_storage"))
+@admin_required
+async def admin_stats_storage(callback: CallbackQuery):
+    """Показать объём аудио на диске"""
+    await callback.message.edit_text(await _storage_text(), reply_markup=_storage_keyboard())
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.exact("admin_stats_storage_reconcile"))
+@admin_required
+async def admin_stats_storage_reconcile(callback: CallbackQuery):
+    """Запустить сверку файлов немедленно"""
+    await callback.answer("⏳ Сверка файлов...")
+    await storage_reconciler.reconcile()
+    try:
+        await callback.message.edit_text(await _storage_text(), reply_markup=_storage_keyboard())
+    except TelegramBadRequest:
+        # Отчёт не изменился
+        pass
@@ -3,7 +3,6 @@
 """
 import logging
 
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -21,10 +20,11 @@ from bot.services.database_service import (
     get_all_books,
     regenerate_teacher_lessons_titles,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 class LessonTeacherStates(StatesGroup):
@@ -35,7 +35,7 @@ class LessonTeacherStates(StatesGroup):
     edit_series_name = State()
 
 
-@router.callback_query(F.data == "admin_teachers")
+@router.callback_query(CallbackRoute.exact("admin_teachers"))
 @admin_required
 async def admin_teachers(callback: CallbackQuery):
     """Показать список преподавателей для управления"""
@@ -61,7 +61,7 @@ async def admin_teachers(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "add_teacher")
+@router.callback_query(CallbackRoute.exact("add_teacher"))
 @admin_required
 async def add_teacher_start(callback: CallbackQuery, state: FSMContext):
     """Начать добавление нового преподавателя"""
@@ -78,7 +78,7 @@ async def add_teacher_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^edit_teacher_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_teacher_\d+$"))
 @admin_required
 async def edit_teacher_menu(callback: CallbackQuery):
     """Показать меню редактирования преподавателя"""
@@ -109,7 +109,7 @@ async def edit_teacher_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("toggle_teacher_"))
+@router.callback_query(CallbackRoute.prefix("toggle_teacher_"))
 @admin_required
 async def toggle_teacher(callback: CallbackQuery):
     """Переключить статус преподавателя"""
@@ -147,7 +147,7 @@ async def toggle_teacher(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data.startswith("delete_teacher_"))
+@router.callback_query(CallbackRoute.prefix("delete_teacher_"))
 @admin_required
 async def delete_teacher_prompt(callback: CallbackQuery):
     """Подтверждение удаления преподавателя"""
@@ -182,7 +182,7 @@ async def delete_teacher_prompt(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_teacher_"))
+@router.callback_query(CallbackRoute.prefix("confirm_delete_teacher_"))
 @admin_required
 async def confirm_delete_teacher(callback: CallbackQuery):
     """Подтвердить удаление преподавателя"""
@@ -205,7 +205,7 @@ async def confirm_delete_teacher(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_teacher_name_"))
+@router.callback_query(CallbackRoute.prefix("edit_teacher_name_"))
 @admin_required
 async def edit_teacher_name_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование имени преподавателя"""
@@ -376,7 +376,7 @@ async def edit_teacher_name_save(message: Message, state: FSMContext):
         await state.set_state(LessonTeacherStates.biography)
 
 
-@router.callback_query(F.data.startswith("edit_teacher_bio_"))
+@router.callback_query(CallbackRoute.prefix("edit_teacher_bio_"))
 @admin_required
 async def edit_teacher_bio_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование биографии преподавателя"""
@@ -407,7 +407,7 @@ async def edit_teacher_bio_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "skip_teacher_biography")
+@router.callback_query(CallbackRoute.exact("skip_teacher_biography"))
 @admin_required
 async def skip_teacher_biography(callback: CallbackQuery, state: FSMContext):
     """Удалить биографию преподавателя или пропустить при создании"""
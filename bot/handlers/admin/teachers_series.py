@@ -1,7 +1,6 @@
 """
 Управление сериями уроков преподавателей
 """
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -17,11 +16,13 @@ from bot.services.database_service import (
 from bot.models.lesson import Lesson
 from bot.models.database import async_session_maker
 from bot.handlers.admin.teachers import LessonTeacherStates
+from bot.utils.render_cache import bump_catalog_version
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
-@router.callback_query(F.data.startswith("manage_teacher_series_"))
+@router.callback_query(CallbackRoute.prefix("manage_teacher_series_"))
 @admin_required
 async def manage_teacher_series(callback: CallbackQuery):
     """Показать список книг преподавателя для управления сериями"""
@@ -71,7 +72,7 @@ async def manage_teacher_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_series_book_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_series_book_\d+_\d+$"))
 @admin_required
 async def show_series_list(callback: CallbackQuery):
     """Показать список серий по выбранной книге"""
@@ -152,7 +153,7 @@ async def show_series_list(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^edit_series_\d+_\d+_\d+_.+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_series_\d+_\d+_\d+_.+$"))
 @admin_required
 async def edit_series_menu(callback: CallbackQuery):
     """Меню редактирования серии"""
@@ -210,7 +211,7 @@ async def edit_series_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^edit_series_year_\d+_\d+_\d+_.+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_series_year_\d+_\d+_\d+_.+$"))
 @admin_required
 async def edit_series_year_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение года серии"""
@@ -270,6 +271,7 @@ async def edit_series_year_save(message: Message, state: FSMContext):
                 .values(series_year=new_year)
             )
             await session.commit()
+            bump_catalog_version()
 
         await message.answer(
             f"✅ Год серии изменен с {old_year} на {new_year}",
@@ -282,7 +284,7 @@ async def edit_series_year_save(message: Message, state: FSMContext):
         await message.answer("❌ Год должен быть числом. Попробуйте еще раз:")
 
 
-@router.callback_query(F.data.regexp(r"^edit_series_name_\d+_\d+_\d+_.+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_series_name_\d+_\d+_\d+_.+$"))
 @admin_required
 async def edit_series_name_start(callback: CallbackQuery, state: FSMContext):
     """Начать изменение названия серии"""
@@ -335,6 +337,7 @@ async def edit_series_name_save(message: Message, state: FSMContext):
             .values(series_name=new_name)
         )
         await session.commit()
+        bump_catalog_version()
 
     await message.answer(
         f"✅ Название серии изменено с «{old_name}» на «{new_name}»",
@@ -3,7 +3,6 @@
 Новая структура: один тест на серию, вопросы привязаны к урокам
 """
 import logging
-from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
@@ -27,10 +26,11 @@ from bot.services.database_service import (
     get_series_by_teacher,
     get_series_by_id,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 class TestStates(StatesGroup):
@@ -59,7 +59,7 @@ class QuestionStates(StatesGroup):
 
 # ==================== ГЛАВНОЕ МЕНЮ ====================
 
-@router.callback_query(F.data == "admin_tests")
+@router.callback_query(CallbackRoute.exact("admin_tests"))
 @admin_required
 async def tests_menu(callback: CallbackQuery):
     """Главное меню управления тестами"""
@@ -79,7 +79,7 @@ async def tests_menu(callback: CallbackQuery):
 
 # ==================== ПРОСМОТР ТЕСТОВ ====================
 
-@router.callback_query(F.data == "tests_all")
+@router.callback_query(CallbackRoute.exact("tests_all"))
 @admin_required
 async def show_all_tests(callback: CallbackQuery):
     """Показать статистику по всем тестам"""
@@ -111,7 +111,7 @@ async def show_all_tests(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "tests_teachers")
+@router.callback_query(CallbackRoute.exact("tests_teachers"))
 @admin_required
 async def tests_teachers_list(callback: CallbackQuery):
     """Список преподавателей для управления тестами"""
@@ -147,7 +147,7 @@ async def tests_teachers_list(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("toggle_test_"))
+@router.callback_query(CallbackRoute.prefix("toggle_test_"))
 @admin_required
 async def toggle_test(callback: CallbackQuery):
     """Переключить активность теста"""
@@ -176,7 +176,7 @@ async def toggle_test(callback: CallbackQuery):
     await callback.answer("✅ Статус изменён")
 
 
-@router.callback_query(F.data.startswith("delete_test_confirm_"))
+@router.callback_query(CallbackRoute.prefix("delete_test_confirm_"))
 @admin_required
 async def delete_test_confirm(callback: CallbackQuery):
     """Подтверждение удаления теста"""
@@ -208,7 +208,7 @@ async def delete_test_confirm(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^delete_test_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^delete_test_\d+$"))
 @admin_required
 async def delete_test_handler(callback: CallbackQuery):
     """Удалить тест"""
@@ -239,7 +239,7 @@ async def delete_test_handler(callback: CallbackQuery):
 
 # ==================== РЕДАКТИРОВАНИЕ ТЕСТОВ ====================
 
-@router.callback_query(F.data.regexp(r"^edit_test_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_test_\d+$"))
 @admin_required
 async def edit_test_menu(callback: CallbackQuery):
     """Меню редактирования теста"""
@@ -275,7 +275,7 @@ async def edit_test_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit_test_title_"))
+@router.callback_query(CallbackRoute.prefix("edit_test_title_"))
 @admin_required
 async def edit_test_title_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование названия теста"""
@@ -350,7 +350,7 @@ async def save_test_title(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("edit_test_description_"))
+@router.callback_query(CallbackRoute.prefix("edit_test_description_"))
 @admin_required
 async def edit_test_description_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование описания теста"""
@@ -380,7 +380,7 @@ async def edit_test_description_start(callback: CallbackQuery, state: FSMContext
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("delete_test_description_"))
+@router.callback_query(CallbackRoute.prefix("delete_test_description_"))
 @admin_required
 async def delete_test_description(callback: CallbackQuery, state: FSMContext):
     """Удалить описание теста"""
@@ -463,7 +463,7 @@ async def save_test_description(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("edit_test_passing_score_"))
+@router.callback_query(CallbackRoute.prefix("edit_test_passing_score_"))
 @admin_required
 async def edit_test_passing_score_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование проходного балла"""
@@ -554,7 +554,7 @@ async def save_test_passing_score(message: Message, state: FSMContext):
     await state.clear()
 
 
-@router.callback_query(F.data.startswith("edit_test_time_"))
+@router.callback_query(CallbackRoute.prefix("edit_test_time_"))
 @admin_required
 async def edit_test_time_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование времени на вопрос"""
@@ -647,7 +647,7 @@ async def save_test_time(message: Message, state: FSMContext):
 
 # ==================== НАВИГАЦИЯ: ПРЕПОДАВАТЕЛЬ → СЕРИИ → ТЕСТ ====================
 
-@router.callback_query(F.data.startswith("tests_teacher_"))
+@router.callback_query(CallbackRoute.prefix("tests_teacher_"))
 @admin_required
 async def tests_teacher_series(callback: CallbackQuery):
     """Серии выбранного преподавателя"""
@@ -694,7 +694,7 @@ async def tests_teacher_series(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("tests_series_"))
+@router.callback_query(CallbackRoute.prefix("tests_series_"))
 @admin_required
 async def tests_series_view(callback: CallbackQuery):
     """Просмотр/создание теста для серии"""
@@ -755,7 +755,7 @@ async def tests_series_view(callback: CallbackQuery):
         await callback.answer()
 
 
-@router.callback_query(F.data.startswith("create_test_for_series_"))
+@router.callback_query(CallbackRoute.prefix("create_test_for_series_"))
 @admin_required
 async def create_test_for_series_start(callback: CallbackQuery, state: FSMContext):
     """Начать создание теста для серии"""
@@ -811,7 +811,7 @@ async def save_test_title(message: Message, state: FSMContext):
     await state.set_state(TestStates.description)
 
 
-@router.callback_query(F.data == "skip_test_description")
+@router.callback_query(CallbackRoute.exact("skip_test_description"))
 @admin_required
 async def skip_test_description(callback: CallbackQuery, state: FSMContext):
     """Пропустить описание теста"""
@@ -972,7 +972,7 @@ async def save_test_time_and_create(message: Message, state: FSMContext):
 
 # ==================== УПРАВЛЕНИЕ ВОПРОСАМИ ====================
 
-@router.callback_query(F.data.startswith("test_questions_"))
+@router.callback_query(CallbackRoute.prefix("test_questions_"))
 @admin_required
 async def test_questions_menu(callback: CallbackQuery):
     """Меню управления вопросами теста"""
@@ -1031,7 +1031,7 @@ async def test_questions_menu(callback: CallbackQuery):
 
 # ==================== ДОБАВЛЕНИЕ ВОПРОСОВ ====================
 
-@router.callback_query(F.data.startswith("add_question_"))
+@router.callback_query(CallbackRoute.prefix("add_question_"))
 @admin_required
 async def add_question_choose_lesson(callback: CallbackQuery, state: FSMContext):
     """Выбор урока для вопроса"""
@@ -1075,7 +1075,7 @@ async def add_question_choose_lesson(callback: CallbackQuery, state: FSMContext)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("add_q_lesson_"))
+@router.callback_query(CallbackRoute.prefix("add_q_lesson_"))
 @admin_required
 async def add_question_start_input(callback: CallbackQuery, state: FSMContext):
     """Начать ввод вопроса"""
@@ -1245,7 +1245,7 @@ async def save_option_4(message: Message, state: FSMContext):
     )
 
 
-@router.callback_query(F.data.regexp(r"^q_correct_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^q_correct_\d+_\d+$"))
 @admin_required
 async def save_correct_answer(callback: CallbackQuery, state: FSMContext):
     """Сохранить правильный ответ"""
@@ -1270,7 +1270,7 @@ async def save_correct_answer(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "skip_question_explanation")
+@router.callback_query(CallbackRoute.exact("skip_question_explanation"))
 @admin_required
 async def skip_question_explanation(callback: CallbackQuery, state: FSMContext):
     """Пропустить пояснение и создать вопрос"""
@@ -1387,7 +1387,7 @@ async def save_explanation_and_create(message: Message, state: FSMContext):
 
 # ==================== ПРОСМОТР СПИСКА ВОПРОСОВ ====================
 
-@router.callback_query(F.data.startswith("list_questions_"))
+@router.callback_query(CallbackRoute.prefix("list_questions_"))
 @admin_required
 async def list_questions_choose_lesson(callback: CallbackQuery):
     """Выбор урока для просмотра вопросов"""
@@ -1447,7 +1447,7 @@ async def list_questions_choose_lesson(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("show_lesson_questions_"))
+@router.callback_query(CallbackRoute.prefix("show_lesson_questions_"))
 @admin_required
 async def show_lesson_questions(callback: CallbackQuery):
     """Показать вопросы для конкретного урока"""
@@ -1512,7 +1512,7 @@ async def show_lesson_questions(callback: CallbackQuery):
 
 # ==================== УДАЛЕНИЕ ВОПРОСОВ ====================
 
-@router.callback_query(F.data.startswith("delete_q_confirm_"))
+@router.callback_query(CallbackRoute.prefix("delete_q_confirm_"))
 @admin_required
 async def delete_question_confirm(callback: CallbackQuery):
     """Подтверждение удаления вопроса"""
@@ -1539,7 +1539,7 @@ async def delete_question_confirm(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("delete_q_") & ~F.data.contains("confirm"))
+@router.callback_query(CallbackRoute.regexp(r"^delete_q_\d+$"))
 @admin_required
 async def delete_question_handler(callback: CallbackQuery):
     """Удалить вопрос"""
@@ -1569,7 +1569,7 @@ async def delete_question_handler(callback: CallbackQuery):
 
 # ==================== ПРОСМОТР ВОПРОСА ====================
 
-@router.callback_query(F.data.startswith("edit_question_"))
+@router.callback_query(CallbackRoute.prefix("edit_question_"))
 @admin_required
 async def view_question_details(callback: CallbackQuery):
     """Просмотр детальной информации о вопросе"""
@@ -1,7 +1,6 @@
 """
 Управление темами
 """
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -16,8 +15,9 @@ from bot.services.database_service import (
     update_theme,
     delete_theme,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 class ThemeStates(StatesGroup):
@@ -26,7 +26,7 @@ class ThemeStates(StatesGroup):
     description = State()
 
 
-@router.callback_query(F.data == "admin_themes")
+@router.callback_query(CallbackRoute.exact("admin_themes"))
 @admin_required
 async def admin_themes(callback: CallbackQuery):
     """Показать список тем для управления"""
@@ -52,7 +52,7 @@ async def admin_themes(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "add_theme")
+@router.callback_query(CallbackRoute.exact("add_theme"))
 @admin_required
 async def add_theme_start(callback: CallbackQuery, state: FSMContext):
     """Начать добавление новой темы"""
@@ -69,7 +69,7 @@ async def add_theme_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^edit_theme_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^edit_theme_\d+$"))
 @admin_required
 async def edit_theme_menu(callback: CallbackQuery):
     """Показать меню редактирования темы"""
@@ -100,7 +100,7 @@ async def edit_theme_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("toggle_theme_"))
+@router.callback_query(CallbackRoute.prefix("toggle_theme_"))
 @admin_required
 async def toggle_theme(callback: CallbackQuery):
     """Переключить статус темы"""
@@ -137,7 +137,7 @@ async def toggle_theme(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data.startswith("edit_theme_name_"))
+@router.callback_query(CallbackRoute.prefix("edit_theme_name_"))
 @admin_required
 async def edit_theme_name_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование названия темы"""
@@ -299,7 +299,7 @@ async def edit_theme_name_save(message: Message, state: FSMContext):
         await state.set_state(ThemeStates.description)
 
 
-@router.callback_query(F.data.startswith("edit_theme_desc_"))
+@router.callback_query(CallbackRoute.prefix("edit_theme_desc_"))
 @admin_required
 async def edit_theme_desc_start(callback: CallbackQuery, state: FSMContext):
     """Начать редактирование описания темы"""
@@ -330,7 +330,7 @@ async def edit_theme_desc_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "skip_theme_description")
+@router.callback_query(CallbackRoute.exact("skip_theme_description"))
 @admin_required
 async def skip_theme_description(callback: CallbackQuery, state: FSMContext):
     """Пропустить/удалить описание темы"""
@@ -543,7 +543,7 @@ async def edit_theme_desc_save(message: Message, state: FSMContext):
                 )
 
 
-@router.callback_query(F.data.startswith("delete_theme_"))
+@router.callback_query(CallbackRoute.prefix("delete_theme_"))
 @admin_required
 async def delete_theme_prompt(callback: CallbackQuery):
     """Подтверждение удаления темы"""
@@ -582,7 +582,7 @@ async def delete_theme_prompt(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_theme_"))
+@router.callback_query(CallbackRoute.prefix("confirm_delete_theme_"))
 @admin_required
 async def confirm_delete_theme(callback: CallbackQuery):
     """Подтвердить удаление темы"""
@@ -602,7 +602,7 @@ async def confirm_delete_theme(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin_panel")
+@router.callback_query(CallbackRoute.exact("admin_panel"))
 @admin_required
 async def back_to_admin_panel(callback: CallbackQuery):
     """Вернуться в административную панель"""
@@ -1,7 +1,6 @@
 """
 User management handlers for admin panel
 """
-from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
@@ -10,8 +9,9 @@ from sqlalchemy.orm import joinedload
 
 from bot.utils.decorators import admin_required
 from bot.services.database_service import UserService, RoleService
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 class UserStates(StatesGroup):
@@ -19,7 +19,7 @@ class UserStates(StatesGroup):
     role = State()
 
 
-@router.callback_query(F.data == "admin_users")
+@router.callback_query(CallbackRoute.exact("admin_users"))
 @admin_required
 async def admin_users(callback: CallbackQuery):
     """Show list of users for management"""
@@ -90,7 +90,7 @@ async def admin_users(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "add_user_role")
+@router.callback_query(CallbackRoute.exact("add_user_role"))
 @admin_required
 async def add_user_role_start(callback: CallbackQuery, state: FSMContext):
     """Start the process of adding/changing user role"""
@@ -155,7 +155,7 @@ async def process_user_id(message: Message, state: FSMContext):
         )
 
 
-@router.callback_query(F.data.startswith("set_role_"))
+@router.callback_query(CallbackRoute.prefix("set_role_"))
 @admin_required
 async def set_user_role(callback: CallbackQuery):
     """Set user role"""
@@ -1,16 +1,23 @@
-from aiogram import Router, F
-from aiogram.filters import Command
+import logging
+
+from aiogram.filters import Command, CommandObject
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
-from bot.services.database_service import UserService
+from bot.services.database_service import UserService, LessonService, get_test_by_id
 from bot.keyboards.user import get_main_keyboard
 from bot.utils.decorators import is_user_admin
+from bot.services.storage_service import storage_reconciler
+from bot.utils.deep_links import LINK_LESSON, LINK_SERIES, LINK_TEST, parse_start_payload
+from bot.utils.render_cache import render_cache
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 from . import themes, series, lessons, search, tests, bookmarks, feedback, teachers
 
+logger = logging.getLogger(__name__)
+
 # Main router
-router = Router()
+router = CallbackRouter()
 
 # Include sub-routers
 router.include_router(themes.router)
@@ -23,9 +30,69 @@ router.include_router(bookmarks.router)
 router.include_router(feedback.router)
 
 
+async def open_deep_link(message: Message, state: FSMContext, user, payload: str) -> bool:
+    """
+    Открыть урок, серию или тест по payload из /start (l_<id>, s_<id>, t_<id>)
+
+    Returns:
+        True, если экран показан (приветствие не нужно)
+    """
+    link = parse_start_payload(payload)
+    if link is None:
+        return False
+
+    kind, entity_id = link
+
+    try:
+        if kind == LINK_LESSON:
+            lesson = await LessonService.get_lesson_by_id(entity_id)
+            if not lesson or not lesson.is_active or not lesson.has_audio() \
+                    or not storage_reconciler.is_available(lesson.audio_path):
+                await message.answer("❌ Урок по этой ссылке недоступен")
+                return False
+
+            part, parts_count = await lessons.get_lesson_part(lesson.id)
+            caption, keyboard = await lessons.build_lesson_view(
+                lesson, message.from_user.id, message.bot, part, parts_count
+            )
+            if not await lessons.send_lesson_audio(message, lesson, caption, keyboard, replace=False, part=part):
+                await message.answer("❌ Урок по этой ссылке недоступен")
+                return False
+            return True
+
+        if kind == LINK_SERIES:
+            screen = await render_cache.get_or_render("series_menu", entity_id, series.render_series_menu)
+            if screen.alert:
+                await message.answer(screen.alert)
+                return False
+
+            await state.update_data(**screen.state_data)
+            await message.answer(screen.text, reply_markup=screen.reply_markup)
+            return True
+
+        if kind == LINK_TEST:
+            test = await get_test_by_id(entity_id)
+            view = None
+            if test and test.series_id:
+                view = await tests.build_general_test_view(test.series_id, state, user)
+            if view is None:
+                await message.answer("❌ Тест по этой ссылке недоступен")
+                return False
+
+            text, keyboard = view
+            await message.answer(text, reply_markup=keyboard)
+            return True
+
+    except Exception as e:
+        logger.error(f"Ошибка открытия ссылки /start {payload}: {e}")
+        await message.answer("❌ Не удалось открыть ссылку")
+
+    return False
+
+
 @router.message(Command("start"))
-async def cmd_start(message: Message):
-    """Handler for /start command with inline keyboard"""
+async def cmd_start(message: Message, state: FSMContext, command: CommandObject):
+    """Handler for /start command with inline keyboard (и deep links: /start l_<id>, s_<id>, t_<id>)"""
     # Регистрация или получение пользователя
     user = await UserService.get_or_create_user(
         telegram_id=message.from_user.id,
@@ -34,6 +101,12 @@ async def cmd_start(message: Message):
         last_name=message.from_user.last_name
     )
 
+    # Ссылка на конкретный урок/серию/тест - открываем сразу
+    if command.args:
+        await state.clear()
+        if await open_deep_link(message, state, user, command.args):
+            return
+
     # Проверяем, является ли пользователь админом
     is_admin = await is_user_admin(message.from_user.id)
 
@@ -95,7 +168,7 @@ async def cmd_id(message: Message):
     await message.answer(info_text, reply_markup=get_main_keyboard(is_admin=is_admin))
 
 
-@router.callback_query(F.data == "get_my_id")
+@router.callback_query(CallbackRoute.exact("get_my_id"))
 async def callback_get_my_id(callback: CallbackQuery, state: FSMContext):
     """Handler for callback 'get_my_id' (inline button)"""
     # Очищаем состояние
@@ -116,7 +189,7 @@ async def callback_get_my_id(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "main_menu")
+@router.callback_query(CallbackRoute.exact("main_menu"))
 async def callback_main_menu(callback: CallbackQuery, state: FSMContext):
     """Handler for callback 'main_menu' (returns to main menu)"""
     # Очищаем состояние
@@ -134,7 +207,7 @@ async def callback_main_menu(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "about_project")
+@router.callback_query(CallbackRoute.exact("about_project"))
 async def callback_about_project(callback: CallbackQuery, state: FSMContext):
     """Handler for callback 'about_project' (shows info about the project)"""
     # Очищаем состояние
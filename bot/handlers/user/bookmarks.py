@@ -2,7 +2,6 @@
 Обработчики для работы с закладками пользователей
 """
 import logging
-from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -19,9 +18,10 @@ from bot.services.database_service import (
     delete_bookmark,
     get_lesson_by_id
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 logger = logging.getLogger(__name__)
-router = Router()
+router = CallbackRouter()
 
 # Лимит закладок на пользователя
 MAX_BOOKMARKS = 20
@@ -29,7 +29,7 @@ MAX_BOOKMARKS = 20
 
 # ==================== СПИСОК ЗАКЛАДОК ====================
 
-@router.callback_query(F.data == "bookmarks")
+@router.callback_query(CallbackRoute.exact("bookmarks"))
 @user_required_callback
 async def show_bookmarks_list(callback: CallbackQuery, state: FSMContext, user):
     """Показать список закладок пользователя"""
@@ -93,8 +93,7 @@ async def show_bookmarks_list(callback: CallbackQuery, state: FSMContext, user):
 
 # ==================== ДЕТАЛИ ЗАКЛАДКИ ====================
 
-@router.callback_query(F.data.startswith("bookmark_") & ~F.data.startswith("bookmark_open_")
-                       & ~F.data.startswith("bookmark_rename_") & ~F.data.startswith("bookmark_delete_"))
+@router.callback_query(CallbackRoute.prefix("bookmark_", exclude=("bookmark_open_", "bookmark_rename_", "bookmark_delete_")))
 @user_required_callback
 async def show_bookmark_details(callback: CallbackQuery, state: FSMContext, user):
     """Показать детали закладки с кнопками действий"""
@@ -161,7 +160,7 @@ async def show_bookmark_details(callback: CallbackQuery, state: FSMContext, user
 
 # ==================== ОТКРЫТЬ УРОК ИЗ ЗАКЛАДКИ ====================
 
-@router.callback_query(F.data.startswith("bookmark_open_"))
+@router.callback_query(CallbackRoute.prefix("bookmark_open_"))
 @user_required_callback
 async def open_lesson_from_bookmark(callback: CallbackQuery, state: FSMContext, user):
     """Открыть урок из закладки"""
@@ -185,7 +184,7 @@ async def open_lesson_from_bookmark(callback: CallbackQuery, state: FSMContext,
 
 # ==================== ДОБАВЛЕНИЕ ЗАКЛАДКИ ====================
 
-@router.callback_query(F.data.startswith("add_bookmark_"))
+@router.callback_query(CallbackRoute.prefix("add_bookmark_"))
 @user_required_callback
 async def add_bookmark_start(callback: CallbackQuery, state: FSMContext, user):
     """Начало добавления закладки - запрос названия"""
@@ -335,7 +334,7 @@ async def add_bookmark_save(message: Message, state: FSMContext):
 
 # ==================== ПЕРЕИМЕНОВАНИЕ ЗАКЛАДКИ ====================
 
-@router.callback_query(F.data.startswith("bookmark_rename_"))
+@router.callback_query(CallbackRoute.prefix("bookmark_rename_"))
 @user_required_callback
 async def rename_bookmark_start(callback: CallbackQuery, state: FSMContext, user):
     """Начало переименования закладки"""
@@ -448,7 +447,7 @@ async def rename_bookmark_save(message: Message, state: FSMContext):
 
 # ==================== УДАЛЕНИЕ ЗАКЛАДКИ ====================
 
-@router.callback_query(F.data.startswith("bookmark_delete_") & ~F.data.startswith("bookmark_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("bookmark_delete_", exclude=("bookmark_delete_confirm_",)))
 @user_required_callback
 async def delete_bookmark_confirm(callback: CallbackQuery, state: FSMContext, user):
     """Подтверждение удаления закладки"""
@@ -476,7 +475,7 @@ async def delete_bookmark_confirm(callback: CallbackQuery, state: FSMContext, us
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("bookmark_delete_confirm_"))
+@router.callback_query(CallbackRoute.prefix("bookmark_delete_confirm_"))
 @user_required_callback
 async def delete_bookmark_execute(callback: CallbackQuery, state: FSMContext, user):
     """Выполнение удаления закладки"""
@@ -507,7 +506,7 @@ async def delete_bookmark_execute(callback: CallbackQuery, state: FSMContext, us
 
 # ==================== УДАЛЕНИЕ ЗАКЛАДКИ С ЭКРАНА УРОКА ====================
 
-@router.callback_query(F.data.startswith("remove_bookmark_"))
+@router.callback_query(CallbackRoute.prefix("remove_bookmark_"))
 @user_required_callback
 async def remove_bookmark_from_lesson(callback: CallbackQuery, state: FSMContext, user):
     """Удалить закладку прямо с экрана урока (показать меню управления)"""
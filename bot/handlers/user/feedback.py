@@ -1,4 +1,3 @@
-from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 
@@ -9,13 +8,14 @@ from bot.services.database_service import (
     get_user_by_telegram_id
 )
 from bot.utils.decorators import user_required_callback, user_required
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 import logging
 
-router = Router()
+router = CallbackRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.callback_query(F.data == "feedback")
+@router.callback_query(CallbackRoute.exact("feedback"))
 @user_required_callback
 async def feedback_menu(callback: CallbackQuery, state: FSMContext, user):
     """Меню обратной связи"""
@@ -41,7 +41,7 @@ async def feedback_menu(callback: CallbackQuery, state: FSMContext, user):
     await callback.answer()
 
 
-@router.callback_query(F.data == "feedback_write")
+@router.callback_query(CallbackRoute.exact("feedback_write"))
 @user_required_callback
 async def start_feedback_write(callback: CallbackQuery, state: FSMContext, user):
     """Начать ввод сообщения"""
@@ -170,7 +170,7 @@ async def save_feedback(message: Message, state: FSMContext, user):
         await state.clear()
 
 
-@router.callback_query(F.data == "my_feedbacks")
+@router.callback_query(CallbackRoute.exact("my_feedbacks"))
 @user_required_callback
 async def show_my_feedbacks(callback: CallbackQuery, state: FSMContext, user):
     """Показать обращения пользователя"""
@@ -233,7 +233,7 @@ async def show_my_feedbacks(callback: CallbackQuery, state: FSMContext, user):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("view_feedback_"))
+@router.callback_query(CallbackRoute.prefix("view_feedback_"))
 @user_required_callback
 async def view_feedback(callback: CallbackQuery, state: FSMContext, user):
     """Просмотр деталей обращения"""
@@ -1,38 +1,172 @@
-from aiogram import Router, F
-from aiogram.types import CallbackQuery, FSInputFile
+import logging
+import os
+from typing import Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardMarkup, InputMediaAudio, Message
 from aiogram.fsm.context import FSMContext
 
-from bot.services.database_service import LessonService, get_test_by_series, get_questions_by_lesson
+from bot.models import Lesson, LessonPart
+from bot.services.database_service import (
+    LessonService,
+    get_test_by_series,
+    get_questions_by_lesson,
+    get_lesson_parts,
+    update_lesson_telegram_file_id,
+    update_lesson_part_telegram_file_id
+)
+from bot.services.storage_service import storage_reconciler
 from bot.keyboards.user import get_lesson_control_keyboard
 from bot.utils.decorators import user_required_callback
-from bot.utils.audio_utils import AudioUtils
+from bot.utils.audio_converter import profile_for_path
+from bot.utils.formatters import format_duration
+from bot.utils.deep_links import LINK_LESSON, get_share_url
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 
-router = Router()
+logger = logging.getLogger(__name__)
 
+router = CallbackRouter()
 
-@router.callback_query(F.data.startswith("lesson_") & ~F.data.startswith("lesson_test_"))
-@user_required_callback
-async def play_lesson(callback: CallbackQuery):
+
+async def send_lesson_audio(
+    message: Message,
+    lesson: Lesson,
+    caption: str,
+    keyboard: InlineKeyboardMarkup,
+    replace: bool = True,
+    part: Optional[LessonPart] = None
+) -> bool:
     """
-    Воспроизведение урока
+    Показать аудио урока в окне бота
+
+    Если текущее сообщение - аудио, а file_id урока уже есть в кеше, аудио
+    заменяется на месте (edit_message_media): один запрос к API вместо двух.
+    Иначе - старый путь: удалить сообщение и отправить новое.
+    При replace=False (например, /start по ссылке) просто отправляется новое сообщение.
+    Для урока из нескольких частей передаётся part - у каждой части свой file_id.
+    Файлы в Opus отправляются голосовым сообщением (заменить на месте его нельзя).
+
+    Returns:
+        False, если файла урока нет на диске (сообщение при этом не трогается)
     """
-    lesson_id = int(callback.data.split("_")[1])
-    lesson = await LessonService.get_lesson_by_id(lesson_id)
+    file_id = part.telegram_file_id if part else lesson.telegram_file_id
+    audio_path = part.audio_path if part else lesson.audio_path
+    as_voice = profile_for_path(audio_path or "").send_as_voice
+
+    if replace and file_id and not as_voice and getattr(message, "audio", None):
+        try:
+            await message.edit_media(
+                media=InputMediaAudio(media=file_id, caption=caption),
+                reply_markup=keyboard
+            )
+            return True
+        except TelegramBadRequest as e:
+            # Тот же урок повторно - сообщение уже показывает нужное аудио
+            if "message is not modified" in str(e):
+                return True
+            logger.warning(f"Не удалось заменить аудио урока {lesson.id} на месте: {e}")
+
+    # Без file_id файл загружается с диска - проверяем его до удаления сообщения
+    # (манифест хранилища узнаёт об удалённых файлах только при сверке)
+    if not file_id and not os.path.exists(audio_path or ""):
+        storage_reconciler.mark_missing(audio_path)
+        return False
 
-    if not lesson:
-        await callback.answer("Урок не найден", show_alert=True)
-        return
+    # ПАТТЕРН ОДНОГО ОКНА: удаляем предыдущее сообщение
+    if replace:
+        try:
+            await message.delete()
+        except:
+            pass
 
-    if not lesson.has_audio():
-        await callback.answer("Аудиофайл недоступен", show_alert=True)
-        return
+    try:
+        if as_voice:
+            try:
+                sent_message = await message.answer_voice(
+                    voice=file_id or FSInputFile(audio_path),
+                    caption=caption,
+                    reply_markup=keyboard
+                )
+            except TelegramBadRequest as e:
+                # Пользователь запретил голосовые сообщения - отправляем файлом
+                if "VOICE_MESSAGES_FORBIDDEN" not in str(e):
+                    raise
+                await message.answer_document(
+                    document=FSInputFile(audio_path),
+                    caption=caption,
+                    reply_markup=keyboard
+                )
+                return True
+            if file_id:
+                return True
+            sent_media = sent_message.voice
 
-    # Проверка существования файла
-    if not AudioUtils.file_exists(lesson.audio_path):
-        await callback.answer("Аудиофайл не найден", show_alert=True)
-        return
+        # Если есть кешированный file_id - используем его (быстро!)
+        elif file_id:
+            await message.answer_audio(
+                audio=file_id,
+                caption=caption,
+                reply_markup=keyboard
+            )
+            return True
+
+        # Первая отправка - загружаем файл и сохраняем file_id
+        else:
+            sent_message = await message.answer_audio(
+                audio=FSInputFile(audio_path),
+                title=part.display_title(lesson.title) if part else lesson.title,
+                caption=caption,
+                reply_markup=keyboard
+            )
+            sent_media = sent_message.audio
+
+        # Сохраняем file_id для следующих отправок
+        if sent_media:
+            if part:
+                part.telegram_file_id = sent_media.file_id
+                await update_lesson_part_telegram_file_id(part.id, part.telegram_file_id)
+            else:
+                lesson.telegram_file_id = sent_media.file_id
+                await update_lesson_telegram_file_id(lesson.id, lesson.telegram_file_id)
+    except FileNotFoundError:
+        # Файл удалили после последней сверки хранилища
+        storage_reconciler.mark_missing(audio_path)
+        return False
+    return True
+
+async def get_lesson_part(lesson_id: int, part_number: int = 1) -> Tuple[Optional[LessonPart], int]:
+    """
+    Часть урока по номеру
 
+    Returns:
+        (часть или None для урока одним файлом, количество частей)
+    """
+    parts = await get_lesson_parts(lesson_id)
+    if not parts:
+        return None, 0
+    part_number = min(max(part_number, 1), len(parts))
+    return parts[part_number - 1], len(parts)
+
+
+def format_part_caption(part: Optional[LessonPart], parts_count: int) -> str:
+    """Строка описания с номером части (пусто для урока одним файлом)"""
+    if not part:
+        return ""
+    return f"🧩 Часть {part.part_number} из {parts_count} ({format_duration(part.duration_seconds or 0)})\n"
+
+
+async def build_lesson_view(
+    lesson: Lesson,
+    telegram_user_id: int,
+    bot: Bot,
+    part: Optional[LessonPart] = None,
+    parts_count: int = 0
+) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Описание урока и клавиатура управления для пользователя
+    """
     # Формирование описания урока
     caption = (
         f"🎧 Урок {lesson.lesson_number}\n\n"
@@ -41,6 +175,7 @@ async def play_lesson(callback: CallbackQuery):
         f"🎙️ Преподаватель: {lesson.teacher_name}\n"
         f"⏱️ Длительность: {lesson.formatted_duration}\n"
     )
+    caption += format_part_caption(part, parts_count)
 
     # Добавляем теги, если они есть
     if lesson.tags_list:
@@ -64,46 +199,58 @@ async def play_lesson(callback: CallbackQuery):
     # Проверяем, есть ли закладка на этот урок
     from bot.services.database_service import get_bookmark_by_user_and_lesson, get_user_by_telegram_id
     has_bookmark = False
-    user = await get_user_by_telegram_id(callback.from_user.id)
+    user = await get_user_by_telegram_id(telegram_user_id)
     if user:
-        bookmark = await get_bookmark_by_user_and_lesson(user.id, lesson_id)
+        bookmark = await get_bookmark_by_user_and_lesson(user.id, lesson.id)
         if bookmark:
             has_bookmark = True
 
-    # Клавиатура управления
-    keyboard = get_lesson_control_keyboard(lesson, has_test=has_test, has_bookmark=has_bookmark)
+    # Клавиатура управления (со ссылкой "Поделиться")
+    share_url = await get_share_url(bot, LINK_LESSON, lesson.id)
+    keyboard = get_lesson_control_keyboard(
+        lesson,
+        has_test=has_test,
+        has_bookmark=has_bookmark,
+        share_url=share_url,
+        part_number=part.part_number if part else 1,
+        parts_count=parts_count
+    )
+
+    return caption, keyboard
 
-    # ПАТТЕРН ОДНОГО ОКНА: удаляем предыдущее сообщение
-    try:
-        await callback.message.delete()
-    except:
-        pass
 
-    try:
-        # Если есть кешированный file_id - используем его (быстро!)
-        if lesson.telegram_file_id:
-            sent_message = await callback.message.answer_audio(
-                audio=lesson.telegram_file_id,
-                caption=caption,
-                reply_markup=keyboard
-            )
-        else:
-            # Первая отправка - загружаем файл и сохраняем file_id
-            audio_file = FSInputFile(lesson.audio_path)
-            sent_message = await callback.message.answer_audio(
-                audio=audio_file,
-                title=lesson.title,
-                caption=caption,
-                reply_markup=keyboard
-            )
+@router.callback_query(CallbackRoute.prefix("lesson_", exclude=("lesson_test_",)))
+@user_required_callback
+async def play_lesson(callback: CallbackQuery):
+    """
+    Воспроизведение урока (lesson_X) или его части (lesson_X_part_N)
+    """
+    data_parts = callback.data.split("_")
+    lesson_id = int(data_parts[1])
+    part_number = int(data_parts[3]) if len(data_parts) > 3 else 1
+    lesson = await LessonService.get_lesson_by_id(lesson_id)
+
+    if not lesson:
+        await callback.answer("Урок не найден", show_alert=True)
+        return
+
+    if not lesson.has_audio():
+        await callback.answer("Аудиофайл недоступен", show_alert=True)
+        return
+
+    part, parts_count = await get_lesson_part(lesson.id, part_number)
 
-            # Сохраняем file_id для следующих отправок
-            if sent_message.audio:
-                lesson.telegram_file_id = sent_message.audio.file_id
-                # Обновляем в БД
-                from bot.services.database_service import update_lesson
-                await update_lesson(lesson)
+    # Проверка наличия файла (по манифесту хранилища, без обращения к диску)
+    if not storage_reconciler.is_available(part.audio_path if part else lesson.audio_path):
+        await callback.answer("Аудиофайл не найден", show_alert=True)
+        return
 
+    caption, keyboard = await build_lesson_view(lesson, callback.from_user.id, callback.bot, part, parts_count)
+
+    try:
+        if not await send_lesson_audio(callback.message, lesson, caption, keyboard, part=part):
+            await callback.answer("Аудиофайл не найден", show_alert=True)
+            return
     except Exception as e:
         # Ограничиваем длину сообщения для alert (макс 200 символов)
         error_msg = str(e)[:150]
@@ -113,7 +260,7 @@ async def play_lesson(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("prev_"))
+@router.callback_query(CallbackRoute.prefix("prev_"))
 @user_required_callback
 async def previous_lesson(callback: CallbackQuery):
     """
@@ -156,7 +303,7 @@ async def previous_lesson(callback: CallbackQuery):
     await play_lesson(new_callback)
 
 
-@router.callback_query(F.data.startswith("next_"))
+@router.callback_query(CallbackRoute.prefix("next_"))
 @user_required_callback
 async def next_lesson(callback: CallbackQuery):
     """
@@ -198,7 +345,7 @@ async def next_lesson(callback: CallbackQuery):
     await play_lesson(new_callback)
 
 
-@router.callback_query(F.data.startswith("author_"))
+@router.callback_query(CallbackRoute.prefix("author_"))
 @user_required_callback
 async def show_author_info(callback: CallbackQuery):
     """
@@ -235,7 +382,7 @@ async def show_author_info(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+$"))
 @user_required_callback
 async def show_teacher_info(callback: CallbackQuery):
     """
@@ -266,7 +413,7 @@ async def show_teacher_info(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("book_info_"))
+@router.callback_query(CallbackRoute.prefix("book_info_"))
 @user_required_callback
 async def show_book_info(callback: CallbackQuery):
     """
@@ -303,7 +450,7 @@ async def show_book_info(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "close_info")
+@router.callback_query(CallbackRoute.exact("close_info"))
 @user_required_callback
 async def close_info(callback: CallbackQuery):
     """
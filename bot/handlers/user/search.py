@@ -1,4 +1,3 @@
-from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -6,15 +5,16 @@ from aiogram.fsm.state import State, StatesGroup
 from bot.services.database_service import LessonService
 from bot.keyboards.user import get_search_results_keyboard, get_main_keyboard
 from bot.utils.decorators import user_required, user_required_callback, is_user_admin
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 class SearchState(StatesGroup):
     search_query = State()
 
 
-@router.callback_query(F.data == "search_lessons")
+@router.callback_query(CallbackRoute.exact("search_lessons"))
 @user_required_callback
 async def start_search(callback: CallbackQuery, state: FSMContext, user):
     """
@@ -73,7 +73,7 @@ async def process_search(message: Message, state: FSMContext, user):
     await state.clear()
 
 
-@router.callback_query(F.data == "cancel_search")
+@router.callback_query(CallbackRoute.exact("cancel_search"))
 @user_required_callback
 async def cancel_search(callback: CallbackQuery, state: FSMContext, user):
     """
@@ -94,7 +94,7 @@ async def cancel_search(callback: CallbackQuery, state: FSMContext, user):
     await callback.answer("❌ Поиск отменен")
 
 
-@router.callback_query(F.data == "new_search")
+@router.callback_query(CallbackRoute.exact("new_search"))
 @user_required_callback
 async def new_search(callback: CallbackQuery, state: FSMContext, user):
     """
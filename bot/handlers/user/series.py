@@ -1,8 +1,9 @@
 """
 Обработчики для работы с сериями уроков (пользовательский интерфейс)
 """
-from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from typing import Tuple
+
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 
 from bot.services.database_service import (
@@ -10,36 +11,30 @@ from bot.services.database_service import (
     get_series_by_book,
     get_series_by_id,
     get_test_by_series,
+    get_book_by_id,
+    get_lesson_teacher_by_id,
     LessonService
 )
 from bot.keyboards.user import get_series_keyboard, get_series_menu_keyboard, get_lessons_keyboard
 from bot.utils.decorators import user_required_callback
+from bot.utils.render_cache import RenderedScreen, render_cache
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
-
+router = CallbackRouter()
 
-@router.callback_query(F.data.regexp(r"^book_\d+$"))
-@user_required_callback
-async def show_book_teachers(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать список преподавателей книги
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    book_id = int(callback.data.split("_")[1])
+async def render_book_teachers(book_id: int) -> RenderedScreen:
+    """Экран преподавателей книги"""
     book = await BookService.get_book_by_id(book_id)
 
     if not book:
-        await callback.answer("📖 Книга не найдена", show_alert=True)
-        return
+        return RenderedScreen(alert="📖 Книга не найдена")
 
     # Получаем серии этой книги
     series_list = await get_series_by_book(book_id)
 
     if not series_list:
-        await callback.answer("📭 В этой книге пока нет уроков", show_alert=True)
-        return
+        return RenderedScreen(alert="📭 В этой книге пока нет уроков")
 
     # Получаем уникальных преподавателей этой книги
     teachers = {}
@@ -49,11 +44,7 @@ async def show_book_teachers(callback: CallbackQuery, state: FSMContext):
                 teachers[series.teacher_id] = series.teacher
 
     if not teachers:
-        await callback.answer("📭 В этой книге пока нет преподавателей", show_alert=True)
-        return
-
-    # Сохраняем book_id для навигации назад
-    await state.update_data(current_book_id=book_id)
+        return RenderedScreen(alert="📭 В этой книге пока нет преподавателей")
 
     text = ""
     if book.theme:
@@ -65,7 +56,6 @@ async def show_book_teachers(callback: CallbackQuery, state: FSMContext):
     )
 
     # Создаём клавиатуру с преподавателями
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     keyboard_buttons = []
     for teacher in teachers.values():
         keyboard_buttons.append([InlineKeyboardButton(
@@ -83,43 +73,30 @@ async def show_book_teachers(callback: CallbackQuery, state: FSMContext):
         callback_data="main_menu"
     )])
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
-    await callback.answer()
+    return RenderedScreen(
+        text=text,
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard_buttons),
+        # Сохраняем book_id для навигации назад
+        state_data={"current_book_id": book_id}
+    )
 
 
-@router.callback_query(F.data.startswith("book_teacher_"))
-@user_required_callback
-async def show_teacher_series_for_book(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать серии конкретного преподавателя по выбранной книге
-    """
-    # Очищаем состояние
-    await state.clear()
-
-    parts = callback.data.split("_")
-    book_id = int(parts[2])
-    teacher_id = int(parts[3])
+async def render_teacher_series_for_book(ids: Tuple[int, int]) -> RenderedScreen:
+    """Экран серий преподавателя по книге"""
+    book_id, teacher_id = ids
 
     book = await BookService.get_book_by_id(book_id)
-    from bot.services.database_service import get_lesson_teacher_by_id
     teacher = await get_lesson_teacher_by_id(teacher_id)
 
     if not book or not teacher:
-        await callback.answer("❌ Данные не найдены", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Данные не найдены")
 
     # Получаем серии этого преподавателя для этой книги
     series_list = await get_series_by_book(book_id)
     teacher_series = [s for s in series_list if s.teacher_id == teacher_id]
 
     if not teacher_series:
-        await callback.answer("📭 У этого преподавателя пока нет серий по этой книге", show_alert=True)
-        return
-
-    # Сохраняем данные для навигации назад
-    await state.update_data(current_book_id=book_id, current_teacher_id=teacher_id)
+        return RenderedScreen(alert="📭 У этого преподавателя пока нет серий по этой книге")
 
     text = ""
     if book.theme:
@@ -132,7 +109,6 @@ async def show_teacher_series_for_book(callback: CallbackQuery, state: FSMContex
     )
 
     # Создаём клавиатуру с сериями
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     keyboard_buttons = []
     for series in teacher_series:
         lessons_count = series.active_lessons_count
@@ -152,44 +128,19 @@ async def show_teacher_series_for_book(callback: CallbackQuery, state: FSMContex
         callback_data="main_menu"
     )])
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
-    await callback.answer()
-
-
-@router.callback_query(F.data.startswith("series_") & ~F.data.startswith("series_lessons_"))
-@user_required_callback
-async def show_series_menu(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать меню серии (Уроки / Общий тест / Назад)
-    """
-    # Очищаем состояние
-    await state.clear()
-
-    series_id = int(callback.data.split("_")[1])
-    series = await get_series_by_id(series_id)
-
-    if not series:
-        await callback.answer("📁 Серия не найдена", show_alert=True)
-        return
-
-    # Сохраняем series_id, book_id и teacher_id для навигации
-    await state.update_data(
-        current_series_id=series_id,
-        current_book_id=series.book_id,
-        current_teacher_id=series.teacher_id
+    return RenderedScreen(
+        text=text,
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard_buttons),
+        # Сохраняем данные для навигации назад
+        state_data={"current_book_id": book_id, "current_teacher_id": teacher_id}
     )
 
-    # Проверяем, есть ли тест для этой серии
-    test = await get_test_by_series(series_id)
-    has_test = test is not None and test.is_active
 
-    # Формируем информацию о серии
+async def _series_header(series) -> str:
+    """Шапка экрана серии: тема, книга, автор, преподаватель, серия"""
     text = ""
 
     # Получаем информацию о книге для отображения темы и автора
-    from bot.services.database_service import get_book_by_id
     book = None
     if series.book_id:
         book = await get_book_by_id(series.book_id)
@@ -211,6 +162,23 @@ async def show_series_menu(callback: CallbackQuery, state: FSMContext):
     # Название серии
     text += f"📁 Серия: {series.display_name}\n"
 
+    return text
+
+
+async def render_series_menu(series_id: int) -> RenderedScreen:
+    """Экран меню серии"""
+    series = await get_series_by_id(series_id)
+
+    if not series:
+        return RenderedScreen(alert="📁 Серия не найдена")
+
+    # Проверяем, есть ли тест для этой серии
+    test = await get_test_by_series(series_id)
+    has_test = test is not None and test.is_active
+
+    # Формируем информацию о серии
+    text = await _series_header(series)
+
     # Статистика
     text += f"🎧 Уроков: {series.active_lessons_count}\n"
 
@@ -227,64 +195,37 @@ async def show_series_menu(callback: CallbackQuery, state: FSMContext):
 
     text += "\n<b>Выберите действие:</b>"
 
-    keyboard = get_series_menu_keyboard(series_id, has_test)
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
-    await callback.answer()
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_series_menu_keyboard(series_id, has_test),
+        # Сохраняем series_id, book_id и teacher_id для навигации
+        state_data={
+            "current_series_id": series_id,
+            "current_book_id": series.book_id,
+            "current_teacher_id": series.teacher_id
+        }
+    )
 
 
-@router.callback_query(F.data.startswith("series_lessons_"))
-@user_required_callback
-async def show_series_lessons(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать список уроков серии с кнопками тестов
-    """
-    series_id = int(callback.data.split("_")[2])
+async def render_series_lessons(series_id: int) -> RenderedScreen:
+    """Экран списка уроков серии"""
     series = await get_series_by_id(series_id)
 
     if not series:
-        await callback.answer("📁 Серия не найдена", show_alert=True)
-        return
+        return RenderedScreen(alert="📁 Серия не найдена")
 
     # Получаем уроки этой серии
     lessons = await LessonService.get_lessons_by_series(series_id)
 
     if not lessons:
-        await callback.answer("📭 В этой серии пока нет уроков", show_alert=True)
-        return
-
-    # Сохраняем series_id для навигации
-    await state.update_data(current_series_id=series_id)
+        return RenderedScreen(alert="📭 В этой серии пока нет уроков")
 
     # TODO: Проверить, есть ли тесты для каждого урока
     # Пока передаем пустой словарь, позже добавим проверку
     has_tests = {}
 
     # Формируем текст с полной иерархией
-    text = ""
-
-    # Получаем информацию о книге для отображения темы и автора
-    from bot.services.database_service import get_book_by_id
-    book = None
-    if series.book_id:
-        book = await get_book_by_id(series.book_id)
-
-    # Тема
-    if book and book.theme:
-        text += f"📚 Тема: {book.theme.name}\n"
-
-    # Книга
-    text += f"📖 Книга: «{series.book_title or 'Не указана'}»\n"
-
-    # Автор книги
-    if book and book.author:
-        text += f"✍️ Автор: {book.author_info}\n"
-
-    # Преподаватель
-    text += f"🎙️ Преподаватель: {series.teacher_name}\n"
-
-    # Серия
-    text += f"📁 Серия: {series.display_name}\n"
+    text = await _series_header(series)
 
     # Длительность
     if series.total_duration_seconds > 0:
@@ -298,77 +239,118 @@ async def show_series_lessons(callback: CallbackQuery, state: FSMContext):
 
     text += f"\n🎧 Список уроков ({len(lessons)}):"
 
-    keyboard = get_lessons_keyboard(lessons, series_id, has_tests)
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_lessons_keyboard(lessons, series_id, has_tests),
+        # Сохраняем series_id для навигации
+        state_data={"current_series_id": series_id}
+    )
+
+
+@router.callback_query(CallbackRoute.regexp(r"^book_\d+$"))
+@user_required_callback
+async def show_book_teachers(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать список преподавателей книги
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    book_id = int(callback.data.split("_")[1])
+    screen = await render_cache.get_or_render("book_teachers", book_id, render_book_teachers)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await state.update_data(**screen.state_data)
 
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("back_to_series_lessons_"))
+@router.callback_query(CallbackRoute.prefix("book_teacher_"))
 @user_required_callback
-async def back_to_series_lessons(callback: CallbackQuery, state: FSMContext):
+async def show_teacher_series_for_book(callback: CallbackQuery, state: FSMContext):
     """
-    Вернуться к списку уроков серии
+    Показать серии конкретного преподавателя по выбранной книге
     """
-    series_id = int(callback.data.split("_")[4])
+    # Очищаем состояние
+    await state.clear()
 
-    # Получаем серию и уроки напрямую
-    series = await get_series_by_id(series_id)
+    parts = callback.data.split("_")
+    book_id = int(parts[2])
+    teacher_id = int(parts[3])
 
-    if not series:
-        await callback.answer("📁 Серия не найдена", show_alert=True)
+    screen = await render_cache.get_or_render(
+        "book_teacher_series", (book_id, teacher_id), render_teacher_series_for_book
+    )
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
         return
 
-    lessons = await LessonService.get_lessons_by_series(series_id)
+    await state.update_data(**screen.state_data)
 
-    if not lessons:
-        await callback.answer("📭 В этой серии пока нет уроков", show_alert=True)
-        return
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
 
-    await state.update_data(current_series_id=series_id)
 
-    # TODO: Проверить наличие тестов для каждого урока
-    has_tests = {}
+@router.callback_query(CallbackRoute.prefix("series_", exclude=("series_lessons_",)))
+@user_required_callback
+async def show_series_menu(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать меню серии (Уроки / Общий тест / Назад)
+    """
+    # Очищаем состояние
+    await state.clear()
 
-    # Формируем текст с полной иерархией
-    text = ""
+    series_id = int(callback.data.split("_")[1])
+    screen = await render_cache.get_or_render("series_menu", series_id, render_series_menu)
 
-    # Получаем информацию о книге для отображения темы и автора
-    from bot.services.database_service import get_book_by_id
-    book = None
-    if series.book_id:
-        book = await get_book_by_id(series.book_id)
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
 
-    # Тема
-    if book and book.theme:
-        text += f"📚 Тема: {book.theme.name}\n"
+    await state.update_data(**screen.state_data)
 
-    # Книга
-    text += f"📖 Книга: «{series.book_title or 'Не указана'}»\n"
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
 
-    # Автор книги
-    if book and book.author:
-        text += f"✍️ Автор: {book.author_info}\n"
 
-    # Преподаватель
-    text += f"🎙️ Преподаватель: {series.teacher_name}\n"
+@router.callback_query(CallbackRoute.prefix("series_lessons_"))
+@user_required_callback
+async def show_series_lessons(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать список уроков серии с кнопками тестов
+    """
+    series_id = int(callback.data.split("_")[2])
+    screen = await render_cache.get_or_render("series_lessons", series_id, render_series_lessons)
 
-    # Серия
-    text += f"📁 Серия: {series.display_name}\n"
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
 
-    # Длительность
-    if series.total_duration_seconds > 0:
-        text += f"⏱️ Длительность: {series.formatted_total_duration}\n"
+    await state.update_data(**screen.state_data)
 
-    # Статус
-    if series.is_completed:
-        text += "✅ Серия завершена\n"
-    else:
-        text += "🔄 В процессе\n"
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
 
-    text += f"\n🎧 Список уроков ({len(lessons)}):"
 
-    keyboard = get_lessons_keyboard(lessons, series_id, has_tests)
+@router.callback_query(CallbackRoute.prefix("back_to_series_lessons_"))
+@user_required_callback
+async def back_to_series_lessons(callback: CallbackQuery, state: FSMContext):
+    """
+    Вернуться к списку уроков серии
+    """
+    series_id = int(callback.data.split("_")[4])
+    screen = await render_cache.get_or_render("series_lessons", series_id, render_series_lessons)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await state.update_data(**screen.state_data)
 
     # Если сообщение содержит аудио (нельзя edit_text), удаляем его и отправляем текстовое
     if callback.message.audio:
@@ -376,15 +358,15 @@ async def back_to_series_lessons(callback: CallbackQuery, state: FSMContext):
             await callback.message.delete()
         except:
             pass
-        await callback.message.answer(text, reply_markup=keyboard)
+        await callback.message.answer(screen.text, reply_markup=screen.reply_markup)
     else:
         # Если текстовое сообщение, редактируем
-        await callback.message.edit_text(text, reply_markup=keyboard)
+        await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
 
     await callback.answer()
 
 
-@router.callback_query(F.data == "back_to_series_list")
+@router.callback_query(CallbackRoute.exact("back_to_series_list"))
 @user_required_callback
 async def back_to_series_list(callback: CallbackQuery, state: FSMContext):
     """
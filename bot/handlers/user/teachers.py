@@ -1,8 +1,9 @@
 """
 Обработчики для навигации по преподавателям (пользовательский интерфейс)
 """
-from aiogram import Router, F
-from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from typing import Tuple
+
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 
 from bot.services.database_service import (
@@ -17,7 +18,6 @@ from bot.services.database_service import (
     get_questions_by_lesson,
     get_bookmark_by_user_and_lesson,
     get_user_by_telegram_id,
-    update_lesson,
     count_user_bookmarks,
     get_lesson_by_id,
     create_bookmark,
@@ -35,11 +35,15 @@ from bot.keyboards.user import (
     get_teacher_lesson_control_keyboard,
 )
 from bot.utils.decorators import user_required_callback
-from bot.utils.audio_utils import AudioUtils
+from bot.services.storage_service import storage_reconciler
+from bot.utils.render_cache import RenderedScreen, render_cache
+from bot.utils.deep_links import LINK_LESSON, get_share_url
 from bot.states.bookmark_states import BookmarkStates
 from bot.handlers.user.bookmarks import MAX_BOOKMARKS
+from bot.handlers.user.lessons import send_lesson_audio, get_lesson_part, format_part_caption
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
 async def safe_edit_or_send(callback: CallbackQuery, text: str, reply_markup=None):
@@ -58,79 +62,49 @@ async def safe_edit_or_send(callback: CallbackQuery, text: str, reply_markup=Non
         await callback.message.answer(text, reply_markup=reply_markup)
 
 
-@router.callback_query(F.data == "show_teachers")
-@user_required_callback
-async def show_teachers_handler(callback: CallbackQuery, state: FSMContext):
-    """
-    Обработчик кнопки 'Список преподавателей' - показывает список доступных преподавателей
-    """
-    # Очищаем состояние
-    await state.clear()
-
+async def render_teachers(_: None) -> RenderedScreen:
+    """Экран списка преподавателей"""
     teachers = await LessonTeacherService.get_all_active_teachers()
 
-    text = "👤 Выберите преподавателя:"
-    keyboard = get_teachers_keyboard(teachers)
-
     if not teachers:
-        text = "📭 Пока нет доступных преподавателей"
-
-    await safe_edit_or_send(callback, text, reply_markup=keyboard if teachers else None)
-    await callback.answer()
+        return RenderedScreen(text="📭 Пока нет доступных преподавателей")
 
+    return RenderedScreen(
+        text="👤 Выберите преподавателя:",
+        reply_markup=get_teachers_keyboard(teachers)
+    )
 
-@router.callback_query(F.data.startswith("teacher_nav_"))
-@user_required_callback
-async def show_teacher_themes(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать список тем выбранного преподавателя
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    teacher_id = int(callback.data.split("_")[2])
+async def render_teacher_themes(teacher_id: int) -> RenderedScreen:
+    """Экран тем преподавателя"""
     teacher = await LessonTeacherService.get_teacher_by_id(teacher_id)
 
     if not teacher:
-        await callback.answer("❌ Преподаватель не найден", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Преподаватель не найден")
 
     themes = await get_themes_by_teacher(teacher_id)
 
     if not themes:
-        await callback.answer("📭 У этого преподавателя пока нет доступных тем", show_alert=True)
-        return
-
-    text = f"🎙️ Преподаватель: {teacher.name}\n\nВыберите тему:"
-    keyboard = get_teacher_themes_keyboard(themes, teacher_id)
-
-    await safe_edit_or_send(callback, text, reply_markup=keyboard)
-    await callback.answer()
+        return RenderedScreen(alert="📭 У этого преподавателя пока нет доступных тем")
 
+    return RenderedScreen(
+        text=f"🎙️ Преподаватель: {teacher.name}\n\nВыберите тему:",
+        reply_markup=get_teacher_themes_keyboard(themes, teacher_id)
+    )
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_theme_\d+$"))
-@user_required_callback
-async def show_teacher_books(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать книги преподавателя по выбранной теме
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    parts = callback.data.split("_")
-    teacher_id = int(parts[1])
-    theme_id = int(parts[3])
+async def render_teacher_books(ids: Tuple[int, int]) -> RenderedScreen:
+    """Экран книг преподавателя по теме"""
+    teacher_id, theme_id = ids
 
     teacher = await LessonTeacherService.get_teacher_by_id(teacher_id)
     if not teacher:
-        await callback.answer("❌ Преподаватель не найден", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Преподаватель не найден")
 
     books = await get_books_by_teacher_and_theme(teacher_id, theme_id)
 
     if not books:
-        await callback.answer("📭 У этого преподавателя нет книг по данной теме", show_alert=True)
-        return
+        return RenderedScreen(alert="📭 У этого преподавателя нет книг по данной теме")
 
     # Формируем текст с темой
     theme_name = books[0].theme.name if books and books[0].theme else "Неизвестная тема"
@@ -139,37 +113,26 @@ async def show_teacher_books(callback: CallbackQuery, state: FSMContext):
         f"📚 Тема: {theme_name}\n\n"
         f"Выберите книгу:"
     )
-    keyboard = get_teacher_books_keyboard(books, teacher_id, theme_id)
-
-    await safe_edit_or_send(callback, text, reply_markup=keyboard)
-    await callback.answer()
-
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_teacher_books_keyboard(books, teacher_id, theme_id)
+    )
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_book_\d+$"))
-@user_required_callback
-async def show_teacher_series(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать серии преподавателя по выбранной книге
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    parts = callback.data.split("_")
-    teacher_id = int(parts[1])
-    book_id = int(parts[3])
+async def render_teacher_series(ids: Tuple[int, int]) -> RenderedScreen:
+    """Экран серий преподавателя по книге"""
+    teacher_id, book_id = ids
 
     teacher = await LessonTeacherService.get_teacher_by_id(teacher_id)
     book = await BookService.get_book_by_id(book_id)
 
     if not teacher or not book:
-        await callback.answer("❌ Данные не найдены", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Данные не найдены")
 
     series_list = await get_series_by_teacher_and_book(teacher_id, book_id)
 
     if not series_list:
-        await callback.answer("📭 У этого преподавателя нет серий по данной книге", show_alert=True)
-        return
+        return RenderedScreen(alert="📭 У этого преподавателя нет серий по данной книге")
 
     text = (
         f"🎙️ Преподаватель: {teacher.name}\n"
@@ -178,30 +141,20 @@ async def show_teacher_series(callback: CallbackQuery, state: FSMContext):
         f"✍️ Автор книги: {book.author_info}\n\n"
         f"Выберите серию:"
     )
-    keyboard = get_teacher_series_keyboard(series_list, teacher_id, book_id)
-
-    await safe_edit_or_send(callback, text, reply_markup=keyboard)
-    await callback.answer()
-
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_teacher_series_keyboard(series_list, teacher_id, book_id)
+    )
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_series_\d+$"))
-@user_required_callback
-async def show_teacher_series_menu(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать меню серии для навигации через преподавателей (Уроки / Тест / Назад)
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    parts = callback.data.split("_")
-    teacher_id = int(parts[1])
-    series_id = int(parts[3])
+async def render_teacher_series_menu(ids: Tuple[int, int]) -> RenderedScreen:
+    """Экран меню серии в навигации через преподавателей"""
+    teacher_id, series_id = ids
 
     series = await get_series_by_id(series_id)
 
     if not series:
-        await callback.answer("❌ Серия не найдена", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Серия не найдена")
 
     # Проверяем наличие теста для серии
     test = await get_test_by_series(series_id)
@@ -217,36 +170,25 @@ async def show_teacher_series_menu(callback: CallbackQuery, state: FSMContext):
 
     # Получаем book_id для навигации назад
     book_id = series.book_id if series.book_id else 0
-    keyboard = get_teacher_series_menu_keyboard(series_id, teacher_id, book_id, has_test)
-
-    await safe_edit_or_send(callback, text, reply_markup=keyboard)
-    await callback.answer()
-
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_teacher_series_menu_keyboard(series_id, teacher_id, book_id, has_test)
+    )
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_series_lessons_\d+$"))
-@user_required_callback
-async def show_teacher_series_lessons(callback: CallbackQuery, state: FSMContext):
-    """
-    Показать список уроков серии для навигации через преподавателей
-    """
-    # Очищаем состояние
-    await state.clear()
 
-    parts = callback.data.split("_")
-    teacher_id = int(parts[1])
-    series_id = int(parts[4])  # teacher_X_series_lessons_Y -> parts[4] = Y
+async def render_teacher_series_lessons(ids: Tuple[int, int]) -> RenderedScreen:
+    """Экран списка уроков серии в навигации через преподавателей"""
+    teacher_id, series_id = ids
 
     series = await get_series_by_id(series_id)
 
     if not series:
-        await callback.answer("❌ Серия не найдена", show_alert=True)
-        return
+        return RenderedScreen(alert="❌ Серия не найдена")
 
     lessons = await LessonService.get_lessons_by_series(series_id)
 
     if not lessons:
-        await callback.answer("📭 В этой серии пока нет уроков", show_alert=True)
-        return
+        return RenderedScreen(alert="📭 В этой серии пока нет уроков")
 
     # TODO: Проверить, есть ли тесты для каждого урока
     # Пока передаем пустой словарь, позже добавим проверку
@@ -261,42 +203,164 @@ async def show_teacher_series_lessons(callback: CallbackQuery, state: FSMContext
 
     # Получаем book_id для навигации назад
     book_id = series.book_id if series.book_id else 0
-    keyboard = get_teacher_lessons_keyboard(lessons, series_id, teacher_id, book_id, has_tests)
+    return RenderedScreen(
+        text=text,
+        reply_markup=get_teacher_lessons_keyboard(lessons, series_id, teacher_id, book_id, has_tests)
+    )
+
+
+@router.callback_query(CallbackRoute.exact("show_teachers"))
+@user_required_callback
+async def show_teachers_handler(callback: CallbackQuery, state: FSMContext):
+    """
+    Обработчик кнопки 'Список преподавателей' - показывает список доступных преподавателей
+    """
+    # Очищаем состояние
+    await state.clear()
 
-    await safe_edit_or_send(callback, text, reply_markup=keyboard)
+    screen = await render_cache.get_or_render("teachers", None, render_teachers)
+
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data == "back_to_teachers")
+@router.callback_query(CallbackRoute.prefix("teacher_nav_"))
 @user_required_callback
-async def back_to_teachers_handler(callback: CallbackQuery, state: FSMContext):
+async def show_teacher_themes(callback: CallbackQuery, state: FSMContext):
     """
-    Возврат к списку преподавателей
+    Показать список тем выбранного преподавателя
     """
     # Очищаем состояние
     await state.clear()
 
-    teachers = await LessonTeacherService.get_all_active_teachers()
+    teacher_id = int(callback.data.split("_")[2])
+    screen = await render_cache.get_or_render("teacher_themes", teacher_id, render_teacher_themes)
 
-    text = "👤 Выберите преподавателя:"
-    keyboard = get_teachers_keyboard(teachers)
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
 
-    if not teachers:
-        text = "📭 Пока нет доступных преподавателей"
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_theme_\d+$"))
+@user_required_callback
+async def show_teacher_books(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать книги преподавателя по выбранной теме
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    parts = callback.data.split("_")
+    teacher_id = int(parts[1])
+    theme_id = int(parts[3])
+
+    screen = await render_cache.get_or_render("teacher_books", (teacher_id, theme_id), render_teacher_books)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_book_\d+$"))
+@user_required_callback
+async def show_teacher_series(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать серии преподавателя по выбранной книге
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    parts = callback.data.split("_")
+    teacher_id = int(parts[1])
+    book_id = int(parts[3])
+
+    screen = await render_cache.get_or_render("teacher_series", (teacher_id, book_id), render_teacher_series)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_series_\d+$"))
+@user_required_callback
+async def show_teacher_series_menu(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать меню серии для навигации через преподавателей (Уроки / Тест / Назад)
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    parts = callback.data.split("_")
+    teacher_id = int(parts[1])
+    series_id = int(parts[3])
+
+    screen = await render_cache.get_or_render("teacher_series_menu", (teacher_id, series_id), render_teacher_series_menu)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_series_lessons_\d+$"))
+@user_required_callback
+async def show_teacher_series_lessons(callback: CallbackQuery, state: FSMContext):
+    """
+    Показать список уроков серии для навигации через преподавателей
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    parts = callback.data.split("_")
+    teacher_id = int(parts[1])
+    series_id = int(parts[4])  # teacher_X_series_lessons_Y -> parts[4] = Y
+
+    screen = await render_cache.get_or_render("teacher_series_lessons", (teacher_id, series_id), render_teacher_series_lessons)
+
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
+        return
+
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
+    await callback.answer()
+
+
+@router.callback_query(CallbackRoute.exact("back_to_teachers"))
+@user_required_callback
+async def back_to_teachers_handler(callback: CallbackQuery, state: FSMContext):
+    """
+    Возврат к списку преподавателей
+    """
+    # Очищаем состояние
+    await state.clear()
+
+    screen = await render_cache.get_or_render("teachers", None, render_teachers)
 
-    await safe_edit_or_send(callback, text, reply_markup=keyboard if teachers else None)
+    await safe_edit_or_send(callback, screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_play_lesson_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_play_lesson_\d+(?:_part_\d+)?$"))
 @user_required_callback
 async def play_teacher_lesson(callback: CallbackQuery):
     """
-    Воспроизведение урока из навигации через преподавателей
+    Воспроизведение урока (или его части) из навигации через преподавателей
     """
     parts = callback.data.split("_")
-    teacher_id = int(parts[1])  # teacher_X_play_lesson_Y
-    lesson_id = int(parts[4])   # teacher_X_play_lesson_Y
+    teacher_id = int(parts[1])  # teacher_X_play_lesson_Y[_part_N]
+    lesson_id = int(parts[4])   # teacher_X_play_lesson_Y[_part_N]
+    part_number = int(parts[6]) if len(parts) > 6 else 1
 
     lesson = await LessonService.get_lesson_by_id(lesson_id)
 
@@ -308,8 +372,10 @@ async def play_teacher_lesson(callback: CallbackQuery):
         await callback.answer("Аудиофайл недоступен", show_alert=True)
         return
 
-    # Проверка существования файла
-    if not AudioUtils.file_exists(lesson.audio_path):
+    lesson_part, parts_count = await get_lesson_part(lesson.id, part_number)
+
+    # Проверка наличия файла (по манифесту хранилища, без обращения к диску)
+    if not storage_reconciler.is_available(lesson_part.audio_path if lesson_part else lesson.audio_path):
         await callback.answer("Аудиофайл не найден", show_alert=True)
         return
 
@@ -321,6 +387,7 @@ async def play_teacher_lesson(callback: CallbackQuery):
         f"🎙️ Преподаватель: {lesson.teacher_name}\n"
         f"⏱️ Длительность: {lesson.formatted_duration}\n"
     )
+    caption += format_part_caption(lesson_part, parts_count)
 
     # Добавляем теги, если они есть
     if lesson.tags_list:
@@ -350,43 +417,21 @@ async def play_teacher_lesson(callback: CallbackQuery):
             has_bookmark = True
 
     # Клавиатура управления (с контекстом преподавателя!)
+    share_url = await get_share_url(callback.bot, LINK_LESSON, lesson.id)
     keyboard = get_teacher_lesson_control_keyboard(
         lesson,
         teacher_id=teacher_id,
         has_test=has_test,
-        has_bookmark=has_bookmark
+        has_bookmark=has_bookmark,
+        share_url=share_url,
+        part_number=lesson_part.part_number if lesson_part else 1,
+        parts_count=parts_count
     )
 
-    # ПАТТЕРН ОДНОГО ОКНА: удаляем предыдущее сообщение
     try:
-        await callback.message.delete()
-    except:
-        pass
-
-    try:
-        # Если есть кешированный file_id - используем его (быстро!)
-        if lesson.telegram_file_id:
-            sent_message = await callback.message.answer_audio(
-                audio=lesson.telegram_file_id,
-                caption=caption,
-                reply_markup=keyboard
-            )
-        else:
-            # Первая отправка - загружаем файл и сохраняем file_id
-            audio_file = FSInputFile(lesson.audio_path)
-            sent_message = await callback.message.answer_audio(
-                audio=audio_file,
-                title=lesson.title,
-                caption=caption,
-                reply_markup=keyboard
-            )
-
-            # Сохраняем file_id для следующих отправок
-            if sent_message.audio:
-                lesson.telegram_file_id = sent_message.audio.file_id
-                # Обновляем в БД
-                await update_lesson(lesson)
-
+        if not await send_lesson_audio(callback.message, lesson, caption, keyboard, part=lesson_part):
+            await callback.answer("Аудиофайл не найден", show_alert=True)
+            return
     except Exception as e:
         # Ограничиваем длину сообщения для alert (макс 200 символов)
         error_msg = str(e)[:150]
@@ -396,7 +441,7 @@ async def play_teacher_lesson(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_prev_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_prev_\d+$"))
 @user_required_callback
 async def teacher_previous_lesson(callback: CallbackQuery):
     """
@@ -440,7 +485,7 @@ async def teacher_previous_lesson(callback: CallbackQuery):
     await play_teacher_lesson(new_callback)
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_next_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_next_\d+$"))
 @user_required_callback
 async def teacher_next_lesson(callback: CallbackQuery):
     """
@@ -486,7 +531,7 @@ async def teacher_next_lesson(callback: CallbackQuery):
 
 # ==================== ЗАКЛАДКИ С КОНТЕКСТОМ ПРЕПОДАВАТЕЛЯ ====================
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_add_bookmark_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_add_bookmark_\d+$"))
 @user_required_callback
 async def teacher_add_bookmark_start(callback: CallbackQuery, state: FSMContext):
     """Начало добавления закладки (из навигации преподавателей)"""
@@ -559,7 +604,7 @@ async def teacher_add_bookmark_start(callback: CallbackQuery, state: FSMContext)
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_remove_bookmark_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_remove_bookmark_\d+$"))
 @user_required_callback
 async def teacher_remove_bookmark_from_lesson(callback: CallbackQuery, state: FSMContext):
     """Удалить закладку прямо с экрана урока (из навигации преподавателей)"""
@@ -614,7 +659,7 @@ async def teacher_remove_bookmark_from_lesson(callback: CallbackQuery, state: FS
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_bookmark_rename_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_bookmark_rename_\d+$"))
 @user_required_callback
 async def teacher_bookmark_rename_start(callback: CallbackQuery, state: FSMContext, user):
     """Начало переименования закладки (из навигации преподавателей)"""
@@ -652,7 +697,7 @@ async def teacher_bookmark_rename_start(callback: CallbackQuery, state: FSMConte
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_bookmark_delete_\d+$") & ~F.data.regexp(r"^teacher_\d+_bookmark_delete_confirm_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_bookmark_delete_\d+$", exclude=(r"^teacher_\d+_bookmark_delete_confirm_\d+$",)))
 @user_required_callback
 async def teacher_bookmark_delete_confirm(callback: CallbackQuery, state: FSMContext, user):
     """Подтверждение удаления закладки (из навигации преподавателей)"""
@@ -683,7 +728,7 @@ async def teacher_bookmark_delete_confirm(callback: CallbackQuery, state: FSMCon
     await callback.answer()
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_bookmark_delete_confirm_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_bookmark_delete_confirm_\d+$"))
 @user_required_callback
 async def teacher_bookmark_delete_execute(callback: CallbackQuery, state: FSMContext, user):
     """Выполнение удаления закладки (из навигации преподавателей)"""
@@ -719,7 +764,7 @@ async def teacher_bookmark_delete_execute(callback: CallbackQuery, state: FSMCon
 
 # ==================== ТЕСТЫ С КОНТЕКСТОМ ПРЕПОДАВАТЕЛЯ ====================
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_lesson_test_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_lesson_test_\d+$"))
 @user_required_callback
 async def teacher_lesson_test(callback: CallbackQuery, state: FSMContext):
     """Начать тест по конкретному уроку (из навигации преподавателей)"""
@@ -738,7 +783,7 @@ async def teacher_lesson_test(callback: CallbackQuery, state: FSMContext):
     await show_test_after_lesson(new_callback, state)
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_start_test_\d+_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_start_test_\d+_\d+$"))
 @user_required_callback
 async def teacher_start_test(callback: CallbackQuery, state: FSMContext):
     """Запустить тест (из навигации преподавателей) - кнопка 'Пройти ещё раз'"""
@@ -759,7 +804,7 @@ async def teacher_start_test(callback: CallbackQuery, state: FSMContext):
     await start_test(new_callback, state)
 
 
-@router.callback_query(F.data.regexp(r"^teacher_\d+_general_test_\d+$"))
+@router.callback_query(CallbackRoute.regexp(r"^teacher_\d+_general_test_\d+$"))
 @user_required_callback
 async def teacher_general_test(callback: CallbackQuery, state: FSMContext):
     """Показать общий тест по всей серии (из навигации преподавателей)"""
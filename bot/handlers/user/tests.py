@@ -2,7 +2,8 @@
 Обработчики для прохождения тестов пользователями
 """
 import logging
-from aiogram import Router, F
+from typing import Optional, Tuple
+
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
@@ -18,10 +19,11 @@ from bot.services.database_service import (
     get_best_attempt,
     get_series_by_id,
 )
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
 logger = logging.getLogger(__name__)
 
-router = Router()
+router = CallbackRouter()
 
 
 class TestStates(StatesGroup):
@@ -72,7 +74,7 @@ async def get_back_to_series_callback(series_id: int, state: FSMContext) -> str:
 
 # ==================== ПОКАЗ ДОСТУПНЫХ ТЕСТОВ ====================
 
-@router.callback_query(F.data.startswith("test_after_lesson_"))
+@router.callback_query(CallbackRoute.prefix("test_after_lesson_"))
 @user_required_callback
 async def show_test_after_lesson(callback: CallbackQuery, state: FSMContext, user):
     """Показать тест после прослушивания урока"""
@@ -186,7 +188,7 @@ async def show_test_after_lesson(callback: CallbackQuery, state: FSMContext, use
 
 # ==================== НАЧАЛО ПРОХОЖДЕНИЯ ТЕСТА ====================
 
-@router.callback_query(F.data.startswith("start_test_"))
+@router.callback_query(CallbackRoute.prefix("start_test_"))
 @user_required_callback
 async def start_test(callback: CallbackQuery, state: FSMContext):
     """Начать прохождение теста"""
@@ -263,7 +265,7 @@ async def show_question(callback: CallbackQuery, state: FSMContext, question_ind
 
 # ==================== ОБРАБОТКА ОТВЕТОВ ====================
 
-@router.callback_query(F.data.startswith("answer_"))
+@router.callback_query(CallbackRoute.prefix("answer_"))
 @user_required_callback
 async def process_answer(callback: CallbackQuery, state: FSMContext):
     """Обработать ответ на вопрос"""
@@ -408,7 +410,7 @@ async def show_test_results(callback: CallbackQuery, state: FSMContext):
 
 # ==================== ОТМЕНА ТЕСТА ====================
 
-@router.callback_query(F.data.startswith("cancel_test_"))
+@router.callback_query(CallbackRoute.prefix("cancel_test_"))
 @user_required_callback
 async def cancel_test(callback: CallbackQuery, state: FSMContext):
     """Отменить прохождение теста"""
@@ -458,7 +460,7 @@ async def cancel_test(callback: CallbackQuery, state: FSMContext):
 
 # ==================== ИСТОРИЯ ПОПЫТОК ====================
 
-@router.callback_query(F.data.startswith("test_history_"))
+@router.callback_query(CallbackRoute.prefix("test_history_"))
 @user_required_callback
 async def show_test_history(callback: CallbackQuery, state: FSMContext, user):
     """Показать историю попыток"""
@@ -530,7 +532,7 @@ async def show_test_history(callback: CallbackQuery, state: FSMContext, user):
 
 # ==================== ТЕСТЫ ПО УРОКАМ (новая навигация) ====================
 
-@router.callback_query(F.data.startswith("lesson_test_"))
+@router.callback_query(CallbackRoute.prefix("lesson_test_"))
 @user_required_callback
 async def start_lesson_test_new(callback: CallbackQuery, state: FSMContext):
     """Начать тест по конкретному уроку (новая навигация)"""
@@ -546,48 +548,44 @@ async def start_lesson_test_new(callback: CallbackQuery, state: FSMContext):
 
 # ==================== ОБЩИЙ ТЕСТ ПО СЕРИИ ====================
 
-@router.callback_query(F.data.startswith("general_test_") & ~F.data.startswith("general_test_history_"))
-@user_required_callback
-async def show_general_test(callback: CallbackQuery, state: FSMContext, user):
-    """Показать общий тест по всей серии"""
-    series_id = int(callback.data.split("_")[2])
+async def build_general_test_view(series_id: int, state: FSMContext, user) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+    """
+    Экран общего теста по серии (текст и клавиатура)
 
+    Returns:
+        None, если серия не найдена
+    """
     # Получаем серию
     series = await get_series_by_id(series_id)
 
     if not series:
-        await callback.answer("📁 Серия не найдена", show_alert=True)
-        return
+        return None
 
     # Получаем тест серии
     test = await get_test_by_series(series_id)
 
     if not test or not test.is_active:
         back_callback = await get_back_to_series_callback(series_id, state)
-        await callback.message.edit_text(
+        return (
             "🎓 <b>Общий тест</b>\n\n"
             "❌ Для этой серии пока нет теста.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardMarkup(inline_keyboard=[[
                 InlineKeyboardButton(text="⬅️ Назад к серии", callback_data=back_callback)
             ]])
         )
-        await callback.answer()
-        return
 
     # Получаем все вопросы теста
     all_questions = await get_questions_by_test(test.id)
 
     if not all_questions:
         back_callback = await get_back_to_series_callback(series_id, state)
-        await callback.message.edit_text(
+        return (
             "🎓 <b>Общий тест</b>\n\n"
             "❌ В этом тесте пока нет вопросов.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardMarkup(inline_keyboard=[[
                 InlineKeyboardButton(text="⬅️ Назад к серии", callback_data=back_callback)
             ]])
         )
-        await callback.answer()
-        return
 
     # Получаем лучшую попытку пользователя для общего теста (lesson_id=None)
     best_attempt = await get_best_attempt(user.id, test.id, lesson_id=None)
@@ -621,11 +619,27 @@ async def show_general_test(callback: CallbackQuery, state: FSMContext, user):
     builder.add(InlineKeyboardButton(text="⬅️ Назад к серии", callback_data=back_callback))
     builder.adjust(1)
 
-    await callback.message.edit_text(text, reply_markup=builder.as_markup())
+    return text, builder.as_markup()
+
+
+@router.callback_query(CallbackRoute.prefix("general_test_", exclude=("general_test_history_",)))
+@user_required_callback
+async def show_general_test(callback: CallbackQuery, state: FSMContext, user):
+    """Показать общий тест по всей серии"""
+    series_id = int(callback.data.split("_")[2])
+
+    view = await build_general_test_view(series_id, state, user)
+
+    if view is None:
+        await callback.answer("📁 Серия не найдена", show_alert=True)
+        return
+
+    text, keyboard = view
+    await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("start_general_test_"))
+@router.callback_query(CallbackRoute.prefix("start_general_test_"))
 @user_required_callback
 async def start_general_test(callback: CallbackQuery, state: FSMContext):
     """Начать прохождение общего теста по серии"""
@@ -665,7 +679,7 @@ async def start_general_test(callback: CallbackQuery, state: FSMContext):
     await show_question(callback, state, 0)
 
 
-@router.callback_query(F.data.startswith("general_test_history_"))
+@router.callback_query(CallbackRoute.prefix("general_test_history_"))
 @user_required_callback
 async def show_general_test_history(callback: CallbackQuery, user):
     """Показать историю попыток общего теста"""
@@ -1,15 +1,62 @@
-from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from bot.services.database_service import ThemeService, BookService
 from bot.keyboards.user import get_themes_keyboard, get_books_keyboard
 from bot.utils.decorators import user_required_callback
+from bot.utils.render_cache import RenderedScreen, render_cache
+from bot.utils.callback_router import CallbackRouter, CallbackRoute
 
-router = Router()
+router = CallbackRouter()
 
 
-@router.callback_query(F.data == "show_themes")
+async def render_themes(_: None) -> RenderedScreen:
+    """Экран списка тем"""
+    themes = await ThemeService.get_all_active_themes()
+    # Проверяем, есть ли книги без темы
+    no_theme_books_count = await BookService.get_books_without_theme_count()
+
+    if not themes and no_theme_books_count == 0:
+        return RenderedScreen(text="📭 Пока нет доступных тем")
+
+    return RenderedScreen(
+        text="📚 Выберите тему:",
+        reply_markup=get_themes_keyboard(themes, no_theme_books_count)
+    )
+
+
+async def render_books_without_theme(_: None) -> RenderedScreen:
+    """Экран книг без темы"""
+    books = await BookService.get_books_by_theme(None)
+
+    if not books:
+        return RenderedScreen(alert="📭 Нет книг без темы")
+
+    return RenderedScreen(
+        text=f"📖 Без темы\n\nВыберите книгу:",
+        reply_markup=get_books_keyboard(books)
+    )
+
+
+async def render_theme_books(theme_id: int) -> RenderedScreen:
+    """Экран книг темы"""
+    theme = await ThemeService.get_theme_by_id(theme_id)
+
+    if not theme:
+        return RenderedScreen(alert="❌ Тема не найдена")
+
+    books = await BookService.get_books_by_theme(theme_id)
+
+    if not books:
+        return RenderedScreen(alert="📭 В этой теме пока нет книг")
+
+    return RenderedScreen(
+        text=f"📚 Тема: {theme.name}\n\nВыберите книгу:",
+        reply_markup=get_books_keyboard(books)
+    )
+
+
+@router.callback_query(CallbackRoute.exact("show_themes"))
 @user_required_callback
 async def show_themes_handler(callback: CallbackQuery, state: FSMContext):
     """
@@ -18,21 +65,13 @@ async def show_themes_handler(callback: CallbackQuery, state: FSMContext):
     # Очищаем состояние (например, если был режим поиска)
     await state.clear()
 
-    themes = await ThemeService.get_all_active_themes()
-    # Проверяем, есть ли книги без темы
-    no_theme_books_count = await BookService.get_books_without_theme_count()
-
-    text = "📚 Выберите тему:"
-    keyboard = get_themes_keyboard(themes, no_theme_books_count)
-
-    if not themes and no_theme_books_count == 0:
-        text = "📭 Пока нет доступных тем"
+    screen = await render_cache.get_or_render("themes", None, render_themes)
 
-    await callback.message.edit_text(text, reply_markup=keyboard if (themes or no_theme_books_count > 0) else None)
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data == "theme_none")
+@router.callback_query(CallbackRoute.exact("theme_none"))
 @user_required_callback
 async def show_books_without_theme_handler(callback: CallbackQuery, state: FSMContext):
     """
@@ -41,20 +80,17 @@ async def show_books_without_theme_handler(callback: CallbackQuery, state: FSMCo
     # Очищаем состояние
     await state.clear()
 
-    books = await BookService.get_books_by_theme(None)
+    screen = await render_cache.get_or_render("books_without_theme", None, render_books_without_theme)
 
-    if not books:
-        await callback.answer("📭 Нет книг без темы", show_alert=True)
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
         return
 
-    text = f"📖 Без темы\n\nВыберите книгу:"
-    keyboard = get_books_keyboard(books)
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("theme_"))
+@router.callback_query(CallbackRoute.prefix("theme_"))
 @user_required_callback
 async def show_books_handler(callback: CallbackQuery, state: FSMContext):
     """
@@ -64,26 +100,17 @@ async def show_books_handler(callback: CallbackQuery, state: FSMContext):
     await state.clear()
 
     theme_id = int(callback.data.split("_")[1])
-    theme = await ThemeService.get_theme_by_id(theme_id)
+    screen = await render_cache.get_or_render("theme_books", theme_id, render_theme_books)
 
-    if not theme:
-        await callback.answer("❌ Тема не найдена", show_alert=True)
+    if screen.alert:
+        await callback.answer(screen.alert, show_alert=True)
         return
 
-    books = await BookService.get_books_by_theme(theme_id)
-
-    if not books:
-        await callback.answer("📭 В этой теме пока нет книг", show_alert=True)
-        return
-
-    text = f"📚 Тема: {theme.name}\n\nВыберите книгу:"
-    keyboard = get_books_keyboard(books)
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
 
 
-@router.callback_query(F.data == "back_to_themes")
+@router.callback_query(CallbackRoute.exact("back_to_themes"))
 @user_required_callback
 async def back_to_themes_handler(callback: CallbackQuery, state: FSMContext):
     """
@@ -92,15 +119,7 @@ async def back_to_themes_handler(callback: CallbackQuery, state: FSMContext):
     # Очищаем состояние
     await state.clear()
 
-    themes = await ThemeService.get_all_active_themes()
-    # Проверяем, есть ли книги без темы
-    no_theme_books_count = await BookService.get_books_without_theme_count()
-
-    text = "📚 Выберите тему:"
-    keyboard = get_themes_keyboard(themes, no_theme_books_count)
-
-    if not themes and no_theme_books_count == 0:
-        text = "📭 Пока нет доступных тем"
+    screen = await render_cache.get_or_render("themes", None, render_themes)
 
-    await callback.message.edit_text(text, reply_markup=keyboard if (themes or no_theme_books_count > 0) else None)
+    await callback.message.edit_text(screen.text, reply_markup=screen.reply_markup)
     await callback.answer()
@@ -240,7 +240,42 @@ def get_lessons_keyboard(lessons: list[Lesson], series_id: int, has_tests: dict
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_lesson_control_keyboard(lesson: Lesson, has_test: bool = False, has_bookmark: bool = False) -> InlineKeyboardMarkup:
+def get_lesson_parts_buttons(callback_prefix: str, part_number: int, parts_count: int) -> list[InlineKeyboardButton]:
+    """
+    Кнопки перехода между частями урока
+
+    Args:
+        callback_prefix: Начало callback_data, к нему добавляется номер части
+        part_number: Текущая часть
+        parts_count: Всего частей (меньше двух - кнопок нет)
+
+    Returns:
+        list[InlineKeyboardButton]: Кнопки "предыдущая/следующая часть"
+    """
+    buttons = []
+    if parts_count < 2:
+        return buttons
+    if part_number > 1:
+        buttons.append(InlineKeyboardButton(
+            text=f"⏮ Часть {part_number - 1}",
+            callback_data=f"{callback_prefix}{part_number - 1}"
+        ))
+    if part_number < parts_count:
+        buttons.append(InlineKeyboardButton(
+            text=f"Часть {part_number + 1} ⏭",
+            callback_data=f"{callback_prefix}{part_number + 1}"
+        ))
+    return buttons
+
+
+def get_lesson_control_keyboard(
+    lesson: Lesson,
+    has_test: bool = False,
+    has_bookmark: bool = False,
+    share_url: str = None,
+    part_number: int = 1,
+    parts_count: int = 0
+) -> InlineKeyboardMarkup:
     """
     Клавиатура управления воспроизведением урока
 
@@ -248,6 +283,9 @@ def get_lesson_control_keyboard(lesson: Lesson, has_test: bool = False, has_book
         lesson: Объект урока
         has_test: Есть ли тест для серии урока
         has_bookmark: Есть ли закладка на этот урок
+        share_url: Ссылка для кнопки "Поделиться" (deep link на урок)
+        part_number: Текущая часть урока
+        parts_count: Количество частей урока (0 - урок одним файлом)
 
     Returns:
         InlineKeyboardMarkup: Клавиатура управления
@@ -266,6 +304,11 @@ def get_lesson_control_keyboard(lesson: Lesson, has_test: bool = False, has_book
     ))
     keyboard.append(nav_buttons)
 
+    # Переход между частями длинного урока
+    parts_buttons = get_lesson_parts_buttons(f"lesson_{lesson.id}_part_", part_number, parts_count)
+    if parts_buttons:
+        keyboard.append(parts_buttons)
+
     # Следующая строка - информация о книге и авторе (горизонтально)
     book_author_buttons = []
     if lesson.book:
@@ -307,6 +350,13 @@ def get_lesson_control_keyboard(lesson: Lesson, has_test: bool = False, has_book
             callback_data=f"add_bookmark_{lesson.id}"
         )])
 
+    # Кнопка "Поделиться" - ссылка сразу на урок
+    if share_url:
+        keyboard.append([InlineKeyboardButton(
+            text="📤 Поделиться уроком",
+            url=share_url
+        )])
+
     # Последняя строка - возврат
     keyboard.append([InlineKeyboardButton(
         text="⬅️ К урокам",
@@ -639,7 +689,15 @@ def get_teacher_lessons_keyboard(lessons: list, series_id: int, teacher_id: int,
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_teacher_lesson_control_keyboard(lesson: Lesson, teacher_id: int, has_test: bool = False, has_bookmark: bool = False) -> InlineKeyboardMarkup:
+def get_teacher_lesson_control_keyboard(
+    lesson: Lesson,
+    teacher_id: int,
+    has_test: bool = False,
+    has_bookmark: bool = False,
+    share_url: str = None,
+    part_number: int = 1,
+    parts_count: int = 0
+) -> InlineKeyboardMarkup:
     """
     Клавиатура управления воспроизведением урока для навигации через преподавателей
 
@@ -648,6 +706,9 @@ def get_teacher_lesson_control_keyboard(lesson: Lesson, teacher_id: int, has_tes
         teacher_id: ID преподавателя (для правильной кнопки Назад)
         has_test: Есть ли тест для серии урока
         has_bookmark: Есть ли закладка на этот урок
+        share_url: Ссылка для кнопки "Поделиться" (deep link на урок)
+        part_number: Текущая часть урока
+        parts_count: Количество частей урока (0 - урок одним файлом)
 
     Returns:
         InlineKeyboardMarkup: Клавиатура управления
@@ -666,6 +727,13 @@ def get_teacher_lesson_control_keyboard(lesson: Lesson, teacher_id: int, has_tes
     ))
     keyboard.append(nav_buttons)
 
+    # Переход между частями длинного урока
+    parts_buttons = get_lesson_parts_buttons(
+        f"teacher_{teacher_id}_play_lesson_{lesson.id}_part_", part_number, parts_count
+    )
+    if parts_buttons:
+        keyboard.append(parts_buttons)
+
     # Следующая строка - информация о книге и авторе (горизонтально)
     book_author_buttons = []
     if lesson.book:
@@ -707,6 +775,13 @@ def get_teacher_lesson_control_keyboard(lesson: Lesson, teacher_id: int, has_tes
             callback_data=f"teacher_{teacher_id}_add_bookmark_{lesson.id}"
         )])
 
+    # Кнопка "Поделиться" - ссылка сразу на урок
+    if share_url:
+        keyboard.append([InlineKeyboardButton(
+            text="📤 Поделиться уроком",
+            url=share_url
+        )])
+
     # Последняя строка - возврат (с контекстом преподавателя)
     keyboard.append([InlineKeyboardButton(
         text="⬅️ К урокам",
@@ -14,7 +14,9 @@ from aiogram.client.default import DefaultBotProperties
 
 from bot.utils.config import config
 from bot.handlers import user, admin
+from bot.middlewares import ChatSequencerMiddleware
 from bot.models.database import engine, Base
+from bot.services.storage_service import storage_reconciler
 from bot.utils.timezone_utils import MOSCOW_TZ, get_moscow_now
 
 
@@ -129,6 +131,13 @@ async def main():
     
     # Создание диспетчера
     dp = Dispatcher()
+
+    # Апдейты одного чата - последовательно, разных чатов - параллельно
+    if config.update_execution_mode == "per_chat":
+        dp.update.outer_middleware(ChatSequencerMiddleware())
+        logger.info("Режим выполнения апдейтов: per_chat")
+    else:
+        logger.info("Режим выполнения апдейтов: parallel")
     
     # Включение роутеров (admin первым для приоритета специфичных хендлеров)
     dp.include_router(admin.router)
@@ -136,12 +145,26 @@ async def main():
 
     # Создание директории для аудиофайлов
     os.makedirs(config.audio_files_path, exist_ok=True)
+
+    # Фоновая сверка файлов на диске с уроками (манифест, удаление файлов без ссылок).
+    # Ссылка на задачу хранится: иначе её может собрать сборщик мусора
+    reconcile_task = None
+    if config.storage_reconcile_interval > 0:
+        reconcile_task = asyncio.create_task(storage_reconciler.run_forever(config.storage_reconcile_interval))
     
     logger.info("Бот запускается...")
     
-    # Удаление вебхуков и запуск поллинга
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        # Удаление вебхуков и запуск поллинга
+        await bot.delete_webhook(drop_pending_updates=True)
+        await dp.start_polling(bot, handle_as_tasks=True)
+    finally:
+        if reconcile_task is not None:
+            reconcile_task.cancel()
+            try:
+                await reconcile_task
+            except asyncio.CancelledError:
+                pass
 
 
 if __name__ == "__main__":
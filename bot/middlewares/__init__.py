@@ -0,0 +1,8 @@
+"""
+Middleware приложения
+"""
+from bot.middlewares.chat_sequencer import ChatSequencerMiddleware
+
+__all__ = [
+    "ChatSequencerMiddleware"
+]
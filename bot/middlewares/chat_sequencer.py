@@ -0,0 +1,98 @@
+"""
+Последовательная обработка апдейтов в рамках одного чата
+
+Апдейты одного чата выполняются строго по очереди (в порядке поступления),
+апдейты разных чатов - параллельно. Одинаковый колбэк, пришедший, пока такой же
+ещё обрабатывается (двойное нажатие кнопки), сразу подтверждается без
+повторного запуска хэндлера.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, Chat
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSequencerMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для Update: очередь на чат + схлопывание дублей колбэков
+    """
+
+    def __init__(self) -> None:
+        # Блокировка на каждый чат и количество апдейтов, ожидающих/выполняющих её
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_users: Dict[int, int] = {}
+        # Колбэки, которые сейчас в очереди или выполняются: (chat_id, message_id, data)
+        self._in_flight: set[Tuple[int, Optional[int], str]] = set()
+        # Счётчик схлопнутых дублей (для логов/статистики)
+        self.coalesced_count = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat: Optional[Chat] = data.get("event_chat")
+
+        # Апдейты без чата (inline-запросы и т.п.) не упорядочиваем
+        if chat is None:
+            return await handler(event, data)
+
+        callback_key = self._get_callback_key(event, chat.id)
+
+        # Такой же колбэк уже в работе - только гасим "часики" на кнопке
+        if callback_key is not None and callback_key in self._in_flight:
+            self.coalesced_count += 1
+            logger.debug(f"Дубль колбэка схлопнут: {callback_key}")
+            try:
+                await event.callback_query.answer()
+            except Exception as e:
+                logger.debug(f"Не удалось ответить на дубль колбэка: {e}")
+            return None
+
+        if callback_key is not None:
+            self._in_flight.add(callback_key)
+
+        lock = self._acquire_chat_lock(chat.id)
+        try:
+            async with lock:
+                return await handler(event, data)
+        finally:
+            self._release_chat_lock(chat.id)
+            if callback_key is not None:
+                self._in_flight.discard(callback_key)
+
+    @staticmethod
+    def _get_callback_key(event: TelegramObject, chat_id: int) -> Optional[Tuple[int, Optional[int], str]]:
+        """Ключ для схлопывания одинаковых колбэков (только для callback_query)"""
+        if not isinstance(event, Update) or event.callback_query is None:
+            return None
+
+        callback = event.callback_query
+        if callback.data is None:
+            return None
+
+        message_id = callback.message.message_id if callback.message else None
+        return chat_id, message_id, callback.data
+
+    def _acquire_chat_lock(self, chat_id: int) -> asyncio.Lock:
+        """Получить блокировку чата (создаётся при первом апдейте)"""
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._chat_locks[chat_id] = lock
+        self._chat_users[chat_id] = self._chat_users.get(chat_id, 0) + 1
+        return lock
+
+    def _release_chat_lock(self, chat_id: int) -> None:
+        """Освободить блокировку чата; удалить её, если очередь пуста"""
+        users = self._chat_users.get(chat_id, 1) - 1
+        if users <= 0:
+            self._chat_users.pop(chat_id, None)
+            self._chat_locks.pop(chat_id, None)
+        else:
+            self._chat_users[chat_id] = users
@@ -10,11 +10,13 @@ from bot.models.lesson_teacher import LessonTeacher
 from bot.models.book import Book
 from bot.models.lesson_series import LessonSeries
 from bot.models.lesson import Lesson
+from bot.models.lesson_part import LessonPart
 from bot.models.test import Test
 from bot.models.test_question import TestQuestion
 from bot.models.test_attempt import TestAttempt
 from bot.models.bookmark import Bookmark
 from bot.models.feedback import Feedback
+from bot.models.storage_file import StorageFile
 
 __all__ = [
     "Base",
@@ -28,9 +30,11 @@ __all__ = [
     "Book",
     "LessonSeries",
     "Lesson",
+    "LessonPart",
     "Test",
     "TestQuestion",
     "TestAttempt",
     "Bookmark",
-    "Feedback"
+    "Feedback",
+    "StorageFile"
 ]
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Модель частей урока
+"""
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import String, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from bot.models.database import Base
+from bot.utils.timezone_utils import get_moscow_now
+
+if TYPE_CHECKING:
+    from bot.models.lesson import Lesson
+
+
+class LessonPart(Base):
+    """
+    Часть длинного урока
+
+    Запись, которая не помещается в 49 МБ при нормальном битрейте, хранится
+    несколькими файлами. У урока audio_path и telegram_file_id указывают на
+    первую часть, полный список частей - в этой таблице.
+    """
+
+    __tablename__ = "lesson_parts"
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'part_number', name='unique_part_number_per_lesson'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    lesson_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("lessons.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    part_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    audio_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    telegram_file_id: Mapped[str | None] = mapped_column(String(200), nullable=True)  # Кеш file_id для быстрой отправки
+    duration_seconds: Mapped[int] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=get_moscow_now)
+
+    # Отношения
+    lesson: Mapped["Lesson"] = relationship()
+
+    def display_title(self, lesson_title: str) -> str:
+        """Название части в плеере Telegram"""
+        return f"{lesson_title} (часть {self.part_number})"
+
+    def __repr__(self) -> str:
+        return f"<LessonPart(id={self.id}, lesson_id={self.lesson_id}, part={self.part_number})>"
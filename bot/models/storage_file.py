@@ -0,0 +1,36 @@
+"""
+Модель манифеста хранилища аудио
+"""
+from datetime import datetime
+
+from sqlalchemy import String, Text, Integer, BigInteger, Float, Boolean, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.models.database import Base
+from bot.utils.timezone_utils import get_moscow_now
+
+
+class StorageFile(Base):
+    """
+    Файл аудио на диске (или ожидаемый уроком, но отсутствующий)
+
+    Таблицу заполняет фоновая сверка диска с уроками (StorageReconciler):
+    referenced_by - кто ссылается на файл ("lesson:12,part:3"), orphaned_at -
+    когда файл впервые оказался без ссылок (удаляется после грейс-периода),
+    missing - урок ссылается на файл, которого нет на диске.
+    """
+
+    __tablename__ = "storage_manifest"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    path: Mapped[str] = mapped_column(String(500), nullable=False, unique=True, index=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    mtime: Mapped[float | None] = mapped_column(Float, nullable=True)
+    referenced_by: Mapped[str | None] = mapped_column(Text, nullable=True)
+    missing: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    orphaned_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(DateTime, default=get_moscow_now)
+
+    def __repr__(self) -> str:
+        return f"<StorageFile(path='{self.path}', size={self.size}, missing={self.missing})>"
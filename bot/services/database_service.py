@@ -1,17 +1,18 @@
 """
 Сервис для работы с базой данных
 """
-from typing import Optional, List
+from typing import Optional, List, Set, Tuple
 from sqlalchemy import select, update, delete, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from bot.models import (
     User, Role, Theme, BookAuthor, LessonTeacher,
-    Book, Lesson, LessonSeries, async_session_maker,
+    Book, Lesson, LessonPart, LessonSeries, async_session_maker,
     Test, TestQuestion, TestAttempt, Bookmark, Feedback
 )
 from bot.utils.timezone_utils import get_moscow_now
+from bot.utils.render_cache import bump_catalog_version
 
 
 class DatabaseService:
@@ -183,6 +184,7 @@ class ThemeService(DatabaseService):
             )
             session.add(theme)
             await session.commit()
+            bump_catalog_version()
             await session.refresh(theme)
             return theme
 
@@ -237,6 +239,7 @@ class BookAuthorService(DatabaseService):
             )
             session.add(author)
             await session.commit()
+            bump_catalog_version()
             await session.refresh(author)
             return author
 
@@ -281,6 +284,7 @@ class LessonTeacherService(DatabaseService):
             )
             session.add(teacher)
             await session.commit()
+            bump_catalog_version()
             await session.refresh(teacher)
             return teacher
 
@@ -360,6 +364,7 @@ class BookService(DatabaseService):
             )
             session.add(book)
             await session.commit()
+            bump_catalog_version()
             await session.refresh(book)
             return book
 
@@ -440,6 +445,7 @@ class LessonService(DatabaseService):
             )
             session.add(lesson)
             await session.commit()
+            bump_catalog_version()
             await session.refresh(lesson)
             return lesson
     
@@ -515,6 +521,7 @@ async def create_theme(name: str, desc: str = None, is_active: bool = True, sort
         )
         session.add(theme)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(theme)
         return theme
 
@@ -524,6 +531,7 @@ async def update_theme(theme: Theme) -> Theme:
     async with async_session_maker() as session:
         await session.merge(theme)
         await session.commit()
+        bump_catalog_version()
         return theme
 
 
@@ -534,6 +542,7 @@ async def delete_theme(theme_id: int) -> bool:
             delete(Theme).where(Theme.id == theme_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -564,6 +573,7 @@ async def create_book_author(name: str, biography: str = None, is_active: bool =
         )
         session.add(author)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(author)
         return author
 
@@ -573,6 +583,7 @@ async def update_book_author(author: BookAuthor) -> BookAuthor:
     async with async_session_maker() as session:
         await session.merge(author)
         await session.commit()
+        bump_catalog_version()
         return author
 
 
@@ -583,6 +594,7 @@ async def delete_book_author(author_id: int) -> bool:
             delete(BookAuthor).where(BookAuthor.id == author_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -613,6 +625,7 @@ async def create_lesson_teacher(name: str, biography: str = None, is_active: boo
         )
         session.add(teacher)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(teacher)
         return teacher
 
@@ -622,6 +635,7 @@ async def update_lesson_teacher(teacher: LessonTeacher) -> LessonTeacher:
     async with async_session_maker() as session:
         await session.merge(teacher)
         await session.commit()
+        bump_catalog_version()
         return teacher
 
 
@@ -632,6 +646,7 @@ async def delete_lesson_teacher(teacher_id: int) -> bool:
             delete(LessonTeacher).where(LessonTeacher.id == teacher_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -667,6 +682,7 @@ async def create_book(
         )
         session.add(book)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(book)
         return book
 
@@ -676,6 +692,7 @@ async def update_book(book: Book) -> Book:
     async with async_session_maker() as session:
         await session.merge(book)
         await session.commit()
+        bump_catalog_version()
         return book
 
 
@@ -686,6 +703,7 @@ async def delete_book(book_id: int) -> bool:
             delete(Book).where(Book.id == book_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -731,6 +749,7 @@ async def create_lesson(
         )
         session.add(lesson)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(lesson)
         return lesson
 
@@ -740,9 +759,94 @@ async def update_lesson(lesson: Lesson) -> Lesson:
     async with async_session_maker() as session:
         await session.merge(lesson)
         await session.commit()
+        bump_catalog_version()
         return lesson
 
 
+async def update_lesson_telegram_file_id(lesson_id: int, telegram_file_id: str) -> None:
+    """Сохранение file_id аудио урока (экраны каталога от него не зависят - версию не меняем)"""
+    async with async_session_maker() as session:
+        await session.execute(
+            update(Lesson)
+            .where(Lesson.id == lesson_id)
+            .values(telegram_file_id=telegram_file_id)
+        )
+        await session.commit()
+
+
+async def get_lesson_parts(lesson_id: int) -> List[LessonPart]:
+    """Части урока по порядку (пустой список - урок одним файлом)"""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(LessonPart)
+            .where(LessonPart.lesson_id == lesson_id)
+            .order_by(LessonPart.part_number)
+        )
+        return list(result.scalars().all())
+
+
+async def replace_lesson_parts(lesson_id: int, parts: List[Tuple[str, int]]) -> List[str]:
+    """
+    Замена частей урока
+
+    Args:
+        lesson_id: ID урока
+        parts: [(путь к файлу, длительность в секундах), ...] по порядку;
+            пустой список - урок снова одним файлом
+
+    Returns:
+        Пути к файлам прежних частей (удалить с диска после успешной замены)
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(LessonPart.audio_path).where(LessonPart.lesson_id == lesson_id)
+        )
+        old_paths = list(result.scalars().all())
+
+        await session.execute(delete(LessonPart).where(LessonPart.lesson_id == lesson_id))
+        for number, (audio_path, duration_seconds) in enumerate(parts, start=1):
+            session.add(LessonPart(
+                lesson_id=lesson_id,
+                part_number=number,
+                audio_path=audio_path,
+                duration_seconds=duration_seconds
+            ))
+
+        await session.commit()
+        return old_paths
+
+
+async def get_referenced_audio_paths(paths: List[str]) -> Set[str]:
+    """Какие из путей ещё используются уроками или частями уроков (остальные можно удалить с диска)"""
+    if not paths:
+        return set()
+    async with async_session_maker() as session:
+        lessons = await session.execute(select(Lesson.audio_path).where(Lesson.audio_path.in_(paths)))
+        parts = await session.execute(select(LessonPart.audio_path).where(LessonPart.audio_path.in_(paths)))
+        return set(lessons.scalars().all()) | set(parts.scalars().all())
+
+
+async def update_lesson_part_telegram_file_id(part_id: int, telegram_file_id: str) -> None:
+    """Сохранение file_id части урока (экраны каталога от него не зависят - версию не меняем)"""
+    async with async_session_maker() as session:
+        await session.execute(
+            update(LessonPart)
+            .where(LessonPart.id == part_id)
+            .values(telegram_file_id=telegram_file_id)
+        )
+        await session.commit()
+
+
+async def _reset_lesson_parts_file_ids(session: AsyncSession, lesson_ids: List[int]) -> None:
+    """Сброс кеша file_id частей переименованных уроков (название в плеере берётся при загрузке)"""
+    if lesson_ids:
+        await session.execute(
+            update(LessonPart)
+            .where(LessonPart.lesson_id.in_(lesson_ids))
+            .values(telegram_file_id=None)
+        )
+
+
 async def delete_lesson(lesson_id: int) -> bool:
     """Удаление урока"""
     async with async_session_maker() as session:
@@ -750,6 +854,7 @@ async def delete_lesson(lesson_id: int) -> bool:
             delete(Lesson).where(Lesson.id == lesson_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -940,6 +1045,7 @@ async def create_lesson_series(
         )
         session.add(series)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(series)
         return series
 
@@ -949,6 +1055,7 @@ async def update_lesson_series(series: LessonSeries) -> LessonSeries:
     async with async_session_maker() as session:
         await session.merge(series)
         await session.commit()
+        bump_catalog_version()
         return series
 
 
@@ -959,6 +1066,7 @@ async def delete_lesson_series(series_id: int) -> bool:
             delete(LessonSeries).where(LessonSeries.id == series_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -990,6 +1098,7 @@ async def regenerate_teacher_lessons_titles(teacher_id: int) -> int:
         lessons = result.scalars().unique().all()
 
         updated_count = 0
+        renamed_ids = []
 
         # Функция генерации названия
         def generate_lesson_title(teacher_name: str, book_name: str, series_year: int, series_name: str, lesson_number: int) -> str:
@@ -1020,9 +1129,12 @@ async def regenerate_teacher_lessons_titles(teacher_id: int) -> int:
             if lesson.title != new_title:
                 lesson.title = new_title
                 lesson.telegram_file_id = None  # Сбрасываем кэш
+                renamed_ids.append(lesson.id)
                 updated_count += 1
 
+        await _reset_lesson_parts_file_ids(session, renamed_ids)
         await session.commit()
+        bump_catalog_version()
         return updated_count
 
 
@@ -1054,6 +1166,7 @@ async def regenerate_book_lessons_titles(book_id: int) -> int:
         lessons = result.scalars().unique().all()
 
         updated_count = 0
+        renamed_ids = []
 
         # Функция генерации названия
         def generate_lesson_title(teacher_name: str, book_name: str, series_year: int, series_name: str, lesson_number: int) -> str:
@@ -1084,9 +1197,12 @@ async def regenerate_book_lessons_titles(book_id: int) -> int:
             if lesson.title != new_title:
                 lesson.title = new_title
                 lesson.telegram_file_id = None  # Сбрасываем кэш
+                renamed_ids.append(lesson.id)
                 updated_count += 1
 
+        await _reset_lesson_parts_file_ids(session, renamed_ids)
         await session.commit()
+        bump_catalog_version()
         return updated_count
 
 
@@ -1136,7 +1252,9 @@ async def regenerate_lesson_title(lesson_id: int) -> bool:
         if lesson.title != new_title:
             lesson.title = new_title
             lesson.telegram_file_id = None  # Сбрасываем кэш
+            await _reset_lesson_parts_file_ids(session, [lesson.id])
             await session.commit()
+            bump_catalog_version()
             return True
 
         return False
@@ -1175,6 +1293,7 @@ async def regenerate_series_lessons_titles(series_id: int) -> int:
         lessons = result.scalars().unique().all()
 
         updated_count = 0
+        renamed_ids = []
 
         # Функция генерации названия
         def generate_lesson_title(teacher_name: str, book_name: str, series_year: int, series_name: str, lesson_number: int) -> str:
@@ -1202,9 +1321,12 @@ async def regenerate_series_lessons_titles(series_id: int) -> int:
             if lesson.title != new_title:
                 lesson.title = new_title
                 lesson.telegram_file_id = None  # Сбрасываем кэш
+                renamed_ids.append(lesson.id)
                 updated_count += 1
 
+        await _reset_lesson_parts_file_ids(session, renamed_ids)
         await session.commit()
+        bump_catalog_version()
         return updated_count
 
 
@@ -1231,6 +1353,7 @@ async def bulk_update_series_lessons(series_id: int, book_id: Optional[int] = No
             .values(**values)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount
 
 
@@ -1250,6 +1373,7 @@ async def bulk_update_book_lessons(book_id: int, theme_id: Optional[int] = None)
             .values(theme_id=theme_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount
 
 
@@ -1339,6 +1463,7 @@ async def create_test(
         )
         session.add(test)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(test)
         return test
 
@@ -1348,6 +1473,7 @@ async def update_test(test: Test) -> Test:
     async with async_session_maker() as session:
         await session.merge(test)
         await session.commit()
+        bump_catalog_version()
         return test
 
 
@@ -1358,6 +1484,7 @@ async def delete_test(test_id: int) -> bool:
             delete(Test).where(Test.id == test_id)
         )
         await session.commit()
+        bump_catalog_version()
         return result.rowcount > 0
 
 
@@ -1386,6 +1513,7 @@ async def update_test_questions_count(test_id: int) -> Test:
             .values(questions_count=count)
         )
         await session.commit()
+        bump_catalog_version()
 
     return await get_test_by_id(test_id)
 
@@ -1454,6 +1582,7 @@ async def create_question(
         )
         session.add(question)
         await session.commit()
+        bump_catalog_version()
         await session.refresh(question)
 
     # Обновляем счётчик вопросов в тесте
@@ -1467,6 +1596,7 @@ async def update_question(question: TestQuestion) -> TestQuestion:
     async with async_session_maker() as session:
         await session.merge(question)
         await session.commit()
+        bump_catalog_version()
         return question
 
 
@@ -1484,6 +1614,7 @@ async def delete_question(question_id: int) -> bool:
             delete(TestQuestion).where(TestQuestion.id == question_id)
         )
         await session.commit()
+        bump_catalog_version()
         success = result.rowcount > 0
 
     if success:
@@ -1503,6 +1634,7 @@ async def reorder_questions(test_id: int, question_ids_in_order: List[int]) -> b
                 .values(order=index)
             )
         await session.commit()
+        bump_catalog_version()
         return True
 
 
@@ -0,0 +1,304 @@
+"""
+Сверка аудиофайлов на диске с уроками (манифест хранилища)
+
+StorageReconciler за один проход по директориям аудио уроков (converted/ и
+объекты хранилища) обновляет таблицу storage_manifest: размер, хеш, время
+изменения и ссылки из lessons / lesson_parts. Файл без ссылок удаляется, если
+остаётся сиротой дольше STORAGE_ORPHAN_GRACE_HOURS - за это время успевает
+завершиться загрузка, файл которой ещё не записан в БД. Объект, который
+конвертация переиспользовала (audio_store обновляет его mtime), тоже не
+удаляется, пока не пройдёт тот же срок с момента использования. Файлы, на которые
+ссылаются уроки, но которых нет на диске, отмечаются как missing.
+
+Экраны уроков проверяют наличие файла по результату последней сверки
+(is_available), а не обращением к диску при каждом воспроизведении; до
+первой сверки (и если сверка выключена) проверяется сам диск. Файл,
+удалённый между сверками, обнаруживается при отправке и отмечается
+(mark_missing).
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from bot.models import Lesson, LessonPart, LessonSeries, LessonTeacher, StorageFile, async_session_maker
+from bot.utils.audio_store import audio_store
+from bot.utils.config import config
+from bot.utils.loudness import file_sha256
+from bot.utils.timezone_utils import get_moscow_now
+
+logger = logging.getLogger(__name__)
+
+# Директории с файлами уроков (в манифесте) и исходников (только объём в отчёте)
+LESSON_AUDIO_DIRS = (os.path.join(config.audio_files_path, "converted"), audio_store.objects_dir)
+ORIGINALS_DIR = os.path.join(config.audio_files_path, "original")
+
+_HASH_NAME_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# (размер, mtime) по абсолютному пути
+ScannedFiles = Dict[str, Tuple[int, float]]
+
+
+@dataclass
+class ReconcileReport:
+    """Итоги сверки"""
+    files: int = 0
+    total_size: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    deleted_size: int = 0
+    # Ссылки на отсутствующие файлы ("lesson:12", "part:3")
+    missing: List[str] = field(default_factory=list)
+    originals_size: int = 0
+    finished_at: Optional[datetime] = None
+
+
+@dataclass
+class DiskUsage:
+    """Объём аудио по преподавателям и сериям (по убыванию)"""
+    total: int
+    by_teacher: List[Tuple[str, int]]
+    by_series: List[Tuple[str, int]]
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def _scan(directory: str) -> ScannedFiles:
+    files: ScannedFiles = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = _key(os.path.join(root, name))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime)
+    return files
+
+
+def _scan_all() -> Tuple[ScannedFiles, int]:
+    """Файлы уроков и общий размер исходников (один проход по диску)"""
+    files: ScannedFiles = {}
+    for directory in LESSON_AUDIO_DIRS:
+        files.update(_scan(directory))
+    originals_size = sum(size for size, _ in _scan(ORIGINALS_DIR).values())
+    return files, originals_size
+
+
+async def _load_references() -> Dict[str, List[str]]:
+    """Кто ссылается на каждый путь: lesson:<id> и part:<id>"""
+    references: Dict[str, List[str]] = {}
+    async with async_session_maker() as session:
+        lessons = await session.execute(
+            select(Lesson.id, Lesson.audio_path).where(Lesson.audio_path.isnot(None))
+        )
+        for lesson_id, path in lessons.all():
+            references.setdefault(_key(path), []).append(f"lesson:{lesson_id}")
+
+        parts = await session.execute(select(LessonPart.id, LessonPart.audio_path))
+        for part_id, path in parts.all():
+            references.setdefault(_key(path), []).append(f"part:{part_id}")
+    return references
+
+
+class StorageReconciler:
+    """Фоновая сверка диска с уроками и сборка мусора"""
+
+    def __init__(self) -> None:
+        # Пути, на которые ссылаются уроки, но которых не было на диске при последней сверке
+        self.missing_paths: Set[str] = set()
+        self.last_report: Optional[ReconcileReport] = None
+        self._lock = asyncio.Lock()
+
+    def is_available(self, path: Optional[str]) -> bool:
+        """Файл урока есть на диске (по последней сверке; до неё - проверкой диска)"""
+        if not path:
+            return False
+        if self.last_report is None:
+            return os.path.exists(path)
+        return _key(path) not in self.missing_paths
+
+    def mark_missing(self, path: Optional[str]) -> None:
+        """Файла не оказалось на диске при отправке - до следующей сверки он недоступен"""
+        if path:
+            self.missing_paths.add(_key(path))
+            logger.warning(f"Нет на диске файла урока: {path}")
+
+    @staticmethod
+    async def _content_hash(path: str) -> str:
+        # Объекты хранилища названы хешем содержимого - читать их не нужно
+        name = os.path.splitext(os.path.basename(path))[0]
+        if _HASH_NAME_RE.match(name):
+            return name
+        return await file_sha256(path)
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            logger.info(f"Удалён файл без ссылок: {path}")
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.error(f"Не удалось удалить файл без ссылок {path}: {e}")
+            return False
+
+    async def reconcile(self) -> ReconcileReport:
+        """Один проход сверки: обновить манифест, удалить старых сирот, найти отсутствующие файлы"""
+        async with self._lock:
+            references = await _load_references()
+            files, originals_size = await asyncio.to_thread(_scan_all)
+
+            now = get_moscow_now()
+            grace = timedelta(hours=config.storage_orphan_grace_hours)
+            report = ReconcileReport(originals_size=originals_size)
+            missing: Set[str] = set()
+
+            # Пустая БД при непустом диске - скорее ошибка подключения, чем
+            # удалённый каталог: ничего не удаляем
+            allow_delete = bool(references)
+            if not allow_delete and files:
+                logger.warning("Сверка хранилища: в БД нет ни одного урока с аудио, удаление пропущено")
+
+            async with async_session_maker() as session:
+                result = await session.execute(select(StorageFile))
+                rows = {row.path: row for row in result.scalars().all()}
+
+                for path, (size, mtime) in files.items():
+                    row = rows.pop(path, None)
+                    if row is None:
+                        row = StorageFile(path=path)
+                        session.add(row)
+                    if row.size != size or row.mtime != mtime or not row.content_hash:
+                        try:
+                            row.content_hash = await self._content_hash(path)
+                        except OSError:
+                            row.content_hash = None
+                    row.size = size
+                    row.mtime = mtime
+                    row.missing = False
+                    row.checked_at = now
+                    row.referenced_by = ",".join(references.get(path, [])) or None
+
+                    report.files += 1
+                    report.total_size += size
+
+                    if row.referenced_by:
+                        row.orphaned_at = None
+                        continue
+
+                    report.orphans += 1
+                    row.orphaned_at = row.orphaned_at or now
+                    # Объект, изменённый недавно (переиспользован конвертацией нового
+                    # урока, который ещё не записан в БД), не удаляется
+                    recently_used = time.time() - mtime < grace.total_seconds()
+                    if allow_delete and not recently_used and now - row.orphaned_at >= grace and self._remove(path):
+                        report.deleted += 1
+                        report.deleted_size += size
+                        if row in session.new:
+                            session.expunge(row)
+                        else:
+                            await session.delete(row)
+
+                for path, owners in references.items():
+                    if path in files:
+                        continue
+                    # Файл вне директорий уроков (старые пути) - проверяем напрямую
+                    if os.path.exists(path):
+                        row = rows.pop(path, None)
+                        if row is not None:
+                            row.missing = False
+                        continue
+
+                    missing.add(path)
+                    report.missing.extend(owners)
+                    row = rows.pop(path, None)
+                    if row is None:
+                        row = StorageFile(path=path, size=0)
+                        session.add(row)
+                    row.missing = True
+                    row.referenced_by = ",".join(owners)
+                    row.orphaned_at = None
+                    row.checked_at = now
+
+                # Записи о файлах, которых больше нет и на которые никто не ссылается
+                for row in rows.values():
+                    await session.delete(row)
+
+                await session.commit()
+
+            report.finished_at = now
+            self.missing_paths = missing
+            self.last_report = report
+
+            if missing:
+                logger.warning(f"Сверка хранилища: нет на диске файлов для {', '.join(report.missing)}")
+            logger.info(
+                f"Сверка хранилища: файлов {report.files} ({report.total_size} байт), "
+                f"без ссылок {report.orphans}, удалено {report.deleted}, отсутствует {len(missing)}"
+            )
+            return report
+
+    async def run_forever(self, interval: int) -> None:
+        """Периодическая сверка (запускается задачей при старте бота)"""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Ошибка сверки хранилища: {e}")
+            await asyncio.sleep(interval)
+
+
+storage_reconciler = StorageReconciler()
+
+
+async def get_disk_usage(limit: int = 10) -> DiskUsage:
+    """
+    Объём аудио по преподавателям и сериям (по данным манифеста)
+
+    Файл, общий для нескольких уроков, учитывается у каждого из них.
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(StorageFile.path, StorageFile.size).where(StorageFile.missing.is_(False))
+        )
+        sizes = dict(result.all())
+
+        result = await session.execute(
+            select(Lesson.id, Lesson.audio_path, LessonTeacher.name, LessonSeries.year, LessonSeries.name)
+            .outerjoin(LessonTeacher, Lesson.teacher_id == LessonTeacher.id)
+            .outerjoin(LessonSeries, Lesson.series_id == LessonSeries.id)
+        )
+        lessons = result.all()
+
+        result = await session.execute(select(LessonPart.lesson_id, LessonPart.audio_path))
+        part_paths: Dict[int, Set[str]] = {}
+        for lesson_id, path in result.all():
+            part_paths.setdefault(lesson_id, set()).add(_key(path))
+
+    by_teacher: Dict[str, int] = {}
+    by_series: Dict[str, int] = {}
+    for lesson_id, audio_path, teacher_name, series_year, series_name in lessons:
+        paths = set(part_paths.get(lesson_id, ()))
+        if audio_path:
+            paths.add(_key(audio_path))
+        size = sum(sizes.get(path, 0) for path in paths)
+
+        teacher = teacher_name or "Без преподавателя"
+        series = f"{teacher}: {series_year} - {series_name}" if series_name else f"{teacher}: без серии"
+        by_teacher[teacher] = by_teacher.get(teacher, 0) + size
+        by_series[series] = by_series.get(series, 0) + size
+
+    def top(usage: Dict[str, int]) -> List[Tuple[str, int]]:
+        return sorted(((name, size) for name, size in usage.items() if size), key=lambda item: -item[1])[:limit]
+
+    return DiskUsage(total=sum(sizes.values()), by_teacher=top(by_teacher), by_series=top(by_series))
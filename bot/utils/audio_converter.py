@@ -1,11 +1,18 @@
 """
 Утилиты для конвертации аудио файлов через FFmpeg
 """
-import subprocess
+import asyncio
+import math
 import os
 import logging
-import json
-from typing import Tuple, Optional, Dict
+import shutil
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Tuple, Optional, Dict
+
+from bot.utils.config import config
+from bot.utils.ffmpeg_pool import FFmpegBusy, ProgressCallback, ffmpeg_pool
+from bot.utils.loudness import AudioAnalysis, analyze_audio, single_pass_loudnorm_filter
+from bot.utils.media_probe import probe
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,322 @@ MIN_BITRATE_KBPS = 16  # Минимальный битрейт для прием
 MAX_BITRATE_KBPS = 128  # Максимальный битрейт для речи
 
 
+# Допустимые CBR-битрейты MP3 в kbps: MPEG-1 (32-48 кГц) и MPEG-2 (16-24 кГц).
+# LAME округляет произвольный битрейт до ближайшего из таблицы - в том числе вверх,
+# поэтому для прогноза размера выбираем значение из таблицы сами (вниз).
+MPEG1_BITRATES_KBPS = (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MPEG2_BITRATES_KBPS = (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# Частота для очень длинных записей, которым мало минимального битрейта MPEG-1 (32 kbps)
+LOW_SAMPLE_RATE = 22050
+# Запас от лимита размера при выборе битрейта заранее
+SIZE_SAFETY_MARGIN = 0.97
+
+# Параллельное кодирование длинных записей: минимальная длина сегмента и
+# насколько далеко (в секундах) от равномерной точки разреза искать паузу
+SEGMENT_MIN_SECONDS = 300
+SILENCE_SEARCH_WINDOW = 90
+
+# Сегмент: (начало, конец) в секундах; конец None - до конца файла
+Segment = Tuple[float, Optional[float]]
+
+# Длинные уроки делятся на части, если иначе битрейт упал бы ниже этого
+QUALITY_MIN_BITRATE_KBPS = 48
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    Профиль кодирования: кодек, контейнер, битрейты и способ отправки в Telegram
+
+    cbr_table - битрейт только из таблиц MPEG (MP3); иначе кодек принимает любой.
+    sample_rate - частота, которую требует кодек (None - как задано при вызове).
+    concat_safe - части можно склеить concat-демуксером без перекодирования. Каждая
+        часть сохраняет задержку и добивку энкодера (у LAME ~1100 и до 1152 сэмплов),
+        поэтому на стыке вставляется около 50 мс тишины - незаметно, только
+        если разрез пришёлся на паузу (так режет plan_segments).
+    """
+    name: str
+    title: str
+    codec: str                  # энкодер FFmpeg
+    source_codec: str           # codec_name готового файла (для копирования без перекодирования)
+    extension: str              # расширение выходного файла
+    preferred_kbps: int
+    min_kbps: int               # ниже - неприемлемое качество
+    quality_min_kbps: int       # ниже - урок лучше разделить на части
+    sample_rate: Optional[int] = None
+    encoder_args: Tuple[str, ...] = ()
+    cbr_table: bool = True
+    concat_safe: bool = True
+    send_as_voice: bool = False  # отправлять голосовым сообщением (send_voice)
+
+    def output_rate(self, sample_rate: int) -> int:
+        """Частота дискретизации результата"""
+        return self.sample_rate or sample_rate
+
+    def output_path(self, path: str) -> str:
+        """Путь с расширением профиля"""
+        return os.path.splitext(path)[0] + self.extension
+
+
+# MP3 CBR - совместим со всеми плеерами, отправляется как аудио с названием
+MP3_PROFILE = EncodingProfile(
+    name="mp3",
+    title="MP3",
+    codec="libmp3lame",
+    source_codec="mp3",
+    extension=".mp3",
+    preferred_kbps=64,
+    min_kbps=MIN_BITRATE_KBPS,
+    quality_min_kbps=QUALITY_MIN_BITRATE_KBPS
+)
+
+# Opus для речи: 32 kbps разборчивее MP3 64 kbps при половинном размере.
+# Кодек работает на 48 кГц; длинные кадры и режим voip экономят битрейт на речи.
+# Telegram воспроизводит OGG/Opus как голосовое сообщение (с ускорением).
+OPUS_SPEECH_PROFILE = EncodingProfile(
+    name="opus",
+    title="Opus",
+    codec="libopus",
+    source_codec="opus",
+    extension=".ogg",
+    preferred_kbps=32,
+    min_kbps=12,
+    quality_min_kbps=24,
+    sample_rate=48000,
+    encoder_args=("-application", "voip", "-vbr", "constrained", "-frame_duration", "60"),
+    cbr_table=False,
+    # Склейка Ogg-кусков даёт щелчки из-за pre-skip каждого куска
+    concat_safe=False,
+    send_as_voice=True
+)
+
+ENCODING_PROFILES: Dict[str, EncodingProfile] = {
+    profile.name: profile for profile in (MP3_PROFILE, OPUS_SPEECH_PROFILE)
+}
+
+
+def get_encoding_profile(name: Optional[str] = None) -> EncodingProfile:
+    """Профиль по имени (по умолчанию - AUDIO_ENCODING_PROFILE); неизвестный - MP3"""
+    key = (name or config.audio_encoding_profile).strip().lower()
+    profile = ENCODING_PROFILES.get(key)
+    if profile is None:
+        logger.warning(f"Неизвестный профиль кодирования '{key}', используется MP3")
+        return MP3_PROFILE
+    return profile
+
+
+def profile_for_path(file_path: str) -> EncodingProfile:
+    """Профиль, которым закодирован файл (по расширению)"""
+    if os.path.splitext(file_path)[1].lower() in (".ogg", ".opus"):
+        return OPUS_SPEECH_PROFILE
+    return MP3_PROFILE
+
+
+def _codec_args(profile: EncodingProfile, bitrate: str, channels: int, sample_rate: int) -> List[str]:
+    """Аргументы FFmpeg для кодирования по профилю"""
+    return [
+        "-codec:a", profile.codec,
+        "-b:a", bitrate,
+        "-ac", str(channels),
+        "-ar", str(profile.output_rate(sample_rate)),
+        *profile.encoder_args
+    ]
+
+
+class BitrateStats:
+    """
+    Статистика подбора битрейта
+
+    overhead - отношение реального размера файла к расчётному (битрейт * длительность):
+    заголовки, ID3, выравнивание фреймов. Уточняется скользящим средним после
+    каждой конвертации и используется для прогноза размера.
+    """
+
+    def __init__(self) -> None:
+        self.overhead = 1.01
+        self.single_pass = 0
+        self.second_pass = 0
+        self.failed = 0
+        # Файлы, уже готовые для раздачи: скопированы без перекодирования
+        self.copied = 0
+
+    @property
+    def total(self) -> int:
+        return self.single_pass + self.second_pass + self.failed
+
+    @property
+    def second_pass_rate(self) -> float:
+        return self.second_pass / self.total if self.total else 0.0
+
+    def record_size(self, bitrate_kbps: int, duration_seconds: int, size_bytes: int) -> None:
+        """Учесть фактический размер файла в поправке на накладные расходы"""
+        if duration_seconds <= 0 or bitrate_kbps <= 0:
+            return
+        ratio = size_bytes / (bitrate_kbps * 1000 / 8 * duration_seconds)
+        # Отбрасываем явные выбросы (битые длительности и т.п.)
+        if 0.9 <= ratio <= 1.2:
+            self.overhead = 0.8 * self.overhead + 0.2 * ratio
+
+
+bitrate_stats = BitrateStats()
+
+
+def estimate_mp3_size(bitrate_kbps: int, duration_seconds: int) -> int:
+    """Прогноз размера MP3 (CBR) в байтах с учётом измеренных накладных расходов"""
+    return int(bitrate_kbps * 1000 / 8 * duration_seconds * bitrate_stats.overhead)
+
+
+def max_duration_seconds(bitrate_kbps: int) -> int:
+    """Самая длинная запись, которая при этом битрейте помещается в лимит размера одним файлом"""
+    return int(MAX_OUTPUT_SIZE_BYTES * SIZE_SAFETY_MARGIN * 8 / 1000 / (bitrate_kbps * bitrate_stats.overhead))
+
+
+def choose_bitrate(
+    duration_seconds: int,
+    preferred_kbps: int,
+    sample_rate: int,
+    profile: Optional[EncodingProfile] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Выбор битрейта до конвертации
+
+    Предпочтительный битрейт, если прогноз размера укладывается в лимит с запасом;
+    иначе максимальный допустимый битрейт, который укладывается. Для MP3 битрейт
+    всегда берётся из таблицы (округление вниз), и если даже минимального битрейта
+    MPEG-1 мало - частота понижается до 22050 Гц.
+
+    Returns:
+        (битрейт в kbps, частота дискретизации) или None, если нужен битрейт ниже минимального
+    """
+    profile = profile or MP3_PROFILE
+    budget = MAX_OUTPUT_SIZE_BYTES * SIZE_SAFETY_MARGIN
+    limit_kbps = budget * 8 / 1000 / (max(duration_seconds, 1) * bitrate_stats.overhead)
+    target_kbps = min(preferred_kbps, MAX_BITRATE_KBPS, limit_kbps)
+
+    if not profile.cbr_table:
+        bitrate_kbps = int(target_kbps)
+        if bitrate_kbps < profile.min_kbps:
+            return None
+        return bitrate_kbps, profile.output_rate(sample_rate)
+
+    rates = [sample_rate]
+    if sample_rate > LOW_SAMPLE_RATE:
+        rates.append(LOW_SAMPLE_RATE)
+
+    for rate in rates:
+        table = MPEG1_BITRATES_KBPS if rate >= 32000 else MPEG2_BITRATES_KBPS
+        fitting = [b for b in table if b <= target_kbps]
+        if fitting and fitting[-1] >= MIN_BITRATE_KBPS:
+            return fitting[-1], rate
+
+    return None
+
+
+def plan_segments(
+    duration_seconds: int,
+    silences: List[float],
+    count: int,
+    require_silence: bool = True
+) -> Optional[List[Segment]]:
+    """
+    Разбиение записи на сегменты по паузам
+
+    Точки разреза - паузы, ближайшие к равномерному делению на count частей
+    (не дальше SILENCE_SEARCH_WINDOW). Разрез в тишине скрывает стыки
+    независимо закодированных кусков: склейка вставляет на стыке около 50 мс
+    тишины (задержка и добивка энкодера), и в паузе это не слышно.
+
+    Args:
+        require_silence: Без паузы рядом отказаться от разбиения (иначе резать в точке деления)
+
+    Returns:
+        Список сегментов или None, если делить нечего или рядом нет пауз
+    """
+    count = min(count, duration_seconds // SEGMENT_MIN_SECONDS)
+    if count < 2:
+        return None
+
+    cuts: List[float] = []
+    previous = 0.0
+    for index in range(1, count):
+        target = duration_seconds * index / count
+        nearby = [
+            silence for silence in silences
+            if abs(silence - target) <= SILENCE_SEARCH_WINDOW
+            and silence - previous >= SEGMENT_MIN_SECONDS / 2
+        ]
+        if nearby:
+            previous = min(nearby, key=lambda silence: abs(silence - target))
+        elif require_silence:
+            return None
+        else:
+            previous = target
+        cuts.append(previous)
+
+    bounds: List[Optional[float]] = [0.0, *cuts, None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parallel_segments(
+    duration_seconds: int,
+    normalize: bool,
+    analysis: Optional[AudioAnalysis],
+    profile: EncodingProfile = MP3_PROFILE
+) -> Optional[List[Segment]]:
+    """Сегменты для параллельного кодирования или None - кодировать целиком"""
+    threshold = config.ffmpeg_segment_min_duration
+    if not profile.concat_safe:
+        return None
+    if not threshold or duration_seconds < threshold or ffmpeg_pool.max_concurrent < 2:
+        return None
+    if analysis is None or not analysis.silences:
+        return None
+    # Громкость частей совпадает, только если усиление линейное (одно на весь файл)
+    if normalize and not analysis.linear_feasible:
+        logger.info("Линейная нормализация невозможна, кодирование без разбиения")
+        return None
+    # Только разрезы в паузах: стыки склейки вставляют короткую тишину (см. convert_to_mp3_segmented)
+    return plan_segments(duration_seconds, analysis.silences, ffmpeg_pool.max_concurrent, require_silence=True)
+
+
+def needs_split(
+    duration_seconds: int,
+    preferred_kbps: int,
+    sample_rate: int = 44100,
+    profile: Optional[EncodingProfile] = None
+) -> bool:
+    """
+    Урок не помещается в лимит без заметной потери качества
+
+    True, если для одного файла пришлось бы опустить битрейт ниже порога
+    качества профиля (или предпочтительного, если он ниже) либо понизить частоту.
+    """
+    profile = profile or MP3_PROFILE
+    choice = choose_bitrate(duration_seconds, preferred_kbps, sample_rate, profile)
+    if choice is None:
+        return True
+    bitrate_kbps, rate = choice
+    return (
+        bitrate_kbps < min(preferred_kbps, profile.quality_min_kbps)
+        or rate != profile.output_rate(sample_rate)
+    )
+
+
+def plan_parts(duration_seconds: int, bitrate_kbps: int, silences: List[float]) -> List[Segment]:
+    """
+    Разбиение урока на части, каждая из которых помещается в лимит при bitrate_kbps
+
+    Части почти равные; разрезы - по паузам рядом с точками деления. Запас
+    SILENCE_SEARCH_WINDOW с каждой стороны учитывает сдвиг разреза к паузе.
+    """
+    budget = MAX_OUTPUT_SIZE_BYTES * SIZE_SAFETY_MARGIN
+    max_part_seconds = budget * 8 / 1000 / (bitrate_kbps * bitrate_stats.overhead)
+    count = math.ceil(duration_seconds / max(max_part_seconds - 2 * SILENCE_SEARCH_WINDOW, 1))
+    if count < 2:
+        return [(0.0, None)]
+    return plan_segments(duration_seconds, silences, count, require_silence=False) or [(0.0, None)]
+
+
 async def calculate_optimal_bitrate(duration_seconds: int, target_size_mb: int = MAX_OUTPUT_SIZE_MB) -> int:
     """
     Расчёт оптимального битрейта для достижения целевого размера файла
@@ -53,18 +376,28 @@ async def convert_to_mp3(
     bitrate: str = "64k",
     channels: int = 1,
     sample_rate: int = 44100,
-    normalize: bool = True
+    normalize: bool = True,
+    analysis: Optional[AudioAnalysis] = None,
+    profile: Optional[EncodingProfile] = None,
+    progress: Optional[ProgressCallback] = None
 ) -> Tuple[bool, Optional[str]]:
     """
-    Конвертация аудио файла в MP3 с нормализацией громкости
+    Конвертация аудио файла в MP3 (или формат профиля) с нормализацией громкости
+
+    Если переданы результаты анализа с измеренной громкостью, нормализация
+    выполняется линейно (второй проход loudnorm); иначе - однопроходным
+    динамическим loudnorm.
 
     Args:
         input_path: Путь к исходному аудио файлу
-        output_path: Путь для сохранения MP3 файла
+        output_path: Путь для сохранения файла
         bitrate: Битрейт (по умолчанию 64k для речи)
         channels: Количество каналов (1 = mono, 2 = stereo)
-        sample_rate: Частота дискретизации в Гц
+        sample_rate: Частота дискретизации в Гц (кроме профилей с фиксированной частотой)
         normalize: Применять ли нормализацию громкости
+        analysis: Результаты analyze_audio() для этого файла
+        profile: Профиль кодирования (по умолчанию MP3)
+        progress: Вызывается с числом закодированных секунд
 
     Returns:
         Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
@@ -83,17 +416,20 @@ async def convert_to_mp3(
         cmd = [
             "ffmpeg",
             "-i", input_path,
-            "-codec:a", "libmp3lame",
-            "-b:a", bitrate,
-            "-ac", str(channels),
-            "-ar", str(sample_rate),
+            "-vn",
+            *_codec_args(profile or MP3_PROFILE, bitrate, channels, sample_rate)
         ]
 
         # Добавление фильтра нормализации громкости
         if normalize:
-            cmd.extend([
-                "-af", "loudnorm=I=-16:TP=-1.5:LRA=11"
-            ])
+            if analysis is not None and analysis.has_loudness:
+                loudnorm = analysis.loudnorm_filter()
+            else:
+                loudnorm = single_pass_loudnorm_filter()
+            cmd.extend(["-af", loudnorm])
+
+        # Ограничение потоков, чтобы конвертация не занимала все ядра
+        cmd.extend(ffmpeg_pool.thread_args())
 
         # Перезапись файла без запроса
         cmd.extend(["-y", output_path])
@@ -101,13 +437,8 @@ async def convert_to_mp3(
         logger.info(f"Запуск конвертации: {input_path} -> {output_path}")
         logger.debug(f"FFmpeg команда: {' '.join(cmd)}")
 
-        # Запуск FFmpeg
-        process = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=600  # Тайм-аут 10 минут
-        )
+        # Запуск FFmpeg (не блокирует event loop, ждёт свободного слота в пуле)
+        process = await ffmpeg_pool.run(cmd, timeout=600, progress=progress)  # Тайм-аут 10 минут
 
         if process.returncode != 0:
             error_message = process.stderr.decode('utf-8', errors='ignore')
@@ -126,7 +457,7 @@ async def convert_to_mp3(
         logger.info(f"Конвертация успешна: {output_path} ({output_size} байт)")
         return True, None
 
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         logger.error(f"Тайм-аут конвертации: {input_path}")
         return False, "Превышено время ожидания конвертации (10 минут)"
     except Exception as e:
@@ -134,6 +465,345 @@ async def convert_to_mp3(
         return False, f"Неожиданная ошибка: {str(e)}"
 
 
+async def _encode_segment(
+    input_path: str,
+    part_path: str,
+    segment: Segment,
+    bitrate: str,
+    channels: int,
+    sample_rate: int,
+    loudnorm: Optional[str],
+    standalone: bool = False,
+    profile: EncodingProfile = MP3_PROFILE,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[bool, Optional[str]]:
+    """Кодирование одного сегмента (standalone - отдельный файл, а не кусок для склейки)"""
+    start, end = segment
+    cmd = ["ffmpeg", "-ss", f"{start:.3f}"]
+    if end is not None:
+        cmd.extend(["-t", f"{end - start:.3f}"])
+    cmd.extend([
+        "-i", input_path,
+        "-vn",
+        *_codec_args(profile, bitrate, channels, sample_rate)
+    ])
+    if loudnorm:
+        cmd.extend(["-af", loudnorm])
+    cmd.extend(ffmpeg_pool.thread_args())
+    if not standalone and profile.codec == "libmp3lame":
+        # Без Xing-заголовка и тегов: при склейке они превратились бы в лишние фреймы
+        cmd.extend(["-write_xing", "0", "-id3v2_version", "0"])
+    cmd.extend(["-map_metadata", "-1", "-y", part_path])
+
+    try:
+        process = await ffmpeg_pool.run(cmd, timeout=600, progress=progress)
+    except asyncio.TimeoutError:
+        return False, "Превышено время ожидания конвертации (10 минут)"
+
+    if process.returncode != 0:
+        error_message = process.stderr.decode('utf-8', errors='ignore')
+        logger.error(f"Ошибка FFmpeg (сегмент {start:.0f}с): {error_message}")
+        return False, f"Ошибка конвертации: {error_message[:200]}"
+    return True, None
+
+
+async def convert_to_mp3_segmented(
+    input_path: str,
+    output_path: str,
+    segments: List[Segment],
+    bitrate: str = "64k",
+    channels: int = 1,
+    sample_rate: int = 44100,
+    normalize: bool = True,
+    analysis: Optional[AudioAnalysis] = None,
+    profile: EncodingProfile = MP3_PROFILE,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    Конвертация длинной записи по частям
+
+    Сегменты кодируются одновременно через пул FFmpeg (по слоту на сегмент)
+    с одинаковым линейным loudnorm по измерениям всего файла, затем
+    склеиваются concat-демуксером без перекодирования.
+
+    Ограничение: стыки не бесшовные. Каждый сегмент начинается с задержки
+    энкодера и заканчивается добивкой до целого фрейма, а при склейке -c copy
+    их не обрезать (MP3 декодируется с перекрытием соседних фреймов, точная
+    обрезка потребовала бы перекодировать стык). На каждом стыке появляется
+    около 50 мс тишины, и запись удлиняется на столько же. Поэтому сегменты
+    режутся только в паузах (_parallel_segments требует паузу рядом с точкой
+    деления) - там вставка не слышна.
+
+    Args:
+        input_path: Путь к исходному аудио файлу
+        output_path: Путь для сохранения MP3 файла
+        segments: Сегменты из plan_segments()
+        bitrate: Битрейт
+        channels: Количество каналов
+        sample_rate: Частота дискретизации в Гц
+        normalize: Применять ли нормализацию громкости
+        analysis: Результаты analyze_audio() (нужны для нормализации)
+        profile: Профиль кодирования (должен допускать склейку - concat_safe)
+        progress: Вызывается с суммой закодированных секунд по всем сегментам
+
+    Returns:
+        Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+    """
+    if not profile.concat_safe:
+        return False, f"Профиль {profile.name} не поддерживает склейку частей"
+    if normalize and (analysis is None or not analysis.linear_feasible):
+        return False, "Нет измерений громкости для нормализации по частям"
+
+    loudnorm = analysis.loudnorm_filter() if normalize else None
+    parts_dir = f"{output_path}.parts"
+
+    try:
+        os.makedirs(parts_dir, exist_ok=True)
+        part_paths = [os.path.join(parts_dir, f"{index:03d}{profile.extension}") for index in range(len(segments))]
+
+        # Прогресс сегментов, кодирующихся одновременно, складывается
+        encoded = [0.0] * len(segments)
+
+        def segment_progress(index: int) -> Optional[ProgressCallback]:
+            if progress is None:
+                return None
+
+            def update(seconds: float) -> None:
+                encoded[index] = seconds
+                progress(sum(encoded))
+            return update
+
+        logger.info(f"Конвертация по частям ({len(segments)} сегм.): {input_path} -> {output_path}")
+        results = await asyncio.gather(*(
+            _encode_segment(
+                input_path, part_path, segment, bitrate, channels, sample_rate, loudnorm,
+                profile=profile, progress=segment_progress(index)
+            )
+            for index, (part_path, segment) in enumerate(zip(part_paths, segments))
+        ))
+        for success, error in results:
+            if not success:
+                return False, error
+
+        list_path = os.path.join(parts_dir, "concat.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for part_path in part_paths:
+                escaped = os.path.abspath(part_path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = [
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-y", output_path
+        ]
+        process = await ffmpeg_pool.run(cmd, timeout=120)
+
+        if process.returncode != 0:
+            error_message = process.stderr.decode('utf-8', errors='ignore')
+            logger.error(f"Ошибка склейки сегментов: {error_message}")
+            return False, f"Ошибка склейки: {error_message[:200]}"
+
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False, "Выходной файл пустой"
+
+        logger.info(f"Конвертация по частям успешна: {output_path} ({os.path.getsize(output_path)} байт)")
+        return True, None
+
+    except asyncio.TimeoutError:
+        logger.error(f"Тайм-аут склейки: {input_path}")
+        return False, "Превышено время ожидания склейки"
+    except Exception as e:
+        logger.error(f"Ошибка при конвертации по частям {input_path}: {str(e)}")
+        return False, f"Неожиданная ошибка: {str(e)}"
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+
+async def _encode(
+    input_path: str,
+    output_path: str,
+    bitrate_kbps: int,
+    channels: int,
+    sample_rate: int,
+    normalize: bool,
+    analysis: Optional[AudioAnalysis],
+    segments: Optional[List[Segment]],
+    profile: EncodingProfile = MP3_PROFILE,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[bool, Optional[str]]:
+    """Кодирование по частям, если есть план сегментов, иначе целиком"""
+    if segments:
+        success, error = await convert_to_mp3_segmented(
+            input_path, output_path, segments,
+            bitrate=f"{bitrate_kbps}k",
+            channels=channels,
+            sample_rate=sample_rate,
+            normalize=normalize,
+            analysis=analysis,
+            profile=profile,
+            progress=progress
+        )
+        if success:
+            return True, None
+        logger.warning(f"Конвертация по частям не удалась ({error}), кодируем целиком")
+
+    return await convert_to_mp3(
+        input_path, output_path,
+        bitrate=f"{bitrate_kbps}k",
+        channels=channels,
+        sample_rate=sample_rate,
+        normalize=normalize,
+        analysis=analysis,
+        profile=profile,
+        progress=progress
+    )
+
+
+async def copy_audio_stream(input_path: str, output_path: str) -> Tuple[bool, Optional[str]]:
+    """
+    Копирование аудио потока без перекодирования (для уже готовых файлов)
+
+    Обложка и метаданные отбрасываются, сам поток не меняется. Контейнер
+    выбирается по расширению output_path.
+    """
+    try:
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        cmd = [
+            "ffmpeg",
+            "-i", input_path,
+            "-map", "0:a:0",
+            "-c:a", "copy",
+            "-map_metadata", "-1",
+            "-y", output_path
+        ]
+
+        logger.info(f"Копирование потока без перекодирования: {input_path} -> {output_path}")
+        process = await ffmpeg_pool.run(cmd, timeout=120)
+
+        if process.returncode != 0:
+            error_message = process.stderr.decode('utf-8', errors='ignore')
+            logger.error(f"Ошибка FFmpeg: {error_message}")
+            return False, f"Ошибка копирования: {error_message[:200]}"
+
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False, "Выходной файл пустой"
+
+        return True, None
+
+    except asyncio.TimeoutError:
+        logger.error(f"Тайм-аут копирования: {input_path}")
+        return False, "Превышено время ожидания копирования"
+    except Exception as e:
+        logger.error(f"Ошибка при копировании {input_path}: {str(e)}")
+        return False, f"Неожиданная ошибка: {str(e)}"
+
+
+async def convert_stream_to_mp3(
+    chunks: AsyncIterator[bytes],
+    output_path: str,
+    bitrate: str = "64k",
+    channels: int = 1,
+    sample_rate: int = 44100,
+    normalize: bool = True,
+    profile: Optional[EncodingProfile] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    Конвертация потока: исходник подаётся в stdin FFmpeg по мере поступления
+
+    Кодирование идёт параллельно с получением файла (например, во время
+    загрузки), поэтому результат готов почти сразу после последнего куска.
+    Файла целиком ещё нет, так что громкость не измеряется заранее -
+    нормализация однопроходным динамическим loudnorm. Подходит только для
+    форматов, которые читаются последовательно (WAV, MP3, FLAC, AAC ADTS);
+    MP4/M4A с индексом в конце файла требуют перемотки и сюда не годятся.
+
+    Процесс занимает слот потоковой конвертации, а не слот пула: ожидание
+    данных загрузки не задерживает очередь. Если слотов нет, конвертация
+    сразу завершается неудачей и файл конвертируется после загрузки.
+
+    Args:
+        chunks: Куски исходного файла по порядку
+        output_path: Путь для сохранения файла
+        bitrate: Битрейт
+        channels: Количество каналов
+        sample_rate: Частота дискретизации в Гц
+        normalize: Применять ли нормализацию громкости
+        profile: Профиль кодирования (по умолчанию MP3)
+
+    Returns:
+        Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostats",
+        "-i", "pipe:0",
+        "-vn",
+        *_codec_args(profile or MP3_PROFILE, bitrate, channels, sample_rate)
+    ]
+    if normalize:
+        cmd.extend(["-af", single_pass_loudnorm_filter()])
+    cmd.extend(ffmpeg_pool.thread_args())
+    cmd.extend(["-y", output_path])
+
+    logger.info(f"Запуск потоковой конвертации -> {output_path}")
+    logger.debug(f"FFmpeg команда: {' '.join(cmd)}")
+
+    try:
+        async with ffmpeg_pool.stream_slot():
+            process = await asyncio.create_subprocess_exec(
+                *ffmpeg_pool.heavy_command(cmd),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            # stderr читается параллельно, иначе заполненный канал остановит FFmpeg
+            stderr_task = asyncio.create_task(process.stderr.read())
+            try:
+                try:
+                    async for chunk in chunks:
+                        process.stdin.write(chunk)
+                        await process.stdin.drain()
+                    process.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    # FFmpeg завершился раньше (ошибка формата) - причина будет в stderr
+                    pass
+                await asyncio.wait_for(process.wait(), timeout=600)
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                stderr_task.cancel()
+                raise
+            stderr = await stderr_task
+
+        if process.returncode != 0:
+            error_message = stderr.decode('utf-8', errors='ignore')
+            logger.error(f"Ошибка потоковой конвертации: {error_message}")
+            return False, f"Ошибка конвертации: {error_message[:200]}"
+
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False, "Выходной файл пустой"
+
+        logger.info(f"Потоковая конвертация успешна: {output_path} ({os.path.getsize(output_path)} байт)")
+        return True, None
+
+    except FFmpegBusy as e:
+        logger.info(f"Потоковая конвертация пропущена: {e}")
+        return False, str(e)
+    except asyncio.TimeoutError:
+        logger.error(f"Тайм-аут потоковой конвертации: {output_path}")
+        return False, "Превышено время ожидания конвертации"
+    except Exception as e:
+        logger.error(f"Ошибка потоковой конвертации {output_path}: {str(e)}")
+        return False, f"Неожиданная ошибка: {str(e)}"
+
+
 async def convert_to_mp3_auto(
     input_path: str,
     output_path: str,
@@ -141,45 +811,87 @@ async def convert_to_mp3_auto(
     channels: int = 1,
     sample_rate: int = 44100,
     normalize: bool = True,
-    max_attempts: int = 2
+    max_attempts: int = 2,
+    profile: Optional[EncodingProfile] = None,
+    progress: Optional[Callable[[float], None]] = None
 ) -> Tuple[bool, Optional[str], Optional[int]]:
     """
-    Автоматическая конвертация аудио в MP3 с подбором оптимального битрейта
+    Автоматическая конвертация аудио в MP3 (или формат профиля) с подбором битрейта
 
-    Сначала пробует конвертировать с предпочтительным битрейтом (64 kbps).
-    Если файл получается > 50 МБ, пересчитывает битрейт и конвертирует заново.
+    Битрейт выбирается заранее по длительности файла и лимиту размера (с запасом
+    и поправкой на накладные расходы контейнера, измеренной на прошлых конвертациях),
+    поэтому файл кодируется один раз. Повторная конвертация - только запасной
+    вариант, если прогноз всё же не оправдался.
+
+    С нормализацией файл сначала анализируется (analyze_audio, кеш по хешу
+    содержимого). Файл в кодеке профиля с нужным форматом, битрейтом и
+    громкостью копируется без перекодирования; остальные нормализуются линейно по измерениям.
+    Записи длиннее FFMPEG_SEGMENT_MIN_DURATION режутся по паузам и кодируются
+    по частям одновременно (convert_to_mp3_segmented).
 
     Args:
         input_path: Путь к исходному аудио файлу
-        output_path: Путь для сохранения MP3 файла
+        output_path: Путь для сохранения файла (с расширением профиля)
         preferred_bitrate: Предпочтительный битрейт в kbps (по умолчанию 64)
         channels: Количество каналов (1 = mono, 2 = stereo)
         sample_rate: Частота дискретизации в Гц
         normalize: Применять ли нормализацию громкости
         max_attempts: Максимальное количество попыток конвертации
+        profile: Профиль кодирования (по умолчанию MP3)
+        progress: Вызывается с долей закодированной записи (0..1) по отчётам FFmpeg
 
     Returns:
         Tuple[bool, Optional[str], Optional[int]]:
             (успех, сообщение об ошибке, использованный битрейт в kbps)
     """
+    profile = profile or MP3_PROFILE
     try:
-        # Сначала получаем длительность оригинального файла
-        duration = await get_audio_duration(input_path)
+        # Анализ формата и громкости (заодно даёт длительность)
+        analysis = await analyze_audio(input_path) if normalize else None
+
+        if analysis is not None and analysis.duration > 0:
+            duration = analysis.duration
+        else:
+            duration = await get_audio_duration(input_path)
         if duration is None:
             return False, "Не удалось определить длительность файла", None
 
         logger.info(f"Длительность файла: {duration} секунд ({duration // 60} минут)")
 
-        # Попытка 1: Конвертация с предпочтительным битрейтом
-        bitrate_kbps = preferred_bitrate
-        logger.info(f"Попытка 1: Конвертация с битрейтом {bitrate_kbps} kbps")
+        def encode_progress(seconds: float) -> None:
+            progress(min(seconds / max(duration, 1), 1.0))
+
+        # Длинные записи кодируются по частям параллельно
+        segments = _parallel_segments(duration, normalize, analysis, profile)
+
+        choice = choose_bitrate(duration, preferred_bitrate, sample_rate, profile)
+        if choice is None:
+            return False, _too_long_error(duration, profile), None
+
+        bitrate_kbps, sample_rate = choice
+
+        # Быстрый путь: файл уже в нужном виде - копируем поток без перекодирования
+        if (
+            analysis is not None
+            and analysis.size <= MAX_OUTPUT_SIZE_BYTES
+            and analysis.is_speech_ready(channels, sample_rate, bitrate_kbps, codec=profile.source_codec)
+        ):
+            success, error = await copy_audio_stream(input_path, output_path)
+            if success and os.path.getsize(output_path) <= MAX_OUTPUT_SIZE_BYTES:
+                bitrate_stats.copied += 1
+                logger.info(f"✅ Файл уже нормализован, скопирован без перекодирования ({analysis.bitrate_kbps} kbps)")
+                return True, None, analysis.bitrate_kbps
+            logger.warning(f"Копирование без перекодирования не удалось ({error}), конвертируем")
+
+        logger.info(
+            f"Конвертация в {profile.title} с битрейтом {bitrate_kbps} kbps, {sample_rate} Гц "
+            f"(прогноз размера {estimate_mp3_size(bitrate_kbps, duration) / (1024 * 1024):.2f} МБ)"
+        )
 
-        success, error = await convert_to_mp3(
-            input_path, output_path,
-            bitrate=f"{bitrate_kbps}k",
-            channels=channels,
-            sample_rate=sample_rate,
-            normalize=normalize
+        success, error = await _encode(
+            input_path, output_path, bitrate_kbps, channels, sample_rate,
+            normalize, analysis, segments, profile,
+            encode_progress if progress is not None else None
         )
 
         if not success:
@@ -188,39 +900,45 @@ async def convert_to_mp3_auto(
         # Проверяем размер получившегося файла
         output_size = os.path.getsize(output_path)
         output_size_mb = output_size / (1024 * 1024)
+        bitrate_stats.record_size(bitrate_kbps, duration, output_size)
 
         logger.info(f"Размер выходного файла: {output_size_mb:.2f} МБ")
 
         # Если файл влезает в лимит - отлично!
         if output_size <= MAX_OUTPUT_SIZE_BYTES:
+            bitrate_stats.single_pass += 1
             logger.info(f"✅ Файл успешно сконвертирован ({output_size_mb:.2f} МБ, {bitrate_kbps} kbps)")
             return True, None, bitrate_kbps
 
-        # Попытка 2: Файл слишком большой, рассчитываем оптимальный битрейт
-        logger.warning(f"Файл слишком большой ({output_size_mb:.2f} МБ), пересчитываем битрейт...")
+        if max_attempts < 2:
+            bitrate_stats.failed += 1
+            return False, _too_large_error(output_size_mb), bitrate_kbps
 
-        optimal_bitrate = await calculate_optimal_bitrate(duration, MAX_OUTPUT_SIZE_MB)
+        # Запасной вариант: прогноз не оправдался, пересчитываем по фактическому размеру
+        # (в статистику конвертация попадает один раз - по итогу повторной попытки)
+        logger.warning(
+            f"Файл больше лимита ({output_size_mb:.2f} МБ при {bitrate_kbps} kbps), повторная конвертация. "
+            f"Повторных конвертаций до этой: {bitrate_stats.second_pass} из {bitrate_stats.total} "
+            f"({bitrate_stats.second_pass_rate:.1%})"
+        )
 
-        if optimal_bitrate < MIN_BITRATE_KBPS:
-            return False, (
-                f"Файл слишком длинный ({duration // 60} минут). "
-                f"Для размещения требуется битрейт < {MIN_BITRATE_KBPS} kbps (неприемлемое качество). "
-                f"Пожалуйста, разделите урок на части по 1-2 часа."
-            ), None
+        target_bitrate = bitrate_kbps * MAX_OUTPUT_SIZE_BYTES * SIZE_SAFETY_MARGIN / output_size
+        choice = choose_bitrate(duration, int(target_bitrate), sample_rate, profile)
+        if choice is None:
+            bitrate_stats.failed += 1
+            return False, _too_long_error(duration, profile), None
 
-        logger.info(f"Попытка 2: Конвертация с оптимальным битрейтом {optimal_bitrate} kbps")
+        optimal_bitrate, sample_rate = choice
+        logger.info(f"Попытка 2: Конвертация с битрейтом {optimal_bitrate} kbps, {sample_rate} Гц")
 
         # Удаляем предыдущий файл
         if os.path.exists(output_path):
             os.remove(output_path)
 
-        # Конвертируем с оптимальным битрейтом
-        success, error = await convert_to_mp3(
-            input_path, output_path,
-            bitrate=f"{optimal_bitrate}k",
-            channels=channels,
-            sample_rate=sample_rate,
-            normalize=normalize
+        success, error = await _encode(
+            input_path, output_path, optimal_bitrate, channels, sample_rate,
+            normalize, analysis, segments, profile,
+            encode_progress if progress is not None else None
         )
 
         if not success:
@@ -229,16 +947,15 @@ async def convert_to_mp3_auto(
         # Финальная проверка размера
         final_size = os.path.getsize(output_path)
         final_size_mb = final_size / (1024 * 1024)
+        bitrate_stats.record_size(optimal_bitrate, duration, final_size)
 
         logger.info(f"Финальный размер: {final_size_mb:.2f} МБ с битрейтом {optimal_bitrate} kbps")
 
         if final_size > MAX_OUTPUT_SIZE_BYTES:
-            return False, (
-                f"Не удалось уменьшить файл до 50 МБ. "
-                f"Итоговый размер: {final_size_mb:.2f} МБ. "
-                f"Пожалуйста, разделите урок на части."
-            ), optimal_bitrate
+            bitrate_stats.failed += 1
+            return False, _too_large_error(final_size_mb), optimal_bitrate
 
+        bitrate_stats.second_pass += 1
         logger.info(f"✅ Файл успешно сконвертирован ({final_size_mb:.2f} МБ, {optimal_bitrate} kbps)")
         return True, None, optimal_bitrate
 
@@ -247,63 +964,173 @@ async def convert_to_mp3_auto(
         return False, f"Неожиданная ошибка: {str(e)}", None
 
 
-async def get_audio_duration(file_path: str) -> Optional[int]:
+async def convert_to_mp3_parts(
+    input_path: str,
+    output_path: str,
+    preferred_bitrate: int = 64,
+    channels: int = 1,
+    sample_rate: int = 44100,
+    normalize: bool = True,
+    profile: Optional[EncodingProfile] = None
+) -> Tuple[bool, Optional[str], List[str], Optional[int]]:
     """
-    Получение длительности аудио файла в секундах через FFprobe
+    Конвертация длинного урока в несколько файлов при нормальном битрейте
 
-    Args:
-        file_path: Путь к аудио файлу
+    Вместо снижения битрейта до неразборчивого запись делится по паузам на
+    части, каждая из которых помещается в лимит Telegram. Части кодируются
+    одновременно через пул FFmpeg и сохраняются как <имя>_part<N>.<расширение>.
 
     Returns:
-        int: Длительность в секундах или None при ошибке
+        Tuple[bool, Optional[str], List[str], Optional[int]]:
+            (успех, сообщение об ошибке, пути к частям по порядку, битрейт в kbps)
     """
+    profile = profile or MP3_PROFILE
+    part_paths: List[str] = []
     try:
-        if not os.path.exists(file_path):
-            logger.error(f"Файл не найден: {file_path}")
-            return None
+        analysis = await analyze_audio(input_path) if normalize else None
+
+        if analysis is not None and analysis.duration > 0:
+            duration = analysis.duration
+        else:
+            duration = await get_audio_duration(input_path)
+        if not duration:
+            return False, "Не удалось определить длительность файла", [], None
+
+        if profile.cbr_table:
+            table = MPEG1_BITRATES_KBPS if sample_rate >= 32000 else MPEG2_BITRATES_KBPS
+            fitting = [b for b in table if b <= min(preferred_bitrate, MAX_BITRATE_KBPS)]
+            bitrate_kbps = fitting[-1] if fitting else table[0]
+        else:
+            bitrate_kbps = max(profile.min_kbps, min(preferred_bitrate, MAX_BITRATE_KBPS))
+
+        silences = analysis.silences if analysis is not None and analysis.silences else []
+        segments = plan_parts(duration, bitrate_kbps, silences)
+        if len(segments) < 2:
+            # Помещается одним файлом - обычная конвертация
+            success, error, used_bitrate = await convert_to_mp3_auto(
+                input_path, output_path, preferred_bitrate, channels, sample_rate, normalize,
+                profile=profile
+            )
+            return success, error, [output_path] if success else [], used_bitrate
+
+        if not normalize:
+            loudnorm = None
+        elif analysis is not None and analysis.has_loudness:
+            loudnorm = analysis.loudnorm_filter()
+        else:
+            loudnorm = single_pass_loudnorm_filter()
+
+        stem, ext = os.path.splitext(output_path)
+        part_paths = [f"{stem}_part{number}{ext}" for number in range(1, len(segments) + 1)]
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
 
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            file_path
-        ]
+        logger.info(
+            f"Урок {duration // 60} мин делится на {len(segments)} частей по {bitrate_kbps} kbps: {input_path}"
+        )
+        results = await asyncio.gather(*(
+            _encode_segment(
+                input_path, part_path, segment, f"{bitrate_kbps}k",
+                channels, sample_rate, loudnorm, standalone=True, profile=profile
+            )
+            for part_path, segment in zip(part_paths, segments)
+        ))
+        for success, error in results:
+            if not success:
+                _remove_files(part_paths)
+                return False, error, [], None
+
+        for part_path, (start, end) in zip(part_paths, segments):
+            part_size = os.path.getsize(part_path)
+            part_duration = (end if end is not None else duration) - start
+            bitrate_stats.record_size(bitrate_kbps, int(part_duration), part_size)
+            if part_size > MAX_OUTPUT_SIZE_BYTES:
+                _remove_files(part_paths)
+                return False, _too_large_error(part_size / (1024 * 1024)), [], bitrate_kbps
+
+        bitrate_stats.single_pass += 1
+        logger.info(f"✅ Урок разделён на {len(part_paths)} частей ({bitrate_kbps} kbps)")
+        return True, None, part_paths, bitrate_kbps
 
-        logger.debug(f"FFprobe команда: {' '.join(cmd)}")
+    except Exception as e:
+        logger.error(f"Ошибка при разделении на части {input_path}: {str(e)}")
+        _remove_files(part_paths)
+        return False, f"Неожиданная ошибка: {str(e)}", [], None
 
-        process = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=30
-        )
 
-        if process.returncode != 0:
-            error_message = process.stderr.decode('utf-8', errors='ignore')
-            logger.error(f"Ошибка FFprobe: {error_message}")
-            return None
+async def convert_lesson_audio(
+    input_path: str,
+    output_path: str,
+    preferred_bitrate: Optional[int] = None,
+    profile: Optional[EncodingProfile] = None
+) -> Tuple[bool, Optional[str], List[str], Optional[int]]:
+    """
+    Конвертация аудио урока: одним файлом или частями
 
-        duration_str = process.stdout.decode('utf-8').strip()
-        duration_seconds = int(float(duration_str))
+    Если запись не помещается в лимит без потери качества (needs_split)
+    и разбиение включено (AUDIO_SPLIT_LONG_LESSONS), урок делится на части.
+    Профиль по умолчанию - AUDIO_ENCODING_PROFILE; расширение output_path
+    заменяется расширением профиля.
 
-        logger.info(f"Длительность {file_path}: {duration_seconds} секунд")
-        return duration_seconds
+    Returns:
+        Tuple[bool, Optional[str], List[str], Optional[int]]:
+            (успех, сообщение об ошибке, пути к файлам по порядку, битрейт в kbps)
+    """
+    profile = profile or get_encoding_profile()
+    output_path = profile.output_path(output_path)
+    preferred_bitrate = preferred_bitrate or profile.preferred_kbps
 
-    except subprocess.TimeoutExpired:
-        logger.error(f"Тайм-аут получения длительности: {file_path}")
-        return None
-    except (ValueError, TypeError) as e:
-        logger.error(f"Ошибка парсинга длительности для {file_path}: {str(e)}")
-        return None
-    except Exception as e:
-        logger.error(f"Ошибка при получении длительности {file_path}: {str(e)}")
-        return None
+    if config.audio_split_long_lessons:
+        duration = await get_audio_duration(input_path)
+        if duration and needs_split(duration, preferred_bitrate, profile=profile):
+            return await convert_to_mp3_parts(input_path, output_path, preferred_bitrate, profile=profile)
+
+    success, error, used_bitrate = await convert_to_mp3_auto(
+        input_path, output_path, preferred_bitrate=preferred_bitrate, profile=profile
+    )
+    return success, error, [output_path] if success else [], used_bitrate
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _too_long_error(duration: int, profile: EncodingProfile = MP3_PROFILE) -> str:
+    return (
+        f"Файл слишком длинный ({duration // 60} минут). "
+        f"Для размещения требуется битрейт < {profile.min_kbps} kbps (неприемлемое качество). "
+        f"Пожалуйста, разделите урок на части по 1-2 часа."
+    )
+
+
+def _too_large_error(size_mb: float) -> str:
+    return (
+        f"Не удалось уменьшить файл до 50 МБ. "
+        f"Итоговый размер: {size_mb:.2f} МБ. "
+        f"Пожалуйста, разделите урок на части."
+    )
+
+
+async def get_audio_duration(file_path: str) -> Optional[int]:
+    """
+    Получение длительности аудио файла в секундах (через probe())
+
+    Args:
+        file_path: Путь к аудио файлу
+
+    Returns:
+        int: Длительность в секундах или None при ошибке
+    """
+    info = await probe(file_path)
+    return info.duration if info else None
 
 
 async def get_audio_info(file_path: str) -> Optional[Dict[str, any]]:
     """
-    Получение полной информации об аудио файле через FFprobe
+    Получение полной информации об аудио файле (через probe())
 
     Args:
         file_path: Путь к аудио файлу
@@ -319,68 +1146,15 @@ async def get_audio_info(file_path: str) -> Optional[Dict[str, any]]:
             'size': int           # размер файла в байтах
         }
     """
-    try:
-        if not os.path.exists(file_path):
-            logger.error(f"Файл не найден: {file_path}")
-            return None
-
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_format",
-            "-show_streams",
-            "-of", "json",
-            file_path
-        ]
-
-        logger.debug(f"FFprobe команда: {' '.join(cmd)}")
-
-        process = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=30
-        )
-
-        if process.returncode != 0:
-            error_message = process.stderr.decode('utf-8', errors='ignore')
-            logger.error(f"Ошибка FFprobe: {error_message}")
-            return None
-
-        data = json.loads(process.stdout.decode('utf-8'))
-
-        # Извлечение информации о формате
-        format_info = data.get('format', {})
-
-        # Извлечение информации об аудио потоке
-        audio_stream = None
-        for stream in data.get('streams', []):
-            if stream.get('codec_type') == 'audio':
-                audio_stream = stream
-                break
-
-        if not audio_stream:
-            logger.error(f"Аудио поток не найден в файле: {file_path}")
-            return None
-
-        info = {
-            'duration': int(float(format_info.get('duration', 0))),
-            'format': format_info.get('format_name', 'unknown'),
-            'bitrate': int(format_info.get('bit_rate', 0)),
-            'sample_rate': int(audio_stream.get('sample_rate', 0)),
-            'channels': int(audio_stream.get('channels', 0)),
-            'size': int(format_info.get('size', os.path.getsize(file_path)))
-        }
-
-        logger.info(f"Информация о файле {file_path}: {info}")
-        return info
-
-    except subprocess.TimeoutExpired:
-        logger.error(f"Тайм-аут получения информации: {file_path}")
-        return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Ошибка парсинга JSON для {file_path}: {str(e)}")
-        return None
-    except Exception as e:
-        logger.error(f"Ошибка при получении информации о {file_path}: {str(e)}")
+    info = await probe(file_path)
+    if info is None:
         return None
+
+    return {
+        'duration': info.duration,
+        'format': info.format,
+        'bitrate': info.bitrate,
+        'sample_rate': info.sample_rate,
+        'channels': info.channels,
+        'size': info.size
+    }
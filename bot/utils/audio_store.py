@@ -0,0 +1,299 @@
+"""
+Контентно-адресуемое хранилище аудио уроков
+
+Сконвертированный файл хранится под SHA-256 своего содержимого:
+store/objects/ab/<хеш>.<расширение>. Одинаковые результаты занимают место
+один раз, а человекочитаемые имена живут в БД (название урока передаётся
+в Telegram как title при отправке). Хеш результата считается при копировании
+в хранилище, без отдельного чтения файла.
+
+Индекс конвертаций (store/conversions/<хеш исходника>_<профиль>_<битрейт>.json)
+связывает исходник с результатом: повторная загрузка того же файла не
+конвертируется - урок ссылается на уже сохранённые объекты. Запись годится,
+только если с тех пор не менялись настройки деления длинных уроков
+(AUDIO_SPLIT_LONG_LESSONS и лимит размера части) - от них зависит, одним
+файлом или частями получится урок. Хеш исходника
+считается при скачивании на диск (download_telegram_file), без повторного чтения.
+
+Один объект могут использовать несколько уроков, поэтому файл удаляется
+только когда на него не осталось ссылок в БД (get_referenced_audio_paths).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+from aiogram import Bot
+
+from bot.utils.audio_converter import MAX_OUTPUT_SIZE_MB, EncodingProfile, convert_lesson_audio, get_encoding_profile
+from bot.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.path.join(config.audio_files_path, "store")
+
+# Размер куска при скачивании: в памяти на одну загрузку только он
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 300
+# Размер куска при копировании в хранилище
+STORE_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredConversion:
+    """Результат конвертации исходника: объекты хранилища по порядку частей"""
+    paths: List[str]
+    bitrate_kbps: Optional[int]
+    # Настройки деления длинных уроков, с которыми получен результат
+    # (записи без них - из старых версий, считаются несовпадающими)
+    split_long_lessons: Optional[bool] = None
+    max_part_size_mb: Optional[int] = None
+
+    def matches_split_settings(self) -> bool:
+        """Результат получен при текущих AUDIO_SPLIT_LONG_LESSONS и лимите размера части"""
+        return (
+            self.split_long_lessons == config.audio_split_long_lessons
+            and self.max_part_size_mb == MAX_OUTPUT_SIZE_MB
+        )
+
+
+class DownloadTooLarge(Exception):
+    """Файл оказался больше допустимого во время скачивания"""
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(f"Файл больше {max_size // (1024 * 1024)} МБ")
+        self.max_size = max_size
+
+
+async def _read_local_file(file_path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(file_path, "rb") as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+async def download_telegram_file(
+    bot: Bot,
+    file_path: str,
+    destination: str,
+    max_size: int,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE
+) -> Tuple[str, int]:
+    """
+    Скачивание файла Telegram сразу на диск по частям с подсчётом SHA-256
+
+    В памяти одновременно только один кусок, поэтому несколько параллельных
+    загрузок не требуют памяти по размеру файлов. Если файл превысил max_size,
+    скачивание прерывается; недокачанный файл удаляется при любой ошибке.
+
+    Args:
+        bot: Бот (его сессия используется для скачивания)
+        file_path: file_path из get_file()
+        destination: Путь для сохранения
+        max_size: Максимальный размер в байтах
+
+    Returns:
+        (хеш содержимого, размер в байтах)
+
+    Raises:
+        DownloadTooLarge: файл больше max_size
+    """
+    if bot.session.api.is_local:
+        # Локальный Bot API сервер отдаёт путь к файлу на диске
+        chunks = _read_local_file(str(bot.session.api.wrap_local_file.to_local(file_path)), chunk_size)
+    else:
+        chunks = bot.session.stream_content(
+            url=bot.session.api.file_url(bot.token, file_path),
+            timeout=DOWNLOAD_TIMEOUT,
+            chunk_size=chunk_size,
+            raise_for_status=True
+        )
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(destination, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise DownloadTooLarge(max_size)
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    finally:
+        await chunks.aclose()
+
+    return digest.hexdigest(), size
+
+
+def _copy_with_sha256(source: str, destination: str) -> str:
+    """Копирование файла с подсчётом SHA-256 содержимого в том же проходе"""
+    digest = hashlib.sha256()
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        for chunk in iter(lambda: src.read(STORE_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            dst.write(chunk)
+    return digest.hexdigest()
+
+
+class AudioStore:
+    """Объекты по хешу содержимого и индекс конвертаций"""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.conversions_dir = os.path.join(root, "conversions")
+        # Файлы, которые ещё копируются в хранилище (вне objects - сверка их не видит)
+        self.incoming_dir = os.path.join(root, "incoming")
+
+    def object_path(self, content_hash: str, extension: str) -> str:
+        return os.path.join(self.objects_dir, content_hash[:2], f"{content_hash}{extension}")
+
+    async def put(self, file_path: str) -> str:
+        """
+        Перенос файла в хранилище
+
+        Файл копируется во временный файл хранилища, хеш содержимого считается
+        в том же проходе (отдельного чтения ради хеша нет), затем копия
+        переименовывается в объект, а исходный файл удаляется. Если объект с
+        таким содержимым уже есть, копия удаляется.
+
+        Returns:
+            Путь к объекту
+        """
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        incoming_path = os.path.join(self.incoming_dir, f"{secrets.token_hex(8)}.part")
+        try:
+            content_hash = await asyncio.to_thread(_copy_with_sha256, file_path, incoming_path)
+            target = self.object_path(content_hash, os.path.splitext(file_path)[1].lower())
+
+            if os.path.exists(target):
+                self.touch(target)
+                logger.info(f"Такой файл уже в хранилище: {target}")
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(incoming_path, target)
+                logger.info(f"Файл сохранён в хранилище: {file_path} -> {target}")
+        finally:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
+
+        os.remove(file_path)
+        return target
+
+    @staticmethod
+    def touch(path: str) -> None:
+        """
+        Отметка повторного использования объекта (mtime)
+
+        Объект мог долго быть без ссылок (урок удалили). Пока новый урок не
+        записан в БД, свежий mtime защищает объект от удаления сверкой хранилища.
+        """
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.warning(f"Не удалось обновить время объекта {path}: {e}")
+
+    def _conversion_path(self, source_hash: str, profile_name: str, preferred_kbps: int) -> str:
+        return os.path.join(self.conversions_dir, f"{source_hash}_{profile_name}_{preferred_kbps}.json")
+
+    def get_conversion(self, source_hash: str, profile_name: str, preferred_kbps: int) -> Optional[StoredConversion]:
+        """Сохранённый результат конвертации исходника (None - нет или объекты удалены)"""
+        try:
+            with open(self._conversion_path(source_hash, profile_name, preferred_kbps), "r", encoding="utf-8") as f:
+                conversion = StoredConversion(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Повреждённая запись индекса конвертаций {source_hash}: {e}")
+            return None
+
+        if not conversion.paths or not all(os.path.exists(path) for path in conversion.paths):
+            return None
+        if not conversion.matches_split_settings():
+            # Разбиение включили или выключили - урок мог бы получиться другим числом частей
+            return None
+        for path in conversion.paths:
+            self.touch(path)
+        return conversion
+
+    def put_conversion(
+        self,
+        source_hash: str,
+        profile_name: str,
+        preferred_kbps: int,
+        conversion: StoredConversion
+    ) -> None:
+        path = self._conversion_path(source_hash, profile_name, preferred_kbps)
+        try:
+            os.makedirs(self.conversions_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(conversion), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Индекс - оптимизация, без него файл просто сконвертируется заново
+            logger.warning(f"Не удалось сохранить индекс конвертации {source_hash}: {e}")
+
+
+audio_store = AudioStore(STORE_DIR)
+
+
+async def convert_and_store(
+    input_path: str,
+    source_hash: str,
+    work_path: str,
+    profile: Optional[EncodingProfile] = None,
+    preferred_bitrate: Optional[int] = None
+) -> Tuple[bool, Optional[str], List[str], Optional[int]]:
+    """
+    Конвертация урока в хранилище с переиспользованием готового результата
+
+    Если этот исходник (по хешу) уже конвертировался тем же профилем, сразу
+    возвращаются сохранённые объекты. Иначе файл конвертируется во временный
+    work_path (convert_lesson_audio) и результат переносится в хранилище.
+
+    Returns:
+        Tuple[bool, Optional[str], List[str], Optional[int]]:
+            (успех, сообщение об ошибке, пути к объектам по порядку частей, битрейт в kbps)
+    """
+    profile = profile or get_encoding_profile()
+    preferred_bitrate = preferred_bitrate or profile.preferred_kbps
+
+    stored = audio_store.get_conversion(source_hash, profile.name, preferred_bitrate)
+    if stored is not None:
+        logger.info(f"Исходник {source_hash[:12]} уже конвертирован, используем готовые файлы: {stored.paths}")
+        return True, None, stored.paths, stored.bitrate_kbps
+
+    success, error, paths, bitrate_kbps = await convert_lesson_audio(
+        input_path, work_path, preferred_bitrate=preferred_bitrate, profile=profile
+    )
+    if not success:
+        return False, error, [], None
+
+    try:
+        object_paths = [await audio_store.put(path) for path in paths]
+    except OSError as e:
+        logger.error(f"Не удалось сохранить файлы в хранилище: {e}")
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return False, f"Ошибка сохранения файла: {str(e)}", [], None
+
+    audio_store.put_conversion(
+        source_hash, profile.name, preferred_bitrate,
+        StoredConversion(
+            paths=object_paths,
+            bitrate_kbps=bitrate_kbps,
+            split_long_lessons=config.audio_split_long_lessons,
+            max_part_size_mb=MAX_OUTPUT_SIZE_MB
+        )
+    )
+    return True, None, object_paths, bitrate_kbps
@@ -7,22 +7,17 @@ from pathlib import Path
 from typing import Optional
 
 import aiofiles
-from mutagen import File as MutagenFile
-from mutagen.mp3 import MP3
-from mutagen.wave import WAVE
-from mutagen.oggvorbis import OggVorbis
-from mutagen.mp4 import MP4
-
 from bot.utils.config import config
+from bot.utils.media_probe import probe
 
 
 class AudioUtils:
     """Утилиты для работы с аудиофайлами"""
     
     @staticmethod
-    def get_audio_duration(file_path: str) -> Optional[int]:
+    async def get_audio_duration(file_path: str) -> Optional[int]:
         """
-        Получение длительности аудиофайла в секундах
+        Получение длительности аудиофайла в секундах (через probe())
         
         Args:
             file_path: Путь к аудиофайлу
@@ -30,18 +25,13 @@ class AudioUtils:
         Returns:
             Длительность в секундах или None в случае ошибки
         """
-        try:
-            audio_file = MutagenFile(file_path)
-            if audio_file is not None:
-                return int(audio_file.info.length)
-        except Exception as e:
-            print(f"Ошибка при получении длительности аудио: {e}")
-        return None
+        info = await probe(file_path)
+        return info.duration if info else None
     
     @staticmethod
-    def validate_audio_file(file_path: str) -> bool:
+    async def validate_audio_file(file_path: str) -> bool:
         """
-        Проверка валидности аудиофайла
+        Проверка валидности аудиофайла (через probe())
         
         Args:
             file_path: Путь к аудиофайлу
@@ -49,11 +39,7 @@ class AudioUtils:
         Returns:
             True если файл валидный, иначе False
         """
-        try:
-            audio_file = MutagenFile(file_path)
-            return audio_file is not None
-        except Exception:
-            return False
+        return await probe(file_path) is not None
     
     @staticmethod
     def get_file_extension(filename: str) -> str:
@@ -0,0 +1,241 @@
+"""
+Маршрутизация колбэков через префиксное дерево
+
+Обычный Router aiogram проверяет фильтры всех хэндлеров callback_query по очереди.
+CallbackRouter индексирует хэндлеры по статическому префиксу callback_data
+(фильтр CallbackRoute; в regexp-маршрутах сегменты \\d+ тоже входят в префикс)
+и для каждого колбэка проверяет только те хэндлеры, чей префикс совпадает
+с началом данных. Порядок регистрации сохраняется,
+поэтому приоритеты хэндлеров остаются прежними.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+# Символы, с которых начинается "нелитеральная" часть регулярного выражения
+_REGEXP_META = set("\\.^$*+?{}[]()|")
+# Узел дерева для сегмента из одной или нескольких цифр
+DIGITS = r"\d+"
+
+
+class CallbackRoute(Filter):
+    """
+    Фильтр callback_data с явным статическим префиксом
+
+    Создаётся через конструкторы:
+        CallbackRoute.exact("main_menu")
+        CallbackRoute.prefix("lesson_", exclude=("lesson_test_",))
+        CallbackRoute.regexp(r"^teacher_\\d+_book_\\d+$")
+    """
+
+    def __init__(
+        self,
+        key: str,
+        *,
+        exact: bool = False,
+        pattern: Optional[Pattern[str]] = None,
+        exclude: Tuple[str, ...] = (),
+        exclude_patterns: Tuple[Pattern[str], ...] = ()
+    ) -> None:
+        self.key = key
+        # Путь в префиксном дереве: символы ключа, для regexp - ещё и сегменты \d+
+        self.path: Tuple[str, ...] = tuple(key)
+        self.is_exact = exact
+        self.pattern = pattern
+        self.exclude = exclude
+        self.exclude_patterns = exclude_patterns
+
+    @classmethod
+    def exact(cls, value: str) -> "CallbackRoute":
+        """callback_data == value"""
+        return cls(value, exact=True)
+
+    @classmethod
+    def prefix(cls, value: str, exclude: Iterable[str] = ()) -> "CallbackRoute":
+        """callback_data начинается с value и не начинается ни с одного из exclude"""
+        return cls(value, exclude=tuple(exclude))
+
+    @classmethod
+    def regexp(cls, pattern: str, exclude: Iterable[str] = ()) -> "CallbackRoute":
+        """callback_data соответствует pattern (обязательно с якорем ^) и не соответствует exclude"""
+        if not pattern.startswith("^"):
+            raise ValueError(f"Шаблон маршрута должен начинаться с '^': {pattern}")
+        route = cls(
+            literal_prefix(pattern),
+            pattern=re.compile(pattern),
+            exclude_patterns=tuple(re.compile(item) for item in exclude)
+        )
+        route.path = route_path(pattern)
+        return route
+
+    def match(self, data: str) -> bool:
+        """Проверка callback_data без учёта индекса"""
+        if self.is_exact:
+            return data == self.key
+        if not data.startswith(self.key):
+            return False
+        if self.exclude and data.startswith(self.exclude):
+            return False
+        if self.pattern is not None and not self.pattern.search(data):
+            return False
+        for excluded in self.exclude_patterns:
+            if excluded.search(data):
+                return False
+        return True
+
+    async def __call__(self, callback: CallbackQuery) -> bool:
+        if callback.data is None:
+            return False
+        return self.match(callback.data)
+
+    def __str__(self) -> str:
+        if self.is_exact:
+            return f"CallbackRoute.exact({self.key!r})"
+        if self.pattern is not None:
+            return f"CallbackRoute.regexp({self.pattern.pattern!r})"
+        return f"CallbackRoute.prefix({self.key!r})"
+
+
+def route_path(pattern: str) -> Tuple[str, ...]:
+    """
+    Путь регулярного выражения в префиксном дереве
+
+    Литеральные символы после ^ и сегменты \\d+ (за которыми не идёт цифра)
+    до первой конструкции, которую дерево не поддерживает.
+    """
+    path: List[str] = []
+    position = 1
+    while position < len(pattern):
+        if pattern.startswith(DIGITS, position):
+            following = pattern[position + len(DIGITS):position + len(DIGITS) + 1]
+            if following.isdigit():
+                break
+            path.append(DIGITS)
+            position += len(DIGITS)
+            continue
+        char = pattern[position]
+        if char in _REGEXP_META:
+            break
+        path.append(char)
+        position += 1
+    return tuple(path)
+
+
+def literal_prefix(pattern: str) -> str:
+    """Литеральная часть регулярного выражения после якоря ^ (до первого метасимвола)"""
+    prefix = []
+    for char in pattern[1:]:
+        if char in _REGEXP_META:
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+class PrefixTrie:
+    """Префиксное дерево: путь маршрута -> список номеров хэндлеров"""
+
+    __slots__ = ("_root",)
+
+    def __init__(self) -> None:
+        # Узел: [дети {символ или DIGITS: узел}, номера хэндлеров]
+        self._root: List[Any] = [{}, []]
+
+    def insert(self, path: Iterable[str], value: int) -> None:
+        node = self._root
+        for token in path:
+            children = node[0]
+            child = children.get(token)
+            if child is None:
+                child = [{}, []]
+                children[token] = child
+            node = child
+        node[1].append(value)
+
+    def collect(self, data: str) -> List[int]:
+        """Все значения, чьи пути совпадают с началом data"""
+        found: List[int] = []
+        length = len(data)
+        stack = [(self._root, 0)]
+        while stack:
+            node, position = stack.pop()
+            found.extend(node[1])
+            if position >= length:
+                continue
+            children = node[0]
+            child = children.get(data[position])
+            if child is not None:
+                stack.append((child, position + 1))
+            digits = children.get(DIGITS)
+            if digits is not None and data[position].isdigit():
+                end = position + 1
+                while end < length and data[end].isdigit():
+                    end += 1
+                stack.append((digits, end))
+        return found
+
+
+class CallbackTrieObserver(TelegramEventObserver):
+    """Наблюдатель callback_query с индексом хэндлеров по префиксу"""
+
+    def __init__(self, router: Router, event_name: str) -> None:
+        super().__init__(router=router, event_name=event_name)
+        self._trie = PrefixTrie()
+        self._exact: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+
+    def register(self, callback: Any, *filters: Any, flags: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        result = super().register(callback, *filters, flags=flags, **kwargs)
+        position = len(self.handlers) - 1
+
+        route = next((item for item in filters if isinstance(item, CallbackRoute)), None)
+        if route is None:
+            self._unindexed.append(position)
+        elif route.is_exact:
+            self._exact.setdefault(route.key, []).append(position)
+        else:
+            self._trie.insert(route.path, position)
+
+        return result
+
+    def candidates(self, data: Optional[str]) -> List[int]:
+        """Номера хэндлеров, которые могут подойти для callback_data (в порядке регистрации)"""
+        if data is None:
+            return self._unindexed
+        found = self._trie.collect(data)
+        found.extend(self._exact.get(data, ()))
+        if self._unindexed:
+            found.extend(self._unindexed)
+        found.sort()
+        return found
+
+    async def trigger(self, event: CallbackQuery, **kwargs: Any) -> Any:
+        for position in self.candidates(event.data):
+            handler = self.handlers[position]
+            kwargs["handler"] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+
+class CallbackRouter(Router):
+    """Router, в котором callback_query маршрутизируются через префиксное дерево"""
+
+    def __init__(self, *, name: Optional[str] = None) -> None:
+        super().__init__(name=name)
+        self.callback_query = CallbackTrieObserver(router=self, event_name="callback_query")
+        self.observers["callback_query"] = self.callback_query
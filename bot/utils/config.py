@@ -38,6 +38,11 @@ class Settings(BaseSettings):
     # Application Configuration
     debug: bool = Field(False, env="DEBUG")
     log_level: str = Field("INFO", env="LOG_LEVEL")
+
+    # Режим выполнения апдейтов:
+    # per_chat - апдейты одного чата по очереди, разных чатов параллельно (+ схлопывание дублей колбэков)
+    # parallel - все апдейты параллельно (поведение aiogram по умолчанию)
+    update_execution_mode: str = Field("per_chat", env="UPDATE_EXECUTION_MODE")
     
     # File Configuration
     max_audio_size_mb: int = Field(20, env="MAX_AUDIO_SIZE_MB")  # 20 МБ - лимит Telegram Bot API для getFile
@@ -53,10 +58,50 @@ class Settings(BaseSettings):
         """Получение максимального размера аудиофайла в байтах"""
         return self.max_audio_size_mb * 1024 * 1024
 
+    # FFmpeg: сколько конвертаций одновременно, потоков на одну конвертацию,
+    # приоритет процесса (nice 0-19) и пониженный приоритет диска (ionice)
+    ffmpeg_max_concurrent: int = Field(2, env="FFMPEG_MAX_CONCURRENT")
+    ffmpeg_threads: int = Field(1, env="FFMPEG_THREADS")
+    ffmpeg_nice: int = Field(10, env="FFMPEG_NICE")
+    ffmpeg_ionice: bool = Field(True, env="FFMPEG_IONICE")
+    # Потоковых конвертаций во время загрузки (отдельно от FFMPEG_MAX_CONCURRENT)
+    ffmpeg_max_streaming: int = Field(1, env="FFMPEG_MAX_STREAMING")
+    # Записи длиннее этого (секунды) кодируются по частям параллельно (0 - выключено)
+    ffmpeg_segment_min_duration: int = Field(1800, env="FFMPEG_SEGMENT_MIN_DURATION")
+    # Уроки, которые не помещаются в 49 МБ без потери качества, делить на части
+    audio_split_long_lessons: bool = Field(True, env="AUDIO_SPLIT_LONG_LESSONS")
+    # Профиль кодирования уроков: mp3 (совместимость) или opus (речь, вдвое меньше файлы)
+    audio_encoding_profile: str = Field("mp3", env="AUDIO_ENCODING_PROFILE")
+    # Сколько дней хранить неиспользуемые результаты анализа громкости (audio_files/.analysis)
+    analysis_cache_ttl_days: int = Field(30, env="ANALYSIS_CACHE_TTL_DAYS")
+    # Сверка файлов на диске с уроками: период (секунды, 0 - выключено) и через сколько
+    # часов без ссылок файл удаляется
+    storage_reconcile_interval: int = Field(3600, env="STORAGE_RECONCILE_INTERVAL")
+    storage_orphan_grace_hours: int = Field(24, env="STORAGE_ORPHAN_GRACE_HOURS")
+
     # Web Converter Configuration
     web_converter_url: str = Field("http://localhost:1992", env="WEB_CONVERTER_URL")
     web_converter_login: str = Field("admin", env="WEB_CONVERTER_LOGIN")
     web_converter_password: str = Field("admin", env="WEB_CONVERTER_PASSWORD")
+    # Ключ подписи сессий (пусто - случайный ключ в web-converter/session.key)
+    web_converter_secret_key: str = Field("", env="WEB_CONVERTER_SECRET_KEY")
+    # Процессов uvicorn (задачи конвертации распределяются между ними)
+    web_converter_workers: int = Field(1, env="WEB_CONVERTER_WORKERS")
+    # Очередь конвертаций веб-конвертера: обработчиков (0 - по числу ядер) и сколько
+    # задач может ждать (при переполнении - ответ 429)
+    web_converter_job_workers: int = Field(0, env="WEB_CONVERTER_JOB_WORKERS")
+    web_converter_max_queued: int = Field(20, env="WEB_CONVERTER_MAX_QUEUED")
+    # Кеш готовых MP3 веб-конвертера по хешу исходника и параметрам: квота в МБ (0 - выключен)
+    web_converter_cache_size_mb: int = Field(2048, env="WEB_CONVERTER_CACHE_SIZE_MB")
+    # Результаты веб-конвертера: срок хранения с последнего скачивания (часы, 0 - без срока),
+    # квота в МБ (0 - без квоты) и период очистки (секунды)
+    web_converter_result_ttl_hours: int = Field(72, env="WEB_CONVERTER_RESULT_TTL_HOURS")
+    web_converter_results_quota_mb: int = Field(10240, env="WEB_CONVERTER_RESULTS_QUOTA_MB")
+    web_converter_cleanup_interval: int = Field(600, env="WEB_CONVERTER_CLEANUP_INTERVAL")
+    # Передача готовых файлов из веб-конвертера в бота по коду: общая директория
+    # (смонтирована в оба контейнера) и срок действия кода в минутах
+    web_converter_handoff_path: str = Field("bot/audio_files/handoff", env="WEB_CONVERTER_HANDOFF_PATH")
+    web_converter_handoff_ttl_minutes: int = Field(60, env="WEB_CONVERTER_HANDOFF_TTL_MINUTES")
 
     # Paths
     audio_files_path: str = "bot/audio_files"
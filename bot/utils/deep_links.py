@@ -0,0 +1,45 @@
+"""
+Deep links вида t.me/<бот>?start=<payload>
+
+Payload: l_<id> - урок, s_<id> - серия, t_<id> - тест.
+Такая ссылка открывает нужный экран одним апдейтом (/start с payload)
+вместо цепочки тем -> книг -> преподавателей -> серий -> уроков.
+"""
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from aiogram import Bot
+from aiogram.utils.deep_linking import create_start_link
+
+LINK_LESSON = "l"
+LINK_SERIES = "s"
+LINK_TEST = "t"
+
+_PAYLOAD_RE = re.compile(r"^(l|s|t)_(\d+)$")
+
+
+def parse_start_payload(payload: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    Разбор payload команды /start
+
+    Returns:
+        (тип ссылки, ID) или None, если payload не наш
+    """
+    if not payload:
+        return None
+    match = _PAYLOAD_RE.match(payload.strip())
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+async def get_start_link(bot: Bot, kind: str, entity_id: int) -> str:
+    """Ссылка на бота, открывающая урок/серию/тест"""
+    return await create_start_link(bot, f"{kind}_{entity_id}")
+
+
+async def get_share_url(bot: Bot, kind: str, entity_id: int) -> str:
+    """Ссылка для кнопки "Поделиться" (окно выбора чата Telegram)"""
+    link = await get_start_link(bot, kind, entity_id)
+    return f"https://t.me/share/url?url={quote(link, safe='')}"
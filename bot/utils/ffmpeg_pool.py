@@ -0,0 +1,209 @@
+"""
+Пул запуска FFmpeg/FFprobe без блокировки event loop
+
+Процессы запускаются через asyncio.create_subprocess_exec. Тяжёлые задачи
+(конвертация) проходят через семафор - одновременно работает не больше
+FFMPEG_MAX_CONCURRENT процессов, остальные ждут в очереди. Конвертации
+запускаются с пониженным приоритетом (nice/ionice) и ограничением потоков,
+чтобы не отнимать CPU и диск у обработки сообщений.
+
+Потоковые конвертации (во время загрузки) большую часть времени ждут данные
+из сети, поэтому слоты пула не занимают: у них свой лимит
+FFMPEG_MAX_STREAMING, и при занятых слотах они не ждут в очереди - файл
+конвертируется обычным способом после загрузки.
+
+С progress FFmpeg запускается с -progress pipe:1: по мере кодирования
+вызывающий код получает, сколько секунд записи уже обработано.
+"""
+import asyncio
+import logging
+import shutil
+import subprocess
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+
+from bot.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Обработано секунд записи (по отчётам -progress)
+ProgressCallback = Callable[[float], None]
+
+# Ключи отчёта -progress со временем в микросекундах (out_time_ms - тоже микросекунды)
+_PROGRESS_TIME_KEYS = ("out_time_us", "out_time_ms")
+
+
+class FFmpegBusy(Exception):
+    """Все слоты потоковой конвертации заняты"""
+
+
+class FFmpegPool:
+    """Ограниченный пул процессов FFmpeg"""
+
+    def __init__(self, max_concurrent: int, threads: int, nice: int, ionice: bool, max_streaming: int = 1) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_streaming = max(0, max_streaming)
+        self.streaming = 0
+        self.threads = max(0, threads)
+        self.nice = nice
+        self.ionice = ionice
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Счётчики для логов: сколько процессов выполняется и ждёт слота
+        self.active = 0
+        self.waiting = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Создаём при первом использовании - уже внутри работающего event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def thread_args(self) -> List[str]:
+        """Аргументы FFmpeg для ограничения числа потоков (0 - без ограничения)"""
+        if not self.threads:
+            return []
+        return ["-threads", str(self.threads), "-filter_threads", str(self.threads)]
+
+    def _priority_prefix(self) -> List[str]:
+        """Префикс команды для понижения приоритета CPU и диска"""
+        prefix: List[str] = []
+        if self.nice and shutil.which("nice"):
+            prefix += ["nice", "-n", str(self.nice)]
+        if self.ionice and shutil.which("ionice"):
+            # best-effort, самый низкий приоритет внутри класса
+            prefix += ["ionice", "-c", "2", "-n", "7"]
+        return prefix
+
+    def heavy_command(self, cmd: List[str]) -> List[str]:
+        """Команда тяжёлой задачи с пониженным приоритетом (для запуска внутри slot())"""
+        return self._priority_prefix() + cmd
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Слот пула для процесса, которым управляет вызывающий код
+
+        Нужен, когда процесс получает данные по мере поступления (потоковая
+        конвертация во время загрузки) и run() с готовыми input_data не подходит.
+        """
+        self.waiting += 1
+        if self.active >= self.max_concurrent:
+            logger.info(f"FFmpeg: все {self.max_concurrent} слота заняты, задача в очереди ({self.waiting} ждут)")
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+    @asynccontextmanager
+    async def stream_slot(self) -> AsyncIterator[None]:
+        """
+        Слот потоковой конвертации - отдельно от слотов пула
+
+        Процесс почти всё время ждёт данные загрузки, и слот пула простаивал
+        бы вместе с ним, задерживая очередь конвертаций.
+
+        Raises:
+            FFmpegBusy: свободного слота нет (в очереди не ждём)
+        """
+        if self.streaming >= self.max_streaming:
+            raise FFmpegBusy(f"Все {self.max_streaming} слота потоковой конвертации заняты")
+
+        self.streaming += 1
+        try:
+            yield
+        finally:
+            self.streaming -= 1
+
+    async def run(
+        self,
+        cmd: List[str],
+        timeout: float,
+        heavy: bool = True,
+        input_data: Optional[bytes] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Запуск команды и ожидание результата
+
+        Args:
+            cmd: Команда (ffmpeg/ffprobe и аргументы)
+            timeout: Тайм-аут в секундах; по истечении процесс убивается
+            heavy: Тяжёлая задача (конвертация) - через очередь и с пониженным приоритетом
+            input_data: Данные для stdin процесса
+            progress: Вызывается с числом обработанных секунд (только для ffmpeg;
+                stdout процесса при этом занят отчётами и не возвращается)
+
+        Returns:
+            subprocess.CompletedProcess с returncode, stdout, stderr (bytes)
+
+        Raises:
+            asyncio.TimeoutError: процесс не уложился в тайм-аут
+        """
+        if progress is not None:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+
+        if not heavy:
+            return await self._execute(cmd, timeout, input_data, progress)
+
+        async with self.slot():
+            return await self._execute(self.heavy_command(cmd), timeout, input_data, progress)
+
+    @staticmethod
+    async def _read_progress(stream: asyncio.StreamReader, progress: ProgressCallback) -> None:
+        async for line in stream:
+            key, _, value = line.decode("utf-8", errors="ignore").strip().partition("=")
+            if key in _PROGRESS_TIME_KEYS and value.isdigit():
+                progress(int(value) / 1_000_000)
+
+    @classmethod
+    async def _execute(
+        cls,
+        cmd: List[str],
+        timeout: float,
+        input_data: Optional[bytes],
+        progress: Optional[ProgressCallback] = None
+    ) -> subprocess.CompletedProcess:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            if progress is None:
+                stdout, stderr = await asyncio.wait_for(process.communicate(input_data), timeout=timeout)
+            else:
+                if input_data is not None:
+                    process.stdin.write(input_data)
+                    process.stdin.close()
+                _, stderr, _ = await asyncio.wait_for(asyncio.gather(
+                    cls._read_progress(process.stdout, progress),
+                    process.stderr.read(),
+                    process.wait()
+                ), timeout=timeout)
+                stdout = b""
+        except BaseException:
+            # Тайм-аут или отмена задачи - процесс не должен остаться висеть
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+ffmpeg_pool = FFmpegPool(
+    max_concurrent=config.ffmpeg_max_concurrent,
+    threads=config.ffmpeg_threads,
+    nice=config.ffmpeg_nice,
+    ionice=config.ffmpeg_ionice,
+    max_streaming=config.ffmpeg_max_streaming
+)
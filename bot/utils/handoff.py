@@ -0,0 +1,205 @@
+"""
+Передача готовых файлов из веб-конвертера в бота по коду
+
+Большой урок конвертируется в веб-конвертере; раньше готовый MP3 нужно было
+скачать на телефон и снова отправить боту (лимит Telegram 20 МБ), а бот
+скачивал и конвертировал его ещё раз. Теперь веб-конвертер публикует
+результат в общую директорию (WEB_CONVERTER_HANDOFF_PATH, смонтирована в оба
+контейнера) и выдаёт короткий код. Админ отправляет код боту вместо файла -
+бот забирает готовый файл с диска без скачивания и перекодирования.
+
+В директории на каждый код два файла: <код>.mp3 и <код>.json (описание).
+Описание пишется последним, так что код виден только с готовым файлом.
+Код одноразовый: забирает его атомарное переименование описания, поэтому
+один файл не попадёт в два урока. Незабранные коды истекают через
+WEB_CONVERTER_HANDOFF_TTL_MINUTES и удаляются при следующей публикации
+или попытке забрать код.
+"""
+import json
+import logging
+import os
+import re
+import secrets
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from bot.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Без похожих символов (0/O, 1/I) - код переписывают с экрана вручную
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 8
+
+_CODE_RE = re.compile(r"^\s*#?([A-Za-z2-9]{4})[-\s]?([A-Za-z2-9]{4})\s*$")
+
+
+@dataclass
+class Handoff:
+    """Опубликованный результат конвертации"""
+    code: str
+    filename: str           # файл в директории передачи
+    title: str              # исходное имя файла
+    bitrate_kbps: int
+    duration: int
+    size: int
+    created_at: float
+    expires_at: float
+
+    @property
+    def display_code(self) -> str:
+        return f"{self.code[:4]}-{self.code[4:]}"
+
+
+def parse_handoff_code(text: Optional[str]) -> Optional[str]:
+    """Код передачи из сообщения (XXXX-XXXX, регистр и дефис не важны) или None"""
+    match = _CODE_RE.match(text or "")
+    if match is None:
+        return None
+    code = "".join(match.groups()).upper()
+    return code if all(char in CODE_ALPHABET for char in code) else None
+
+
+class HandoffStore:
+    """Директория передачи файлов (общая для веб-конвертера и бота)"""
+
+    def __init__(self, root: str, ttl: int) -> None:
+        self.root = root
+        self.ttl = ttl
+
+    def _meta_path(self, code: str) -> str:
+        return os.path.join(self.root, f"{code}.json")
+
+    def path(self, handoff: Handoff) -> str:
+        return os.path.join(self.root, handoff.filename)
+
+    def publish(self, file_path: str, title: str, bitrate_kbps: int, duration: int) -> Handoff:
+        """
+        Публикация файла под новым кодом (веб-конвертер)
+
+        Файл попадает в директорию жёсткой ссылкой, а если директория на
+        другой файловой системе - копией; исходный файл остаётся на месте.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        self.cleanup_expired()
+
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+        extension = os.path.splitext(file_path)[1].lower()
+        now = time.time()
+        handoff = Handoff(
+            code=code,
+            filename=f"{code}{extension}",
+            title=title,
+            bitrate_kbps=bitrate_kbps,
+            duration=duration,
+            size=os.path.getsize(file_path),
+            created_at=now,
+            expires_at=now + self.ttl,
+        )
+
+        target = self.path(handoff)
+        try:
+            os.link(file_path, target)
+        except OSError:
+            shutil.copyfile(file_path, target)
+        # Ссылка делит время изменения с исходным файлом - отсчёт срока с публикации
+        os.utime(target)
+
+        meta_path = self._meta_path(code)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(asdict(handoff), f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        logger.info(f"Файл {file_path} опубликован для бота с кодом {handoff.display_code}")
+        return handoff
+
+    def claim(self, code: str) -> Optional[Handoff]:
+        """
+        Получение файла по коду (бот); код после этого недействителен
+
+        Returns:
+            Handoff (файл - path(handoff), его нужно перенести к себе) или None,
+            если кода нет, он уже использован или истёк
+        """
+        self.cleanup_expired()
+        meta_path = self._meta_path(code)
+        claimed_path = f"{meta_path}.claimed-{secrets.token_hex(4)}"
+        try:
+            os.rename(meta_path, claimed_path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            with open(claimed_path, "r", encoding="utf-8") as f:
+                handoff = Handoff(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Повреждённое описание передачи {code}: {e}")
+            return None
+        finally:
+            os.remove(claimed_path)
+
+        if handoff.expires_at < time.time() or not os.path.exists(self.path(handoff)):
+            self._remove_file(self.path(handoff))
+            return None
+
+        logger.info(f"Код передачи {handoff.display_code} использован: {handoff.title}")
+        return handoff
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def cleanup_expired(self) -> int:
+        """Удаление истёкших кодов и файлов без описания (брошенных после получения)"""
+        if not os.path.isdir(self.root):
+            return 0
+
+        now = time.time()
+        removed = 0
+        described = set()
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.root, name)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    handoff = Handoff(**json.load(f))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, TypeError):
+                if os.path.getmtime(meta_path) < now - self.ttl:
+                    self._remove_file(meta_path)
+                continue
+
+            if handoff.expires_at < now:
+                self._remove_file(meta_path)
+                self._remove_file(self.path(handoff))
+                removed += 1
+            else:
+                described.add(handoff.filename)
+
+        # Файлы без действующего описания: забраны, но не перенесены, или публикация прервалась
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".json") or name in described:
+                continue
+            try:
+                if os.path.getmtime(path) < now - self.ttl:
+                    self._remove_file(path)
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            logger.info(f"Удалено истёкших кодов передачи: {removed}")
+        return removed
+
+
+handoff_store = HandoffStore(
+    config.web_converter_handoff_path,
+    config.web_converter_handoff_ttl_minutes * 60
+)
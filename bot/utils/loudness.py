@@ -0,0 +1,332 @@
+"""
+Анализ громкости и формата аудио перед конвертацией
+
+Один проход FFmpeg с фильтром loudnorm в режиме измерения даёт интегральную
+громкость, true peak, LRA и порог - их же принимает второй (линейный) проход
+нормализации. Формат (кодек, каналы, частота, битрейт) берётся из probe().
+В том же проходе silencedetect находит паузы - по ним длинные записи режутся
+на сегменты для параллельного кодирования. Результат кешируется по SHA-256
+содержимого файла: повторная загрузка того же аудио не требует нового анализа.
+Записи кеша, не использованные ANALYSIS_CACHE_TTL_DAYS дней, удаляются
+(проверка не чаще раза в ANALYSIS_PRUNE_INTERVAL, после очередного анализа).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from bot.utils.config import config
+from bot.utils.ffmpeg_pool import ffmpeg_pool
+from bot.utils.media_probe import probe
+
+logger = logging.getLogger(__name__)
+
+# Цель нормализации (как у прежнего однопроходного loudnorm)
+LOUDNORM_I = -16.0
+LOUDNORM_TP = -1.5
+LOUDNORM_LRA = 11.0
+
+# Допуски, при которых файл считается уже нормализованным
+LOUDNESS_TOLERANCE_LU = 1.0
+TRUE_PEAK_TOLERANCE_DB = 0.5
+# Допуск битрейта VBR-файлов относительно целевого (kbps)
+BITRATE_TOLERANCE_KBPS = 8
+
+# Пауза для точек разреза: тише порога и не короче SILENCE_MIN_DURATION секунд
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_DURATION = 0.5
+
+# Директория кеша результатов анализа (по одному JSON на хеш содержимого)
+ANALYSIS_CACHE_DIR = os.path.join(config.audio_files_path, ".analysis")
+# Как часто проверять кеш анализа на устаревшие записи (секунды)
+ANALYSIS_PRUNE_INTERVAL = 24 * 3600
+
+_LOUDNORM_JSON_RE = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}", re.S)
+_SILENCE_START_RE = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end: (-?[\d.]+)")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class AudioAnalysis:
+    """Формат и измеренная громкость аудио файла"""
+    codec: str
+    sample_rate: int
+    channels: int
+    bitrate_kbps: int
+    duration: int
+    size: int
+    # Результаты измерения loudnorm (None, если измерить не удалось)
+    input_i: Optional[float] = None
+    input_tp: Optional[float] = None
+    input_lra: Optional[float] = None
+    input_thresh: Optional[float] = None
+    target_offset: Optional[float] = None
+    # Середины пауз в секундах (None - паузы не искались, например старая запись кеша)
+    silences: Optional[List[float]] = None
+
+    @property
+    def has_loudness(self) -> bool:
+        """Измерения пригодны для линейной нормализации (тишина даёт -inf)"""
+        values = (self.input_i, self.input_tp, self.input_lra, self.input_thresh, self.target_offset)
+        return all(value is not None and math.isfinite(value) for value in values)
+
+    @property
+    def loudness_compliant(self) -> bool:
+        """Громкость уже соответствует цели"""
+        return (
+            self.has_loudness
+            and abs(self.input_i - LOUDNORM_I) <= LOUDNESS_TOLERANCE_LU
+            and self.input_tp <= LOUDNORM_TP + TRUE_PEAK_TOLERANCE_DB
+        )
+
+    @property
+    def linear_feasible(self) -> bool:
+        """
+        loudnorm применит линейное усиление, а не перейдёт в динамический режим
+
+        Линейный режим возможен, если после усиления true peak не превысит цель.
+        Только тогда громкость одинакова при кодировании файла по частям.
+        """
+        return (
+            self.has_loudness
+            and self.input_tp + (LOUDNORM_I - self.input_i) <= LOUDNORM_TP
+        )
+
+    def is_speech_ready(self, channels: int, sample_rate: int, max_bitrate_kbps: int, codec: str = "mp3") -> bool:
+        """
+        Файл можно отдать как есть (копированием потока, без перекодирования)
+
+        Нужный кодек (по умолчанию MP3) с нужными каналами и частотой,
+        битрейтом не выше целевого и уже нормализованной громкостью.
+        """
+        return (
+            self.codec == codec
+            and self.channels == channels
+            and self.sample_rate == sample_rate
+            and 0 < self.bitrate_kbps <= max_bitrate_kbps + BITRATE_TOLERANCE_KBPS
+            and self.loudness_compliant
+        )
+
+    def loudnorm_filter(self) -> str:
+        """Фильтр второго прохода: линейная нормализация по измеренным значениям"""
+        return (
+            f"loudnorm=I={LOUDNORM_I:g}:TP={LOUDNORM_TP:g}:LRA={LOUDNORM_LRA:g}"
+            f":measured_I={self.input_i:.2f}:measured_TP={self.input_tp:.2f}"
+            f":measured_LRA={self.input_lra:.2f}:measured_thresh={self.input_thresh:.2f}"
+            f":offset={self.target_offset:.2f}:linear=true"
+        )
+
+
+def single_pass_loudnorm_filter() -> str:
+    """Однопроходный (динамический) loudnorm - когда измерений нет"""
+    return f"loudnorm=I={LOUDNORM_I:g}:TP={LOUDNORM_TP:g}:LRA={LOUDNORM_LRA:g}"
+
+
+def _sha256_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def file_sha256(file_path: str) -> str:
+    """SHA-256 содержимого файла (чтение в отдельном потоке)"""
+    return await asyncio.to_thread(_sha256_file, file_path)
+
+
+class AnalysisCache:
+    """Кеш результатов анализа: в памяти и JSON-файлы на диске"""
+
+    def __init__(self, cache_dir: str, ttl: int) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._memory: Dict[str, AudioAnalysis] = {}
+        self._last_prune = 0.0
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def get(self, content_hash: str) -> Optional[AudioAnalysis]:
+        analysis = self._memory.get(content_hash)
+        if analysis is not None:
+            self._touch(content_hash)
+            return analysis
+
+        try:
+            with open(self._path(content_hash), "r", encoding="utf-8") as f:
+                analysis = AudioAnalysis(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Повреждённая запись кеша анализа {content_hash}: {e}")
+            return None
+
+        self._memory[content_hash] = analysis
+        self._touch(content_hash)
+        return analysis
+
+    def _touch(self, content_hash: str) -> None:
+        """Отметка использования записи (mtime) - срок хранения считается от неё"""
+        try:
+            os.utime(self._path(content_hash))
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        """Удаление записей, не использованных дольше ttl; возвращает их число"""
+        self._last_prune = time.time()
+        if self.ttl <= 0 or not os.path.isdir(self.cache_dir):
+            return 0
+
+        deadline = time.time() - self.ttl
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) >= deadline:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            self._memory.pop(os.path.splitext(name)[0], None)
+            removed += 1
+
+        if removed:
+            logger.info(f"Кеш анализа: удалено устаревших записей: {removed}")
+        return removed
+
+    def prune_due(self) -> bool:
+        return time.time() - self._last_prune >= ANALYSIS_PRUNE_INTERVAL
+
+    def put(self, content_hash: str, analysis: AudioAnalysis) -> None:
+        self._memory[content_hash] = analysis
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._path(content_hash) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(analysis), f)
+            os.replace(tmp_path, self._path(content_hash))
+        except OSError as e:
+            # Кеш на диске - оптимизация, без него анализ просто повторится
+            logger.warning(f"Не удалось сохранить кеш анализа {content_hash}: {e}")
+
+
+analysis_cache = AnalysisCache(ANALYSIS_CACHE_DIR, config.analysis_cache_ttl_days * 24 * 3600)
+
+
+async def _probe_format(file_path: str) -> Optional[AudioAnalysis]:
+    """Формат первого аудио потока (через probe())"""
+    info = await probe(file_path)
+    if info is None:
+        return None
+
+    return AudioAnalysis(
+        codec=info.codec,
+        sample_rate=info.sample_rate,
+        channels=info.channels,
+        bitrate_kbps=info.bitrate_kbps,
+        duration=info.duration,
+        size=info.size
+    )
+
+
+def _parse_silences(stderr: str) -> List[float]:
+    """Середины найденных silencedetect пауз"""
+    starts = [float(value) for value in _SILENCE_START_RE.findall(stderr)]
+    ends = [float(value) for value in _SILENCE_END_RE.findall(stderr)]
+    # Пауза в самом конце файла может не иметь silence_end - такая не нужна
+    return [round((start + end) / 2, 3) for start, end in zip(starts, ends) if end > start]
+
+
+async def _measure_loudness(file_path: str, analysis: AudioAnalysis) -> bool:
+    """
+    Проход измерения loudnorm и поиска пауз; результаты записываются в analysis
+
+    Returns:
+        False, если измерение не удалось (результат нельзя кешировать)
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-i", file_path,
+        "-vn",
+        "-af", (
+            f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_DURATION},"
+            f"{single_pass_loudnorm_filter()}:print_format=json"
+        ),
+        *ffmpeg_pool.thread_args(),
+        "-f", "null", "-"
+    ]
+    process = await ffmpeg_pool.run(cmd, timeout=600)
+    stderr = process.stderr.decode("utf-8", errors="ignore")
+    if process.returncode != 0:
+        logger.error(f"Ошибка измерения громкости: {stderr[-500:]}")
+        return False
+
+    analysis.silences = _parse_silences(stderr)
+
+    matches = _LOUDNORM_JSON_RE.findall(stderr)
+    if not matches:
+        logger.warning(f"loudnorm не вернул измерения для {file_path}")
+        return False
+
+    measured = json.loads(matches[-1])
+    analysis.input_i = float(measured["input_i"])
+    analysis.input_tp = float(measured["input_tp"])
+    analysis.input_lra = float(measured["input_lra"])
+    analysis.input_thresh = float(measured["input_thresh"])
+    analysis.target_offset = float(measured["target_offset"])
+    return True
+
+
+async def analyze_audio(file_path: str) -> Optional[AudioAnalysis]:
+    """
+    Анализ аудио файла (с кешем по хешу содержимого)
+
+    Returns:
+        AudioAnalysis или None, если файл не удалось прочитать
+    """
+    try:
+        if not os.path.exists(file_path):
+            logger.error(f"Файл не найден: {file_path}")
+            return None
+
+        content_hash = await file_sha256(file_path)
+        cached = analysis_cache.get(content_hash)
+        if cached is not None:
+            logger.info(f"Анализ {file_path} взят из кеша ({content_hash[:12]})")
+            return cached
+
+        analysis = await _probe_format(file_path)
+        if analysis is None:
+            return None
+
+        measured = await _measure_loudness(file_path, analysis)
+
+        logger.info(
+            f"Анализ {file_path}: {analysis.codec}, {analysis.channels} кан., {analysis.sample_rate} Гц, "
+            f"{analysis.bitrate_kbps} kbps, I={analysis.input_i} LUFS, TP={analysis.input_tp} dBTP"
+        )
+        # Неудачное измерение не кешируется: иначе исходник навсегда останется
+        # без двухпроходной нормализации и разбиения по паузам
+        if measured:
+            analysis_cache.put(content_hash, analysis)
+        if analysis_cache.prune_due():
+            await asyncio.to_thread(analysis_cache.prune)
+        return analysis
+
+    except asyncio.TimeoutError:
+        logger.error(f"Тайм-аут анализа: {file_path}")
+        return None
+    except Exception as e:
+        logger.error(f"Ошибка при анализе {file_path}: {str(e)}")
+        return None
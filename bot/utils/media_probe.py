@@ -0,0 +1,153 @@
+"""
+Единая проверка медиафайла через FFprobe
+
+probe() за один вызов ffprobe возвращает длительность, кодек, битрейт, каналы,
+частоту и размер. Результат запоминается по (путь, размер, mtime): при загрузке
+урока один и тот же файл проверяется перед конвертацией, при анализе громкости
+и после - повторные вызовы не запускают ffprobe. Изменённый файл получает
+новый ключ и проверяется заново.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from bot.utils.ffmpeg_pool import ffmpeg_pool
+
+logger = logging.getLogger(__name__)
+
+# Сколько результатов держать в памяти (вытесняются самые давно запрошенные)
+MAX_CACHED_PROBES = 256
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Параметры аудио файла"""
+    duration: int       # секунды
+    format: str         # формат контейнера (mp3, wav, ...)
+    codec: str          # кодек первого аудио потока
+    bitrate: int        # битрейт в bps
+    sample_rate: int    # частота дискретизации
+    channels: int       # количество каналов
+    size: int           # размер файла в байтах
+
+    @property
+    def bitrate_kbps(self) -> int:
+        return self.bitrate // 1000
+
+
+ProbeKey = Tuple[str, int, int]
+
+
+class ProbeCache:
+    """Ограниченный LRU-кеш результатов probe()"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_PROBES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[ProbeKey, MediaInfo]" = OrderedDict()
+
+    def get(self, key: ProbeKey) -> Optional[MediaInfo]:
+        info = self._entries.get(key)
+        if info is not None:
+            self._entries.move_to_end(key)
+        return info
+
+    def put(self, key: ProbeKey, info: MediaInfo) -> None:
+        self._entries[key] = info
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+probe_cache = ProbeCache()
+
+
+def _parse_ffprobe(data: dict, size: int) -> Optional[MediaInfo]:
+    format_info = data.get("format", {})
+
+    audio_stream = None
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            audio_stream = stream
+            break
+
+    if not audio_stream:
+        return None
+
+    # У VBR-потоков bit_rate бывает только у контейнера
+    bitrate = audio_stream.get("bit_rate") or format_info.get("bit_rate") or 0
+
+    return MediaInfo(
+        duration=int(float(format_info.get("duration", 0))),
+        format=format_info.get("format_name", "unknown"),
+        codec=audio_stream.get("codec_name", "unknown"),
+        bitrate=int(bitrate),
+        sample_rate=int(audio_stream.get("sample_rate", 0)),
+        channels=int(audio_stream.get("channels", 0)),
+        size=size
+    )
+
+
+async def probe(file_path: str) -> Optional[MediaInfo]:
+    """
+    Параметры аудио файла (один вызов ffprobe, результат запоминается)
+
+    Args:
+        file_path: Путь к аудио файлу
+
+    Returns:
+        MediaInfo или None, если файла нет или в нём нет аудио потока
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        logger.error(f"Файл не найден: {file_path}")
+        return None
+
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    info = probe_cache.get(key)
+    if info is not None:
+        probe_cache.hits += 1
+        return info
+    probe_cache.misses += 1
+
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_format",
+        "-show_streams",
+        "-of", "json",
+        file_path
+    ]
+
+    logger.debug(f"FFprobe команда: {' '.join(cmd)}")
+
+    try:
+        process = await ffmpeg_pool.run(cmd, timeout=30, heavy=False)
+
+        if process.returncode != 0:
+            error_message = process.stderr.decode('utf-8', errors='ignore')
+            logger.error(f"Ошибка FFprobe: {error_message}")
+            return None
+
+        info = _parse_ffprobe(json.loads(process.stdout.decode('utf-8')), stat.st_size)
+
+    except asyncio.TimeoutError:
+        logger.error(f"Тайм-аут FFprobe: {file_path}")
+        return None
+    except (ValueError, TypeError) as e:
+        logger.error(f"Ошибка разбора ответа FFprobe для {file_path}: {str(e)}")
+        return None
+
+    if info is None:
+        logger.error(f"Аудио поток не найден в файле: {file_path}")
+        return None
+
+    logger.info(f"Информация о файле {file_path}: {info}")
+    probe_cache.put(key, info)
+    return info
@@ -0,0 +1,99 @@
+"""
+Кеш отрисованных экранов каталога
+
+Экраны навигации (списки тем, книг, серий, уроков, преподавателей) одинаковы
+для всех пользователей и меняются только при правках каталога в админке.
+Готовые текст и клавиатура кешируются по ключу (экран, ID сущности, версия
+каталога). Любая запись в каталог увеличивает версию - старые экраны больше
+не выдаются.
+"""
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+# Сколько экранов держать в памяти (вытесняются самые давно запрошенные)
+MAX_CACHED_SCREENS = 2048
+
+
+@dataclass(frozen=True)
+class RenderedScreen:
+    """Готовый экран: текст и клавиатура, либо alert, если показывать нечего"""
+    text: Optional[str] = None
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    # Текст всплывающего уведомления вместо перехода (например, "нет книг")
+    alert: Optional[str] = None
+    # Данные навигации, которые хэндлер сохраняет в FSM при показе экрана
+    state_data: Dict[str, Any] = field(default_factory=dict)
+
+
+RenderKey = Tuple[str, Hashable, int]
+
+
+class RenderCache:
+    """LRU-кеш экранов с версией каталога"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_SCREENS) -> None:
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._screens: "OrderedDict[RenderKey, RenderedScreen]" = OrderedDict()
+
+    def bump(self) -> int:
+        """Каталог изменился: новая версия, старые экраны выбрасываются"""
+        self.version += 1
+        self._screens.clear()
+        return self.version
+
+    def get(self, screen: str, entity_id: Hashable = None) -> Optional[RenderedScreen]:
+        key = (screen, entity_id, self.version)
+        rendered = self._screens.get(key)
+        if rendered is not None:
+            self._screens.move_to_end(key)
+        return rendered
+
+    def put(self, key: RenderKey, rendered: RenderedScreen) -> None:
+        # Экран, отрисованный до смены версии, не сохраняем
+        if key[2] != self.version:
+            return
+        self._screens[key] = rendered
+        self._screens.move_to_end(key)
+        while len(self._screens) > self.max_entries:
+            self._screens.popitem(last=False)
+
+    async def get_or_render(
+        self,
+        screen: str,
+        entity_id: Hashable,
+        render: Callable[[Any], Awaitable[RenderedScreen]]
+    ) -> RenderedScreen:
+        """
+        Экран из кеша или отрисовка через render(entity_id)
+
+        Версия фиксируется до отрисовки: если каталог изменится, пока идут
+        запросы к БД, результат не попадёт в кеш.
+        """
+        rendered = self.get(screen, entity_id)
+        if rendered is not None:
+            self.hits += 1
+            return rendered
+
+        self.misses += 1
+        key = (screen, entity_id, self.version)
+        rendered = await render(entity_id)
+        self.put(key, rendered)
+        return rendered
+
+
+render_cache = RenderCache()
+
+
+def bump_catalog_version() -> None:
+    """Вызывается после каждой записи в каталог (темы, книги, серии, уроки, тесты...)"""
+    version = render_cache.bump()
+    logger.debug(f"Версия каталога: {version}")
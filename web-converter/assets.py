@@ -0,0 +1,143 @@
+"""
+Статические файлы интерфейса веб-конвертера (директория static/)
+
+При запуске сервиса файлы читаются один раз:
+    - стили, скрипты и manifest.json получают имя с хешем содержимого
+      (app.css -> app.3f2a9c1d7b4e.css), ссылки /static/<имя> в страницах
+      и sw.js заменяются на такие имена - их можно кэшировать навсегда;
+    - всё сжимается заранее gzip и brotli (если установлен пакет Brotli).
+
+Ответ выбирает сжатие по Accept-Encoding (Vary: Accept-Encoding), ETag -
+хеш содержимого, If-None-Match -> 304. Файлы с хешем в имени отдаются с
+Cache-Control: immutable на год; страницы и sw.js (их адрес не меняется) -
+с no-cache, т.е. браузер каждый раз проверяет их по ETag.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Файлы, которые получают имя с хешем
+FINGERPRINTED_SUFFIXES = {".css", ".js", ".json"}
+# Файлы с фиксированным адресом (страницы и Service Worker)
+UNVERSIONED_NAMES = {"sw.js"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Меньшие файлы не сжимаются
+MIN_COMPRESS_SIZE = 512
+
+MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/manifest+json; charset=utf-8",
+}
+
+
+@dataclass
+class Asset:
+    """Файл со всеми вариантами сжатия"""
+    media_type: str
+    digest: str
+    bodies: Dict[str, bytes]        # кодировка (identity, gzip, br) -> тело
+    immutable: bool
+
+
+def _compress(data: bytes) -> Dict[str, bytes]:
+    bodies = {"identity": data}
+    if len(data) < MIN_COMPRESS_SIZE:
+        return bodies
+    bodies["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        bodies["br"] = brotli.compress(data, quality=11)
+    # Сжатие оставляем, только если оно меньше исходника
+    return {encoding: body for encoding, body in bodies.items() if len(body) <= len(data)}
+
+
+def _accepted_encodings(header: Optional[str]) -> set:
+    accepted = {"identity"}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetStore:
+    """Файлы интерфейса, подготовленные при запуске"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        # Имя в static/ -> адрес, по которому файл отдаётся
+        self.urls: Dict[str, str] = {}
+        self._assets: Dict[str, Asset] = {}
+        self._load()
+
+    def _load(self) -> None:
+        sources = {path.name: path.read_bytes() for path in sorted(self.root.iterdir()) if path.is_file()}
+
+        for name, data in sources.items():
+            path = Path(name)
+            if path.suffix in FINGERPRINTED_SUFFIXES and name not in UNVERSIONED_NAMES:
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                self.urls[name] = f"/static/{path.stem}.{digest}{path.suffix}"
+
+        for name, data in sources.items():
+            # Страницы, Service Worker и manifest ссылаются на остальные файлы
+            if Path(name).suffix in (".html", ".js", ".json"):
+                text = data.decode("utf-8")
+                for source_name, url in self.urls.items():
+                    text = text.replace(f"/static/{source_name}", url)
+                data = text.encode("utf-8")
+
+            suffix = Path(name).suffix
+            url = self.urls.get(name)
+            key = url.rsplit("/", 1)[1] if url else name
+            self._assets[key] = Asset(
+                media_type=MEDIA_TYPES.get(suffix) or mimetypes.guess_type(name)[0] or "application/octet-stream",
+                digest=hashlib.sha256(data).hexdigest(),
+                bodies=_compress(data),
+                immutable=url is not None,
+            )
+
+        encodings = "gzip, br" if brotli is not None else "gzip (пакет Brotli не установлен)"
+        logger.info(f"Статические файлы интерфейса: {len(self._assets)}, сжатие: {encodings}")
+
+    def response(self, request: Request, name: str) -> Optional[Response]:
+        """Ответ с файлом (None - такого файла нет)"""
+        asset = self._assets.get(name)
+        if asset is None:
+            return None
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+        encoding = next(encoding for encoding in ("br", "gzip", "identity") if encoding in asset.bodies and encoding in accepted)
+        etag = f'"{asset.digest[:32]}-{encoding}"'
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL,
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.bodies[encoding], headers=headers, media_type=asset.media_type)
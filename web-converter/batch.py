@@ -0,0 +1,203 @@
+"""
+Пакетная конвертация: серия уроков несколькими файлами или ZIP-архивом
+
+Исходники пакета лежат в одной директории; архивы распаковываются туда же
+потоково (по кускам, без чтения файла целиком в память) с защитой от путей
+вне директории и архивов-бомб. Файлы упорядочиваются естественно по имени
+("Урок 2" раньше "Урок 10"), номер урока берётся из имени - так результат
+можно импортировать уроками в том же порядке.
+
+Результаты собираются в ZIP (без сжатия - MP3 не сжимается) вместе с
+manifest.json: для каждого файла номер, исходное имя, длительность,
+битрейт и размер (или ошибка).
+"""
+import json
+import logging
+import re
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Что считаем аудио при распаковке и сборе пакета
+AUDIO_EXTENSIONS = {
+    ".mp3", ".wav", ".ogg", ".oga", ".opus", ".flac", ".m4a", ".aac", ".wma", ".amr", ".mp4", ".webm"
+}
+
+# Ограничения пакета: файлов и суммарный размер распакованного
+MAX_BATCH_FILES = 200
+MAX_EXTRACTED_SIZE = 8 * 1024 * 1024 * 1024
+
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+MANIFEST_NAME = "manifest.json"
+
+# Флаг UTF-8 имён в заголовке ZIP
+_ZIP_UTF8_FLAG = 0x800
+
+_NUMBER_RE = re.compile(r"\d+")
+_NUMBER_SPLIT_RE = re.compile(r"(\d+)")
+
+
+class BatchError(Exception):
+    """Ошибка пакета (текст показывается пользователю)"""
+
+
+@dataclass
+class BatchItem:
+    """Файл пакета и результат его конвертации"""
+    order: int                  # позиция в естественном порядке (с 1)
+    number: int                 # номер урока (из имени файла или позиция)
+    source: str                 # имя исходника внутри пакета
+    source_path: str
+    filename: Optional[str] = None
+    duration: Optional[int] = None
+    bitrate: Optional[int] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+
+    def manifest(self) -> dict:
+        data = asdict(self)
+        data.pop("source_path")
+        return data
+
+
+def natural_key(name: str) -> List[Tuple[int, object]]:
+    """Ключ естественной сортировки: числа сравниваются как числа"""
+    return [
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in _NUMBER_SPLIT_RE.split(name.lower())
+        if part
+    ]
+
+
+def _name_number(name: str) -> Optional[int]:
+    """Первое число в имени файла (без директорий и расширения)"""
+    match = _NUMBER_RE.search(Path(name).stem)
+    return int(match.group()) if match else None
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    # Архивы из Windows пишут кириллицу в cp866 без флага UTF-8,
+    # а zipfile читает такие имена как cp437
+    if info.flag_bits & _ZIP_UTF8_FLAG:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp866")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _is_audio(name: str) -> bool:
+    parts = Path(name).parts
+    if any(part.startswith(".") or part == "__MACOSX" for part in parts):
+        return False
+    return Path(name).suffix.lower() in AUDIO_EXTENSIONS
+
+
+def extract_zip(archive_path: Path, destination: Path) -> int:
+    """
+    Потоковая распаковка аудио из архива
+
+    Каждый файл копируется по кускам; директории архива сохраняются (для
+    порядка), пути вне destination и не-аудио пропускаются.
+
+    Returns:
+        Количество распакованных файлов
+
+    Raises:
+        BatchError: архив повреждён или превышены ограничения пакета
+    """
+    extracted = 0
+    total_size = 0
+    root = destination.resolve()
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = _zip_member_name(info)
+                if info.is_dir() or not _is_audio(name):
+                    continue
+
+                target = (destination / name).resolve()
+                if root not in target.parents:
+                    logger.warning(f"Пропущен файл с путём вне архива: {name}")
+                    continue
+
+                extracted += 1
+                if extracted > MAX_BATCH_FILES:
+                    raise BatchError(f"В архиве больше {MAX_BATCH_FILES} аудио файлов")
+
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with archive.open(info) as source, open(target, "wb") as output:
+                    while chunk := source.read(EXTRACT_CHUNK_SIZE):
+                        # Размер в заголовке может быть неправдой - считаем фактический
+                        total_size += len(chunk)
+                        if total_size > MAX_EXTRACTED_SIZE:
+                            raise BatchError("Архив после распаковки слишком большой")
+                        output.write(chunk)
+    except zipfile.BadZipFile as e:
+        raise BatchError(f"Повреждённый архив {archive_path.name}: {e}")
+
+    archive_path.unlink()
+    logger.info(f"Распакован архив {archive_path.name}: {extracted} файлов, {total_size} байт")
+    return extracted
+
+
+def collect_items(batch_dir: Path) -> List[BatchItem]:
+    """
+    Аудио файлы пакета в естественном порядке (архивы распаковываются)
+
+    Номер урока - первое число в имени файла, если у всех файлов числа разные;
+    иначе позиция в естественном порядке.
+    """
+    for archive_path in sorted(batch_dir.rglob("*.zip")):
+        extract_zip(archive_path, archive_path.parent / archive_path.stem)
+
+    names = sorted(
+        (str(path.relative_to(batch_dir)) for path in batch_dir.rglob("*") if path.is_file()),
+        key=natural_key
+    )
+    names = [name for name in names if _is_audio(name)]
+    if not names:
+        raise BatchError("В пакете нет аудио файлов")
+    if len(names) > MAX_BATCH_FILES:
+        raise BatchError(f"В пакете больше {MAX_BATCH_FILES} файлов")
+
+    numbers = [_name_number(name) for name in names]
+    use_names = None not in numbers and len(set(numbers)) == len(numbers)
+
+    return [
+        BatchItem(
+            order=order,
+            number=numbers[order - 1] if use_names else order,
+            source=name,
+            source_path=str(batch_dir / name)
+        )
+        for order, name in enumerate(names, start=1)
+    ]
+
+
+def unique_output_name(item: BatchItem, used: set) -> str:
+    """Имя результата в архиве: имя исходника с .mp3 (без повторов)"""
+    stem = Path(item.source).stem
+    name = f"{stem}.mp3"
+    suffix = 2
+    while name in used:
+        name = f"{stem} ({suffix}).mp3"
+        suffix += 1
+    used.add(name)
+    return name
+
+
+def write_result_archive(archive_path: Path, items: List[BatchItem], converted_dir: Path) -> None:
+    """ZIP с результатами из converted_dir и manifest.json (без сжатия, файлы копируются потоком)"""
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for item in items:
+            if item.filename:
+                archive.write(converted_dir / item.filename, arcname=item.filename)
+        archive.writestr(
+            MANIFEST_NAME,
+            json.dumps([item.manifest() for item in items], ensure_ascii=False, indent=2)
+        )
+
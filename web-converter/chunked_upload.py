@@ -0,0 +1,308 @@
+"""
+Загрузка больших файлов по частям с докачкой
+
+Протокол:
+    POST /upload/init              - создать загрузку (имя, размер) -> id и размер части
+    GET  /upload/{id}              - какие части уже приняты (для докачки после обрыва)
+    PUT  /upload/{id}?offset=N     - тело запроса - часть файла, начиная с байта N
+    POST /upload/{id}/finalize     - все части приняты, файл передаётся на конвертацию
+
+Части пишутся сразу в файл на своё место (pwrite), без буферизации в памяти:
+на один запрос в памяти только текущий кусок тела. Браузер отправляет несколько
+частей параллельно, поэтому они приходят не по порядку. SHA-256 считается
+инкрементально по непрерывному началу файла: после каждой части хеш дочитывает
+принятые подряд части (обычно из кэша страниц ОС), к финализации остаётся
+дочитать только хвост.
+
+Состояние загрузки (принятые части) хранится рядом с файлом в .json, так что
+загрузку можно продолжить и после перезапуска сервиса - хеш в этом случае
+досчитывается при финализации. Состояние читается с диска при каждом запросе
+и меняется под блокировкой файла (<id>.lock): части одной загрузки могут
+принимать разные процессы сервиса.
+
+Подписчик (subscribe) узнаёт, сколько байт от начала файла уже принято подряд -
+так потоковая конвертация читает файл, пока он ещё загружается.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import secrets
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Размер части по умолчанию и допустимые пределы (задаёт сервер)
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+
+# Кусок при чтении с диска для хеша
+HASH_READ_SIZE = 1024 * 1024
+
+# Незавершённые загрузки старше этого срока удаляются
+STALE_UPLOAD_SECONDS = 24 * 3600
+
+
+class UploadError(Exception):
+    """Ошибка протокола загрузки (текст показывается пользователю)"""
+
+    def __init__(self, message: str, status_code: int = 400) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadSession:
+    """Состояние одной загрузки (сохраняется в <id>.json)"""
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    username: str
+    created_at: float
+    received: List[int] = field(default_factory=list)
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, (self.size + self.chunk_size - 1) // self.chunk_size)
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    @property
+    def received_bytes(self) -> int:
+        return sum(self.chunk_length(index) for index in self.received)
+
+    @property
+    def complete(self) -> bool:
+        return len(self.received) == self.chunk_count
+
+    def status(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "received": sorted(self.received),
+            "received_bytes": self.received_bytes,
+            "complete": self.complete,
+        }
+
+
+class _HashState:
+    """Инкрементальный хеш непрерывного начала файла (только в памяти)"""
+
+    def __init__(self) -> None:
+        self.digest = hashlib.sha256()
+        self.next_chunk = 0
+
+
+class UploadManager:
+    """Загрузки по частям в директории root"""
+
+    def __init__(self, root: Path, max_file_size: int) -> None:
+        self.root = root
+        self.max_file_size = max_file_size
+        self._hashes: Dict[str, _HashState] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._listeners: Dict[str, Callable[[int], None]] = {}
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def data_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _lock_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.lock"
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _save(self, session: UploadSession) -> None:
+        path = self._meta_path(session.upload_id)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(session), f)
+        os.replace(tmp_path, path)
+
+    def _discard(self, upload_id: str) -> None:
+        self._hashes.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        self._listeners.pop(upload_id, None)
+        for path in (self.data_path(upload_id), self._meta_path(upload_id), self._lock_path(upload_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load(self, upload_id: str) -> UploadSession:
+        # id приходит из URL - только безопасные символы
+        if not upload_id.isalnum():
+            raise UploadError("Загрузка не найдена", 404)
+        try:
+            with open(self._meta_path(upload_id), "r", encoding="utf-8") as f:
+                return UploadSession(**json.load(f))
+        except FileNotFoundError:
+            raise UploadError("Загрузка не найдена", 404)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Повреждённое состояние загрузки {upload_id}: {e}")
+            raise UploadError("Загрузка не найдена", 404)
+
+    def get(self, upload_id: str, username: str) -> UploadSession:
+        """Загрузка по id (состояние с диска - его меняют все процессы)"""
+        session = self._load(upload_id)
+        if session.username != username:
+            raise UploadError("Загрузка не найдена", 404)
+        return session
+
+    def _mark_received(self, upload_id: str, index: int) -> UploadSession:
+        """Отметка принятой части: чтение-изменение-запись состояния под блокировкой файла"""
+        with open(self._lock_path(upload_id), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            session = self._load(upload_id)
+            if index not in session.received:
+                session.received.append(index)
+                self._save(session)
+        return session
+
+    def subscribe(self, upload_id: str, callback: Callable[[int], None]) -> None:
+        """Вызывать callback(байт подряд от начала файла) по мере приёма частей"""
+        self._listeners[upload_id] = callback
+
+    def cleanup_stale(self) -> int:
+        """Удаление брошенных загрузок старше STALE_UPLOAD_SECONDS"""
+        removed = 0
+        deadline = time.time() - STALE_UPLOAD_SECONDS
+        for meta_path in self.root.glob("*.json"):
+            try:
+                if meta_path.stat().st_mtime < deadline:
+                    self._discard(meta_path.stem)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"Удалено брошенных загрузок: {removed}")
+        return removed
+
+    def init(self, filename: str, size: int, username: str, chunk_size: Optional[int] = None) -> UploadSession:
+        """Создание загрузки: место под файл выделяется сразу"""
+        if size <= 0:
+            raise UploadError("Пустой файл")
+        if size > self.max_file_size:
+            raise UploadError(f"Файл больше {self.max_file_size // (1024 * 1024)} МБ", 413)
+
+        chunk_size = min(max(chunk_size or DEFAULT_CHUNK_SIZE, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+        self.cleanup_stale()
+
+        session = UploadSession(
+            upload_id=secrets.token_hex(16),
+            filename=Path(filename).name or "audio",
+            size=size,
+            chunk_size=chunk_size,
+            username=username,
+            created_at=time.time(),
+        )
+        with open(self.data_path(session.upload_id), "wb") as f:
+            f.truncate(size)
+        self._save(session)
+        logger.info(f"Начата загрузка {session.upload_id}: {session.filename}, {size} байт, части по {chunk_size}")
+        return session
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        username: str,
+        offset: int,
+        body: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """
+        Приём части: тело потоком пишется в файл со смещения offset
+
+        Повторная отправка уже принятой части перезаписывает её тем же содержимым,
+        поэтому клиент может просто повторить запрос после обрыва.
+        """
+        session = self.get(upload_id, username)
+        if offset < 0 or offset % session.chunk_size or offset >= session.size:
+            raise UploadError("Неверное смещение части")
+        index = offset // session.chunk_size
+        expected = session.chunk_length(index)
+
+        written = 0
+        fd = os.open(self.data_path(upload_id), os.O_WRONLY)
+        try:
+            async for piece in body:
+                if written + len(piece) > expected:
+                    raise UploadError("Часть больше ожидаемого размера")
+                await asyncio.to_thread(os.pwrite, fd, piece, offset + written)
+                written += len(piece)
+        finally:
+            os.close(fd)
+
+        if written != expected:
+            raise UploadError(f"Часть получена не полностью: {written} из {expected} байт")
+
+        async with self._lock(upload_id):
+            session = await asyncio.to_thread(self._mark_received, upload_id, index)
+            await self._advance_hash(session)
+        return session
+
+    async def _advance_hash(self, session: UploadSession) -> None:
+        """Дочитать в хеш все принятые подряд части от начала файла"""
+        state = self._hashes.setdefault(session.upload_id, _HashState())
+        received = set(session.received)
+        if state.next_chunk not in received:
+            return
+
+        def read_contiguous() -> None:
+            with open(self.data_path(session.upload_id), "rb") as f:
+                while state.next_chunk in received:
+                    f.seek(state.next_chunk * session.chunk_size)
+                    remaining = session.chunk_length(state.next_chunk)
+                    while remaining > 0:
+                        data = f.read(min(HASH_READ_SIZE, remaining))
+                        if not data:
+                            raise OSError("Файл загрузки короче ожидаемого")
+                        state.digest.update(data)
+                        remaining -= len(data)
+                    state.next_chunk += 1
+
+        await asyncio.to_thread(read_contiguous)
+
+        listener = self._listeners.get(session.upload_id)
+        if listener is not None:
+            listener(min(state.next_chunk * session.chunk_size, session.size))
+
+    async def finalize(self, upload_id: str, username: str, destination: Path) -> Tuple[str, int]:
+        """
+        Завершение загрузки: файл переносится в destination
+
+        Returns:
+            (SHA-256 содержимого, размер в байтах)
+        """
+        self.get(upload_id, username)
+        async with self._lock(upload_id):
+            session = self._load(upload_id)
+            if not session.complete:
+                missing = session.chunk_count - len(session.received)
+                raise UploadError(f"Не получено частей: {missing}", 409)
+            await self._advance_hash(session)
+            content_hash = self._hashes[upload_id].digest.hexdigest()
+            os.replace(self.data_path(upload_id), destination)
+            self._discard(upload_id)
+
+        logger.info(f"Загрузка {upload_id} завершена: {destination}, sha256 {content_hash[:12]}")
+        return content_hash, session.size
+
+    def abort(self, upload_id: str, username: str) -> None:
+        """Отмена загрузки с удалением принятых частей"""
+        self.get(upload_id, username)
+        self._discard(upload_id)
+        logger.info(f"Загрузка {upload_id} отменена")
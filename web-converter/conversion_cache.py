@@ -0,0 +1,188 @@
+"""
+Кеш результатов конвертации веб-конвертера
+
+Один и тот же исходник часто загружают повторно (потеряли скачанный файл,
+выбрали не тот битрейт). Результат конвертации запоминается по ключу из
+SHA-256 исходника и параметров кодирования (битрейт из формы, каналы,
+частота, нормализация): повторный запрос сразу получает готовый MP3 без
+FFmpeg.
+
+Записи лежат в root: <ключ>.mp3 и <ключ>.json (битрейт, длительность, время
+последнего использования). MP3 попадает в кеш и выдаётся из него жёсткой
+ссылкой - без копирования данных (копия - только если ссылка невозможна).
+Суммарный размер ограничен квотой: при превышении удаляются записи, которые
+дольше всех не использовались (LRU). Состояние только на диске, поэтому кеш
+общий для всех процессов сервиса.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedConversion:
+    """Запись кеша: параметры готового MP3"""
+    key: str
+    bitrate_kbps: int
+    duration: Optional[int]
+    size: int
+    created_at: float
+    last_used: float
+
+
+class ConversionCache:
+    """Готовые MP3 по (хеш исходника, параметры кодирования) с LRU-вытеснением по квоте"""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(
+        source_hash: str,
+        bitrate: str,
+        channels: int = 1,
+        sample_rate: int = 44100,
+        normalize: bool = True
+    ) -> str:
+        """Ключ записи (параметры по умолчанию - как у convert_to_mp3_auto)"""
+        raw = f"{source_hash}:{bitrate}:{channels}:{sample_rate}:{int(normalize)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _mp3_path(self, key: str) -> Path:
+        return self.root / f"{key}.mp3"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _save(self, entry: CachedConversion) -> None:
+        path = self._meta_path(entry.key)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp_path, path)
+
+    def _load(self, key: str) -> Optional[CachedConversion]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return CachedConversion(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Повреждённая запись кеша конвертаций {key[:12]}: {e}")
+            self._remove(key)
+            return None
+
+    def _remove(self, key: str) -> None:
+        for path in (self._mp3_path(key), self._meta_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> Optional[CachedConversion]:
+        """Запись кеша (отмечается как использованная) или None"""
+        if not self.enabled:
+            return None
+
+        entry = self._load(key)
+        if entry is not None and not self._mp3_path(key).exists():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry.last_used = time.time()
+        try:
+            self._save(entry)
+        except OSError as e:
+            logger.warning(f"Не удалось обновить запись кеша конвертаций {key[:12]}: {e}")
+        return entry
+
+    def restore(self, entry: CachedConversion, destination: Path) -> None:
+        """Готовый MP3 из кеша в destination"""
+        _link_or_copy(self._mp3_path(entry.key), destination)
+
+    def put(self, key: str, output_path: Path, bitrate_kbps: int, duration: Optional[int]) -> None:
+        """Запоминание результата конвертации (файл output_path остаётся на месте)"""
+        if not self.enabled:
+            return
+
+        size = os.path.getsize(output_path)
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        mp3_path = self._mp3_path(key)
+        try:
+            tmp_path = mp3_path.with_suffix(".mp3.tmp")
+            _link_or_copy(output_path, tmp_path)
+            os.replace(tmp_path, mp3_path)
+            self._save(CachedConversion(key, bitrate_kbps, duration, size, now, now))
+        except OSError as e:
+            # Кеш - оптимизация, без него файл просто сконвертируется заново
+            logger.warning(f"Не удалось сохранить результат в кеш конвертаций: {e}")
+            self._remove(key)
+            return
+
+        self._evict()
+
+    def _entries(self) -> List[CachedConversion]:
+        entries = []
+        for meta_path in self.root.glob("*.json"):
+            entry = self._load(meta_path.stem)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _evict(self) -> None:
+        """Удаление давно не использованных записей, пока кеш больше квоты"""
+        entries = sorted(self._entries(), key=lambda entry: entry.last_used)
+        total = sum(entry.size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(entry.key)
+            total -= entry.size
+            self.evictions += 1
+            logger.info(f"Из кеша конвертаций вытеснена запись {entry.key[:12]} ({entry.size} байт)")
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.enabled else []
+        return {
+            "entries": len(entries),
+            "size": sum(entry.size for entry in entries),
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """Жёсткая ссылка (без копирования данных), копия - если ссылка невозможна"""
+    try:
+        if destination.exists():
+            destination.unlink()
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
@@ -0,0 +1,195 @@
+"""
+Отдача результатов конвертации
+
+Результаты (MP3, ZIP пакета) не меняются после записи, поэтому:
+    - ETag строгий - SHA-256 содержимого (считается один раз на файл и
+      запоминается по (путь, размер, mtime); после конвертации считается
+      заранее, пока файл в кэше страниц ОС);
+    - If-None-Match с тем же ETag -> 304 без тела;
+    - Range: bytes=... -> 206 с запрошенным диапазоном, так что прерванное
+      скачивание продолжается с места обрыва (If-Range - только если файл
+      не изменился); несколько диапазонов в одном запросе не поддерживаются,
+      на них отдаётся файл целиком;
+    - Cache-Control: private - файлы доступны только после входа.
+
+Тело отдаётся расширением ASGI zerocopysend (sendfile без копирования в
+процесс), если сервер его поддерживает, иначе - кусками из потока pread.
+"""
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Результаты не меняются - браузер может не перепроверять их сутки
+CACHE_CONTROL = "private, max-age=86400"
+# Кусок тела, если сервер не умеет sendfile
+SEND_CHUNK_SIZE = 1024 * 1024
+HASH_READ_SIZE = 1024 * 1024
+MAX_CACHED_TAGS = 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+TagKey = Tuple[str, int, int]
+
+
+class ContentTags:
+    """SHA-256 файлов для ETag (ограниченный LRU в памяти)"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_TAGS) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[TagKey, str]" = OrderedDict()
+
+    async def etag(self, path: Path) -> str:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        tag = self._entries.get(key)
+        if tag is None:
+            tag = f'"{await asyncio.to_thread(_sha256_file, path)}"'
+            self._entries[key] = tag
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+        return tag
+
+
+content_tags = ContentTags()
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return any(tag.strip() in (etag, "*") for tag in header.split(","))
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Диапазон из заголовка Range (начало, конец включительно)
+
+    Returns:
+        None - заголовок не понят (отдаётся весь файл)
+
+    Raises:
+        ValueError: диапазон за пределами файла (ответ 416)
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None or match.group() == "bytes=-":
+        return None
+
+    start, end = match.groups()
+    if not start:
+        # bytes=-N - последние N байт
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """Файл или его диапазон (offset, length) с заданным статусом и заголовками"""
+
+    def __init__(
+        self,
+        path: Path,
+        status_code: int,
+        headers: Dict[str, str],
+        offset: int = 0,
+        length: int = 0,
+        send_body: bool = True
+    ) -> None:
+        self.path = path
+        self.status_code = status_code
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body and length > 0
+        self.background = None
+        self.raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.offset,
+                    "count": self.length,
+                })
+                return
+
+            position = self.offset
+            end = self.offset + self.length
+            while position < end:
+                data = await asyncio.to_thread(os.pread, f.fileno(), min(SEND_CHUNK_SIZE, end - position), position)
+                if not data:
+                    break
+                position += len(data)
+                await send({"type": "http.response.body", "body": data, "more_body": position < end})
+
+
+async def file_download(request: Request, path: Path, filename: str, media_type: str) -> Response:
+    """Ответ на скачивание с учётом If-None-Match, Range и If-Range"""
+    size = path.stat().st_size
+    etag = await content_tags.etag(path)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(filename),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return RangeFileResponse(path, 304, headers, send_body=False)
+
+    send_body = request.method != "HEAD"
+    headers["Content-Type"] = media_type
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            headers["Content-Length"] = "0"
+            return RangeFileResponse(path, 416, headers, send_body=False)
+
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return RangeFileResponse(path, 206, headers, start, end - start + 1, send_body)
+
+    headers["Content-Length"] = str(size)
+    return RangeFileResponse(path, 200, headers, 0, size, send_body)
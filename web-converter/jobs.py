@@ -0,0 +1,375 @@
+"""
+Очередь конвертаций веб-конвертера
+
+/convert и финализация загрузки не конвертируют файл внутри запроса, а ставят
+задачу в очередь и сразу возвращают её id. Задачи выполняют обработчики
+(по числу ядер), прогресс берётся из отчётов FFmpeg (-progress) и передаётся
+странице через Server-Sent Events (watch).
+
+Состояние задач хранится в SQLite: после перезапуска сервиса незавершённые
+задачи снова ставятся в очередь (исходники лежат на диске), а готовые
+результаты по-прежнему доступны по id. Очередь ограничена - при переполнении
+новые задачи не принимаются (QueueFull -> ответ 429).
+
+Сервис может работать несколькими процессами (uvicorn --workers) над одной
+БД. Задачу выполняет принявший её процесс (владелец); процессы отмечаются в
+БД раз в OWNER_HEARTBEAT_INTERVAL секунд, и незавершённые задачи процесса,
+который перестал отмечаться (упал или остановлен), забирает себе другой.
+Состояние чужой задачи читается из БД.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+# Прогресс пишется в БД не чаще, чем раз в столько секунд (в памяти - всегда)
+PROGRESS_SAVE_INTERVAL = 2.0
+# Завершённые задачи хранятся столько секунд
+FINISHED_JOB_TTL = 7 * 24 * 3600
+# Через сколько секунд повторить запрос при переполненной очереди
+RETRY_AFTER_SECONDS = 30
+# Процесс отмечается раз в столько секунд; не отмечавшийся OWNER_TIMEOUT - считается остановленным
+OWNER_HEARTBEAT_INTERVAL = 10
+OWNER_TIMEOUT = 30
+# Как часто перечитывать из БД задачу, которую выполняет другой процесс
+FOREIGN_POLL_INTERVAL = 1.0
+
+
+class QueueFull(Exception):
+    """Очередь переполнена"""
+
+
+class JobError(Exception):
+    """Ошибка конвертации (текст показывается пользователю)"""
+
+
+@dataclass
+class Job:
+    """Задача конвертации"""
+    job_id: str
+    username: str
+    filename: str
+    source_path: str
+    bitrate: str
+    original_size: int
+    created_at: float
+    status: str = QUEUED
+    stage: str = "В очереди"
+    progress: float = 0.0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    # file - один файл, batch - пакет (source_path - директория исходников)
+    kind: str = "file"
+    # Загрузка по частям, из которой создана задача (потоковая конвертация)
+    upload_id: Optional[str] = None
+    content_hash: Optional[str] = None
+    # Процесс, выполняющий задачу
+    owner: Optional[str] = None
+
+    def public(self) -> dict:
+        """Состояние для страницы"""
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": int(self.progress * 100),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+# Обработчик задачи: (задача, отчёт о ходе (этап, доля 0..1)) -> результат
+ProgressReport = Callable[[str, float], None]
+JobHandler = Callable[[Job, ProgressReport], Awaitable[dict]]
+
+
+class JobStore:
+    """Задачи в SQLite (одна строка - JSON задачи)"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._db.execute("CREATE TABLE IF NOT EXISTS owners (owner TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+
+    def save(self, job: Job) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, created_at, data, owner) VALUES (?, ?, ?, ?, ?)",
+            (job.job_id, job.status, job.created_at, json.dumps(asdict(job), ensure_ascii=False), job.owner)
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._db.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def count(self, status: str) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def active_sources(self) -> Set[str]:
+        """Исходники незавершённых задач"""
+        rows = self._db.execute("SELECT data FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+        return {json.loads(row[0])["source_path"] for row in rows}
+
+    def heartbeat(self, owner: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO owners (owner, heartbeat) VALUES (?, ?)", (owner, time.time())
+        )
+        self._db.execute("DELETE FROM owners WHERE heartbeat < ?", (time.time() - FINISHED_JOB_TTL,))
+
+    def remove_owner(self, owner: str) -> None:
+        self._db.execute("DELETE FROM owners WHERE owner = ?", (owner,))
+
+    def orphaned(self) -> List[Job]:
+        """Незавершённые задачи процессов, которые перестали отмечаться"""
+        rows = self._db.execute(
+            "SELECT data FROM jobs WHERE status IN (?, ?) AND (owner IS NULL OR owner NOT IN "
+            "(SELECT owner FROM owners WHERE heartbeat >= ?)) ORDER BY created_at",
+            (QUEUED, RUNNING, time.time() - OWNER_TIMEOUT)
+        ).fetchall()
+        return [Job(**json.loads(row[0])) for row in rows]
+
+    def claim(self, job: Job, owner: str) -> bool:
+        """Передача задачи процессу owner (False - её уже забрал другой)"""
+        cursor = self._db.execute(
+            "UPDATE jobs SET owner = ? WHERE job_id = ? AND owner IS ?", (owner, job.job_id, job.owner)
+        )
+        return cursor.rowcount == 1
+
+    def delete_finished_before(self, timestamp: float) -> int:
+        cursor = self._db.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND created_at < ?", (DONE, FAILED, timestamp)
+        )
+        return cursor.rowcount
+
+
+class JobQueue:
+    """Ограниченная очередь задач с пулом обработчиков"""
+
+    def __init__(self, store: JobStore, handler: JobHandler, workers: int, max_queued: int) -> None:
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self._jobs: Dict[str, Job] = {}
+        self._last_saved: Dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # Идентификатор процесса - владельца задач
+        self.owner = secrets.token_hex(8)
+
+    @property
+    def queued(self) -> int:
+        """Задач в очереди во всех процессах"""
+        return self.store.count(QUEUED)
+
+    @property
+    def running(self) -> int:
+        return self.store.count(RUNNING)
+
+    async def start(self) -> None:
+        """Запуск обработчиков и возврат в очередь задач, прерванных перезапуском"""
+        # Создаём внутри работающего event loop
+        self._queue = asyncio.Queue()
+        self._changed = asyncio.Event()
+
+        removed = self.store.delete_finished_before(time.time() - FINISHED_JOB_TTL)
+        if removed:
+            logger.info(f"Удалено старых задач конвертации: {removed}")
+
+        self.store.heartbeat(self.owner)
+        self._recover()
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"Очередь конвертаций: обработчиков {self.workers}, до {self.max_queued} задач в очереди")
+
+    async def stop(self) -> None:
+        """Остановка обработчиков (выполняемые задачи продолжатся после перезапуска)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Незавершённые задачи сразу может забрать другой процесс
+        self.store.remove_owner(self.owner)
+
+    def _recover(self) -> None:
+        """Перенос к себе незавершённых задач остановленных процессов"""
+        recovered = 0
+        for job in self.store.orphaned():
+            if not self.store.claim(job, self.owner):
+                continue
+            job.owner = self.owner
+            if Path(job.source_path).exists():
+                job.status = QUEUED
+                job.stage = "В очереди (после перезапуска)"
+                job.progress = 0.0
+                self._jobs[job.job_id] = job
+                self._queue.put_nowait(job.job_id)
+                recovered += 1
+            else:
+                job.status = FAILED
+                job.stage = "Ошибка"
+                job.error = "Исходный файл потерян при перезапуске, загрузите его снова"
+            self._save(job)
+
+        if recovered:
+            logger.info(f"Восстановлено задач конвертации после перезапуска: {recovered}")
+            self._notify()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(OWNER_HEARTBEAT_INTERVAL)
+            try:
+                self.store.heartbeat(self.owner)
+                self._recover()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка отметки процесса очереди конвертаций: {e}")
+
+    def check_capacity(self) -> None:
+        """QueueFull, если новую задачу сейчас не принять"""
+        if self.queued >= self.max_queued:
+            raise QueueFull(f"Очередь конвертаций заполнена ({self.max_queued} задач), попробуйте позже")
+
+    def submit(self, **fields) -> Job:
+        """Постановка задачи в очередь (поля - как у Job, кроме служебных)"""
+        self.check_capacity()
+        job = Job(job_id=secrets.token_hex(12), created_at=time.time(), owner=self.owner, **fields)
+        self._jobs[job.job_id] = job
+        self._save(job)
+        self._queue.put_nowait(job.job_id)
+        self._notify()
+        logger.info(f"Задача {job.job_id} в очереди: {job.filename} (в очереди {self.queued})")
+        return job
+
+    def add_finished(self, result: dict, **fields) -> Job:
+        """Задача, результат которой уже готов (из кеша конвертаций) - без очереди"""
+        job = Job(
+            job_id=secrets.token_hex(12),
+            created_at=time.time(),
+            status=DONE,
+            stage="Готово",
+            progress=1.0,
+            result=result,
+            owner=self.owner,
+            **fields
+        )
+        self._jobs[job.job_id] = job
+        self._save(job)
+        logger.info(f"Задача {job.job_id} выполнена из кеша: {job.filename}")
+        return job
+
+    def get(self, job_id: str, username: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and job_id.isalnum():
+            job = self.store.get(job_id)
+        if job is None or job.username != username:
+            return None
+        return job
+
+    async def watch(self, job_id: str, username: str, keepalive: float = 15) -> AsyncIterator[Optional[dict]]:
+        """
+        Состояние задачи при каждом изменении, пока она не завершится
+
+        None - ничего не изменилось за keepalive секунд (чтобы соединение не закрыл прокси).
+        Задачу другого процесса видно только через БД - она перечитывается раз
+        в FOREIGN_POLL_INTERVAL секунд.
+        """
+        last = None
+        quiet = 0.0
+        while True:
+            job = self.get(job_id, username)
+            if job is None:
+                return
+            state = job.public()
+            if state != last:
+                yield state
+                last = state
+                quiet = 0.0
+            if job.status in FINISHED:
+                return
+
+            timeout = keepalive if job_id in self._jobs else FOREIGN_POLL_INTERVAL
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                quiet += timeout
+                if quiet >= keepalive:
+                    yield None
+                    quiet = 0.0
+
+    def _notify(self) -> None:
+        # Ожидающие держат ссылку на старое событие и просыпаются
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _save(self, job: Job) -> None:
+        self.store.save(job)
+        self._last_saved[job.job_id] = time.monotonic()
+
+    def _report(self, job: Job, stage: str, fraction: float) -> None:
+        stage_changed = stage != job.stage
+        job.stage = stage
+        job.progress = max(0.0, min(fraction, 1.0))
+        if stage_changed or time.monotonic() - self._last_saved.get(job.job_id, 0) >= PROGRESS_SAVE_INTERVAL:
+            self._save(job)
+        self._notify()
+
+    def _forget_finished(self) -> None:
+        """Завершённые задачи не держим в памяти дольше суток (остаются в БД)"""
+        deadline = time.time() - 24 * 3600
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in FINISHED and job.created_at < deadline]:
+            self._jobs.pop(job_id, None)
+            self._last_saved.pop(job_id, None)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+
+            job.status = RUNNING
+            self._report(job, "Конвертация", 0.0)
+            started = time.monotonic()
+            try:
+                job.result = await self.handler(job, lambda stage, fraction: self._report(job, stage, fraction))
+                job.status = DONE
+                job.stage = "Готово"
+                job.progress = 1.0
+                logger.info(f"Задача {job.job_id} выполнена за {time.monotonic() - started:.0f} с")
+            except JobError as e:
+                job.status = FAILED
+                job.stage = "Ошибка"
+                job.error = str(e)
+            except Exception as e:
+                logger.error(f"Ошибка задачи {job.job_id}: {e}")
+                job.status = FAILED
+                job.stage = "Ошибка"
+                job.error = str(e)
+
+            self._save(job)
+            self._notify()
+            self._forget_finished()
@@ -4,28 +4,44 @@
 """
 import os
 import sys
+import json
 import logging
 import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Добавляем родительскую директорию в PATH для импорта утилит бота
 sys.path.append(str(Path(__file__).parent.parent))
+# И саму директорию сервиса - для соседних модулей
+sys.path.append(str(Path(__file__).parent))
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, Depends, Cookie
-from fastapi.responses import FileResponse, HTMLResponse, Response, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.exception_handlers import http_exception_handler as default_http_exception_handler
+from fastapi.responses import JSONResponse, Response, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 import uvicorn
-import secrets
 import hashlib
+import shutil
 import time
 
-from bot.utils.audio_converter import convert_to_mp3_auto, get_audio_duration, calculate_optimal_bitrate
+from bot.utils.audio_converter import convert_to_mp3_auto, calculate_optimal_bitrate
+from bot.utils.ffmpeg_pool import ffmpeg_pool
+from bot.utils.media_probe import probe
 from bot.utils.formatters import format_duration, format_file_size
+from bot.utils.handoff import handoff_store
 from bot.utils.config import config
 
+from chunked_upload import UploadError, UploadManager
+from stream_transcode import UploadTranscode, is_streamable
+from assets import AssetStore
+from conversion_cache import ConversionCache
+from retention import RetentionManager
+from sessions import SESSION_TTL, SessionSigner
+from downloads import content_tags, file_download
+from batch import BatchError, BatchItem, collect_items, unique_output_name, write_result_archive
+from jobs import DONE, RETRY_AFTER_SECONDS, Job, JobError, JobQueue, JobStore, ProgressReport, QueueFull
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -53,7 +69,7 @@ app.add_middleware(
 async def http_exception_handler(request: Request, exc: HTTPException):
     if exc.status_code == 401:
         # Для API запросов возвращаем JSON
-        if request.url.path.startswith("/convert") or request.url.path.startswith("/download"):
+        if request.url.path.startswith(("/convert", "/batch", "/download", "/upload", "/jobs")):
             return Response(
                 content='{"detail":"Требуется авторизация"}',
                 status_code=401,
@@ -61,7 +77,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             )
         # Для обычных страниц делаем редирект на логин
         return RedirectResponse(url="/login")
-    raise exc
+    return await default_http_exception_handler(request, exc)
 
 # Директории для файлов
 UPLOAD_DIR = Path("web-converter/uploads")
@@ -69,256 +85,73 @@ CONVERTED_DIR = Path("web-converter/converted")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 CONVERTED_DIR.mkdir(parents=True, exist_ok=True)
 
+# Типы скачиваемых результатов (MP3 или ZIP пакета)
+DOWNLOAD_MEDIA_TYPES = {".mp3": "audio/mpeg", ".zip": "application/zip"}
+
 # Максимальный размер файла (2 ГБ)
 MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB
 
-# Хранилище активных сессий (в продакшене лучше использовать Redis)
-active_sessions = {}
+# Загрузки по частям (браузер отправляет файл частями с докачкой)
+upload_manager = UploadManager(UPLOAD_DIR / "chunks", MAX_FILE_SIZE)
+
+# Конвертации во время загрузки по id загрузки
+upload_transcodes: Dict[str, UploadTranscode] = {}
+# Части загрузки принимают разные процессы, а конвертация во время загрузки
+# живёт в одном - с несколькими процессами она выключена
+STREAMING_ENABLED = config.web_converter_workers <= 1
+
+# Готовые MP3 по хешу исходника и параметрам кодирования
+conversion_cache = ConversionCache(CONVERTED_DIR / ".cache", config.web_converter_cache_size_mb * 1024 * 1024)
+
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+# Интерфейс - статические файлы, подготовленные при запуске (хеш в имени, сжатие)
+assets = AssetStore(Path(__file__).parent / "static")
+
+
+def _asset(request: Request, name: str) -> Response:
+    response = assets.response(request, name)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Файл не найден")
+    return response
 
-def generate_session_token(username: str) -> str:
-    """Генерация токена сессии"""
-    timestamp = str(time.time())
-    raw = f"{username}:{timestamp}:{secrets.token_urlsafe(32)}"
-    return hashlib.sha256(raw.encode()).hexdigest()
+# Подписанные токены сессий - проверяются любым процессом без общего состояния
+session_signer = SessionSigner.from_credentials(
+    config.web_converter_secret_key,
+    Path("web-converter/session.key"),
+    config.web_converter_login,
+    config.web_converter_password
+)
 
 def verify_session(session_token: Optional[str] = Cookie(None, alias="session_token")) -> str:
     """Проверка токена сессии"""
-    if not session_token or session_token not in active_sessions:
+    username = session_signer.verify(session_token) if session_token else None
+    if username is None:
         raise HTTPException(status_code=401, detail="Требуется авторизация")
-    return active_sessions[session_token]
+    return username
 
 
-@app.get("/login", response_class=HTMLResponse)
-async def login_page():
+@app.get("/login")
+async def login_page(request: Request):
     """Страница авторизации"""
-    return """
-    <!DOCTYPE html>
-    <html lang="ru">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Вход - Аудио Конвертер</title>
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                padding: 20px;
-            }
-
-            .login-container {
-                background: white;
-                border-radius: 20px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                padding: 40px;
-                width: 100%;
-                max-width: 400px;
-                animation: slideIn 0.5s ease-out;
-            }
-
-            @keyframes slideIn {
-                from {
-                    opacity: 0;
-                    transform: translateY(-30px);
-                }
-                to {
-                    opacity: 1;
-                    transform: translateY(0);
-                }
-            }
-
-            .login-header {
-                text-align: center;
-                margin-bottom: 30px;
-            }
-
-            .login-header h1 {
-                font-size: 28px;
-                color: #333;
-                margin-bottom: 10px;
-            }
-
-            .login-header .icon {
-                font-size: 60px;
-                margin-bottom: 15px;
-            }
-
-            .login-header p {
-                color: #666;
-                font-size: 14px;
-            }
-
-            .form-group {
-                margin-bottom: 20px;
-            }
-
-            .form-group label {
-                display: block;
-                margin-bottom: 8px;
-                color: #333;
-                font-weight: 500;
-                font-size: 14px;
-            }
-
-            .form-group input {
-                width: 100%;
-                padding: 12px 16px;
-                border: 2px solid #e0e0e0;
-                border-radius: 10px;
-                font-size: 16px;
-                transition: all 0.3s;
-                font-family: inherit;
-            }
-
-            .form-group input:focus {
-                outline: none;
-                border-color: #667eea;
-                box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-            }
-
-            .form-group input::placeholder {
-                color: #999;
-            }
-
-            .btn-login {
-                width: 100%;
-                padding: 14px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: 600;
-                cursor: pointer;
-                transition: all 0.3s;
-                margin-top: 10px;
-            }
-
-            .btn-login:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3);
-            }
-
-            .btn-login:active {
-                transform: translateY(0);
-            }
-
-            .error-message {
-                background: #fee;
-                color: #c33;
-                padding: 12px;
-                border-radius: 8px;
-                margin-bottom: 20px;
-                font-size: 14px;
-                display: none;
-                animation: shake 0.5s;
-            }
-
-            @keyframes shake {
-                0%, 100% { transform: translateX(0); }
-                25% { transform: translateX(-10px); }
-                75% { transform: translateX(10px); }
-            }
-
-            .error-message.show {
-                display: block;
-            }
-
-            @media (max-width: 480px) {
-                .login-container {
-                    padding: 30px 20px;
-                }
-
-                .login-header h1 {
-                    font-size: 24px;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="login-container">
-            <div class="login-header">
-                <div class="icon">🎵</div>
-                <h1>Вход в систему</h1>
-                <p>Аудио конвертер для исламского бота</p>
-            </div>
-
-            <div class="error-message" id="errorMessage"></div>
-
-            <form id="loginForm" method="POST" action="/login">
-                <div class="form-group">
-                    <label for="username">Логин</label>
-                    <input type="text" id="username" name="username" placeholder="Введите логин" required autofocus>
-                </div>
-
-                <div class="form-group">
-                    <label for="password">Пароль</label>
-                    <input type="password" id="password" name="password" placeholder="Введите пароль" required>
-                </div>
-
-                <button type="submit" class="btn-login">Войти</button>
-            </form>
-        </div>
-
-        <script>
-            const form = document.getElementById('loginForm');
-            const errorMessage = document.getElementById('errorMessage');
-
-            form.addEventListener('submit', async (e) => {
-                e.preventDefault();
-
-                const formData = new FormData(form);
-
-                try {
-                    const response = await fetch('/login', {
-                        method: 'POST',
-                        body: formData
-                    });
-
-                    if (response.ok) {
-                        window.location.href = '/';
-                    } else {
-                        const data = await response.json();
-                        errorMessage.textContent = data.detail || 'Неверный логин или пароль';
-                        errorMessage.classList.add('show');
-
-                        setTimeout(() => {
-                            errorMessage.classList.remove('show');
-                        }, 3000);
-                    }
-                } catch (error) {
-                    errorMessage.textContent = 'Ошибка подключения к серверу';
-                    errorMessage.classList.add('show');
-                }
-            });
-        </script>
-    </body>
-    </html>
-    """
+    return _asset(request, "login.html")
 
 
 @app.post("/login")
 async def login(username: str = Form(...), password: str = Form(...)):
     """Обработка авторизации"""
     if username == config.web_converter_login and password == config.web_converter_password:
-        session_token = generate_session_token(username)
-        active_sessions[session_token] = username
+        session_token = session_signer.issue(username)
 
         response = RedirectResponse(url="/", status_code=303)
         response.set_cookie(
             key="session_token",
             value=session_token,
             httponly=True,
-            max_age=86400 * 7,  # 7 дней
+            max_age=SESSION_TTL,
             samesite="lax"
         )
         return response
@@ -327,740 +160,662 @@ async def login(username: str = Form(...), password: str = Form(...)):
 
 
 @app.get("/logout")
-async def logout(session_token: Optional[str] = Cookie(None, alias="session_token")):
-    """Выход из системы"""
-    if session_token and session_token in active_sessions:
-        del active_sessions[session_token]
-
+async def logout():
+    """Выход из системы (токен не хранится на сервере - удаляется cookie)"""
     response = RedirectResponse(url="/login")
     response.delete_cookie("session_token")
     return response
 
 
-@app.get("/manifest.json")
-async def get_manifest(username: str = Depends(verify_session)):
-    """PWA Manifest для установки на мобильный"""
+@app.get("/sw.js")
+async def get_service_worker(request: Request):
+    """Service Worker для PWA (адрес постоянный - проверяется по ETag)"""
+    return _asset(request, "sw.js")
+
+
+@app.get("/static/{name}")
+async def static_file(name: str, request: Request):
+    """Стили, скрипты и manifest.json (имя с хешем содержимого)"""
+    if name.endswith(".html"):
+        raise HTTPException(status_code=404, detail="Файл не найден")
+    return _asset(request, name)
+
+
+@app.get("/")
+async def read_root(request: Request, username: str = Depends(verify_session)):
+    """Главная страница с интерфейсом для загрузки файлов"""
+    return _asset(request, "index.html")
+
+
+async def _convert_saved_file(
+    temp_path: Path,
+    filename: str,
+    original_size: int,
+    bitrate: str,
+    progress: Optional[Callable[[float], None]] = None
+) -> dict:
+    """
+    Конвертация сохранённого на диск исходника в MP3
+
+    Args:
+        temp_path: Исходник (удаляется после конвертации)
+        filename: Исходное имя файла
+        original_size: Размер исходника в байтах
+        bitrate: Битрейт (64, 48, 32 или auto)
+        progress: Вызывается с долей закодированной записи (0..1)
+
+    Returns:
+        JSON с информацией о конвертированном файле
+
+    Raises:
+        JobError: конвертация не удалась
+    """
+    try:
+        preferred_bitrate = await _preferred_bitrate(temp_path, bitrate)
+
+        # Конвертируем (используем оригинальное имя файла)
+        output_filename, output_path = _output_path(filename)
+
+        success, error, used_bitrate = await convert_to_mp3_auto(
+            str(temp_path),
+            str(output_path),
+            preferred_bitrate=preferred_bitrate,
+            progress=progress
+        )
+    except Exception:
+        _remove_source(temp_path)
+        raise
+    # Удаляем временный файл (при остановке сервиса он остаётся для задачи после перезапуска)
+    _remove_source(temp_path)
+
+    if not success:
+        raise JobError(error)
+
+    return await _conversion_result(output_filename, output_path, used_bitrate or preferred_bitrate, original_size)
+
+
+async def _preferred_bitrate(source_path: Path, bitrate: str) -> int:
+    """Битрейт из формы (64, 48, 32 или auto - по длительности)"""
+    if bitrate != "auto":
+        return int(bitrate)
+    # Результат probe() запоминается - конвертация не запустит ffprobe повторно
+    source_info = await probe(str(source_path))
+    if source_info and source_info.duration:
+        return await calculate_optimal_bitrate(source_info.duration)
+    return 64
+
+
+def _remove_source(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    elif path.exists():
+        os.remove(path)
+
+
+async def _conversion_result(output_filename: str, output_path: Path, bitrate_kbps: int, original_size: int) -> dict:
+    """JSON с информацией о конвертированном файле"""
+    output_info = await probe(str(output_path))
+    duration_seconds = output_info.duration if output_info else None
+    mp3_size = output_info.size if output_info else os.path.getsize(output_path)
+
+    result = _result_info(output_filename, duration_seconds, bitrate_kbps, mp3_size, original_size)
+    logger.info(f"Конвертация успешна: {result}")
+    return result
+
+
+def _result_info(
+    output_filename: str,
+    duration_seconds: Optional[int],
+    bitrate_kbps: int,
+    mp3_size: int,
+    original_size: int,
+    cached: bool = False
+) -> dict:
     return {
-        "name": "Аудио Конвертер - Исламский Бот",
-        "short_name": "Аудио Конвертер",
-        "description": "Конвертация аудио файлов для Telegram бота",
-        "start_url": "/",
-        "display": "standalone",
-        "background_color": "#667eea",
-        "theme_color": "#667eea",
-        "orientation": "portrait",
-        "icons": [
-            {
-                "src": "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'%3E%3Crect fill='%23667eea' width='100' height='100'/%3E%3Ctext y='75' font-size='70' fill='white' text-anchor='middle' x='50'%3E🎵%3C/text%3E%3C/svg%3E",
-                "sizes": "192x192",
-                "type": "image/svg+xml"
-            },
-            {
-                "src": "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'%3E%3Crect fill='%23667eea' width='100' height='100'/%3E%3Ctext y='75' font-size='70' fill='white' text-anchor='middle' x='50'%3E🎵%3C/text%3E%3C/svg%3E",
-                "sizes": "512x512",
-                "type": "image/svg+xml"
-            }
-        ]
+        "filename": output_filename,
+        "duration": format_duration(duration_seconds) if duration_seconds else "Неизвестно",
+        "bitrate": bitrate_kbps,
+        "mp3_size": format_file_size(mp3_size),
+        "original_size": format_file_size(original_size),
+        "cached": cached
     }
 
 
-@app.get("/sw.js")
-async def get_service_worker(username: str = Depends(verify_session)):
-    """Service Worker для PWA"""
-    return HTMLResponse(content="""
-// Service Worker для кэширования
-const CACHE_NAME = 'audio-converter-v1';
-const urlsToCache = [
-  '/',
-];
-
-self.addEventListener('install', event => {
-  event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then(cache => cache.addAll(urlsToCache))
-  );
-});
-
-self.addEventListener('fetch', event => {
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => response || fetch(event.request))
-  );
-});
-""", media_type="application/javascript")
-
-
-@app.get("/", response_class=HTMLResponse)
-async def read_root(username: str = Depends(verify_session)):
-    """Главная страница с интерфейсом для загрузки файлов"""
-    return """
-    <!DOCTYPE html>
-    <html lang="ru">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no">
-        <meta name="theme-color" content="#667eea">
-        <meta name="apple-mobile-web-app-capable" content="yes">
-        <meta name="apple-mobile-web-app-status-bar-style" content="black-translucent">
-        <meta name="apple-mobile-web-app-title" content="Аудио Конвертер">
-        <meta name="description" content="Конвертация аудио файлов для Telegram бота">
-        <link rel="manifest" href="/manifest.json">
-        <link rel="apple-touch-icon" href="data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'%3E%3Crect fill='%23667eea' width='100' height='100'/%3E%3Ctext y='75' font-size='70' fill='white' text-anchor='middle' x='50'%3E🎵%3C/text%3E%3C/svg%3E">
-        <title>Конвертер аудио для исламского бота</title>
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                padding: 20px;
-            }
-
-            .container {
-                background: white;
-                border-radius: 20px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-                padding: 40px;
-                max-width: 600px;
-                width: 100%;
-            }
-
-            h1 {
-                color: #333;
-                margin-bottom: 10px;
-                font-size: 28px;
-                text-align: center;
-            }
-
-            .subtitle {
-                color: #666;
-                text-align: center;
-                margin-bottom: 30px;
-                font-size: 14px;
-            }
-
-            .upload-area {
-                border: 3px dashed #667eea;
-                border-radius: 15px;
-                padding: 40px;
-                text-align: center;
-                cursor: pointer;
-                transition: all 0.3s;
-                margin-bottom: 20px;
-                background: #f8f9ff;
-            }
-
-            .upload-area:hover {
-                background: #eef1ff;
-                border-color: #764ba2;
-            }
-
-            .upload-area.dragover {
-                background: #e0e7ff;
-                border-color: #764ba2;
-                transform: scale(1.02);
-            }
-
-            .upload-icon {
-                font-size: 50px;
-                margin-bottom: 15px;
-            }
-
-            .upload-text {
-                color: #667eea;
-                font-weight: bold;
-                margin-bottom: 5px;
-            }
-
-            .upload-hint {
-                color: #999;
-                font-size: 13px;
-            }
-
-            input[type="file"] {
-                display: none;
-            }
-
-            .bitrate-selector {
-                margin-bottom: 20px;
-            }
-
-            .bitrate-selector label {
-                display: block;
-                margin-bottom: 10px;
-                color: #333;
-                font-weight: bold;
-            }
-
-            .bitrate-options {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
-                gap: 10px;
-            }
-
-            .bitrate-option {
-                padding: 15px;
-                border: 2px solid #e0e0e0;
-                border-radius: 10px;
-                cursor: pointer;
-                transition: all 0.2s;
-                text-align: center;
-            }
-
-            .bitrate-option:hover {
-                border-color: #667eea;
-                background: #f8f9ff;
-            }
-
-            .bitrate-option input {
-                display: none;
-            }
-
-            .bitrate-option input:checked + label {
-                color: #667eea;
-                font-weight: bold;
-            }
-
-            .bitrate-option input:checked ~ .bitrate-parent {
-                border-color: #667eea;
-                background: #eef1ff;
-            }
-
-            .convert-btn {
-                width: 100%;
-                padding: 15px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: bold;
-                cursor: pointer;
-                transition: transform 0.2s;
-            }
-
-            .convert-btn:hover {
-                transform: translateY(-2px);
-            }
-
-            .convert-btn:disabled {
-                background: #ccc;
-                cursor: not-allowed;
-                transform: none;
-            }
-
-            .progress-container {
-                display: none;
-                margin-top: 20px;
-            }
-
-            .progress-bar {
-                width: 100%;
-                height: 30px;
-                background: #f0f0f0;
-                border-radius: 15px;
-                overflow: hidden;
-                margin-bottom: 10px;
-            }
-
-            .progress-fill {
-                height: 100%;
-                background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-                transition: width 0.3s;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                color: white;
-                font-weight: bold;
-            }
-
-            .file-info {
-                background: #f8f9ff;
-                border-radius: 10px;
-                padding: 15px;
-                margin-top: 20px;
-                display: none;
-            }
-
-            .file-info-item {
-                display: flex;
-                justify-content: space-between;
-                padding: 8px 0;
-                border-bottom: 1px solid #e0e0e0;
-            }
-
-            .file-info-item:last-child {
-                border-bottom: none;
-            }
-
-            .download-section {
-                display: none;
-                margin-top: 20px;
-                text-align: center;
-            }
-
-            .download-btn {
-                display: inline-block;
-                padding: 15px 40px;
-                background: #28a745;
-                color: white;
-                text-decoration: none;
-                border-radius: 10px;
-                font-weight: bold;
-                transition: transform 0.2s;
-            }
-
-            .download-btn:hover {
-                transform: translateY(-2px);
-            }
-
-            .error-message {
-                background: #fee;
-                border: 1px solid #fcc;
-                color: #c00;
-                padding: 15px;
-                border-radius: 10px;
-                margin-top: 20px;
-                display: none;
-            }
-
-            /* Адаптация для мобильных устройств */
-            @media (max-width: 768px) {
-                body {
-                    padding: 10px;
-                }
-
-                .container {
-                    padding: 20px;
-                    border-radius: 15px;
-                }
-
-                h1 {
-                    font-size: 24px;
-                }
-
-                .subtitle {
-                    font-size: 14px;
-                }
-
-                .upload-area {
-                    padding: 30px 20px;
-                }
-
-                .upload-icon {
-                    font-size: 48px;
-                }
-
-                .upload-text {
-                    font-size: 16px;
-                }
-
-                .upload-hint {
-                    font-size: 12px;
-                }
-
-                .bitrate-selector label {
-                    font-size: 14px;
-                }
-
-                .bitrate-options {
-                    gap: 8px;
-                }
-
-                .bitrate-btn {
-                    padding: 10px 15px;
-                    font-size: 14px;
-                }
-
-                .convert-btn {
-                    padding: 12px;
-                    font-size: 16px;
-                }
-
-                .file-info {
-                    padding: 15px;
-                }
-
-                .download-section {
-                    padding: 15px;
-                }
-            }
-
-            /* Адаптация для очень маленьких экранов */
-            @media (max-width: 400px) {
-                .container {
-                    padding: 15px;
-                }
-
-                h1 {
-                    font-size: 20px;
-                }
-
-                .upload-area {
-                    padding: 20px 15px;
-                }
-
-                .bitrate-options {
-                    flex-direction: column;
-                    gap: 10px;
-                }
-
-                .bitrate-btn {
-                    width: 100%;
-                }
-            }
-
-            /* Поддержка safe area для iPhone с вырезом */
-            @supports (padding: max(0px)) {
-                body {
-                    padding-left: max(20px, env(safe-area-inset-left));
-                    padding-right: max(20px, env(safe-area-inset-right));
-                    padding-bottom: max(20px, env(safe-area-inset-bottom));
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🎵 Конвертер Аудио</h1>
-            <p class="subtitle">Для исламского Telegram бота уроков</p>
-
-            <div class="upload-area" id="uploadArea">
-                <div class="upload-icon">📁</div>
-                <div class="upload-text">Нажмите или перетащите файл сюда</div>
-                <div class="upload-hint">Поддерживаются: MP3, WAV, OGG, FLAC, M4A, AAC и другие<br>Максимальный размер: 2 ГБ</div>
-                <input type="file" id="fileInput" accept="audio/*">
-            </div>
-
-            <div class="bitrate-selector">
-                <label>Выберите качество (битрейт):</label>
-                <div class="bitrate-options">
-                    <div class="bitrate-option bitrate-parent">
-                        <input type="radio" name="bitrate" value="64" id="bitrate64" checked>
-                        <label for="bitrate64">
-                            <strong>64 kbps</strong><br>
-                            <small>До 40 мин</small>
-                        </label>
-                    </div>
-                    <div class="bitrate-option bitrate-parent">
-                        <input type="radio" name="bitrate" value="48" id="bitrate48">
-                        <label for="bitrate48">
-                            <strong>48 kbps</strong><br>
-                            <small>До 1 часа</small>
-                        </label>
-                    </div>
-                    <div class="bitrate-option bitrate-parent">
-                        <input type="radio" name="bitrate" value="32" id="bitrate32">
-                        <label for="bitrate32">
-                            <strong>32 kbps</strong><br>
-                            <small>До 1.5 часов</small>
-                        </label>
-                    </div>
-                    <div class="bitrate-option bitrate-parent">
-                        <input type="radio" name="bitrate" value="auto" id="bitrateAuto">
-                        <label for="bitrateAuto">
-                            <strong>Авто</strong><br>
-                            <small>Подобрать</small>
-                        </label>
-                    </div>
-                </div>
-            </div>
-
-            <button class="convert-btn" id="convertBtn" disabled>Конвертировать</button>
-
-            <div class="progress-container" id="progressContainer">
-                <div class="progress-bar">
-                    <div class="progress-fill" id="progressFill">0%</div>
-                </div>
-                <div id="statusText" style="text-align: center; color: #666;"></div>
-            </div>
-
-            <div class="file-info" id="fileInfo"></div>
-
-            <div class="download-section" id="downloadSection">
-                <a href="#" class="download-btn" id="downloadBtn" download>📥 Скачать MP3</a>
-            </div>
-
-            <div class="error-message" id="errorMessage"></div>
-        </div>
-
-        <script>
-            const uploadArea = document.getElementById('uploadArea');
-            const fileInput = document.getElementById('fileInput');
-            const convertBtn = document.getElementById('convertBtn');
-            const progressContainer = document.getElementById('progressContainer');
-            const progressFill = document.getElementById('progressFill');
-            const statusText = document.getElementById('statusText');
-            const fileInfo = document.getElementById('fileInfo');
-            const downloadSection = document.getElementById('downloadSection');
-            const downloadBtn = document.getElementById('downloadBtn');
-            const errorMessage = document.getElementById('errorMessage');
-
-            let selectedFile = null;
-
-            // Drag & Drop
-            uploadArea.addEventListener('click', () => fileInput.click());
-            uploadArea.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                uploadArea.classList.add('dragover');
-            });
-            uploadArea.addEventListener('dragleave', () => {
-                uploadArea.classList.remove('dragover');
-            });
-            uploadArea.addEventListener('drop', (e) => {
-                e.preventDefault();
-                uploadArea.classList.remove('dragover');
-                const files = e.dataTransfer.files;
-                if (files.length > 0) {
-                    handleFileSelect(files[0]);
-                }
-            });
-
-            fileInput.addEventListener('change', (e) => {
-                if (e.target.files.length > 0) {
-                    handleFileSelect(e.target.files[0]);
-                }
-            });
-
-            function handleFileSelect(file) {
-                selectedFile = file;
-                convertBtn.disabled = false;
-                uploadArea.querySelector('.upload-text').textContent = `Выбран: ${file.name}`;
-                uploadArea.querySelector('.upload-hint').textContent = `Размер: ${formatFileSize(file.size)}`;
-            }
-
-            convertBtn.addEventListener('click', async () => {
-                if (!selectedFile) return;
-
-                const bitrate = document.querySelector('input[name="bitrate"]:checked').value;
-
-                convertBtn.disabled = true;
-                progressContainer.style.display = 'block';
-                downloadSection.style.display = 'none';
-                errorMessage.style.display = 'none';
-                fileInfo.style.display = 'none';
-
-                const formData = new FormData();
-                formData.append('file', selectedFile);
-                formData.append('bitrate', bitrate);
-
-                let progressInterval; // Объявляем снаружи для доступа в catch
-
-                try {
-                    updateProgress(10, 'Загрузка файла на сервер...');
-
-                    // Запускаем имитацию прогресса во время конвертации
-                    let currentProgress = 10;
-                    progressInterval = setInterval(() => {
-                        if (currentProgress < 90) {
-                            currentProgress += 5;
-                            updateProgress(currentProgress, 'Конвертация в MP3...');
-                        }
-                    }, 500); // Обновление каждые 500мс
-
-                    const response = await fetch('/convert', {
-                        method: 'POST',
-                        body: formData
-                    });
-
-                    clearInterval(progressInterval); // Останавливаем имитацию
-
-                    if (!response.ok) {
-                        // Если требуется авторизация - перенаправляем на логин
-                        if (response.status === 401) {
-                            window.location.href = '/login';
-                            return;
-                        }
-                        const error = await response.json();
-                        throw new Error(error.detail || 'Ошибка конвертации');
-                    }
-
-                    const result = await response.json();
-
-                    updateProgress(100, 'Готово!');
-
-                    // Показываем информацию о файле
-                    showFileInfo(result);
-
-                    // Показываем кнопку скачивания
-                    downloadBtn.href = `/download/${result.filename}`;
-                    downloadSection.style.display = 'block';
-
-                } catch (error) {
-                    if (progressInterval) clearInterval(progressInterval); // Останавливаем имитацию при ошибке
-                    errorMessage.textContent = `Ошибка: ${error.message}`;
-                    errorMessage.style.display = 'block';
-                    progressContainer.style.display = 'none';
-                } finally {
-                    convertBtn.disabled = false;
-                }
-            });
-
-            function updateProgress(percent, text) {
-                progressFill.style.width = percent + '%';
-                progressFill.textContent = percent + '%';
-                statusText.textContent = text;
-            }
-
-            function showFileInfo(data) {
-                fileInfo.innerHTML = `
-                    <div class="file-info-item">
-                        <span>Длительность:</span>
-                        <strong>${data.duration}</strong>
-                    </div>
-                    <div class="file-info-item">
-                        <span>Битрейт MP3:</span>
-                        <strong>${data.bitrate} kbps</strong>
-                    </div>
-                    <div class="file-info-item">
-                        <span>Размер MP3:</span>
-                        <strong>${data.mp3_size}</strong>
-                    </div>
-                    <div class="file-info-item">
-                        <span>Исходный размер:</span>
-                        <strong>${data.original_size}</strong>
-                    </div>
-                `;
-                fileInfo.style.display = 'block';
-            }
-
-            function formatFileSize(bytes) {
-                if (bytes < 1024) return bytes + ' Б';
-                if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' КБ';
-                if (bytes < 1024 * 1024 * 1024) return (bytes / (1024 * 1024)).toFixed(1) + ' МБ';
-                return (bytes / (1024 * 1024 * 1024)).toFixed(1) + ' ГБ';
-            }
-
-            // Регистрация Service Worker для PWA
-            if ('serviceWorker' in navigator) {
-                window.addEventListener('load', () => {
-                    navigator.serviceWorker.register('/sw.js')
-                        .then(registration => console.log('PWA: Service Worker зарегистрирован'))
-                        .catch(err => console.log('PWA: Ошибка регистрации Service Worker', err));
-                });
-            }
-
-            // Обработка события установки PWA
-            let deferredPrompt;
-            window.addEventListener('beforeinstallprompt', (e) => {
-                e.preventDefault();
-                deferredPrompt = e;
-                console.log('PWA: Готово к установке на устройство');
-            });
-        </script>
-    </body>
-    </html>
+async def _cached_result(content_hash: str, filename: str, bitrate: str, original_size: int) -> Optional[dict]:
+    """Результат из кеша конвертаций (None - этот исходник с такими параметрами ещё не конвертировался)"""
+    entry = await asyncio.to_thread(conversion_cache.get, ConversionCache.key(content_hash, bitrate))
+    if entry is None:
+        return None
+
+    output_filename, output_path = _output_path(filename)
+    await asyncio.to_thread(conversion_cache.restore, entry, output_path)
+    # Жёсткая ссылка делит время изменения с записью кеша - для срока хранения результат новый
+    os.utime(output_path)
+    result = _result_info(output_filename, entry.duration, entry.bitrate_kbps, entry.size, original_size, cached=True)
+    result["sha256"] = content_hash
+    logger.info(f"Результат из кеша конвертаций: {result}")
+    return result
+
+
+async def _cache_result(content_hash: str, bitrate: str, result: dict) -> None:
+    """Запоминание результата конвертации в кеше"""
+    output_path = CONVERTED_DIR / result["filename"]
+    output_info = await probe(str(output_path))
+    await asyncio.to_thread(
+        conversion_cache.put,
+        ConversionCache.key(content_hash, bitrate),
+        output_path,
+        result["bitrate"],
+        output_info.duration if output_info else None
+    )
+
+
+def _save_upload(source, destination: Path) -> str:
+    """Сохранение загруженного файла на диск по кускам с подсчётом SHA-256"""
+    digest = hashlib.sha256()
+    with open(destination, "wb") as f:
+        while chunk := source.read(1024 * 1024):
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+def _temp_upload_path(filename: str) -> Path:
+    return UPLOAD_DIR / f"temp_{os.urandom(8).hex()}{Path(filename).suffix}"
+
+
+def _output_path(filename: str) -> Tuple[str, Path]:
+    """Имя результата: оригинальное имя с timestamp для уникальности"""
+    output_filename = f"{Path(filename).stem}_{int(time.time())}.mp3"
+    return output_filename, CONVERTED_DIR / output_filename
+
+
+async def _run_batch_job(job: Job, report: ProgressReport) -> dict:
+    """
+    Пакет: файлы конвертируются параллельно (не больше слотов пула FFmpeg)
+    в естественном порядке имён, результат - ZIP с manifest.json
     """
+    batch_dir = Path(job.source_path)
+    output_dir = batch_dir / ".converted"
+    try:
+        report("Распаковка", 0.0)
+        try:
+            items = await asyncio.to_thread(collect_items, batch_dir)
+        except BatchError as e:
+            raise JobError(str(e))
+        output_dir.mkdir(exist_ok=True)
+
+        used_names: set = set()
+        for item in items:
+            item.filename = unique_output_name(item, used_names)
+
+        # Общий прогресс - по доле объёма исходников
+        weights = [max(os.path.getsize(item.source_path), 1) for item in items]
+        encoded = [0.0] * len(items)
+        finished = 0
+        semaphore = asyncio.Semaphore(ffmpeg_pool.max_concurrent)
+
+        def update(index: int, fraction: float) -> None:
+            encoded[index] = fraction * weights[index]
+            report(f"Конвертация файлов: готово {finished} из {len(items)}", sum(encoded) / sum(weights))
+
+        async def convert(index: int, item: BatchItem) -> None:
+            nonlocal finished
+            output_path = output_dir / item.filename
+            async with semaphore:
+                preferred_bitrate = await _preferred_bitrate(Path(item.source_path), job.bitrate)
+                success, error, used_bitrate = await convert_to_mp3_auto(
+                    item.source_path,
+                    str(output_path),
+                    preferred_bitrate=preferred_bitrate,
+                    progress=lambda fraction: update(index, fraction)
+                )
+            if success:
+                output_info = await probe(str(output_path))
+                item.duration = output_info.duration if output_info else None
+                item.bitrate = used_bitrate or preferred_bitrate
+                item.size = os.path.getsize(output_path)
+            else:
+                logger.warning(f"Пакет {job.job_id}: не сконвертирован {item.source}: {error}")
+                item.filename = None
+                item.error = error
+            finished += 1
+            update(index, 1.0)
+
+        await asyncio.gather(*(convert(index, item) for index, item in enumerate(items)))
+
+        failed = [item for item in items if item.error]
+        if len(failed) == len(items):
+            raise JobError(f"Ни один файл не сконвертирован: {failed[0].error}")
+
+        report("Упаковка результатов", 1.0)
+        archive_name = f"{Path(job.filename).stem}_{int(time.time())}.zip"
+        archive_path = CONVERTED_DIR / archive_name
+        await asyncio.to_thread(write_result_archive, archive_path, items, output_dir)
+    except Exception:
+        _remove_source(batch_dir)
+        raise
+    _remove_source(batch_dir)
+
+    logger.info(f"Пакет {job.job_id}: {len(items) - len(failed)} из {len(items)} файлов -> {archive_name}")
+    return {
+        "filename": archive_name,
+        "batch": True,
+        "files": len(items),
+        "failed": len(failed),
+        "items": [item.manifest() for item in items],
+        "archive_size": format_file_size(os.path.getsize(archive_path)),
+        "original_size": format_file_size(job.original_size)
+    }
+
+
+async def _run_job(job: Job, report: ProgressReport) -> dict:
+    """Выполнение задачи конвертации из очереди"""
+    result = await _run_job_kind(job, report)
+    # ETag для скачивания считается сразу, пока результат в кэше страниц ОС
+    await content_tags.etag(CONVERTED_DIR / result["filename"])
+    return result
+
+
+async def _run_job_kind(job: Job, report: ProgressReport) -> dict:
+    if job.kind == "batch":
+        return await _run_batch_job(job, report)
+
+    source_path = Path(job.source_path)
+    transcode = upload_transcodes.pop(job.upload_id, None) if job.upload_id else None
+
+    # Такой же исходник мог сконвертироваться, пока задача ждала в очереди
+    if job.content_hash:
+        result = await _cached_result(job.content_hash, job.filename, job.bitrate, job.original_size)
+        if result is not None:
+            if transcode is not None:
+                await transcode.discard()
+            _remove_source(source_path)
+            return result
+
+    result = await _convert_job_file(job, transcode, report)
+    if job.content_hash:
+        result["sha256"] = job.content_hash
+        await _cache_result(job.content_hash, job.bitrate, result)
+    return result
 
 
-@app.post("/convert")
+async def _convert_job_file(job: Job, transcode: Optional[UploadTranscode], report: ProgressReport) -> dict:
+    source_path = Path(job.source_path)
+
+    # Файл конвертировался во время загрузки - остаётся дождаться хвоста
+    if transcode is not None:
+        if transcode.bitrate != job.bitrate:
+            await transcode.discard()
+        else:
+            report("Завершение конвертации", 0.95)
+            success, _ = await transcode.result()
+            if success:
+                os.remove(source_path)
+                output_filename, output_path = _output_path(job.filename)
+                os.replace(transcode.output_path, output_path)
+                result = await _conversion_result(output_filename, output_path, transcode.bitrate_kbps, job.original_size)
+                result["streamed"] = True
+                return result
+
+    report("Анализ и конвертация в MP3", 0.0)
+    return await _convert_saved_file(
+        source_path, job.filename, job.original_size, job.bitrate,
+        progress=lambda fraction: report("Конвертация в MP3", fraction)
+    )
+
+
+async def _submit_file_job(
+    username: str,
+    filename: str,
+    source_path: Path,
+    bitrate: str,
+    original_size: int,
+    content_hash: str,
+    upload_id: Optional[str] = None
+) -> Job:
+    """Задача конвертации файла; если результат есть в кеше - сразу выполненная"""
+    fields = dict(
+        username=username,
+        filename=filename,
+        source_path=str(source_path),
+        bitrate=bitrate,
+        original_size=original_size,
+        upload_id=upload_id,
+        content_hash=content_hash
+    )
+    result = await _cached_result(content_hash, filename, bitrate, original_size)
+    if result is None:
+        return job_queue.submit(**fields)
+
+    transcode = upload_transcodes.pop(upload_id, None) if upload_id else None
+    if transcode is not None:
+        await transcode.discard()
+    _remove_source(source_path)
+    return job_queue.add_finished(result, **fields)
+
+
+# Очередь конвертаций (состояние в SQLite переживает перезапуск и общее для процессов);
+# по умолчанию ядра делятся между процессами сервиса
+job_queue = JobQueue(
+    JobStore(Path("web-converter/jobs.db")),
+    _run_job,
+    workers=config.web_converter_job_workers or (os.cpu_count() or 1) // max(config.web_converter_workers, 1),
+    max_queued=config.web_converter_max_queued
+)
+
+
+# Срок хранения и квота результатов, удаление брошенных временных файлов
+retention = RetentionManager(
+    CONVERTED_DIR,
+    UPLOAD_DIR,
+    ttl=config.web_converter_result_ttl_hours * 3600,
+    max_bytes=config.web_converter_results_quota_mb * 1024 * 1024,
+    active_sources=job_queue.store.active_sources
+)
+cleanup_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    global cleanup_task
+    await job_queue.start()
+    await asyncio.to_thread(retention.run_once)
+    await asyncio.to_thread(upload_manager.cleanup_stale)
+    await asyncio.to_thread(handoff_store.cleanup_expired)
+    cleanup_task = asyncio.create_task(retention.run_periodically(config.web_converter_cleanup_interval))
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    if cleanup_task is not None:
+        cleanup_task.cancel()
+    await job_queue.stop()
+
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+@app.post("/convert", status_code=202)
 async def convert_audio(
     file: UploadFile = File(...),
     bitrate: str = Form("64"),
     username: str = Depends(verify_session)
 ):
     """
-    Конвертация аудио файла в MP3
+    Постановка аудио файла в очередь конвертации (файл целиком одним запросом)
+
+    Страница использует загрузку по частям (/upload/...), этот метод
+    оставлен для скриптов. Ход и результат - GET /jobs/{job_id}. Если этот
+    файл с тем же битрейтом уже конвертировался, задача сразу выполнена
+    (status done, в result cached: true).
 
     Args:
         file: Загруженный аудио файл
         bitrate: Битрейт (64, 48, 32 или auto)
 
     Returns:
-        JSON с информацией о конвертированном файле
+        JSON с состоянием задачи
     """
+    job_queue.check_capacity()
     try:
         logger.info(f"Получен файл: {file.filename}, размер: {file.size if hasattr(file, 'size') else 'unknown'}")
 
-        # Сохраняем загруженный файл
-        file_ext = Path(file.filename).suffix
-        temp_filename = f"temp_{os.urandom(8).hex()}{file_ext}"
-        temp_path = UPLOAD_DIR / temp_filename
-
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Сохраняем загруженный файл потоком, не читая его целиком в память
+        temp_path = _temp_upload_path(file.filename)
+        content_hash = await asyncio.to_thread(_save_upload, file.file, temp_path)
 
         original_size = os.path.getsize(temp_path)
         logger.info(f"Файл сохранён: {temp_path}, размер: {original_size} байт")
 
-        # Определяем битрейт
-        if bitrate == "auto":
-            duration = await get_audio_duration(str(temp_path))
-            if duration:
-                preferred_bitrate = await calculate_optimal_bitrate(duration)
-            else:
-                preferred_bitrate = 64
-        else:
-            preferred_bitrate = int(bitrate)
+    except Exception as e:
+        logger.error(f"Ошибка сохранения файла: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Конвертируем (используем оригинальное имя файла)
-        original_name = Path(file.filename).stem  # имя без расширения
-        # Добавляем timestamp для уникальности
-        import time
-        timestamp = int(time.time())
-        output_filename = f"{original_name}_{timestamp}.mp3"
-        output_path = CONVERTED_DIR / output_filename
+    job = await _submit_file_job(username, file.filename, temp_path, bitrate, original_size, content_hash)
+    return job.public()
 
-        success, error, used_bitrate = await convert_to_mp3_auto(
-            str(temp_path),
-            str(output_path),
-            preferred_bitrate=preferred_bitrate
+
+@app.post("/upload/init")
+async def upload_init(
+    filename: str = Form(...),
+    size: int = Form(...),
+    chunk_size: Optional[int] = Form(None),
+    bitrate: str = Form("64"),
+    stream: bool = Form(False),
+    username: str = Depends(verify_session)
+):
+    """
+    Начало загрузки по частям: id загрузки и размер части
+
+    С stream=true файл потокового формата конвертируется во время загрузки
+    с битрейтом bitrate (тот же битрейт нужно передать при финализации).
+    """
+    # При переполненной очереди не заставляем загружать файл впустую
+    job_queue.check_capacity()
+    session = await asyncio.to_thread(upload_manager.init, filename, size, username, chunk_size)
+
+    status = session.status()
+    status["streaming"] = stream and STREAMING_ENABLED and is_streamable(session.filename)
+    if status["streaming"]:
+        transcode = UploadTranscode(
+            upload_manager.data_path(session.upload_id),
+            session.size,
+            CONVERTED_DIR / f".stream_{session.upload_id}.mp3",
+            bitrate
         )
+        upload_transcodes[session.upload_id] = transcode
+        upload_manager.subscribe(session.upload_id, transcode.feed_until)
+    return status
+
 
-        # Удаляем временный файл
-        os.remove(temp_path)
+@app.get("/upload/{upload_id}")
+async def upload_status(upload_id: str, username: str = Depends(verify_session)):
+    """Принятые части загрузки (для докачки)"""
+    return upload_manager.get(upload_id, username).status()
 
-        if not success:
-            raise HTTPException(status_code=400, detail=error)
 
-        # Получаем информацию о файле
-        duration_seconds = await get_audio_duration(str(output_path))
-        mp3_size = os.path.getsize(output_path)
+@app.put("/upload/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    username: str = Depends(verify_session)
+):
+    """Приём одной части: тело запроса пишется в файл со смещения offset"""
+    session = await upload_manager.write_chunk(upload_id, username, offset, request.stream())
+    return {"received_bytes": session.received_bytes, "complete": session.complete}
 
-        result = {
-            "filename": output_filename,
-            "duration": format_duration(duration_seconds) if duration_seconds else "Неизвестно",
-            "bitrate": used_bitrate or preferred_bitrate,
-            "mp3_size": format_file_size(mp3_size),
-            "original_size": format_file_size(original_size)
-        }
 
-        logger.info(f"Конвертация успешна: {result}")
-        return result
+@app.delete("/upload/{upload_id}")
+async def upload_abort(upload_id: str, username: str = Depends(verify_session)):
+    """Отмена загрузки"""
+    upload_manager.abort(upload_id, username)
+    transcode = upload_transcodes.pop(upload_id, None)
+    if transcode is not None:
+        await transcode.discard()
+    return {"status": "ok"}
 
-    except Exception as e:
-        logger.error(f"Ошибка конвертации: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/upload/{upload_id}/finalize", status_code=202)
+async def upload_finalize(
+    upload_id: str,
+    bitrate: str = Form("64"),
+    username: str = Depends(verify_session)
+):
+    """Завершение загрузки по частям и постановка файла в очередь конвертации"""
+    job_queue.check_capacity()
+    session = upload_manager.get(upload_id, username)
+    temp_path = _temp_upload_path(session.filename)
+    content_hash, original_size = await upload_manager.finalize(upload_id, username, temp_path)
+
+    job = await _submit_file_job(
+        username, session.filename, temp_path, bitrate, original_size, content_hash, upload_id=upload_id
+    )
+    return job.public()
+
+
+def _unique_path(path: Path) -> Path:
+    """Путь без перезаписи существующего файла: "имя (2).ext" и т.д."""
+    candidate = path
+    suffix = 2
+    while candidate.exists():
+        candidate = path.with_name(f"{path.stem} ({suffix}){path.suffix}")
+        suffix += 1
+    return candidate
+
+
+@app.post("/batch", status_code=202)
+async def batch_convert(
+    upload_ids: Optional[List[str]] = Form(None),
+    files: Optional[List[UploadFile]] = File(None),
+    bitrate: str = Form("64"),
+    username: str = Depends(verify_session)
+):
+    """
+    Пакетная конвертация: несколько файлов и/или ZIP-архивов
+
+    Файлы передаются завершёнными загрузками по частям (upload_ids - так делает
+    страница) или напрямую в запросе (files). Результат задачи - ZIP с MP3
+    и manifest.json (номер урока, длительность, битрейт каждого файла).
+    """
+    job_queue.check_capacity()
+    if not upload_ids and not files:
+        raise HTTPException(status_code=400, detail="Нет файлов для конвертации")
+
+    batch_dir = UPLOAD_DIR / f"batch_{os.urandom(8).hex()}"
+    batch_dir.mkdir(parents=True)
+    sources: List[str] = []
+    original_size = 0
+    try:
+        for upload_id in upload_ids or []:
+            session = upload_manager.get(upload_id, username)
+            target = _unique_path(batch_dir / session.filename)
+            _, size = await upload_manager.finalize(upload_id, username, target)
+            transcode = upload_transcodes.pop(upload_id, None)
+            if transcode is not None:
+                await transcode.discard()
+            sources.append(session.filename)
+            original_size += size
+
+        for file in files or []:
+            target = _unique_path(batch_dir / (Path(file.filename).name or "audio"))
+            with open(target, "wb") as f:
+                await asyncio.to_thread(shutil.copyfileobj, file.file, f, 1024 * 1024)
+            sources.append(target.name)
+            original_size += target.stat().st_size
+    except Exception:
+        _remove_source(batch_dir)
+        raise
+
+    # Имя результата - по архиву, если прислан один архив
+    name = Path(sources[0]).stem if len(sources) == 1 else "batch"
+    job = job_queue.submit(
+        username=username,
+        filename=f"{name}.zip",
+        source_path=str(batch_dir),
+        bitrate=bitrate,
+        original_size=original_size,
+        kind="batch"
+    )
+    logger.info(f"Пакет {job.job_id}: {len(sources)} файлов, {original_size} байт")
+    return job.public()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, username: str = Depends(verify_session)):
+    """Состояние задачи конвертации"""
+    job = job_queue.get(job_id, username)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job.public()
 
-@app.get("/download/{filename}")
-async def download_file(filename: str, username: str = Depends(verify_session)):
-    """Скачивание сконвертированного файла"""
+
+@app.post("/jobs/{job_id}/handoff")
+async def job_handoff(job_id: str, username: str = Depends(verify_session)):
+    """
+    Передача готового MP3 в бота: файл публикуется в общей с ботом директории,
+    в ответе - одноразовый код, который админ отправляет боту вместо файла
+    """
+    job = job_queue.get(job_id, username)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if job.status != DONE or job.kind != "file":
+        raise HTTPException(status_code=400, detail="Передать в бота можно только готовый файл")
+
+    output_path = CONVERTED_DIR / job.result["filename"]
+    if not output_path.is_file():
+        raise HTTPException(status_code=410, detail="Файл уже удалён, сконвертируйте его снова")
+
+    output_info = await probe(str(output_path))
+    handoff = await asyncio.to_thread(
+        handoff_store.publish,
+        str(output_path),
+        job.filename,
+        job.result["bitrate"],
+        output_info.duration if output_info else 0
+    )
+    return {
+        "code": handoff.display_code,
+        "expires_at": handoff.expires_at,
+        "ttl_minutes": config.web_converter_handoff_ttl_minutes,
+    }
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, username: str = Depends(verify_session)):
+    """Ход задачи конвертации (Server-Sent Events) до её завершения"""
+    if job_queue.get(job_id, username) is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+
+    async def events():
+        async for state in job_queue.watch(job_id, username):
+            if state is None:
+                # Комментарий SSE - чтобы прокси не закрыл простаивающее соединение
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(state, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.api_route("/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request, username: str = Depends(verify_session)):
+    """Скачивание сконвертированного файла (с докачкой по Range и проверкой по ETag)"""
     file_path = CONVERTED_DIR / filename
 
-    if not file_path.exists():
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="Файл не найден")
+    retention.touch(file_path)
 
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type="audio/mpeg"
+    return await file_download(
+        request,
+        file_path,
+        filename,
+        DOWNLOAD_MEDIA_TYPES.get(file_path.suffix.lower(), "audio/mpeg")
     )
 
 
 @app.get("/health")
 async def health_check():
-    """Проверка здоровья сервиса"""
-    return {"status": "ok", "service": "audio-converter"}
+    """Проверка здоровья сервиса, занятое место и статистика очистки"""
+    return {
+        "status": "ok",
+        "service": "audio-converter",
+        "storage": await asyncio.to_thread(retention.stats),
+        "conversion_cache": await asyncio.to_thread(conversion_cache.stats),
+        "jobs": {"queued": job_queue.queued, "running": job_queue.running},
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+"""
+Срок хранения и квота результатов веб-конвертера
+
+Результаты (CONVERTED_DIR/*.mp3, *.zip) хранятся не дольше ttl секунд с
+последнего использования, а их суммарный размер ограничен квотой: при
+превышении удаляются файлы, которые дольше всех не скачивали (LRU).
+Использование - время последнего скачивания (atime ставится явно при
+скачивании, mtime не меняется) или время создания. Свежие результаты
+(моложе MIN_RESULT_AGE) квота не трогает - их ещё не успели скачать.
+
+Временные файлы, оставшиеся после падения процесса посреди конвертации
+(UPLOAD_DIR/temp_*, batch_*, CONVERTED_DIR/.stream_*), удаляются при запуске
+и затем периодически, если их не меняли дольше TEMP_GRACE_SECONDS и они не
+исходники незавершённых задач. Кеш конвертаций (.cache) ограничен своей
+квотой и здесь не учитывается.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Результаты, которые квота не удаляет
+MIN_RESULT_AGE = 3600
+# Временный файл без изменений дольше этого считается брошенным
+TEMP_GRACE_SECONDS = 3600
+
+RESULT_SUFFIXES = {".mp3", ".zip"}
+
+
+@dataclass
+class CleanupTotals:
+    """Сколько удалено с запуска процесса"""
+    expired: int = 0
+    evicted: int = 0
+    orphans: int = 0
+    freed_bytes: int = 0
+    last_run: Optional[float] = None
+
+
+@dataclass
+class _Result:
+    path: Path
+    size: int
+    created: float
+    last_used: float
+
+
+class RetentionManager:
+    """Очистка результатов по сроку и квоте и удаление брошенных временных файлов"""
+
+    def __init__(
+        self,
+        converted_dir: Path,
+        upload_dir: Path,
+        ttl: int,
+        max_bytes: int,
+        active_sources: Callable[[], Set[str]]
+    ) -> None:
+        self.converted_dir = converted_dir
+        self.upload_dir = upload_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # Исходники незавершённых задач (их не трогаем)
+        self.active_sources = active_sources
+        self.totals = CleanupTotals()
+
+    def touch(self, path: Path) -> None:
+        """Отметка использования результата (скачивание) - atime, mtime не меняется"""
+        try:
+            stat = path.stat()
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError as e:
+            logger.warning(f"Не удалось отметить использование {path}: {e}")
+
+    def _results(self) -> List[_Result]:
+        results = []
+        for path in self.converted_dir.iterdir():
+            if path.name.startswith(".") or path.suffix.lower() not in RESULT_SUFFIXES:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if not path.is_file():
+                continue
+            results.append(_Result(path, stat.st_size, stat.st_mtime, max(stat.st_atime, stat.st_mtime)))
+        return results
+
+    def _delete(self, path: Path) -> int:
+        """Удаление файла или директории, возвращает освобождённые байты"""
+        try:
+            if path.is_dir():
+                size = sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                size = path.stat().st_size
+                path.unlink()
+        except FileNotFoundError:
+            return 0
+        self.totals.freed_bytes += size
+        return size
+
+    def enforce(self) -> None:
+        """Удаление просроченных результатов, затем давно не использованных сверх квоты"""
+        now = time.time()
+        results = []
+        for result in self._results():
+            if self.ttl > 0 and now - result.last_used > self.ttl:
+                self._delete(result.path)
+                self.totals.expired += 1
+                logger.info(f"Удалён результат с истёкшим сроком хранения: {result.path.name}")
+            else:
+                results.append(result)
+
+        if self.max_bytes <= 0:
+            return
+        total = sum(result.size for result in results)
+        for result in sorted(results, key=lambda result: result.last_used):
+            if total <= self.max_bytes:
+                break
+            if now - result.created < MIN_RESULT_AGE:
+                continue
+            self._delete(result.path)
+            total -= result.size
+            self.totals.evicted += 1
+            logger.info(f"Удалён результат сверх квоты: {result.path.name} ({result.size} байт)")
+
+    def sweep_orphans(self) -> int:
+        """Удаление брошенных временных файлов конвертаций"""
+        active = {str(Path(source).resolve()) for source in self.active_sources()}
+        deadline = time.time() - TEMP_GRACE_SECONDS
+        candidates = [
+            *self.upload_dir.glob("temp_*"),
+            *self.upload_dir.glob("batch_*"),
+            *self.converted_dir.glob(".stream_*"),
+        ]
+
+        removed = 0
+        for path in candidates:
+            try:
+                if path.stat().st_mtime > deadline or str(path.resolve()) in active:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._delete(path)
+            removed += 1
+            logger.info(f"Удалён брошенный временный файл: {path}")
+
+        self.totals.orphans += removed
+        return removed
+
+    def run_once(self) -> None:
+        self.sweep_orphans()
+        self.enforce()
+        self.totals.last_run = time.time()
+
+    async def run_periodically(self, interval: int) -> None:
+        """Очистка раз в interval секунд (запускается задачей при старте сервиса)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Ошибка очистки результатов конвертации: {e}")
+
+    def stats(self) -> dict:
+        results = self._results()
+        disk = shutil.disk_usage(self.converted_dir)
+        return {
+            "results": len(results),
+            "results_size": sum(result.size for result in results),
+            "quota": self.max_bytes,
+            "ttl": self.ttl,
+            "disk_free": disk.free,
+            "disk_total": disk.total,
+            **asdict(self.totals),
+        }
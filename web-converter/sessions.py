@@ -0,0 +1,102 @@
+"""
+Сессии веб-конвертера без хранения на сервере
+
+Токен сессии - "<данные>.<подпись>": данные (логин и срок действия) в
+base64url, подпись - HMAC-SHA256 данных секретным ключом. Проверка не требует
+общего состояния, поэтому токен принимает любой процесс сервиса (uvicorn
+--workers) и он переживает перезапуск.
+
+Ключ - WEB_CONVERTER_SECRET_KEY; если он не задан, при первом запуске
+создаётся случайный ключ в файле (общий для всех процессов и перезапусков).
+Из пароля ключ не выводится: иначе по одной перехваченной cookie пароль можно
+было бы подбирать офлайн. Логин и пароль подмешиваются к ключу, так что смена
+пароля завершает все сессии. Отозвать отдельный токен нельзя: выход удаляет
+cookie, а токен истекает сам.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Срок действия сессии (совпадает со сроком cookie)
+SESSION_TTL = 7 * 24 * 3600
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _load_or_create_key(path: Path) -> bytes:
+    """
+    Случайный ключ из файла; файла нет - создаётся
+
+    Процессы uvicorn стартуют одновременно: ключ пишется во временный файл и
+    публикуется жёсткой ссылкой (как O_EXCL - существующий файл не заменяется),
+    поэтому все процессы читают один и тот же полностью записанный ключ.
+    """
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+        os.link(tmp_path, path)
+        logger.info(f"Создан ключ подписи сессий: {path}")
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    return path.read_bytes()
+
+
+class SessionSigner:
+    """Выдача и проверка подписанных токенов сессии"""
+
+    def __init__(self, secret: bytes, ttl: int = SESSION_TTL) -> None:
+        self._secret = secret
+        self.ttl = ttl
+
+    @classmethod
+    def from_credentials(cls, secret_key: str, key_path: Path, login: str, password: str) -> "SessionSigner":
+        """Подпись ключом WEB_CONVERTER_SECRET_KEY или ключом из файла key_path"""
+        secret = secret_key.encode() if secret_key else _load_or_create_key(key_path)
+        return cls(hmac.new(secret, f"web-converter-session:{login}:{password}".encode(), hashlib.sha256).digest())
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, username: str) -> str:
+        """Токен сессии пользователя на ttl секунд"""
+        payload = _b64encode(f"{username}:{int(time.time()) + self.ttl}".encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> Optional[str]:
+        """Логин из токена (None - подпись неверна или срок истёк)"""
+        if not token.isascii():
+            return None
+        payload, _, signature = token.partition(".")
+        if not payload or not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            username, _, expires = _b64decode(payload).decode().rpartition(":")
+            if int(expires) < time.time():
+                return None
+        except ValueError:
+            return None
+        return username or None
@@ -0,0 +1,363 @@
+const uploadArea = document.getElementById('uploadArea');
+const fileInput = document.getElementById('fileInput');
+const convertBtn = document.getElementById('convertBtn');
+const progressContainer = document.getElementById('progressContainer');
+const progressFill = document.getElementById('progressFill');
+const statusText = document.getElementById('statusText');
+const fileInfo = document.getElementById('fileInfo');
+const downloadSection = document.getElementById('downloadSection');
+const downloadBtn = document.getElementById('downloadBtn');
+const handoffBtn = document.getElementById('handoffBtn');
+const handoffCode = document.getElementById('handoffCode');
+const errorMessage = document.getElementById('errorMessage');
+
+let selectedFiles = [];
+// Задача последней конвертации (для передачи результата в бота)
+let resultJobId = null;
+
+// Drag & Drop
+uploadArea.addEventListener('click', () => fileInput.click());
+uploadArea.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    uploadArea.classList.add('dragover');
+});
+uploadArea.addEventListener('dragleave', () => {
+    uploadArea.classList.remove('dragover');
+});
+uploadArea.addEventListener('drop', (e) => {
+    e.preventDefault();
+    uploadArea.classList.remove('dragover');
+    const files = e.dataTransfer.files;
+    if (files.length > 0) {
+        handleFileSelect(files);
+    }
+});
+
+fileInput.addEventListener('change', (e) => {
+    if (e.target.files.length > 0) {
+        handleFileSelect(e.target.files);
+    }
+});
+
+function handleFileSelect(files) {
+    selectedFiles = Array.from(files);
+    convertBtn.disabled = false;
+    const totalSize = selectedFiles.reduce((sum, file) => sum + file.size, 0);
+    uploadArea.querySelector('.upload-text').textContent = selectedFiles.length === 1
+        ? `Выбран: ${selectedFiles[0].name}`
+        : `Выбрано файлов: ${selectedFiles.length}`;
+    uploadArea.querySelector('.upload-hint').textContent = `Размер: ${formatFileSize(totalSize)}`;
+}
+
+// Несколько файлов или архив - пакетная конвертация (результат - ZIP)
+function isBatch(files) {
+    return files.length > 1 || files[0].name.toLowerCase().endsWith('.zip');
+}
+
+// Загрузка по частям: несколько частей параллельно, повтор при обрыве,
+// id загрузки хранится в localStorage - после перезагрузки страницы
+// тот же файл докачивается с места обрыва
+const PARALLEL_CHUNKS = 4;
+const CHUNK_RETRIES = 5;
+
+function uploadKey(file) {
+    return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function apiRequest(url, options) {
+    const response = await fetch(url, options);
+    if (response.status === 401) {
+        window.location.href = '/login';
+        throw new Error('Требуется авторизация');
+    }
+    if (!response.ok) {
+        let detail = `HTTP ${response.status}`;
+        try {
+            detail = (await response.json()).detail || detail;
+        } catch (e) {}
+        const error = new Error(detail);
+        error.status = response.status;
+        throw error;
+    }
+    return response.json();
+}
+
+async function startUpload(file, bitrate, stream) {
+    const saved = localStorage.getItem(uploadKey(file));
+    if (saved) {
+        try {
+            return await apiRequest(`/upload/${saved}`);
+        } catch (e) {
+            if (e.status !== 404) throw e;
+            localStorage.removeItem(uploadKey(file));
+        }
+    }
+    const form = new FormData();
+    form.append('filename', file.name);
+    form.append('size', file.size);
+    form.append('bitrate', bitrate);
+    form.append('stream', stream);
+    const upload = await apiRequest('/upload/init', { method: 'POST', body: form });
+    localStorage.setItem(uploadKey(file), upload.upload_id);
+    return upload;
+}
+
+async function sendChunk(upload, file, index) {
+    const offset = index * upload.chunk_size;
+    const blob = file.slice(offset, Math.min(offset + upload.chunk_size, file.size));
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await apiRequest(`/upload/${upload.upload_id}?offset=${offset}`, {
+                method: 'PUT',
+                body: blob
+            });
+        } catch (e) {
+            // Ошибки протокола не лечатся повтором
+            if (attempt >= CHUNK_RETRIES || (e.status && e.status < 500)) throw e;
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+    }
+}
+
+async function uploadFile(file, bitrate, stream, onProgress) {
+    const upload = await startUpload(file, bitrate, stream);
+    const chunkCount = Math.max(1, Math.ceil(file.size / upload.chunk_size));
+    const received = new Set(upload.received);
+    const pending = [];
+    for (let i = 0; i < chunkCount; i++) {
+        if (!received.has(i)) pending.push(i);
+    }
+
+    let uploadedBytes = upload.received_bytes;
+    onProgress(uploadedBytes);
+
+    async function worker() {
+        while (pending.length > 0) {
+            const index = pending.shift();
+            await sendChunk(upload, file, index);
+            uploadedBytes += Math.min(upload.chunk_size, file.size - index * upload.chunk_size);
+            onProgress(uploadedBytes);
+        }
+    }
+
+    await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+    return upload;
+}
+
+// Ход задачи конвертации (Server-Sent Events); при обрыве
+// EventSource переподключается сам, задача на сервере продолжается
+function watchJob(jobId, onProgress) {
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/jobs/${jobId}/events`);
+        events.onmessage = (event) => {
+            const state = JSON.parse(event.data);
+            if (state.status === 'done') {
+                events.close();
+                resolve(state.result);
+            } else if (state.status === 'failed') {
+                events.close();
+                reject(new Error(state.error || 'Ошибка конвертации'));
+            } else {
+                onProgress(state);
+            }
+        };
+        events.onerror = () => {
+            if (events.readyState === EventSource.CLOSED) {
+                reject(new Error('Соединение с сервером потеряно'));
+            }
+        };
+    });
+}
+
+convertBtn.addEventListener('click', async () => {
+    if (selectedFiles.length === 0) return;
+
+    const files = selectedFiles;
+    const batch = isBatch(files);
+    const bitrate = document.querySelector('input[name="bitrate"]:checked').value;
+    // Конвертация во время загрузки - только для одного файла
+    const stream = !batch && document.getElementById('streamCheckbox').checked;
+
+    convertBtn.disabled = true;
+    progressContainer.style.display = 'block';
+    downloadSection.style.display = 'none';
+    handoffCode.style.display = 'none';
+    errorMessage.style.display = 'none';
+    fileInfo.style.display = 'none';
+
+    try {
+        updateProgress(0, 'Загрузка на сервер...');
+
+        // Загрузка - первые 70% шкалы (файлы по очереди, части каждого - параллельно)
+        const totalSize = files.reduce((sum, file) => sum + file.size, 0);
+        const uploads = [];
+        let doneBytes = 0;
+        for (const [index, file] of files.entries()) {
+            const upload = await uploadFile(file, bitrate, stream, (uploadedBytes) => {
+                const sent = doneBytes + uploadedBytes;
+                const percent = Math.floor(sent / totalSize * 70);
+                const counter = files.length > 1 ? ` (файл ${index + 1} из ${files.length})` : '';
+                updateProgress(percent, `Загрузка${counter}: ${formatFileSize(sent)} из ${formatFileSize(totalSize)}`);
+            });
+            uploads.push(upload);
+            doneBytes += file.size;
+        }
+
+        // Файлы в очереди конвертации - ход задачи приходит с сервера
+        updateProgress(70, 'Постановка в очередь...');
+        const form = new FormData();
+        form.append('bitrate', bitrate);
+        let job;
+        if (batch) {
+            uploads.forEach(upload => form.append('upload_ids', upload.upload_id));
+            job = await apiRequest('/batch', { method: 'POST', body: form });
+        } else {
+            job = await apiRequest(`/upload/${uploads[0].upload_id}/finalize`, {
+                method: 'POST',
+                body: form
+            });
+        }
+        files.forEach(file => localStorage.removeItem(uploadKey(file)));
+
+        // Конвертация - оставшиеся 30% шкалы (результат из кеша готов сразу)
+        const result = job.status === 'done' ? job.result : await watchJob(job.job_id, (state) => {
+            updateProgress(70 + Math.floor(state.progress * 0.3), `${state.stage}...`);
+        });
+
+        updateProgress(100, 'Готово!');
+
+        // Показываем информацию о результате
+        if (result.batch) {
+            showBatchInfo(result);
+        } else {
+            showFileInfo(result);
+        }
+
+        // Показываем кнопку скачивания
+        downloadBtn.href = `/download/${result.filename}`;
+        downloadBtn.textContent = result.batch ? '📥 Скачать ZIP' : '📥 Скачать MP3';
+        // Один файл можно передать в бота кодом - без скачивания на телефон
+        resultJobId = result.batch ? null : job.job_id;
+        handoffBtn.style.display = resultJobId ? 'inline-block' : 'none';
+        downloadSection.style.display = 'block';
+
+    } catch (error) {
+        errorMessage.textContent = `Ошибка: ${error.message}. Нажмите "Конвертировать" ещё раз - загрузка продолжится с места обрыва`;
+        errorMessage.style.display = 'block';
+        progressContainer.style.display = 'none';
+    } finally {
+        convertBtn.disabled = false;
+    }
+});
+
+handoffBtn.addEventListener('click', async () => {
+    if (!resultJobId) return;
+    handoffBtn.disabled = true;
+    errorMessage.style.display = 'none';
+    try {
+        const handoff = await apiRequest(`/jobs/${resultJobId}/handoff`, { method: 'POST' });
+        handoffCode.innerHTML = `
+            Отправьте боту этот код вместо аудиофайла при добавлении или замене урока:
+            <strong>${handoff.code}</strong>
+            Код одноразовый, действует ${handoff.ttl_minutes} мин.
+        `;
+        handoffCode.style.display = 'block';
+    } catch (error) {
+        errorMessage.textContent = `Ошибка: ${error.message}`;
+        errorMessage.style.display = 'block';
+    } finally {
+        handoffBtn.disabled = false;
+    }
+});
+
+function updateProgress(percent, text) {
+    progressFill.style.width = percent + '%';
+    progressFill.textContent = percent + '%';
+    statusText.textContent = text;
+}
+
+function showFileInfo(data) {
+    fileInfo.innerHTML = `
+        <div class="file-info-item">
+            <span>Длительность:</span>
+            <strong>${data.duration}</strong>
+        </div>
+        <div class="file-info-item">
+            <span>Битрейт MP3:</span>
+            <strong>${data.bitrate} kbps</strong>
+        </div>
+        <div class="file-info-item">
+            <span>Размер MP3:</span>
+            <strong>${data.mp3_size}</strong>
+        </div>
+        <div class="file-info-item">
+            <span>Исходный размер:</span>
+            <strong>${data.original_size}</strong>
+        </div>
+        ${data.cached ? `
+        <div class="file-info-item">
+            <span>Конвертация:</span>
+            <strong>готовый файл из кеша</strong>
+        </div>` : ''}
+    `;
+    fileInfo.style.display = 'block';
+}
+
+function escapeHtml(text) {
+    const element = document.createElement('span');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
+function showBatchInfo(data) {
+    const rows = data.items.map(item => `
+        <div class="file-info-item">
+            <span>${item.number}. ${escapeHtml(item.source)}</span>
+            <strong>${item.error ? '❌ ' + escapeHtml(item.error) : `${formatDuration(item.duration)}, ${item.bitrate} kbps`}</strong>
+        </div>
+    `).join('');
+    fileInfo.innerHTML = `
+        <div class="file-info-item">
+            <span>Файлов:</span>
+            <strong>${data.files - data.failed} из ${data.files}</strong>
+        </div>
+        <div class="file-info-item">
+            <span>Размер архива:</span>
+            <strong>${data.archive_size}</strong>
+        </div>
+        ${rows}
+    `;
+    fileInfo.style.display = 'block';
+}
+
+function formatDuration(seconds) {
+    if (!seconds) return '?';
+    const h = Math.floor(seconds / 3600);
+    const m = Math.floor(seconds % 3600 / 60);
+    const s = String(seconds % 60).padStart(2, '0');
+    return h ? `${h}:${String(m).padStart(2, '0')}:${s}` : `${m}:${s}`;
+}
+
+function formatFileSize(bytes) {
+    if (bytes < 1024) return bytes + ' Б';
+    if (bytes < 1024 * 1024) return (bytes / 1024).toFixed(1) + ' КБ';
+    if (bytes < 1024 * 1024 * 1024) return (bytes / (1024 * 1024)).toFixed(1) + ' МБ';
+    return (bytes / (1024 * 1024 * 1024)).toFixed(1) + ' ГБ';
+}
+
+// Регистрация Service Worker для PWA
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js')
+            .then(registration => console.log('PWA: Service Worker зарегистрирован'))
+            .catch(err => console.log('PWA: Ошибка регистрации Service Worker', err));
+    });
+}
+
+// Обработка события установки PWA
+let deferredPrompt;
+window.addEventListener('beforeinstallprompt', (e) => {
+    e.preventDefault();
+    deferredPrompt = e;
+    console.log('PWA: Готово к установке на устройство');
+});
@@ -0,0 +1,30 @@
+const form = document.getElementById('loginForm');
+const errorMessage = document.getElementById('errorMessage');
+
+form.addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const formData = new FormData(form);
+
+    try {
+        const response = await fetch('/login', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (response.ok) {
+            window.location.href = '/';
+        } else {
+            const data = await response.json();
+            errorMessage.textContent = data.detail || 'Неверный логин или пароль';
+            errorMessage.classList.add('show');
+
+            setTimeout(() => {
+                errorMessage.classList.remove('show');
+            }, 3000);
+        }
+    } catch (error) {
+        errorMessage.textContent = 'Ошибка подключения к серверу';
+        errorMessage.classList.add('show');
+    }
+});
@@ -0,0 +1,144 @@
+"""
+Конвертация во время загрузки
+
+Пока браузер отправляет части файла, уже принятое подряд начало файла
+подаётся в stdin FFmpeg (convert_stream_to_mp3). К моменту, когда приходит
+последняя часть, большая часть записи уже закодирована, и MP3 готов через
+несколько секунд после окончания загрузки.
+
+Годятся только форматы, которые читаются последовательно и длительность
+которых видна по началу файла (битрейт выбирается до кодирования). Для
+остальных (M4A/MP4, OGG), а также при любой ошибке потоковой конвертации
+файл конвертируется обычным способом после загрузки.
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+from bot.utils.audio_converter import (
+    MAX_OUTPUT_SIZE_BYTES,
+    calculate_optimal_bitrate,
+    choose_bitrate,
+    convert_stream_to_mp3
+)
+from bot.utils.media_probe import probe
+
+logger = logging.getLogger(__name__)
+
+# Форматы, которые FFmpeg читает из канала без перемотки
+STREAMABLE_EXTENSIONS = {".wav", ".mp3", ".flac", ".aac"}
+
+# Сколько байт начала файла нужно для определения формата и длительности
+PROBE_BYTES = 1024 * 1024
+# Кусок при подаче в FFmpeg
+FEED_CHUNK_SIZE = 1024 * 1024
+# Загрузка стоит дольше - потоковая конвертация прекращается
+IDLE_TIMEOUT = 600
+
+
+def is_streamable(filename: str) -> bool:
+    return Path(filename).suffix.lower() in STREAMABLE_EXTENSIONS
+
+
+class UploadTranscode:
+    """Потоковая конвертация одной загрузки"""
+
+    def __init__(self, source_path: Path, size: int, output_path: Path, bitrate: str) -> None:
+        # Файл открывается сразу: при финализации загрузки его переносят
+        self._source = open(source_path, "rb")
+        self.source_path = source_path
+        self.size = size
+        self.output_path = output_path
+        self.bitrate = bitrate
+        self.bitrate_kbps: Optional[int] = None
+        self._available = 0
+        self._data = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def feed_until(self, available: int) -> None:
+        """Принято подряд available байт от начала файла"""
+        if available > self._available:
+            self._available = available
+            self._data.set()
+
+    async def _wait_for(self, position: int) -> None:
+        while self._available < position:
+            self._data.clear()
+            await asyncio.wait_for(self._data.wait(), timeout=IDLE_TIMEOUT)
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        fed = 0
+        while fed < self.size:
+            await self._wait_for(fed + 1)
+            length = min(FEED_CHUNK_SIZE, self._available - fed)
+            data = await asyncio.to_thread(os.pread, self._source.fileno(), length, fed)
+            if not data:
+                raise OSError("Файл загрузки короче ожидаемого")
+            fed += len(data)
+            yield data
+
+    async def _choose_bitrate(self) -> Optional[Tuple[int, int]]:
+        """Битрейт по длительности, видимой в начале файла (заголовок WAV/FLAC, битрейт MP3)"""
+        await self._wait_for(min(PROBE_BYTES, self.size))
+        info = await probe(str(self.source_path))
+        if info is None or not info.duration:
+            return None
+
+        if self.bitrate == "auto":
+            preferred_bitrate = await calculate_optimal_bitrate(info.duration)
+        else:
+            preferred_bitrate = int(self.bitrate)
+        return choose_bitrate(info.duration, preferred_bitrate, 44100)
+
+    async def _run(self) -> Tuple[bool, Optional[str]]:
+        try:
+            choice = await self._choose_bitrate()
+            if choice is None:
+                return False, "Длительность не видна по началу файла"
+            bitrate_kbps, sample_rate = choice
+
+            success, error = await convert_stream_to_mp3(
+                self._chunks(),
+                str(self.output_path),
+                bitrate=f"{bitrate_kbps}k",
+                sample_rate=sample_rate
+            )
+            if success and os.path.getsize(self.output_path) > MAX_OUTPUT_SIZE_BYTES:
+                success, error = False, "Результат больше лимита"
+            if success:
+                self.bitrate_kbps = bitrate_kbps
+            return success, error
+        except asyncio.TimeoutError:
+            return False, "Загрузка остановилась"
+        except Exception as e:
+            return False, str(e)
+        finally:
+            self._source.close()
+
+    async def result(self) -> Tuple[bool, Optional[str]]:
+        """
+        Дождаться конвертации (после приёма всего файла)
+
+        При неудаче частичный результат удаляется - вызывающий код
+        конвертирует файл обычным способом.
+        """
+        success, error = await self._task
+        if not success:
+            logger.info(f"Потоковая конвертация не удалась ({error}), конвертируем файл целиком")
+            await self.discard()
+        return success, error
+
+    async def discard(self) -> None:
+        """Отмена конвертации и удаление результата"""
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            self.output_path.unlink()
+        except FileNotFoundError:
+            pass